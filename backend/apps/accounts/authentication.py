@@ -0,0 +1,56 @@
+"""
+کلاس احراز هویت JWT پروژه.
+
+همان JWTAuthentication کتابخانهٔ simplejwt است، با دو تفاوت:
+- کاربر همراه پروفایلش (select_related) خوانده می‌شود تا UserSerializer کوئری جداگانه نزند.
+- توکن بررسی‌شده و snapshot کاربر/پروفایل در token_cache نگه داشته می‌شوند؛ درخواست‌های بعدی با همان توکن
+  بدون decode دوباره و بدون هیچ کوئری‌ای احراز هویت می‌شوند (ابطال با تغییر کاربر، token_cache.py).
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .token_cache import token_cache
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = token_cache.get(raw_token, self.user_model)
+        if cached is not None:
+            return cached
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        token_cache.put(raw_token, validated_token, user)
+        return user, validated_token
+
+    def get_user(self, validated_token):
+        """مثل simplejwt (همان بررسی‌های فعال بودن و ابطال توکن)، با یک کوئری برای کاربر + پروفایل."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from exc
+
+        try:
+            user = self.user_model.objects.select_related('profile').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as exc:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
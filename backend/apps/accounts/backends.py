@@ -2,35 +2,51 @@
 بک‌اند احراز هویت سفارشی — اجازهٔ لاگین با ایمیل به‌جای فقط username.
 
 پیش‌فرض Django: فقط با username می‌شود لاگین کرد.
-با این بک‌اند: اگر کاربر مقدار واردشده را به عنوان username نتوان پیدا کرد، با email جستجو می‌کنیم.
+با این بک‌اند: اگر مقدار واردشده @ داشته باشد، با ایمیل (بدون حساسیت به حروف بزرگ/کوچک) یا username پیدا می‌شود.
+
+مسیر سریع لاگین (ساعت شلوغ صبح که همهٔ باجه‌ها همزمان وارد می‌شوند):
+- فقط یک کوئری: ایمیل و username با هم (OR) و روی ایندکس LOWER(email) (migration 0003 accounts).
+- فقط یک بار هش رمز، چه موفق چه ناموفق؛ اگر کاربر پیدا نشد هم یک بار هش می‌کنیم تا زمان پاسخ
+  نشان ندهد کاربر وجود دارد یا نه (مثل ModelBackend).
 """
-from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+from django.db.models.functions import Lower
 
 
 class EmailOrUsernameBackend(ModelBackend):
     """
-    اگر مقدار واردشده شبیه ایمیل باشد (حاوی @)، اول با email جستجو می‌کنیم؛
-    وگرنه با username. بعد رمز را چک می‌کنیم.
+    اگر مقدار واردشده شبیه ایمیل باشد (حاوی @)، کاربر با آن ایمیل اولویت دارد و بعد username؛
+    وگرنه فقط username. بعد رمز را چک می‌کنیم.
     """
 
-    def authenticate(self, request, username=None, password=None, **kwargs):
+    def find_user(self, username):
+        """کاربر (همراه پروفایل) یا None — با یک کوئری."""
         User = get_user_model()
+        # پروفایل همراه کاربر خوانده می‌شود (پاسخ لاگین UserSerializer را صدا می‌زند)
+        users = User.objects.select_related('profile')
+        if '@' not in username:
+            return users.filter(username=username).first()
+        email = username.lower()
+        candidates = (
+            users.annotate(email_lower=Lower('email'))
+            .filter(Q(email_lower=email) | Q(username=username))
+            .order_by('pk')[:5]
+        )
+        ranked = sorted(candidates, key=lambda user: user.email_lower != email)
+        return ranked[0] if ranked else None
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None or password is None:
             return None
 
-        user = None
-        if '@' in username:
-            try:
-                user = User.objects.get(email=username)
-            except User.DoesNotExist:
-                pass
+        user = self.find_user(username)
         if user is None:
-            try:
-                user = User.objects.get(username=username)
-            except User.DoesNotExist:
-                return None
-
+            # همان هزینهٔ هش برای کاربر ناموجود
+            get_user_model()().set_password(password)
+            return None
+        # check_password اگر هزینهٔ هشر عوض شده باشد رمز را دوباره هش و ذخیره می‌کند
         if user.check_password(password):
             return user
         return None
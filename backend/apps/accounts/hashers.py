@@ -0,0 +1,17 @@
+"""
+هشر رمز با هزینهٔ قابل تنظیم.
+
+همان PBKDF2-SHA256 خود Django (همان نام الگوریتم pbkdf2_sha256، پس هش‌های موجود معتبر می‌مانند)،
+فقط تعداد تکرار از PASSWORD_PBKDF2_ITERATIONS در settings خوانده می‌شود (۰ = پیش‌فرض Django).
+
+اگر عدد عوض شود، رمز هر کاربر در اولین لاگین موفق خودبه‌خود با هزینهٔ جدید دوباره هش و ذخیره می‌شود
+(must_update + User.check_password خود Django). کم کردن عدد لاگین را سریع‌تر و حدس رمز را ارزان‌تر می‌کند.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', 0) or PBKDF2PasswordHasher.iterations
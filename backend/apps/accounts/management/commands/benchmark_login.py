@@ -0,0 +1,73 @@
+"""
+دستور مدیریتی: اندازه‌گیری زمان لاگین (POST /api/auth/login/) برای مسیرهای موفق و ناموفق.
+استفاده: python manage.py benchmark_login --rounds 20 [--iterations 600000]
+
+یک کاربر موقت می‌سازد و همه چیز داخل یک تراکنش است که در پایان rollback می‌شود (دیتابیس دست نمی‌خورد).
+برای هر مسیر میانه و p95 زمان و تعداد کوئری‌ها چاپ می‌شود.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.views import LoginView
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark login latency for success and failure paths (changes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument(
+            '--iterations', type=int, default=None,
+            help='PASSWORD_PBKDF2_ITERATIONS for this run (default: current setting).',
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options['iterations'] is not None:
+            overrides['PASSWORD_PBKDF2_ITERATIONS'] = options['iterations']
+        with override_settings(**overrides):
+            try:
+                with transaction.atomic():
+                    self._run(options['rounds'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _run(self, rounds):
+        User = get_user_model()
+        username, email, password = 'bench-login-user', 'Bench.Login@example.com', 'bench-Passw0rd!'
+        User.objects.create_user(username, email, password)
+        cases = [
+            ('success (username)', username, password),
+            ('success (email, other case)', email.upper(), password),
+            ('wrong password', username, 'wrong-password'),
+            ('unknown user', 'nobody@example.com', password),
+        ]
+        factory = APIRequestFactory()
+        view = LoginView.as_view()
+        for label, login, secret in cases:
+            timings, queries, codes = [], 0, set()
+            for _ in range(rounds):
+                request = factory.post('/api/auth/login/', {'username': login, 'password': secret}, format='json')
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = view(request)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, len(captured))
+                codes.add(response.status_code)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'{label:<30} status={",".join(map(str, sorted(codes)))}  '
+                f'median={statistics.median(timings):7.1f} ms  p95={p95:7.1f} ms  queries={queries}'
+            )
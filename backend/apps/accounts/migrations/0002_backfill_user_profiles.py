@@ -0,0 +1,41 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:10
+
+from django.conf import settings
+from django.db import migrations
+
+
+BATCH_SIZE = 2000
+
+
+def create_missing_profiles(apps, schema_editor):
+    """کاربرانی که هنوز پروفایل ندارند (قبلاً پروفایل هنگام خواندن ساخته می‌شد) یک پروفایل پیش‌فرض می‌گیرند."""
+    app_label, model_name = settings.AUTH_USER_MODEL.split('.')
+    User = apps.get_model(app_label, model_name)
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    db = schema_editor.connection.alias
+    missing = (
+        User.objects.using(db)
+        .filter(profile__isnull=True)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for user_id in missing:
+        batch.append(UserProfile(user_id=user_id))
+        if len(batch) >= BATCH_SIZE:
+            UserProfile.objects.using(db).bulk_create(batch)
+            batch = []
+    UserProfile.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:40
+
+from django.conf import settings
+from django.db import migrations
+
+
+# ایندکس عبارتی روی جدول کاربر خود Django (مدلش مال ما نیست، پس با SQL ساخته می‌شود)؛
+# همان عبارت LOWER(email) که EmailOrUsernameBackend با آن جستجو می‌کند. SQLite و PostgreSQL.
+INDEX_NAME = 'accounts_user_email_lower_idx'
+
+
+def _table_and_column(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    return (
+        schema_editor.quote_name(User._meta.db_table),
+        schema_editor.quote_name(User._meta.get_field('email').column),
+    )
+
+
+def create_index(apps, schema_editor):
+    table, column = _table_and_column(apps, schema_editor)
+    schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {table} (LOWER({column}))')
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_backfill_user_profiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -37,32 +37,38 @@ class UserSerializer(serializers.ModelSerializer):
             "updatedAt",
         ]
 
-    def get_profile(self, obj) -> UserProfile:
-        profile, _ = UserProfile.objects.get_or_create(user=obj)
-        return profile
+    def get_profile(self, obj):
+        """
+        پروفایل کاربر بدون کوئری اضافه: از select_related('profile') یا کش رابطه.
+        پروفایل هنگام ساخت کاربر ساخته می‌شود (signals.py)؛ اگر به هر دلیلی نبود None (و مقادیر پیش‌فرض).
+        """
+        try:
+            return obj.profile
+        except UserProfile.DoesNotExist:
+            return None
 
     def get_displayName(self, obj):
         profile = self.get_profile(obj)
-        return profile.display_name or obj.get_username()
+        return (profile and profile.display_name) or obj.get_username()
 
     def get_role(self, obj):
         if getattr(obj, 'is_staff', False):
             return 'admin'
         profile = self.get_profile(obj)
-        return profile.role
+        return profile.role if profile else 'user'
 
     def get_emailVerified(self, obj):
         profile = self.get_profile(obj)
-        return profile.email_verified
+        return profile.email_verified if profile else False
 
     def get_createdAt(self, obj):
         # ترجیحاً از created_at پروفایل استفاده می‌کنیم
         profile = self.get_profile(obj)
-        return profile.created_at.isoformat()
+        return (profile.created_at if profile else obj.date_joined).isoformat()
 
     def get_updatedAt(self, obj):
         profile = self.get_profile(obj)
-        return profile.updated_at.isoformat()
+        return (profile.updated_at if profile else obj.date_joined).isoformat()
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -88,13 +94,12 @@ class RegisterSerializer(serializers.Serializer):
             email=validated_data["email"],
             password=validated_data["password"],
         )
-        # پروفایل همراه با نقش و وضعیت ایمیل
-        UserProfile.objects.create(
-            user=user,
-            display_name=display_name,
-            role="user",
-            email_verified=True,  # فعلاً ایمیل را تأیید‌شده در نظر می‌گیریم
-        )
+        # پروفایل را سیگنال post_save ساخته است؛ فقط نام نمایشی و وضعیت ایمیل را پر می‌کنیم
+        profile = user.profile
+        profile.display_name = display_name
+        profile.role = "user"
+        profile.email_verified = True  # فعلاً ایمیل را تأیید‌شده در نظر می‌گیریم
+        profile.save(update_fields=["display_name", "role", "email_verified", "updated_at"])
         return user
 
 
@@ -105,10 +110,8 @@ class LoginSerializer(serializers.Serializer):
     def validate(self, attrs):
         username = attrs.get("username")
         password = attrs.get("password")
-        user = authenticate(username=username, password=password)
-        if not user:
-            # تلاش دوم: اگر username ایمیل بود و بک‌اند ایمیل را پشتیبانی نکند
-            user = authenticate(username=username, password=password)
+        # یک بار؛ EmailOrUsernameBackend هم ایمیل و هم username را پوشش می‌دهد
+        user = authenticate(self.context.get("request"), username=username, password=password)
         if not user:
             raise serializers.ValidationError("Invalid username or password")
         if not user.is_active:
@@ -122,8 +125,11 @@ class UpdateUserSerializer(serializers.Serializer):
     username = serializers.CharField(required=False, allow_blank=True)
 
     def update(self, instance, validated_data):
-        # instance = User
-        profile, _ = UserProfile.objects.get_or_create(user=instance)
+        # instance = User (پروفایل هنگام ساخت کاربر ساخته شده است)
+        try:
+            profile = instance.profile
+        except UserProfile.DoesNotExist:
+            profile = UserProfile(user=instance)
         if "username" in validated_data and validated_data["username"]:
             instance.username = validated_data["username"]
         if "displayName" in validated_data:
@@ -0,0 +1,40 @@
+"""
+سیگنال‌های اپ accounts.
+
+- هر کاربر از لحظهٔ ساخته شدن (ثبت‌نام، createsuperuser، پنل ادمین، shell) یک UserProfile دارد؛
+  پس خواندن کاربر هیچ‌وقت پروفایل نمی‌سازد و UserSerializer فقط با select_related('profile') کار می‌کند.
+- هر تغییر کاربر یا پروفایل، کش احراز هویت JWT آن کاربر را باطل می‌کند.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+from .token_cache import invalidate_user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    """پروفایل پیش‌فرض برای کاربر تازه (در همان تراکنش ساخت کاربر)."""
+    if created and not raw:
+        UserProfile.objects.create(user=instance)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created=False, **kwargs):
+    """تغییر یا حذف کاربر: snapshot کش‌شدهٔ احراز هویت او کنار گذاشته می‌شود (token_cache.py)."""
+    if not created:
+        _invalidate_after_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_profile_tokens(sender, instance, **kwargs):
+    _invalidate_after_commit(instance.user_id)
+
+
+def _invalidate_after_commit(user_id):
+    # همین الان (تا درخواست‌های بعدی همین پردازه تا commit هم مقدار قدیمی نبینند) و دوباره بعد از commit
+    # (تا پردازهٔ دیگری که در این فاصله از دیتابیس خوانده، snapshot قدیمی را نگه ندارد)
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
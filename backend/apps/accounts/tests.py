@@ -1,3 +1,173 @@
-from django.test import TestCase
+"""
+تست‌های تعداد کوئری APIهای کاربر — تا N+1 پروفایل (یک get_or_create برای هر فیلد هر کاربر) برنگردد —
+و ابطال کش احراز هویت بین پردازه‌ها.
+"""
+import multiprocessing
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import UserProfile
+from .token_cache import invalidate_user, token_cache
+
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UserQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", "admin@example.com", "secret123", is_staff=True)
+        for i in range(30):
+            User.objects.create_user(f"user{i}", f"user{i}@example.com", "secret123")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _auth(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_profile_created_with_user(self):
+        self.assertEqual(UserProfile.objects.count(), User.objects.count())
+
+    def test_user_list_query_count_is_constant(self):
+        self._auth(self.admin)
+        # یک کوئری برای کاربر درخواست‌دهنده (احراز هویت) + یک کوئری برای کل صفحه
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/auth/users/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 31)
+        self.assertEqual(response.json()[0]["role"], "admin")
+
+    def test_user_list_pagination(self):
+        self._auth(self.admin)
+        response = self.client.get("/api/auth/users/?limit=20")
+        first = response.json()
+        self.assertEqual(len(first), 20)
+        self.assertEqual(response["X-Next-Cursor"], str(first[-1]["id"]))
+        response = self.client.get(f"/api/auth/users/?limit=20&after={response['X-Next-Cursor']}")
+        self.assertEqual(len(response.json()), 11)
+        self.assertNotIn("X-Next-Cursor", response)
+        self.assertEqual(self.client.get("/api/auth/users/?limit=x").status_code, 400)
+
+    def test_me_query_count(self):
+        self._auth(User.objects.get(username="user3"))
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.json()["displayName"], "user3")
+        # همان توکن دوباره: کاربر و پروفایل از کش احراز هویت (token_cache)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.json()["username"], "user3")
+
+    def test_login_query_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                "/api/auth/login/", {"username": "user5", "password": "secret123"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["username"], "user5")
+
+    def test_register_fills_auto_created_profile(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            {"email": "new@example.com", "username": "newuser", "displayName": "New", "password": "secret123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["displayName"], "New")
+        self.assertTrue(response.json()["emailVerified"])
+        self.assertEqual(UserProfile.objects.filter(user__username="newuser").count(), 1)
+
+
+class LoginFastPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            cls.user = User.objects.create_user("counter1", "Counter1@Example.com", "secret123")
+
+    def _login(self, username, password):
+        return APIClient().post("/api/auth/login/", {"username": username, "password": password}, format="json")
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_email_login_is_case_insensitive(self):
+        self.assertEqual(self._login("counter1@EXAMPLE.com", "secret123").status_code, 200)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_failures_use_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self._login("counter1", "wrong").status_code, 400)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._login("nobody@example.com", "secret123").status_code, 400)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=2000)
+    def test_password_rehashed_when_cost_changes(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertEqual(self._login("counter1", "secret123").status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TokenCacheInvalidationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.admin = User.objects.create_user("boss", "boss@example.com", "secret123", is_staff=True)
+        self.kiosk = User.objects.create_user("kiosk", "kiosk@example.com", "secret123")
+        self.admin_client = APIClient()
+        self.admin_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.admin).access_token}")
+        self.kiosk_client = APIClient()
+        self.kiosk_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.kiosk).access_token}")
+
+    def test_update_in_user_detail_view_invalidates(self):
+        self.assertEqual(self.kiosk_client.get("/api/auth/me/").json()["displayName"], "kiosk")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.patch(f"/api/auth/users/{self.kiosk.pk}/", {"displayName": "Gate 3"}, format="json")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.kiosk_client.get("/api/auth/me/").json()["displayName"], "Gate 3")
+
+    def test_delete_in_user_detail_view_invalidates(self):
+        self.assertEqual(self.kiosk_client.get("/api/auth/me/").status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.delete(f"/api/auth/users/{self.kiosk.pk}/")
+        self.assertEqual(self.kiosk_client.get("/api/auth/me/").status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.kiosk_client.get("/api/auth/me/").status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kiosk.is_active = False
+            self.kiosk.save()
+        self.assertEqual(self.kiosk_client.get("/api/auth/me/").status_code, 401)
+
+    def test_cache_is_bounded(self):
+        with override_settings(JWT_AUTH_CACHE={"MAX_ENTRIES": 3}):
+            for _ in range(5):
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.kiosk).access_token}")
+                client.get("/api/auth/me/")
+        self.assertEqual(len(token_cache), 3)
+
+    @skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_invalidation_reaches_other_workers(self):
+        self.kiosk_client.get("/api/auth/me/")
+        with self.assertNumQueries(0):
+            self.kiosk_client.get("/api/auth/me/")
+        # worker دیگری (پردازهٔ جدا) کاربر را تغییر داده و سیگنالش نسخه را زیاد کرده است
+        worker = multiprocessing.get_context("fork").Process(target=invalidate_user, args=(self.kiosk.pk,))
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        with self.assertNumQueries(1):
+            self.kiosk_client.get("/api/auth/me/")
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_per_process_cache_disables_token_caching(self):
+        # کش نسخهٔ جدا برای هر پردازه ابطال را به workerهای دیگر نمی‌رساند → هر درخواست از دیتابیس
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.kiosk_client.get("/api/auth/me/").status_code, 200)
+        self.assertEqual(len(token_cache), 0)
@@ -0,0 +1,174 @@
+"""
+کش احراز هویت JWT — برای کیوسک‌ها و صفحه‌هایی که مدام poll می‌کنند.
+
+بدون کش، هر درخواست: decode و بررسی امضای توکن + یک کوئری کاربر (و پروفایل).
+با کش، بعد از اولین درخواست با یک توکن، خود توکن بررسی‌شده و یک snapshot سبک از کاربر و پروفایل
+(فقط ستون‌ها، نه شیء مشترک) در حافظهٔ پردازه نگه داشته می‌شود و درخواست‌های بعدی هیچ کوئری‌ای نمی‌زنند.
+
+- کلید: SHA-256 خود رشتهٔ توکن (همان بایت‌هایی که قبلاً امضایشان بررسی شده؛ jti داخل همان است).
+- ظرفیت محدود (MAX_ENTRIES، حذف LRU) و عمر محدود (TTL، و هیچ‌وقت بعد از exp خود توکن).
+- ابطال: هر کاربر یک شمارهٔ نسخه در کش مشترک (CACHES[JWT_AUTH_CACHE['ALIAS']]) دارد؛ save/delete کاربر
+  یا پروفایلش (از جمله PATCH/DELETE در UserDetailView) آن را زیاد می‌کند (signals.py) و ورودی‌های قبلی
+  آن کاربر در همهٔ پردازه‌ها در درخواست بعدی کنار گذاشته می‌شوند.
+  اگر آن کش بین پردازه‌ها مشترک نباشد (LocMem؛ config/caches.py) ابطال به workerهای دیگر نمی‌رسد، پس
+  کش توکن خاموش است و هر درخواست مثل simplejwt از دیتابیس احراز هویت می‌شود.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from config.caches import is_shared
+
+from .models import UserProfile
+
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+}
+
+# ستون‌هایی از پروفایل که در snapshot نگه داشته می‌شوند (همه؛ جدول کوچک است)
+_PROFILE_FIELDS = [field.attname for field in UserProfile._meta.concrete_fields]
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'JWT_AUTH_CACHE', {})}
+
+
+def _shared_cache():
+    return caches[_config()['ALIAS']]
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def enabled():
+    """کش توکن فقط با کش نسخهٔ مشترک بین پردازه‌ها."""
+    return is_shared(_config()['ALIAS'])
+
+
+def user_version(user_id):
+    cache = _shared_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # کلید نبود (تازه، یا از کش بیرون رفته): از زمان فعلی، تا هیچ‌وقت به نسخه‌ای که ورودی قدیمی دارد برنگردیم
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def invalidate_user(user_id):
+    """همهٔ توکن‌های کش‌شدهٔ این کاربر (در همهٔ پردازه‌ها) از درخواست بعدی دوباره از دیتابیس خوانده می‌شوند."""
+    cache = _shared_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # کلید نبود (یا از کش بیرون رفته بود): عددی که با هیچ نسخهٔ قبلی برابر نیست
+        cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def _user_fields(user_model):
+    # رمز در snapshot نیست؛ اگر جایی لازم شد Django آن را (deferred) از دیتابیس می‌خواند
+    return [field.attname for field in user_model._meta.concrete_fields if field.attname != 'password']
+
+
+class _Entry:
+    __slots__ = ('token', 'user_values', 'profile_values', 'version', 'expires_at')
+
+    def __init__(self, token, user_values, profile_values, version, expires_at):
+        self.token = token
+        self.user_values = user_values
+        self.profile_values = profile_values
+        self.version = version
+        self.expires_at = expires_at
+
+
+class TokenCache:
+    """LRU محدود با TTL؛ مقدار = توکن بررسی‌شده + ستون‌های کاربر و پروفایل."""
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token, user_model):
+        """(user, validated_token) از کش یا None. user هر بار یک شیء تازه است (بین درخواست‌ها مشترک نیست)."""
+        if not enabled():
+            return None
+        key = self.key(raw_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return None
+        user_id = entry.user_values[user_model._meta.pk.attname]
+        if entry.expires_at <= time.time() or user_version(user_id) != entry.version:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return self._build_user(user_model, entry), entry.token
+
+    def put(self, raw_token, validated_token, user):
+        if not enabled():
+            return
+        config = _config()
+        ttl = self.ttl if self.ttl is not None else config['TTL']
+        max_entries = self.max_entries if self.max_entries is not None else config['MAX_ENTRIES']
+        expires_at = time.time() + ttl
+        if validated_token.get('exp'):
+            expires_at = min(expires_at, float(validated_token['exp']))
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            profile = None
+        entry = _Entry(
+            token=validated_token,
+            user_values={name: getattr(user, name) for name in _user_fields(type(user))},
+            profile_values={name: getattr(profile, name) for name in _PROFILE_FIELDS} if profile else None,
+            version=user_version(user.pk),
+            expires_at=expires_at,
+        )
+        key = self.key(raw_token)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _build_user(user_model, entry):
+        names = list(entry.user_values)
+        user = user_model.from_db(DEFAULT_DB_ALIAS, names, [entry.user_values[name] for name in names])
+        if entry.profile_values is not None:
+            profile = UserProfile.from_db(
+                DEFAULT_DB_ALIAS, _PROFILE_FIELDS, [entry.profile_values[name] for name in _PROFILE_FIELDS],
+            )
+            # همان کش رابطه‌ای که select_related می‌سازد: user.profile و profile.user بدون کوئری
+            user._state.fields_cache['profile'] = profile
+            profile._state.fields_cache['user'] = user
+        return user
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
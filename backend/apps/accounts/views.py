@@ -3,9 +3,11 @@ APIهای احراز هویت و مدیریت کاربر:
 - POST /api/auth/register/  → ثبت‌نام
 - POST /api/auth/login/     → لاگین و دریافت JWT + اطلاعات کاربر
 - GET  /api/auth/me/        → اطلاعات کاربر لاگین‌شده
-- GET  /api/auth/users/     → لیست کاربران (فقط ادمین)
+- GET  /api/auth/users/     → لیست کاربران (فقط ادمین، صفحه‌بندی با ?limit=&after=)
 - PATCH/DELETE /api/auth/users/<id>/ → ویرایش/حذف کاربر (ادمین)
 """
+from urllib.parse import urlencode
+
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
@@ -24,6 +26,10 @@ from .serializers import (
 
 User = get_user_model()
 
+# صفحهٔ پیش‌فرض لیست کاربران؛ فرانت (auth.service.ts listUsers) با X-Next-Cursor همهٔ صفحه‌ها را می‌خواند
+USER_PAGE_SIZE = 500
+USER_PAGE_SIZE_MAX = 1000
+
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
@@ -40,7 +46,7 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={"request": request})
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         user = serializer.validated_data["user"]
@@ -62,15 +68,36 @@ class MeView(APIView):
 
 class UserListView(APIView):
     """
-    لیست کاربران برای پنل ادمین.
+    لیست کاربران برای پنل ادمین (به ترتیب id).
+
+    بدنهٔ پاسخ همان آرایهٔ User[] فرانت است؛ صفحه‌بندی keyset با ?limit=&after=<آخرین id>
+    و لینک صفحهٔ بعد در هدرهای Link (rel="next") و X-Next-Cursor.
+    کاربر و پروفایل با یک کوئری (select_related) خوانده می‌شوند.
     """
 
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        users = User.objects.all().order_by("id")
-        data = UserSerializer(users, many=True).data
-        return Response(data)
+        params = request.query_params
+        try:
+            limit = int(params.get("limit") or USER_PAGE_SIZE)
+            after = int(params.get("after") or 0)
+        except ValueError:
+            return Response({"detail": "limit و after باید عدد باشند."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, USER_PAGE_SIZE_MAX))
+
+        users = list(
+            User.objects.select_related("profile").filter(pk__gt=after).order_by("pk")[:limit + 1]
+        )
+        headers = {}
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = str(users[-1].pk)
+            next_url = request.build_absolute_uri(
+                f"{request.path}?{urlencode({'limit': limit, 'after': next_cursor})}"
+            )
+            headers = {"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": next_cursor}
+        return Response(UserSerializer(users, many=True).data, headers=headers)
 
 
 class UserDetailView(APIView):
@@ -78,7 +105,7 @@ class UserDetailView(APIView):
 
     def get_object(self, pk):
         try:
-            return User.objects.get(pk=pk)
+            return User.objects.select_related("profile").get(pk=pk)
         except User.DoesNotExist:
             return None
 
@@ -2,16 +2,39 @@
 ثبت مدل در پنل ادمین — تا بتوانی از صفحهٔ /admin/ رزروها را ببینی و ویرایش کنی.
 """
 from django.contrib import admin
-from .models import Booking, Port, Carrier
+from . import sms
+from .jobs import requeue
+from .models import (
+    BaggageItem, Booking, BookingDailyStat, BookingScan, IdempotencyKey, Job, Port, Carrier, SmsMessage, VehicleItem,
+    Voyage,
+)
+
+
+class BaggageItemInline(admin.TabularInline):
+    model = BaggageItem
+    extra = 0
+
+
+class VehicleItemInline(admin.TabularInline):
+    model = VehicleItem
+    extra = 0
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    inlines = (BaggageItemInline, VehicleItemInline)
     list_display = ('reference', 'origin_port', 'destination_port', 'departure_date', 'created_at', 'user')
     list_filter = ('document_type', 'has_passenger', 'has_baggage', 'has_vehicle')
     search_fields = ('reference', 'passenger_name', 'passport_number', 'passenger_id_number', 'origin_port', 'destination_port')
 
 
+@admin.register(BookingScan)
+class BookingScanAdmin(admin.ModelAdmin):
+    list_display = ('booking', 'event', 'gate', 'scanned_at')
+    list_filter = ('event', 'gate')
+    raw_id_fields = ('booking',)
+
+
 @admin.register(Port)
 class PortAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'created_at')
@@ -22,3 +45,85 @@ class PortAdmin(admin.ModelAdmin):
 class CarrierAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'created_at')
     search_fields = ('code', 'name')
+
+
+@admin.register(Voyage)
+class VoyageAdmin(admin.ModelAdmin):
+    list_display = (
+        'code', 'origin', 'destination', 'departure_at', 'status',
+        'passengers_booked', 'passenger_capacity', 'cargo_booked_kg', 'vehicle_lane_booked_m',
+    )
+    list_filter = ('status', 'carrier')
+    search_fields = ('code',)
+    readonly_fields = ('passengers_booked', 'cargo_booked_kg', 'vehicle_lane_booked_m')
+    actions = ('send_departure_sms',)
+
+    @admin.action(description='SMS حرکت به رزروهای این حرکت‌ها')
+    def send_departure_sms(self, request, queryset):
+        count = sum(sms.queue_departure_sms(voyage) for voyage in queryset)
+        self.message_user(request, f'{count} پیام در صف SMS قرار گرفت.')
+
+
+@admin.register(BookingDailyStat)
+class BookingDailyStatAdmin(admin.ModelAdmin):
+    list_display = (
+        'day', 'origin_port', 'destination_port', 'carrier_name', 'document_type',
+        'bookings', 'passengers', 'baggage_pieces', 'baggage_weight_kg', 'vehicles',
+    )
+    list_filter = ('document_type', 'origin_port', 'destination_port')
+    date_hierarchy = 'day'
+
+    # فقط rollups.py این ردیف‌ها را می‌نویسد
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'completed', 'status_code', 'created_at')
+    list_filter = ('completed',)
+    search_fields = ('key',)
+    exclude = ('response_body',)
+
+    # فقط idempotency.py این ردیف‌ها را می‌نویسد
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ('requeue_jobs',)
+
+    # کارها فقط از enqueue (jobs.py) ساخته می‌شوند
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='برگرداندن به صف (اجرای دوباره از همین الان)')
+    def requeue_jobs(self, request, queryset):
+        self.message_user(request, f'{requeue(queryset)} کار دوباره در صف قرار گرفت.')
+
+
+@admin.register(SmsMessage)
+class SmsMessageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'topic', 'status', 'attempts', 'send_after', 'sent_at', 'provider_id')
+    list_filter = ('status', 'topic')
+    search_fields = ('recipient', 'provider_id')
+    readonly_fields = [field.name for field in SmsMessage._meta.fields]
+    actions = ('requeue_messages',)
+
+    # پیام‌ها فقط از sms.queue_sms ساخته می‌شوند
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='ارسال دوباره (پیام‌های ناموفق)')
+    def requeue_messages(self, request, queryset):
+        self.message_user(request, f'{sms.requeue(queryset)} پیام دوباره در صف قرار گرفت.')
@@ -0,0 +1,161 @@
+"""
+تخصیص ظرفیت حرکت (صندلی، وزن بار، متر طولی خط وسیله) — بدون فروش بیش از ظرفیت حتی زیر بار همزمان.
+
+روش:
+۱) یک UPDATE شرطی روی ردیف Voyage:
+       UPDATE voyage SET passengers_booked = passengers_booked + n, ...
+       WHERE id = ? AND status = 'OPEN' AND passengers_booked <= passenger_capacity - n AND ...
+   اگر ۰ ردیف عوض شد یعنی ظرفیت نیست. هیچ COUNT(*) روی رزروها لازم نیست.
+۲) همان UPDATE ردیف حرکت را تا پایان تراکنش قفل می‌کند (PostgreSQL: قفل ردیف؛ SQLite: قفل نوشتن)،
+   پس خواندن و نوشتن seat_map بعد از آن برای این حرکت سریالی است و دو رزرو هرگز یک صندلی نمی‌گیرند.
+
+allocate و release باید داخل transaction.atomic صدا زده شوند (همان تراکنشی که رزرو را INSERT می‌کند)،
+تا اگر INSERT شکست خورد شمارنده‌ها هم برگردند.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db.models import F
+
+from .models import Voyage
+
+
+# passengers برای هر رزرو ۰ یا ۱ است (هر رزرو حداکثر یک مسافر و یک صندلی دارد)
+Demand = namedtuple('Demand', ['passengers', 'cargo_kg', 'vehicle_lane_m'])
+
+# بُعد ظرفیت → (فیلد ظرفیت، فیلد مصرف‌شده، فیلد Demand)
+DIMENSIONS = {
+    'passengers': ('passenger_capacity', 'passengers_booked', 'passengers'),
+    'cargo': ('cargo_capacity_kg', 'cargo_booked_kg', 'cargo_kg'),
+    'vehicle_lane': ('vehicle_lane_capacity_m', 'vehicle_lane_booked_m', 'vehicle_lane_m'),
+}
+
+
+class CapacityError(Exception):
+    """حرکت پیدا نشد، بسته است یا ظرفیت یکی از ابعاد کافی نیست."""
+
+    def __init__(self, message, dimension='voyage'):
+        super().__init__(message)
+        self.dimension = dimension
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value or 0))
+    except ArithmeticError:
+        return Decimal(0)
+
+
+def booking_demand(booking):
+    """سهم یک رزرو از ظرفیت: یک صندلی اگر مسافر دارد، وزن بار، مجموع طول وسیله‌ها."""
+    lane = sum(
+        (_decimal(item.get('lengthM')) for item in booking.vehicle_items or [] if isinstance(item, dict)),
+        Decimal(0),
+    )
+    if not lane and booking.vehicle_length_m:
+        lane = _decimal(booking.vehicle_length_m)
+    return Demand(
+        passengers=1 if booking.has_passenger else 0,
+        cargo_kg=_decimal(booking.baggage_weight_kg),
+        vehicle_lane_m=lane,
+    )
+
+
+def _take_seats(seat_map, count, capacity):
+    """اولین count صندلی آزاد (شماره از ۱)؛ (bitmap جدید، لیست شماره‌ها)."""
+    bits = bytearray(seat_map)
+    bits.extend(b'\0' * max(0, (capacity + 7) // 8 - len(bits)))
+    seats = []
+    for byte_index, byte in enumerate(bits):
+        if byte == 0xFF:
+            continue
+        for bit in range(8):
+            seat = byte_index * 8 + bit
+            if seat >= capacity or len(seats) == count:
+                break
+            if not byte & (1 << bit):
+                bits[byte_index] |= 1 << bit
+                seats.append(seat + 1)
+        if len(seats) == count or byte_index * 8 >= capacity:
+            break
+    if len(seats) < count:
+        raise CapacityError('صندلی آزاد در این حرکت نیست.', 'passengers')
+    return bytes(bits), seats
+
+
+def _free_seats(seat_map, seats):
+    bits = bytearray(seat_map)
+    for seat in seats:
+        byte_index, bit = divmod(seat - 1, 8)
+        if byte_index < len(bits):
+            bits[byte_index] &= ~(1 << bit) & 0xFF
+    return bytes(bits)
+
+
+def _capacity_error(voyage_id, total):
+    voyage = Voyage.objects.filter(pk=voyage_id).first()
+    if voyage is None:
+        return CapacityError('حرکت یافت نشد.')
+    if voyage.status != Voyage.OPEN:
+        return CapacityError('این حرکت برای رزرو بسته است.')
+    for dimension, (capacity, booked, demand) in DIMENSIONS.items():
+        if getattr(voyage, booked) + getattr(total, demand) > getattr(voyage, capacity):
+            return CapacityError(f'ظرفیت {dimension} این حرکت تکمیل است.', dimension)
+    return CapacityError('ظرفیت حرکت تکمیل است.')
+
+
+def allocate(voyage_id, demands):
+    """
+    ظرفیت چند رزرو روی یک حرکت را یک‌جا می‌گیرد (یک UPDATE برای همه).
+    خروجی: شمارهٔ صندلی هر Demand به همان ترتیب (None برای رزرو بدون مسافر).
+    اگر ظرفیت نباشد CapacityError و هیچ چیزی عوض نمی‌شود.
+    """
+    total = Demand(
+        sum(1 for d in demands if d.passengers),
+        sum((d.cargo_kg for d in demands), Decimal(0)),
+        sum((d.vehicle_lane_m for d in demands), Decimal(0)),
+    )
+    filters = {'pk': voyage_id, 'status': Voyage.OPEN}
+    updates = {}
+    for capacity, booked, demand in DIMENSIONS.values():
+        amount = getattr(total, demand)
+        if amount:
+            filters[f'{booked}__lte'] = F(capacity) - amount
+            updates[booked] = F(booked) + amount
+    if updates:
+        changed = Voyage.objects.filter(**filters).update(**updates)
+    else:
+        changed = Voyage.objects.filter(**filters).exists()
+    if not changed:
+        raise _capacity_error(voyage_id, total)
+
+    seats = [None] * len(demands)
+    if total.passengers:
+        seat_map, capacity = (
+            Voyage.objects.filter(pk=voyage_id).values_list('seat_map', 'passenger_capacity').get()
+        )
+        seat_map, numbers = _take_seats(bytes(seat_map or b''), total.passengers, capacity)
+        Voyage.objects.filter(pk=voyage_id).update(seat_map=seat_map)
+        numbers = iter(numbers)
+        for i, demand in enumerate(demands):
+            if demand.passengers:
+                seats[i] = next(numbers)
+    return seats
+
+
+def release(allocation):
+    """ظرفیت و صندلی یک VoyageAllocation را برمی‌گرداند."""
+    updates = {}
+    for capacity, booked, demand in DIMENSIONS.values():
+        amount = getattr(allocation, demand)
+        if amount:
+            updates[booked] = F(booked) - amount
+    if not updates:
+        return
+    Voyage.objects.filter(pk=allocation.voyage_id).update(**updates)
+    if allocation.seat:
+        seat_map = Voyage.objects.filter(pk=allocation.voyage_id).values_list('seat_map', flat=True).first()
+        if seat_map:
+            Voyage.objects.filter(pk=allocation.voyage_id).update(
+                seat_map=_free_seats(bytes(seat_map), [allocation.seat]),
+            )
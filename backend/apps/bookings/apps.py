@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from .search import ensure_search_index
+    ensure_search_index(using)
 
 
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.bookings'
+
+    def ready(self):
+        from . import signals  # noqa: F401 — ثبت receiverها
+        from . import tasks  # noqa: F401 — ثبت handlerهای صف کار (jobs.py)
+        # ایندکس زیررشتهٔ جستجو (FTS5 / pg_trgm) بیرون از migrationها نگه‌داری می‌شود
+        post_migrate.connect(_ensure_search_index, sender=self)
@@ -0,0 +1,14 @@
+"""
+مسیریابی viewهای async رزرو (async_views.py) — زیر /api/async/bookings/ در config/urls.py.
+همان آدرس‌های /api/bookings/؛ فقط پیشوند فرق می‌کند تا هر دو مسیر کنار هم قابل مقایسه باشند.
+"""
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('', async_views.AsyncBookingCreateView.as_view()),
+    path('search/', async_views.AsyncBookingSearchView.as_view()),
+    path('<str:reference>/receipt/pdf/', async_views.AsyncBookingReceiptPdfView.as_view()),
+    path('<str:reference>/labels/print/', async_views.AsyncBookingLabelPrintView.as_view()),
+    path('<str:reference>/', async_views.AsyncBookingDetailView.as_view()),
+]
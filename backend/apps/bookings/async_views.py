@@ -0,0 +1,216 @@
+"""
+نسخهٔ async (ASGI) پرترافیک‌ترین endpointهای رزرو زیر /api/async/bookings/.
+
+زیر uvicorn / daphne، viewهای DRF (views.py) هر درخواست را در یک نخ sync اجرا می‌کنند؛ تا وقتی رندر PDF،
+خواندن کش رسید از دیسک یا اتصال به چاپگر طول بکشد، آن نخ (و اتصال دیتابیسش) بسته است. اینجا viewها
+View معمولی Django با متدهای async هستند (نه APIView، که async را پشتیبانی نمی‌کند):
+
+- خواندن‌ها با async ORM خود Django (aget، async for) و همان BookingMapper / search.py مسیر sync.
+- ثبت رزرو (تراکنش + تخصیص ظرفیت) همان BookingSerializer است، در sync_to_async.
+- کار بلاک‌کننده: رندر PDF در استخر پردازه‌های receipts.py، کش رسید در استخر نخ محدود offload.py
+  (صف پر → 503)، ارسال ZPL با asyncio streams (printing.asend_zpl).
+
+شکل ورودی/خروجی و کدهای وضعیت همان endpointهای sync است؛ Idempotency-Key هم پشتیبانی می‌شود.
+احراز هویت: اگر هدر Authorization باشد با همان JWTAuthentication بررسی می‌شود (توکن نامعتبر → 401).
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.accounts.authentication import JWTAuthentication
+
+from .allocation import CapacityError
+from .booking_json import mapper_for, parse_fields
+from .conditional import conditional_response, validator_headers
+from .idempotency import idempotent
+from .labels import booking_labels
+from .models import Booking
+from .normalization import normalize_lookup
+from .offload import Overloaded, run_blocking
+from .pagination import InvalidQuery
+from .printing import PrinterError, UnknownPrinter, asend_zpl
+from .receipt_cache import get_receipt_cache, receipt_digest
+from .receipts import arender_receipt_fields, receipt_fields
+from .renderers import FastJSONRenderer
+from .search import MATCH_MODES, SEARCH_PARAMS, asearch_bookings
+from .serializers import BookingSerializer, _model_to_dict
+from .views import _parse_label_kinds
+
+
+_renderer = FastJSONRenderer()
+
+
+def _json(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        _renderer.render(data), status=status, content_type='application/json', headers=headers,
+    )
+
+
+def _detail(message, status, **extra):
+    return _json({'detail': message, **extra}, status=status)
+
+
+def _not_found():
+    return _detail('رزروی با این شماره یافت نشد.', status.HTTP_404_NOT_FOUND)
+
+
+def _overloaded():
+    return _detail(
+        'سرور مشغول است؛ کمی بعد دوباره تلاش کنید.',
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+def _authenticate(request):
+    """مثل DRF: بدون توکن → AnonymousUser، توکن معتبر → کاربر، توکن نامعتبر → AuthenticationFailed."""
+    result = JWTAuthentication().authenticate(request)
+    if result is not None:
+        request.user, request.auth = result
+
+
+def _create(data):
+    serializer = BookingSerializer(data=data)
+    if not serializer.is_valid():
+        return _json(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        booking = serializer.save()
+    except CapacityError as exc:
+        return _detail(str(exc), status.HTTP_409_CONFLICT, dimension=exc.dimension)
+    return _json(_model_to_dict(booking), status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncBookingView(View):
+    """پایهٔ viewهای این فایل: احراز هویت JWT قبل از متد (در نخ sync؛ با کش توکن معمولاً بدون کوئری)."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # مثل DRF با DEFAULT_AUTHENTICATION_CLASSES: کاربر session (AuthenticationMiddleware) حساب نمی‌شود
+        request.user, request.auth = AnonymousUser(), None
+        if request.META.get('HTTP_AUTHORIZATION'):
+            try:
+                await sync_to_async(_authenticate)(request)
+            except AuthenticationFailed as exc:
+                # شکل بدنه مثل exception handler خود DRF
+                data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+                return _json(
+                    data, status=exc.status_code,
+                    headers={'WWW-Authenticate': 'Bearer realm="api"'},
+                )
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncBookingCreateView(AsyncBookingView):
+    """POST /api/async/bookings/ — مثل POST /api/bookings/."""
+
+    @idempotent('bookings:create-async')
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as exc:
+            return _detail(f'JSON parse error - {exc}', status.HTTP_400_BAD_REQUEST)
+        return await sync_to_async(_create)(data)
+
+
+class AsyncBookingDetailView(AsyncBookingView):
+    """GET /api/async/bookings/<reference>/ — مثل GET /api/bookings/<reference>/."""
+
+    async def get(self, request, reference):
+        mapper = mapper_for()
+        rows = [row async for row in mapper.rows(Booking.objects.filter(reference=reference))[:1]]
+        if not rows:
+            return _not_found()
+        return _json((await mapper.adicts(rows))[0])
+
+
+class AsyncBookingSearchView(AsyncBookingView):
+    """GET /api/async/bookings/search/?reference=...&passport=...&id_number=...&match=auto&fields=..."""
+
+    async def get(self, request):
+        terms = {name: request.GET.get(name) for name in SEARCH_PARAMS}
+        match = (request.GET.get('match') or 'auto').strip().lower()
+
+        if not any(normalize_lookup(value) for value in terms.values()):
+            return _detail(
+                'حداقل یکی از پارامترهای reference، passport یا id_number را ارسال کنید.',
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if match not in MATCH_MODES:
+            return _detail(f'match باید یکی از {", ".join(MATCH_MODES)} باشد.', status.HTTP_400_BAD_REQUEST)
+
+        try:
+            mapper = mapper_for(parse_fields(request.GET.get('fields')))
+        except InvalidQuery as exc:
+            return _detail(str(exc), status.HTTP_400_BAD_REQUEST)
+        rows = await asearch_bookings(terms, match=match, limit=50, queryset=mapper.rows(Booking.objects.all()))
+        return _json(await mapper.adicts(rows))
+
+
+class AsyncBookingReceiptPdfView(AsyncBookingView):
+    """GET /api/async/bookings/<reference>/receipt/pdf/ — مثل نسخهٔ sync (کش رسید، ETag و 304)."""
+
+    async def get(self, request, reference):
+        try:
+            booking = await Booking.objects.only(
+                'reference', 'created_at', 'passenger_name', 'origin_port', 'destination_port',
+                'baggage_pieces', 'baggage_weight_kg',
+            ).aget(reference=reference)
+        except Booking.DoesNotExist:
+            return _not_found()
+        fields = receipt_fields(booking)
+        digest = receipt_digest(fields)
+        headers = validator_headers(etag=f'"{digest}"')
+        not_modified = conditional_response(request, etag=headers['ETag'], headers=headers)
+        if not_modified is not None:
+            return not_modified
+
+        cache = get_receipt_cache()
+        try:
+            pdf_bytes = await run_blocking(cache.get, digest)
+            if pdf_bytes is None:
+                pdf_bytes = await arender_receipt_fields(fields)
+                if pdf_bytes is None:
+                    return _detail('تولید PDF در سرور پیکربندی نشده (reportlab).', status.HTTP_501_NOT_IMPLEMENTED)
+                await run_blocking(cache.set, digest, pdf_bytes)
+        except Overloaded:
+            return _overloaded()
+        response = HttpResponse(pdf_bytes, content_type='application/pdf', headers=headers)
+        response['Content-Disposition'] = f'attachment; filename="receipt-{booking.reference}.pdf"'
+        return response
+
+
+class AsyncBookingLabelPrintView(AsyncBookingView):
+    """
+    POST /api/async/bookings/<reference>/labels/print/ — لیبل‌های ZPL یک رزرو مستقیم به چاپگر.
+    بدنه: {"printer": "default", "kinds": ["BAG_TAG", ...]} (kinds اختیاری). پاسخ مثل POST /api/bookings/labels/.
+    """
+
+    async def post(self, request, reference):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as exc:
+            return _detail(f'JSON parse error - {exc}', status.HTTP_400_BAD_REQUEST)
+        data = data if isinstance(data, dict) else {}
+        kinds, error = _parse_label_kinds(data.get('kinds'))
+        if error is not None:
+            return _json(error.data, status=error.status_code)
+        printer = str(data.get('printer') or 'default')
+        try:
+            booking = await Booking.objects.with_items().aget(reference=reference)
+        except Booking.DoesNotExist:
+            return _not_found()
+
+        labels = [label for _, label in booking_labels(booking, kinds)]
+        try:
+            sent = await asend_zpl(''.join(labels), printer=printer)
+        except UnknownPrinter as exc:
+            return _detail(str(exc), status.HTTP_400_BAD_REQUEST)
+        except PrinterError as exc:
+            return _detail(str(exc), status.HTTP_502_BAD_GATEWAY)
+        return _json({'printer': printer, 'labels': len(labels), 'bytes': sent})
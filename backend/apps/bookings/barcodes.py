@@ -0,0 +1,267 @@
+"""
+محتوای بارکد رزرو (بخش ۴ مشخصات): نام مسافر، پاسپورت، شناسه، تاریخ، مبدأ، مقصد، نوع بار و قطعه/وزن.
+
+قبلاً هر کلاینت Angular این متن را خودش می‌ساخت. حالا سرور یک payload باینری فشرده و نسخه‌دار می‌سازد:
+
+    [نسخه: 1 بایت]
+    [شناسهٔ رزرو (pk)] [روز حرکت از 2000-01-01] [شمارهٔ قطعه] [تعداد قطعه] [وزن به ۱۰۰ گرم]  ← varint
+    [نام] [پاسپورت] [شناسه] [مبدأ] [مقصد] [نوع بار]                               ← طول varint + UTF-8
+    [CRC32: 4 بایت]
+
+و به صورت متن با الفبای Crockford base32 (همان الفبای شمارهٔ رزرو) و پیشوند PREFIX نوشته می‌شود.
+این الفبا کاملاً در حالت alphanumeric کد QR جا می‌شود (۵.۵ بیت برای هر نویسه) و در PDF417 هم متن ساده است.
+
+شمارهٔ قطعه ۰ یعنی کارت اصلی رزرو (بوردینگ‌پاس / کارت بار)؛ ۱..n قطعه‌های بار.
+هنگام اسکن، decode فقط چند عملیات بایتی است و pk داخل payload مستقیم به رزرو می‌رسد (بدون جستجوی متنی).
+"""
+import base64
+import datetime
+import io
+import itertools
+import zlib
+from collections import namedtuple
+
+from django.utils import timezone
+
+from .references import ALPHABET
+
+
+VERSION = 1
+PREFIX = 'SB'
+_EPOCH_ORDINAL = datetime.date(2000, 1, 1).toordinal()
+_VALUES = {ch: i for i, ch in enumerate(ALPHABET)}
+# نویسه‌هایی که هنگام تایپ دستی با هم اشتباه می‌شوند (قاعدهٔ Crockford)
+_VALUES.update({'O': 0, 'I': 1, 'L': 1})
+
+BarcodePayload = namedtuple('BarcodePayload', [
+    'version', 'booking_id', 'departure_date', 'piece', 'piece_count', 'weight_kg',
+    'passenger', 'passport', 'id_number', 'origin', 'destination', 'baggage_type',
+])
+
+_INT_FIELDS = 5
+_TEXT_FIELDS = 6
+
+BARCODE_FORMATS = ('payload', 'svg', 'png')
+# حاشیهٔ سفید استاندارد QR (ماژول) و بزرگنمایی PNG (پیکسل برای هر ماژول)
+QR_BORDER = 4
+QR_SCALE = 4
+
+
+class InvalidBarcode(ValueError):
+    """متن اسکن‌شده بارکد این سیستم نیست، خراب است یا نسخه‌اش پشتیبانی نمی‌شود."""
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, pos):
+    result = shift = 0
+    while True:
+        if pos >= len(data) or shift > 63:
+            raise InvalidBarcode('بارکد ناقص است.')
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _b32encode(data):
+    number = int.from_bytes(data, 'big')
+    chars = []
+    for _ in range((len(data) * 8 + 4) // 5):
+        number, rem = divmod(number, 32)
+        chars.append(ALPHABET[rem])
+    return ''.join(reversed(chars))
+
+
+def _b32decode(text):
+    number = 0
+    try:
+        for ch in text:
+            number = number * 32 + _VALUES[ch]
+    except KeyError:
+        raise InvalidBarcode('نویسهٔ نامعتبر در بارکد.')
+    size = len(text) * 5 // 8
+    if number >> (size * 8):
+        raise InvalidBarcode('طول بارکد نامعتبر است.')
+    return number.to_bytes(size, 'big')
+
+
+def pack(payload):
+    """BarcodePayload → bytes."""
+    out = bytearray([VERSION])
+    date = payload.departure_date
+    for value in (
+        payload.booking_id,
+        date.toordinal() - _EPOCH_ORDINAL + 1 if date else 0,
+        payload.piece,
+        payload.piece_count,
+        int(round((payload.weight_kg or 0) * 10)),
+    ):
+        _put_varint(out, max(int(value or 0), 0))
+    for text in (
+        payload.passenger, payload.passport, payload.id_number,
+        payload.origin, payload.destination, payload.baggage_type,
+    ):
+        raw = (text or '').encode('utf-8')
+        _put_varint(out, len(raw))
+        out += raw
+    out += zlib.crc32(out).to_bytes(4, 'big')
+    return bytes(out)
+
+
+def unpack(data):
+    """bytes → BarcodePayload؛ در صورت خرابی InvalidBarcode."""
+    if len(data) < 6:
+        raise InvalidBarcode('بارکد ناقص است.')
+    body, crc = data[:-4], data[-4:]
+    if zlib.crc32(body).to_bytes(4, 'big') != crc:
+        raise InvalidBarcode('checksum بارکد درست نیست.')
+    if body[0] != VERSION:
+        raise InvalidBarcode(f'نسخهٔ بارکد پشتیبانی نمی‌شود: {body[0]}')
+    pos = 1
+    numbers = []
+    for _ in range(_INT_FIELDS):
+        value, pos = _get_varint(body, pos)
+        numbers.append(value)
+    texts = []
+    for _ in range(_TEXT_FIELDS):
+        size, pos = _get_varint(body, pos)
+        if pos + size > len(body):
+            raise InvalidBarcode('بارکد ناقص است.')
+        try:
+            texts.append(body[pos:pos + size].decode('utf-8'))
+        except UnicodeDecodeError:
+            raise InvalidBarcode('متن بارکد UTF-8 معتبر نیست.')
+        pos += size
+    booking_id, days, piece, piece_count, weight = numbers
+    date = datetime.date.fromordinal(days - 1 + _EPOCH_ORDINAL) if days else None
+    return BarcodePayload(VERSION, booking_id, date, piece, piece_count, weight / 10, *texts)
+
+
+def encode(payload):
+    """BarcodePayload → متن بارکد (PREFIX + base32)."""
+    return PREFIX + _b32encode(pack(payload))
+
+
+def decode(text):
+    """متن اسکن‌شده → BarcodePayload (فاصله، خط تیره و حروف کوچک نادیده گرفته می‌شوند)."""
+    text = (text or '').strip().upper().replace('-', '').replace(' ', '')
+    if not text.startswith(PREFIX):
+        raise InvalidBarcode('بارکد این سیستم نیست.')
+    return unpack(_b32decode(text[len(PREFIX):]))
+
+
+def _weight(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def booking_payloads(booking):
+    """
+    همهٔ بارکدهای یک رزرو: لیست (شمارهٔ قطعه، BarcodePayload).
+    قطعهٔ ۰ = خود رزرو با وزن کل؛ بعد هر قطعهٔ بار در baggage_items به ترتیب.
+    """
+    dep = booking.departure_date
+    base = BarcodePayload(
+        version=VERSION,
+        booking_id=booking.pk,
+        departure_date=timezone.localdate(dep) if dep else None,
+        piece=0,
+        piece_count=0,
+        weight_kg=_weight(booking.baggage_weight_kg),
+        passenger=booking.passenger_name,
+        passport=booking.passport_number,
+        id_number=booking.passenger_id_number,
+        origin=booking.origin_port,
+        destination=booking.destination_port,
+        baggage_type='',
+    )
+    pieces = []
+    for group in booking.baggage_items or []:
+        if not isinstance(group, dict):
+            continue
+        for piece in group.get('pieceDetails') or []:
+            if isinstance(piece, dict):
+                pieces.append((group.get('baggageType') or '', _weight(piece.get('weightKg'))))
+
+    payloads = [(0, base._replace(piece_count=len(pieces)))]
+    for number, (baggage_type, weight) in enumerate(pieces, start=1):
+        payloads.append((number, base._replace(
+            piece=number, piece_count=len(pieces), weight_kg=weight, baggage_type=baggage_type,
+        )))
+    return payloads
+
+
+def qr_modules(text):
+    """ماتریس ماژول‌های QR (لیست ردیف‌ها، True = تیره) با encoder خود reportlab، یا None اگر نصب نباشد."""
+    try:
+        from reportlab.graphics.barcode.qr import QrCodeWidget
+    except ImportError:
+        return None
+    code = QrCodeWidget(text, barLevel='M').qr
+    code.make()
+    return [[bool(cell) for cell in row] for row in code.modules]
+
+
+def _svg(modules):
+    # هر دنبالهٔ ماژول تیره در یک ردیف = یک مستطیل در یک path؛ خروجی چند کیلوبایت است
+    size = len(modules) + QR_BORDER * 2
+    path = []
+    for y, row in enumerate(modules, start=QR_BORDER):
+        x = QR_BORDER
+        for dark, run in itertools.groupby(row):
+            count = len(list(run))
+            if dark:
+                path.append(f'M{x} {y}h{count}v1h-{count}z')
+            x += count
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/><path d="{"".join(path)}"/></svg>'
+    ).encode('ascii')
+
+
+def _png(modules):
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    size = len(modules) + QR_BORDER * 2
+    image = Image.new('1', (size, size), 1)
+    pixels = image.load()
+    for y, row in enumerate(modules, start=QR_BORDER):
+        for x, dark in enumerate(row, start=QR_BORDER):
+            if dark:
+                pixels[x, y] = 0
+    image = image.resize((size * QR_SCALE, size * QR_SCALE), Image.NEAREST)
+    buf = io.BytesIO()
+    image.save(buf, format='PNG', optimize=True)
+    return buf.getvalue()
+
+
+def render_image(text, image_format='svg'):
+    """
+    تصویر QR برای متن بارکد (bytes)؛ image_format: 'svg' یا 'png'.
+    اگر reportlab (یا برای PNG، Pillow) نصب نباشد None.
+    """
+    modules = qr_modules(text)
+    if modules is None:
+        return None
+    return _png(modules) if image_format == 'png' else _svg(modules)
+
+
+def image_data_uri(text, image_format='svg'):
+    """تصویر به صورت data URI برای قرار دادن مستقیم در JSON / <img src>، یا None."""
+    image = render_image(text, image_format)
+    if image is None:
+        return None
+    mime = 'image/png' if image_format == 'png' else 'image/svg+xml'
+    return f'data:{mime};base64,{base64.b64encode(image).decode("ascii")}'
@@ -0,0 +1,189 @@
+"""
+مسیر سریع تبدیل رزروها به JSON برای لیست، جستجو و منیفست.
+
+_model_to_dict (serializers.py) برای هر رزرو یک شیء کامل Booking، اشیای BaggageItem / VehicleItem
+(prefetch) و حدود ۳۰ خواندن attribute لازم دارد؛ در صفحه‌های ۲۰۰تایی و منیفست‌های چند هزارتایی
+بیشتر وقت CPU همین‌جا می‌رود. اینجا:
+
+۱) فقط ستون‌های لازم با values_list(named=True) خوانده می‌شوند (بدون ساختن شیء مدل).
+۲) برای هر fieldset یک بار (و کش‌شده) جای هر ستون در ردیف و تابع تبدیلش حساب می‌شود:
+   (('reference', row → row[2]), ('createdAt', row → _iso(row[1])), ...)
+   پس برای هر ردیف نه جستجوی نام ستون هست و نه getattr؛ فقط همین tuple پیموده می‌شود.
+۳) قطعه‌های بار و وسیله‌ها (فقط اگر در fieldset باشند) با یک کوئری values_list برای کل صفحه.
+
+خروجی دقیقاً همان شکل _model_to_dict است. fieldset با پارامتر ?fields=reference,passengerName,...
+کوچک‌تر می‌شود (parse_fields)؛ ستون‌ها و جدول‌های فرزندی که لازم نیستند خوانده نمی‌شوند.
+رندر JSON با renderers.FastJSONRenderer.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from .items import VEHICLE_FIELDS, baggage_groups, vehicle_dicts
+from .models import BaggageItem, VehicleItem
+from .pagination import InvalidQuery
+
+
+def _iso(value):
+    return value.isoformat() if value else ''
+
+
+def _or_none(value):
+    return value or None
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def _getter(name, position, convert):
+    """تابع (ردیف، قطعه‌های بار، وسیله‌ها) → مقدار کلید name؛ position جای ستون در ردیف است."""
+    if name == 'baggageItems':
+        return lambda row, baggage, vehicles: baggage.get(row[0], [])
+    if name == 'vehicleItems':
+        return lambda row, baggage, vehicles: vehicles.get(row[0], [])
+    if convert is None:
+        return lambda row, baggage, vehicles: row[position]
+    return lambda row, baggage, vehicles: convert(row[position])
+
+
+# کلید JSON → (ستون Booking، تبدیل) به همان ترتیب _model_to_dict؛ None یعنی همان مقدار ستون
+FIELDS = {
+    'reference': ('reference', None),
+    'createdAt': ('created_at', _iso),
+    'hasPassenger': ('has_passenger', None),
+    'hasBaggage': ('has_baggage', None),
+    'hasVehicle': ('has_vehicle', None),
+    'passengerName': ('passenger_name', _or_none),
+    'passengerIdNumber': ('passenger_id_number', _or_none),
+    'passportNumber': ('passport_number', _or_none),
+    'phoneNumber': ('phone_number', _or_none),
+    'baggagePieces': ('baggage_pieces', None),
+    'baggageWeightKg': ('baggage_weight_kg', _float),
+    'baggageItems': (None, None),
+    'vehicleItems': (None, None),
+    'vehiclePlateNumber': ('vehicle_plate_number', _or_none),
+    'vehicleType': ('vehicle_type', _or_none),
+    'vehicleLengthM': ('vehicle_length_m', _float),
+    'originPort': ('origin_port', None),
+    'destinationPort': ('destination_port', None),
+    'departureDate': ('departure_date', _iso),
+    'documentType': ('document_type', None),
+    'departureGate': ('departure_gate', _or_none),
+    'seatNumber': ('seat_number', _or_none),
+    'seatingArea': ('seating_area', _or_none),
+    'arrivalDate': ('arrival_date', _or_none),
+    'carrierName': ('carrier_name', _or_none),
+    'ticketNumber': ('ticket_number', _or_none),
+    'sequenceNumber': ('sequence_number', _or_none),
+    'boardingTime': ('boarding_time', _or_none),
+}
+# id و created_at همیشه خوانده می‌شوند: کلید جدول‌های فرزند و cursor صفحه‌بندی
+_BASE_COLUMNS = ('id', 'created_at')
+_BAGGAGE_COLUMNS = ('booking_id', 'group', 'baggage_type', 'weight_kg', 'tag_number')
+_VEHICLE_COLUMNS = ('booking_id', *VEHICLE_FIELDS.values())
+
+
+def parse_fields(value):
+    """
+    پارامتر ?fields=a,b,c → tuple کلیدها به ترتیب FIELDS؛ خالی → None (همهٔ فیلدها).
+    کلید ناشناخته → InvalidQuery.
+    """
+    names = {name.strip() for name in (value or '').split(',') if name.strip()}
+    if not names:
+        return None
+    unknown = sorted(names - FIELDS.keys())
+    if unknown:
+        raise InvalidQuery(f'fields ناشناخته: {", ".join(unknown)}')
+    return tuple(name for name in FIELDS if name in names)
+
+
+class BookingMapper:
+    """ستون‌ها و تابع تبدیل یک fieldset. با mapper_for بسازید (کش می‌شود)."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.baggage = 'baggageItems' in fields
+        self.vehicles = 'vehicleItems' in fields
+        columns = list(_BASE_COLUMNS)
+        for name in fields:
+            column = FIELDS[name][0]
+            if column is not None and column not in columns:
+                columns.append(column)
+        self.columns = tuple(columns)
+        index = {column: position for position, column in enumerate(self.columns)}
+        self._getters = tuple(
+            (name, _getter(name, index.get(FIELDS[name][0]), FIELDS[name][1])) for name in fields
+        )
+
+    def _to_dict(self, row, baggage, vehicles):
+        return {name: get(row, baggage, vehicles) for name, get in self._getters}
+
+    def rows(self, queryset):
+        """queryset رزرو → همان queryset با فقط ستون‌های لازم (namedtuple؛ row.id و row.created_at دارد)."""
+        return queryset.values_list(*self.columns, named=True)
+
+    def dicts(self, rows):
+        """ردیف‌های rows() → لیست دیکشنری‌های JSON (حداکثر دو کوئری برای قطعه‌های بار و وسیله‌ها)."""
+        rows = list(rows)
+        ids = [row[0] for row in rows]
+        baggage = _baggage_by_booking(ids) if self.baggage and ids else {}
+        vehicles = _vehicles_by_booking(ids) if self.vehicles and ids else {}
+        to_dict = self._to_dict
+        return [to_dict(row, baggage, vehicles) for row in rows]
+
+    async def adicts(self, rows):
+        """نسخهٔ async dicts برای viewهای async (rows: لیست یا queryset rows())."""
+        if not isinstance(rows, list):
+            rows = [row async for row in rows]
+        ids = [row[0] for row in rows]
+        baggage = vehicles = {}
+        if self.baggage and ids:
+            baggage = _group(baggage_groups, [row async for row in _baggage_rows(ids)])
+        if self.vehicles and ids:
+            vehicles = _group(vehicle_dicts, [row async for row in _vehicle_rows(ids)])
+        to_dict = self._to_dict
+        return [to_dict(row, baggage, vehicles) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def mapper_for(fields=None):
+    """BookingMapper برای fieldset (خروجی parse_fields؛ None = همه)."""
+    return BookingMapper(tuple(fields or FIELDS))
+
+
+def booking_dicts(queryset, fields=None):
+    """میان‌بر: queryset رزرو → لیست دیکشنری‌های JSON."""
+    mapper = mapper_for(fields)
+    return mapper.dicts(mapper.rows(queryset))
+
+
+def _baggage_rows(ids):
+    return (
+        BaggageItem.objects.filter(booking_id__in=ids)
+        .order_by('booking_id', 'group', 'position')
+        .values_list(*_BAGGAGE_COLUMNS, named=True)
+    )
+
+
+def _vehicle_rows(ids):
+    return (
+        VehicleItem.objects.filter(booking_id__in=ids)
+        .order_by('booking_id', 'position')
+        .values_list(*_VEHICLE_COLUMNS, named=True)
+    )
+
+
+def _group(convert, rows):
+    """ردیف‌های فرزند مرتب بر اساس booking_id → {booking_id: خروجی convert}."""
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.booking_id].append(row)
+    return {booking_id: convert(items) for booking_id, items in grouped.items()}
+
+
+def _baggage_by_booking(ids):
+    return _group(baggage_groups, _baggage_rows(ids))
+
+
+def _vehicles_by_booking(ids):
+    return _group(vehicle_dicts, _vehicle_rows(ids))
@@ -0,0 +1,30 @@
+"""
+درخواست‌های شرطی HTTP (ETag / Last-Modified → 304 Not Modified).
+
+وقتی کلاینت نسخه‌ای را که قبلاً گرفته با If-None-Match یا If-Modified-Since می‌فرستد
+و هنوز همان است، فقط 304 برمی‌گردانیم و بدنه (PDF، JSON) دوباره ساخته یا فرستاده نمی‌شود.
+منطق مقایسه همان get_conditional_response خود Django است.
+"""
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def validator_headers(etag=None, last_modified=None, cache_control='private, no-cache'):
+    """هدرهای اعتبارسنجی برای پاسخ 200 و 304 (no-cache یعنی «نگه دار ولی هر بار بپرس»)."""
+    headers = {'Cache-Control': cache_control}
+    if etag:
+        headers['ETag'] = etag
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return headers
+
+
+def conditional_response(request, etag=None, last_modified=None, headers=None):
+    """اگر نسخهٔ کلاینت هنوز معتبر است پاسخ 304 (یا 412) برمی‌گرداند، وگرنه None."""
+    probe = HttpResponse(headers=headers or validator_headers(etag, last_modified))
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    result = get_conditional_response(
+        request, etag=etag, last_modified=last_modified_ts, response=probe,
+    )
+    return None if result is probe else result
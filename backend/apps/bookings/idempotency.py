@@ -0,0 +1,218 @@
+"""
+پشتیبانی هدر Idempotency-Key برای POSTهای ساخت رزرو.
+
+باجه‌ها روی Wi-Fi ناپایدار بندر درخواست را دوباره می‌فرستند؛ بدون این، هر تلاش دوباره یک رزرو تکراری
+با reference جدید می‌ساخت. حالا کلاینت برای هر «ثبت» یک کلید یکتا (مثلاً UUID) می‌فرستد:
+
+    Idempotency-Key: 6f1c0a52-...
+
+- اولین درخواست با این کلید یک ردیف IdempotencyKey (completed=False) INSERT می‌کند و اجرا می‌شود؛
+  پاسخش (کد وضعیت + بدنهٔ JSON رندرشده) در همان ردیف ذخیره می‌شود.
+- تلاش‌های بعدی با همان کلید و همان بدنه همان بایت‌ها را برمی‌گردانند (هدر Idempotent-Replayed: true)؛
+  نه اعتبارسنجی دوباره، نه نوشتن دوباره.
+- درخواست همزمان با همان کلید: INSERT به قید یکتایی می‌خورد و تا IDEMPOTENCY_WAIT_SECONDS منتظر نتیجهٔ
+  اولی می‌ماند، بعد 409 با Retry-After. پس فقط یک INSERT رزرو انجام می‌شود.
+- همان کلید با بدنهٔ دیگر → 422. پاسخ 5xx یا استثنا ذخیره نمی‌شود (کلید آزاد می‌شود تا تلاش بعدی اجرا شود).
+- کلیدها بعد از IDEMPOTENCY_KEY_TTL منقضی‌اند و با manage.py purge_idempotency_keys پاک می‌شوند.
+"""
+import functools
+import hashlib
+import inspect
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+PURGE_BATCH_SIZE = 2000
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+
+def _wait_seconds():
+    return getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 10)
+
+
+def _lock_timeout():
+    # ردیف ناتمامی که این‌قدر قدیمی است مال پردازه‌ای است که وسط کار مرده؛ کلید دوباره آزاد می‌شود
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 120))
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        sha.update(len(part).to_bytes(8, 'big'))
+        sha.update(part)
+    return sha.hexdigest()
+
+
+def _replay(row):
+    return HttpResponse(
+        bytes(row['response_body']),
+        status=row['status_code'],
+        content_type='application/json',
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def _acquire(key, request_hash):
+    """
+    ردیف کلید را می‌گیرد. خروجی None یعنی «مال ماست، اجرا کن»؛
+    وگرنه پاسخی که باید برگردد (پاسخ ذخیره‌شده، 409 یا 422).
+    """
+    deadline = time.monotonic() + _wait_seconds()
+    while True:
+        now = timezone.now()
+        # اول خواندن: تلاش دوباره (رایج‌ترین حالت) فقط همین یک SELECT است
+        row = (
+            IdempotencyKey.objects.filter(key=key)
+            .values('request_hash', 'completed', 'status_code', 'response_body', 'created_at')[:1]
+        )
+        row = next(iter(row), None)
+        if row is None:
+            try:
+                with transaction.atomic():
+                    IdempotencyKey.objects.create(key=key, request_hash=request_hash, created_at=now)
+                return None
+            except IntegrityError:
+                continue  # درخواست همزمان همین الان کلید را گرفت
+        stale = row['created_at'] < now - (_ttl() if row['completed'] else _lock_timeout())
+        if stale:
+            IdempotencyKey.objects.filter(key=key, created_at=row['created_at']).delete()
+            continue
+        if row['request_hash'] != request_hash:
+            return Response(
+                {'detail': 'این Idempotency-Key قبلاً با درخواست دیگری استفاده شده است.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if row['completed']:
+            return _replay(row)
+        if time.monotonic() >= deadline:
+            return Response(
+                {'detail': 'درخواستی با همین Idempotency-Key در حال اجراست؛ کمی بعد دوباره بفرستید.'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'},
+            )
+        time.sleep(POLL_SECONDS)
+
+
+def _prepare(scope, request):
+    """(پاسخ خطا، None، None) برای کلید نامعتبر؛ وگرنه (None، کلید، هش درخواست)."""
+    raw_key = request.META[HEADER].strip()
+    if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+        return Response(
+            {'detail': f'Idempotency-Key باید ۱ تا {MAX_KEY_LENGTH} نویسه باشد.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        ), None, None
+    user = getattr(request, 'user', None)
+    user_id = str(user.pk) if user is not None and user.is_authenticated else ''
+    key = _digest(scope, user_id, raw_key)
+    # request.body قبل از parse شدن بدنه توسط DRF خوانده می‌شود (Django آن را نگه می‌دارد)
+    request_hash = _digest(request.method, request.get_full_path(), request.content_type or '', request.body)
+    return None, key, request_hash
+
+
+def _release(key):
+    IdempotencyKey.objects.filter(key=key, completed=False).delete()
+
+
+def _finish(key, response):
+    if response.status_code >= 500:
+        _release(key)
+        return
+    # پاسخ DRF → همان data رندرشده؛ پاسخ Django ساده (viewهای async) → بدنهٔ آماده
+    body = JSONRenderer().render(response.data) if hasattr(response, 'data') else response.content
+    IdempotencyKey.objects.filter(key=key).update(
+        completed=True,
+        status_code=response.status_code,
+        response_body=body,
+    )
+
+
+def _plain(response):
+    # viewهای async (async_views.py) از DRF رد نمی‌شوند تا Response رندر شود
+    if isinstance(response, Response):
+        return HttpResponse(
+            JSONRenderer().render(response.data),
+            status=response.status_code,
+            content_type='application/json',
+            headers={name: value for name, value in response.items() if name.lower() != 'content-type'},
+        )
+    return response
+
+
+def idempotent(scope):
+    """
+    دکوراتور متد post یک APIView (یا متد async یک View در async_views.py).
+    scope نام endpoint است تا یک کلید در دو endpoint با هم قاطی نشود.
+    بدون هدر Idempotency-Key رفتار همان قبلی است.
+    """
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                if request.META.get(HEADER) is None:
+                    return await method(view, request, *args, **kwargs)
+                error, key, request_hash = _prepare(scope, request)
+                if error is not None:
+                    return _plain(error)
+                # _acquire کوئری و sleep دارد؛ در نخ جدا تا event loop آزاد بماند
+                replay = await sync_to_async(_acquire)(key, request_hash)
+                if replay is not None:
+                    return _plain(replay)
+                try:
+                    response = await method(view, request, *args, **kwargs)
+                except BaseException:
+                    await sync_to_async(_release)(key)
+                    raise
+                await sync_to_async(_finish)(key, response)
+                return response
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.META.get(HEADER) is None:
+                return method(view, request, *args, **kwargs)
+            error, key, request_hash = _prepare(scope, request)
+            if error is not None:
+                return error
+
+            replay = _acquire(key, request_hash)
+            if replay is not None:
+                return replay
+            try:
+                response = method(view, request, *args, **kwargs)
+            except BaseException:
+                _release(key)
+                raise
+            _finish(key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired(batch_size=PURGE_BATCH_SIZE):
+    """حذف کلیدهای منقضی (دسته‌ای تا قفل طولانی روی جدول نگیرد)؛ خروجی: تعداد حذف‌شده."""
+    cutoff = timezone.now() - max(_ttl(), _lock_timeout())
+    deleted = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,151 @@
+"""
+تبدیل بین شکل JSON قطعه‌های بار / وسیله‌ها (همان BaggageItem و VehicleItem فرانت) و ردیف‌های جدول‌های
+BaggageItem / VehicleItem.
+
+API همان شکل قبلی را می‌گیرد و برمی‌گرداند:
+    baggageItems: [{"baggageType": "checked", "pieceDetails": [{"weightKg": 20, "barcodeId": "..."}]}]
+    vehicleItems: [{"plateNumber": "...", "type": "car", "lengthM": 4.5, "barcodeId": "...", ...}]
+ولی در دیتابیس هر قطعه و هر وسیله یک ردیف با ستون‌های ایندکس‌دار است (برچسب، وزن، نوع، پلاک، شاسی، موتور).
+
+توابع اینجا به مدل‌ها وابسته نیستند تا migration پرکردن جدول‌ها هم از آن‌ها استفاده کند.
+"""
+from decimal import Decimal, InvalidOperation
+
+
+# کلید JSON وسیله → ستون VehicleItem (به ترتیب نمایش)
+VEHICLE_FIELDS = {
+    'plateNumber': 'plate_number',
+    'type': 'vehicle_type',
+    'lengthM': 'length_m',
+    'barcodeId': 'tag_number',
+    'make': 'make',
+    'model': 'model',
+    'year': 'year',
+    'engineNumber': 'engine_number',
+    'chassisNumber': 'chassis_number',
+    'ownerName': 'owner_name',
+    'ownerContact': 'owner_contact',
+    'senderCompany': 'sender_company',
+    'receiverCompany': 'receiver_company',
+}
+# کلیدهایی که فرانت همیشه می‌فرستد؛ بقیه اگر خالی باشند در خروجی نمی‌آیند (مثل قبل)
+VEHICLE_REQUIRED_KEYS = ('plateNumber', 'type', 'barcodeId')
+
+
+class InvalidItem(ValueError):
+    """قطعهٔ بار یا وسیله با شکل/نوع نادرست."""
+
+
+def _decimal(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise InvalidItem(f'{name} باید عدد باشد.')
+    if not number.is_finite() or number < 0:
+        raise InvalidItem(f'{name} باید عدد نامنفی باشد.')
+    try:
+        return number.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        # بیشتر از دقت Decimal (۲۸ رقم)؛ سقف واقعی ستون را سریالایزر بررسی می‌کند
+        raise InvalidItem(f'{name} بیش از حد بزرگ است.')
+
+
+def _integer(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidItem(f'{name} باید عدد صحیح باشد.')
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _number(value):
+    """Decimal ستون → عدد JSON (۲۰ نه ۲۰.۰۰)."""
+    if value is None:
+        return None
+    value = Decimal(value)
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def baggage_rows(groups):
+    """baggageItems (JSON) → لیست دیکشنری ستون‌های BaggageItem. شکل نادرست → InvalidItem."""
+    if not isinstance(groups, list):
+        raise InvalidItem('baggageItems باید لیست باشد.')
+    rows = []
+    for group_index, group in enumerate(groups):
+        if not isinstance(group, dict):
+            raise InvalidItem('هر گروه بار باید یک شیء باشد.')
+        pieces = group.get('pieceDetails') or []
+        if not isinstance(pieces, list):
+            raise InvalidItem('pieceDetails باید لیست باشد.')
+        for position, piece in enumerate(pieces):
+            if not isinstance(piece, dict):
+                raise InvalidItem('هر قطعهٔ بار باید یک شیء باشد.')
+            rows.append({
+                'group': group_index,
+                'position': position,
+                'baggage_type': _text(group.get('baggageType')),
+                'weight_kg': _decimal(piece.get('weightKg'), 'weightKg'),
+                'tag_number': _text(piece.get('barcodeId')),
+            })
+    return rows
+
+
+def vehicle_rows(vehicles):
+    """vehicleItems (JSON) → لیست دیکشنری ستون‌های VehicleItem. شکل نادرست → InvalidItem."""
+    if not isinstance(vehicles, list):
+        raise InvalidItem('vehicleItems باید لیست باشد.')
+    rows = []
+    for position, vehicle in enumerate(vehicles):
+        if not isinstance(vehicle, dict):
+            raise InvalidItem('هر وسیله باید یک شیء باشد.')
+        row = {'position': position}
+        for key, column in VEHICLE_FIELDS.items():
+            value = vehicle.get(key)
+            if key == 'lengthM':
+                row[column] = _decimal(value, key)
+            elif key == 'year':
+                row[column] = _integer(value, key)
+            else:
+                row[column] = _text(value)
+        rows.append(row)
+    return rows
+
+
+def baggage_groups(items):
+    """ردیف‌های BaggageItem (مرتب بر اساس group, position) → baggageItems (JSON)."""
+    groups = []
+    current = None
+    for item in items:
+        if current is None or current[0] != item.group:
+            group = {'pieceDetails': []}
+            if item.baggage_type:
+                group = {'baggageType': item.baggage_type, 'pieceDetails': []}
+            current = (item.group, group)
+            groups.append(group)
+        current[1]['pieceDetails'].append({
+            'weightKg': _number(item.weight_kg),
+            'barcodeId': item.tag_number,
+        })
+    return groups
+
+
+def vehicle_dicts(items):
+    """ردیف‌های VehicleItem (مرتب بر اساس position) → vehicleItems (JSON)."""
+    result = []
+    for item in items:
+        data = {}
+        for key, column in VEHICLE_FIELDS.items():
+            value = getattr(item, column)
+            if key == 'lengthM':
+                value = _number(value)
+            if key in VEHICLE_REQUIRED_KEYS or value not in (None, ''):
+                data[key] = value
+        result.append(data)
+    return result
@@ -0,0 +1,176 @@
+"""
+صف کار پس‌زمینهٔ پایدار روی همان دیتابیس (جدول Job) — برای کارهای جانبی بعد از ثبت رزرو.
+
+رندر رسید و چاپ لیبل اگر داخل create_booking انجام شوند چند ثانیه به POST اضافه می‌کنند و
+خطای چاپگر یعنی خطای ثبت رزرو. حالا:
+
+- enqueue / enqueue_many: ردیف Job در تراکنش فراخواننده INSERT می‌شود؛ rollback رزرو یعنی کاری هم نیست،
+  و کاری که ثبت شد گم نمی‌شود (حتی اگر پردازه بلافاصله بمیرد).
+- manage.py run_jobs --processes N: چند پردازهٔ worker. هر worker کارهای آمادهٔ *یک نوع* را دسته‌ای
+  برمی‌دارد (تا batch_size همان handler) و handler یک بار برای کل دسته صدا زده می‌شود
+  (مثلاً همهٔ لیبل‌ها با یک اتصال به چاپگر).
+- برداشتن کار: PostgreSQL با SELECT ... FOR UPDATE SKIP LOCKED (workerها منتظر هم نمی‌مانند)؛ SQLite قفل
+  ردیفی ندارد، پس همان SELECT + UPDATE شرطی (WHERE status = 'PENDING') در یک تراکنش است — با پروفایل
+  sqlite-wal (BEGIN IMMEDIATE) تراکنش‌های برداشتن پشت سر هم اجرا می‌شوند و در بقیه UPDATE شرطی تضمین می‌کند
+  هیچ کاری دو بار برداشته نشود.
+- خطا: تلاش دوباره با backoff نمایی (JOB_RETRY_BASE_SECONDS × 2^(تلاش-1)، حداکثر JOB_RETRY_MAX_SECONDS،
+  ±۲۰٪ jitter تا کارهای یک چاپگر خاموش همه با هم برنگردند)؛ بعد از max_attempts → DEAD (dead-letter)،
+  با last_error، در پنل ادمین قابل دیدن و برگرداندن به صف.
+- worker مرده: کار RUNNING قدیمی‌تر از JOB_LOCK_TIMEOUT دوباره PENDING می‌شود (یک تلاش حساب شده).
+
+handlerها با @job_handler('kind', batch_size=...) ثبت می‌شوند (tasks.py) و لیست Jobها را می‌گیرند؛
+استثنا یعنی شکست کل دسته، یا خروجی {job.id: 'خطا'} برای شکست فقط بعضی‌ها.
+"""
+import os
+import random
+import socket
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+Handler = namedtuple('Handler', 'kind func batch_size')
+
+_handlers = {}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def job_handler(kind, batch_size=50):
+    """ثبت handler یک نوع کار: func(jobs) → None یا {job.id: پیام خطا}."""
+    def decorator(func):
+        _handlers[kind] = Handler(kind, func, batch_size)
+        return func
+    return decorator
+
+
+def handlers():
+    return dict(_handlers)
+
+
+def _new_job(kind, payload, run_at=None, max_attempts=None):
+    now = timezone.now()
+    return Job(
+        kind=kind,
+        payload=payload,
+        run_at=run_at or now,
+        max_attempts=max_attempts or _setting('JOB_MAX_ATTEMPTS', 5),
+        created_at=now,
+    )
+
+
+def enqueue(kind, payload, run_at=None, max_attempts=None):
+    """یک کار در صف (در تراکنش فعلی، اگر باشد)."""
+    job = _new_job(kind, payload, run_at, max_attempts)
+    job.save()
+    return job
+
+
+def enqueue_many(items):
+    """items: (kind، payload) ها — یک INSERT گروهی."""
+    return Job.objects.bulk_create([_new_job(kind, payload) for kind, payload in items])
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'[:64]
+
+
+def retry_delay(attempts):
+    base = _setting('JOB_RETRY_BASE_SECONDS', 5)
+    delay = min(_setting('JOB_RETRY_MAX_SECONDS', 3600), base * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(worker, kinds=None):
+    """
+    کارهای آمادهٔ قدیمی‌ترین نوع (فقط نوع‌هایی که handler دارند) → (Handler، لیست Job RUNNING) یا (None، []).
+    """
+    kinds = [kind for kind in (kinds or _handlers) if kind in _handlers]
+    if not kinds:
+        return None, []
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.PENDING, kind__in=kinds, run_at__lte=now)
+    kind = due.order_by('run_at', 'id').values_list('kind', flat=True).first()
+    if kind is None:
+        return None, []
+    handler = _handlers[kind]
+
+    with transaction.atomic():
+        candidates = due.filter(kind=kind).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:handler.batch_size])
+        # شرط status دوباره: در SQLite بدون قفل ردیفی، worker دیگری ممکن است همین الان برداشته باشد
+        Job.objects.filter(id__in=ids, status=Job.PENDING).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+    jobs = list(Job.objects.filter(id__in=ids, status=Job.RUNNING, locked_by=worker, locked_at=now))
+    return handler, jobs
+
+
+def run_batch(handler, jobs):
+    """اجرای handler روی یک دسته و ثبت نتیجه؛ خروجی: (تعداد موفق، تعداد شکست)."""
+    try:
+        failures = handler.func(jobs) or {}
+    except Exception as exc:
+        failures = {job.id: f'{type(exc).__name__}: {exc}' for job in jobs}
+
+    now = timezone.now()
+    done = [job.id for job in jobs if job.id not in failures]
+    Job.objects.filter(id__in=done).update(
+        status=Job.DONE, finished_at=now, last_error='', locked_by='', locked_at=None,
+    )
+    for job in jobs:
+        if job.id in failures:
+            _fail(job, str(failures[job.id]), now)
+    return len(done), len(jobs) - len(done)
+
+
+def _fail(job, error, now):
+    if job.attempts >= job.max_attempts:
+        changes = {'status': Job.DEAD, 'finished_at': now}
+    else:
+        changes = {'status': Job.PENDING, 'run_at': now + retry_delay(job.attempts)}
+    Job.objects.filter(id=job.id).update(last_error=error[:2000], locked_by='', locked_at=None, **changes)
+
+
+def recover_stale():
+    """کارهای RUNNING که worker شان مرده (قدیمی‌تر از JOB_LOCK_TIMEOUT) → دوباره PENDING یا DEAD."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('JOB_LOCK_TIMEOUT', 600))
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    error = 'worker stopped before finishing (lock timeout)'
+    recovered = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.PENDING, locked_by='', locked_at=None, last_error=error,
+    )
+    buried = stale.update(
+        status=Job.DEAD, locked_by='', locked_at=None, last_error=error, finished_at=timezone.now(),
+    )
+    return recovered + buried
+
+
+def requeue(queryset):
+    """کارهای DEAD (یا هر queryset) → PENDING برای اجرا همین الان با شمارش تلاش از صفر."""
+    return queryset.exclude(status=Job.RUNNING).update(
+        status=Job.PENDING, attempts=0, run_at=timezone.now(), finished_at=None,
+    )
+
+
+def purge_finished(batch_size=2000):
+    """حذف کارهای DONE قدیمی‌تر از JOB_KEEP_DONE_SECONDS (دسته‌ای)؛ خروجی: تعداد حذف‌شده."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('JOB_KEEP_DONE_SECONDS', 7 * 24 * 3600))
+    deleted = 0
+    while True:
+        ids = list(
+            Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(id__in=ids).delete()[0]
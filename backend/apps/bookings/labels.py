@@ -0,0 +1,213 @@
+"""
+لیبل‌های ZPL برای چاپ مستقیم روی چاپگر Zebra S4M (عرض ۴ اینچ، ۲۰۳ dpi → ۸۱۲ نقطه).
+
+انواع لیبل:
+- PASSENGER_TICKET       بوردینگ‌پاس مسافر
+- CARGO_BOARDING_CARD    کارت بوردینگ بار
+- BAG_TAG                تگ هر قطعه بار (غیر کابین)
+- CABIN_TAG              تگ بار کابین
+- VEHICLE_LABEL          لیبل وسیله همراه مسافر
+- VEHICLE_CARGO_LABEL    لیبل وسیلهٔ بدون مسافر (مالک، فرستنده، گیرنده)
+
+قالب‌ها یک بار هنگام import «کامپایل» می‌شوند: متن ZPL به تکه‌های ثابت و نام فیلدها شکسته می‌شود
+و رندر فقط join کردن تکه‌هاست (بدون parse دوباره). همهٔ لیبل‌های یک حرکت در چند میلی‌ثانیه ساخته می‌شوند.
+"""
+import re
+
+
+PASSENGER_TICKET = 'PASSENGER_TICKET'
+CARGO_BOARDING_CARD = 'CARGO_BOARDING_CARD'
+BAG_TAG = 'BAG_TAG'
+CABIN_TAG = 'CABIN_TAG'
+VEHICLE_LABEL = 'VEHICLE_LABEL'
+VEHICLE_CARGO_LABEL = 'VEHICLE_CARGO_LABEL'
+LABEL_KINDS = (
+    PASSENGER_TICKET, CARGO_BOARDING_CARD, BAG_TAG, CABIN_TAG, VEHICLE_LABEL, VEHICLE_CARGO_LABEL,
+)
+
+# ^CI28 = ورودی UTF-8؛ ^FH_ = داده‌های فیلد می‌توانند کاراکترهای خاص را به شکل _hex داشته باشند
+_HEADER = '^XA^CI28^PW812^LH0,0'
+_TERMINAL = '^FO40,30^A0N,34,34^FDShinas Port International Terminal^FS'
+
+_SOURCES = {
+    PASSENGER_TICKET: (
+        _HEADER + '^LL1218' + _TERMINAL
+        + '^FO40,80^A0N,30,30^FDBOARDING PASS^FS'
+        + '^FO40,140^A0N,28,28^FH_^FDPassenger: {passenger}^FS'
+        + '^FO40,180^A0N,28,28^FH_^FDPassport: {passport}   ID: {id_number}^FS'
+        + '^FO40,240^A0N,40,40^FH_^FD{origin} > {destination}^FS'
+        + '^FO40,300^A0N,28,28^FH_^FDDeparture: {departure}^FS'
+        + '^FO40,340^A0N,28,28^FH_^FDGate: {gate}   Seat: {seat}   Area: {area}^FS'
+        + '^FO40,380^A0N,28,28^FH_^FDCarrier: {carrier}   Boarding: {boarding_time}^FS'
+        + '^FO40,420^A0N,28,28^FH_^FDTicket: {ticket}   Seq: {sequence}^FS'
+        + '^FO40,480^BY3^BCN,120,Y,N,N^FH_^FD{reference}^FS'
+        + '^XZ'
+    ),
+    CARGO_BOARDING_CARD: (
+        _HEADER + '^LL1218' + _TERMINAL
+        + '^FO40,80^A0N,30,30^FDCARGO BOARDING CARD^FS'
+        + '^FO40,140^A0N,28,28^FH_^FDName: {passenger}^FS'
+        + '^FO40,180^A0N,28,28^FH_^FDPassport: {passport}   ID: {id_number}^FS'
+        + '^FO40,240^A0N,40,40^FH_^FD{origin} > {destination}^FS'
+        + '^FO40,300^A0N,28,28^FH_^FDDeparture: {departure}^FS'
+        + '^FO40,340^A0N,28,28^FH_^FDCargo: {pieces} pcs / {weight} kg   Vehicles: {vehicles}^FS'
+        + '^FO40,380^A0N,28,28^FH_^FDCarrier: {carrier}^FS'
+        + '^FO40,440^BY3^BCN,120,Y,N,N^FH_^FD{reference}^FS'
+        + '^XZ'
+    ),
+    BAG_TAG: (
+        _HEADER + '^LL1218' + _TERMINAL
+        + '^FO40,80^A0N,60,60^FH_^FD{destination}^FS'
+        + '^FO40,160^A0N,28,28^FH_^FDFrom: {origin}   Date: {departure_date}^FS'
+        + '^FO40,200^A0N,28,28^FH_^FDName: {passenger}^FS'
+        + '^FO40,240^A0N,28,28^FH_^FDType: {baggage_type}   Piece {piece} of {piece_count}   {piece_weight} kg^FS'
+        + '^FO40,280^A0N,28,28^FH_^FDPNR: {reference}^FS'
+        + '^FO40,340^BY3^BCN,160,Y,N,N^FH_^FD{barcode}^FS'
+        + '^XZ'
+    ),
+    CABIN_TAG: (
+        _HEADER + '^LL406'
+        + '^FO40,20^A0N,40,40^FDCABIN^FS'
+        + '^FO40,70^A0N,26,26^FH_^FD{passenger}^FS'
+        + '^FO40,105^A0N,26,26^FH_^FD{origin} > {destination}   {departure_date}^FS'
+        + '^FO40,150^BY2^BCN,100,Y,N,N^FH_^FD{barcode}^FS'
+        + '^XZ'
+    ),
+    VEHICLE_LABEL: (
+        _HEADER + '^LL812' + _TERMINAL
+        + '^FO40,80^A0N,30,30^FDVEHICLE^FS'
+        + '^FO40,130^A0N,50,50^FH_^FD{plate}^FS'
+        + '^FO40,195^A0N,28,28^FH_^FD{vehicle_type} {make} {model} {year}^FS'
+        + '^FO40,235^A0N,28,28^FH_^FDPassenger: {passenger}^FS'
+        + '^FO40,275^A0N,28,28^FH_^FD{origin} > {destination}   {departure_date}^FS'
+        + '^FO40,330^BY3^BCN,120,Y,N,N^FH_^FD{barcode}^FS'
+        + '^XZ'
+    ),
+    VEHICLE_CARGO_LABEL: (
+        _HEADER + '^LL812' + _TERMINAL
+        + '^FO40,80^A0N,30,30^FDVEHICLE (CARGO)^FS'
+        + '^FO40,130^A0N,50,50^FH_^FD{plate}^FS'
+        + '^FO40,195^A0N,28,28^FH_^FD{vehicle_type} {make} {model} {year}^FS'
+        + '^FO40,235^A0N,24,24^FH_^FDChassis: {chassis}   Engine: {engine}^FS'
+        + '^FO40,270^A0N,24,24^FH_^FDOwner: {owner} {owner_contact}^FS'
+        + '^FO40,305^A0N,24,24^FH_^FDSender: {sender}   Receiver: {receiver}^FS'
+        + '^FO40,340^A0N,28,28^FH_^FD{origin} > {destination}   {departure_date}^FS'
+        + '^FO40,390^BY3^BCN,120,Y,N,N^FH_^FD{barcode}^FS'
+        + '^XZ'
+    ),
+}
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+# کاراکترهای کنترلی ZPL داخل ^FD (با ^FH_ به صورت hex نوشته می‌شوند)
+_ZPL_ESCAPES = str.maketrans({'_': '_5F', '^': '_5E', '~': '_7E', '\n': ' ', '\r': ' '})
+
+
+def zpl_escape(value):
+    if value is None:
+        return ''
+    return str(value).translate(_ZPL_ESCAPES)
+
+
+class ZplTemplate:
+    """قالب از پیش کامپایل‌شده: تکه‌های زوج = متن ثابت، تکه‌های فرد = نام فیلد."""
+
+    __slots__ = ('parts',)
+
+    def __init__(self, source):
+        self.parts = _PLACEHOLDER.split(source)
+
+    def render(self, values):
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = zpl_escape(values.get(parts[i]))
+        return ''.join(parts)
+
+
+TEMPLATES = {kind: ZplTemplate(source) for kind, source in _SOURCES.items()}
+
+
+def _booking_values(booking):
+    """مقادیر مشترک همهٔ لیبل‌های یک رزرو."""
+    dep = booking.departure_date
+    return {
+        'reference': booking.reference,
+        'passenger': booking.passenger_name,
+        'passport': booking.passport_number,
+        'id_number': booking.passenger_id_number,
+        'origin': booking.origin_port,
+        'destination': booking.destination_port,
+        'departure': dep.strftime('%Y-%m-%d %H:%M') if dep else '',
+        'departure_date': dep.strftime('%Y-%m-%d') if dep else '',
+        'gate': booking.departure_gate,
+        'seat': booking.seat_number,
+        'area': booking.seating_area,
+        'carrier': booking.carrier_name,
+        'boarding_time': booking.boarding_time,
+        'ticket': booking.ticket_number,
+        'sequence': booking.sequence_number,
+        'pieces': booking.baggage_pieces or 0,
+        'weight': booking.baggage_weight_kg or 0,
+        'vehicles': len(booking.vehicle_items or []),
+    }
+
+
+def _baggage_pieces(booking):
+    """(نوع بار، قطعه) برای همهٔ قطعه‌های baggage_items."""
+    for group in booking.baggage_items or []:
+        if not isinstance(group, dict):
+            continue
+        for piece in group.get('pieceDetails') or []:
+            if isinstance(piece, dict):
+                yield group.get('baggageType') or '', piece
+
+
+def booking_labels(booking, kinds=None):
+    """
+    همهٔ لیبل‌های یک رزرو به صورت لیست (نوع، ZPL).
+    kinds: محدود کردن به بعضی انواع (پیش‌فرض: همه).
+    """
+    wanted = set(kinds or LABEL_KINDS)
+    base = _booking_values(booking)
+    labels = []
+
+    document = PASSENGER_TICKET if booking.document_type == PASSENGER_TICKET else CARGO_BOARDING_CARD
+    if document in wanted:
+        labels.append((document, TEMPLATES[document].render(base)))
+
+    pieces = list(_baggage_pieces(booking))
+    for number, (baggage_type, piece) in enumerate(pieces, start=1):
+        kind = CABIN_TAG if baggage_type == 'cabin' else BAG_TAG
+        if kind not in wanted:
+            continue
+        values = dict(
+            base,
+            baggage_type=baggage_type,
+            piece=number,
+            piece_count=len(pieces),
+            piece_weight=piece.get('weightKg', ''),
+            barcode=piece.get('barcodeId') or f'{booking.reference}-{number}',
+        )
+        labels.append((kind, TEMPLATES[kind].render(values)))
+
+    vehicle_kind = VEHICLE_LABEL if booking.has_passenger else VEHICLE_CARGO_LABEL
+    if vehicle_kind in wanted:
+        for number, vehicle in enumerate(booking.vehicle_items or [], start=1):
+            if not isinstance(vehicle, dict):
+                continue
+            values = dict(
+                base,
+                plate=vehicle.get('plateNumber'),
+                vehicle_type=vehicle.get('type'),
+                make=vehicle.get('make'),
+                model=vehicle.get('model'),
+                year=vehicle.get('year'),
+                chassis=vehicle.get('chassisNumber'),
+                engine=vehicle.get('engineNumber'),
+                owner=vehicle.get('ownerName'),
+                owner_contact=vehicle.get('ownerContact'),
+                sender=vehicle.get('senderCompany'),
+                receiver=vehicle.get('receiverCompany'),
+                barcode=vehicle.get('barcodeId') or f'{booking.reference}-V{number}',
+            )
+            labels.append((vehicle_kind, TEMPLATES[vehicle_kind].render(values)))
+    return labels
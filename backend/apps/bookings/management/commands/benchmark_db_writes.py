@@ -0,0 +1,150 @@
+"""
+دستور مدیریتی: مقایسهٔ پروفایل‌های دیتابیس (config/database.py) زیر نوشتن همزمان — مثل چند باجهٔ check-in
+که همزمان شمارنده‌های یک حرکت را زیاد می‌کنند.
+
+استفاده:
+    python manage.py benchmark_db_writes --profiles sqlite,sqlite-wal --workers 4 --writes 200
+    DB_POOL=1 POSTGRES_HOST=... python manage.py benchmark_db_writes --profiles sqlite-wal,postgres
+
+برای هر پروفایل چند پردازهٔ جدا (هر کدام با DB_PROFILE همان پروفایل) همزمان شروع می‌کنند و هر کدام
+--writes تراکنش کوچک می‌زنند: خواندن یک شمارنده، UPDATE آن و INSERT یک رویداد (همان الگوی اسکن/آمار).
+پروفایل‌های SQLite روی یک فایل موقت تازه اجرا می‌شوند (db.sqlite3 پروژه دست نمی‌خورد)؛
+برای postgres دو جدول bench_db_writes_* در همان دیتابیس ساخته و در پایان حذف می‌شوند.
+خروجی: تراکنش موفق در ثانیه، میانه / p95 / p99 زمان هر تراکنش و تعداد خطاها (مثلاً database is locked).
+"""
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from config.database import PROFILES
+
+
+COUNTER_TABLE = 'bench_db_writes_counter'
+EVENT_TABLE = 'bench_db_writes_event'
+COUNTERS = 8
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Compare database profiles (DB_PROFILE) under concurrent small write transactions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='sqlite,sqlite-wal')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--writes', type=int, default=200, help='Transactions per worker.')
+        # نقش‌های داخلی پردازه‌های فرزند
+        parser.add_argument('--role', choices=('run', 'setup', 'worker', 'teardown'), default='run')
+        parser.add_argument('--start-at', type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        role = options['role']
+        if role == 'setup':
+            return self._setup()
+        if role == 'teardown':
+            return self._teardown()
+        if role == 'worker':
+            return self._worker(options['writes'], options['start_at'])
+
+        profiles = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = sorted(set(profiles) - set(PROFILES))
+        if unknown:
+            raise CommandError(f'unknown profile(s): {", ".join(unknown)}; choose from {", ".join(PROFILES)}')
+        self.stdout.write(f'{options["workers"]} workers x {options["writes"]} transactions per profile')
+        for profile in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                env = dict(os.environ, DB_PROFILE=profile, SQLITE_PATH=os.path.join(directory, 'bench.sqlite3'))
+                self._run_profile(profile, env, options['workers'], options['writes'])
+
+    # ---------- پردازهٔ اصلی ----------
+
+    def _child(self, env, *arguments):
+        command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_db_writes', *arguments]
+        return subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def _wait(self, process):
+        out, err = process.communicate()
+        if process.returncode:
+            raise CommandError(err.strip().splitlines()[-1] if err.strip() else f'exit {process.returncode}')
+        return out
+
+    def _run_profile(self, profile, env, workers, writes):
+        self._wait(self._child(env, '--role', 'setup'))
+        try:
+            # همه با هم شروع کنند، نه به ترتیب بالا آمدن پردازه‌ها
+            start_at = time.time() + 2 + 0.5 * workers
+            processes = [
+                self._child(env, '--role', 'worker', '--writes', str(writes), '--start-at', str(start_at))
+                for _ in range(workers)
+            ]
+            results = [json.loads(self._wait(process).strip().splitlines()[-1]) for process in processes]
+        finally:
+            self._wait(self._child(env, '--role', 'teardown'))
+
+        latencies = sorted(ms for result in results for ms in result['latencies'])
+        errors = sum(result['errors'] for result in results)
+        elapsed = max(result['elapsed'] for result in results)
+        self.stdout.write(
+            f'{profile:<15} ok={len(latencies):5d}  errors={errors:4d}  {len(latencies) / elapsed:7.0f} tx/s  '
+            f'median={statistics.median(latencies) if latencies else 0:6.2f} ms  '
+            f'p95={_percentile(latencies, 0.95):7.2f} ms  p99={_percentile(latencies, 0.99):7.2f} ms'
+        )
+
+    # ---------- پردازه‌های فرزند ----------
+
+    def _setup(self):
+        key = 'BIGSERIAL PRIMARY KEY' if connection.vendor == 'postgresql' else 'INTEGER PRIMARY KEY'
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {EVENT_TABLE}')
+            cursor.execute(f'DROP TABLE IF EXISTS {COUNTER_TABLE}')
+            cursor.execute(f'CREATE TABLE {COUNTER_TABLE} (id INTEGER PRIMARY KEY, hits INTEGER NOT NULL)')
+            cursor.execute(
+                f'CREATE TABLE {EVENT_TABLE} (id {key}, counter_id INTEGER NOT NULL, '
+                f'hits INTEGER NOT NULL, worker INTEGER NOT NULL)'
+            )
+            for counter_id in range(1, COUNTERS + 1):
+                cursor.execute(f'INSERT INTO {COUNTER_TABLE} (id, hits) VALUES (%s, 0)', [counter_id])
+
+    def _teardown(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {EVENT_TABLE}')
+            cursor.execute(f'DROP TABLE IF EXISTS {COUNTER_TABLE}')
+
+    def _worker(self, writes, start_at):
+        connection.ensure_connection()
+        worker = os.getpid()
+        latencies, errors = [], 0
+        time.sleep(max(0.0, start_at - time.time()))
+        started = time.perf_counter()
+        for _ in range(writes):
+            counter_id = random.randint(1, COUNTERS)
+            begin = time.perf_counter()
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(f'SELECT hits FROM {COUNTER_TABLE} WHERE id = %s', [counter_id])
+                    hits = cursor.fetchone()[0] + 1
+                    cursor.execute(f'UPDATE {COUNTER_TABLE} SET hits = %s WHERE id = %s', [hits, counter_id])
+                    cursor.execute(
+                        f'INSERT INTO {EVENT_TABLE} (counter_id, hits, worker) VALUES (%s, %s, %s)',
+                        [counter_id, hits, worker],
+                    )
+            except OperationalError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - begin) * 1000)
+        self.stdout.write(json.dumps({
+            'latencies': latencies,
+            'errors': errors,
+            'elapsed': time.perf_counter() - started,
+        }))
@@ -0,0 +1,215 @@
+"""
+دستور مدیریتی: تست بار HTTP روی uvicorn — مسیر WSGI، viewهای DRF زیر ASGI و viewهای async (async_views.py).
+
+استفاده (روی کپی دیتابیس، چون سناریوی create رزرو ثبت می‌کند):
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py benchmark_http --concurrency 32 --duration 10
+    python manage.py benchmark_http --modes wsgi,asgi-async --scenarios detail,receipt
+
+برای هر حالت یک پردازهٔ uvicorn (با همان متغیرهای محیطی همین دستور) روی پورت آزاد بالا می‌آید:
+- wsgi:       uvicorn --interface wsgi config.wsgi:application  → /api/bookings/...
+- asgi:       uvicorn config.asgi:application                   → /api/bookings/...  (DRF در نخ sync)
+- asgi-async: uvicorn config.asgi:application                   → /api/async/bookings/...
+و --concurrency اتصال keep-alive همزمان تا --duration ثانیه درخواست می‌فرستند (کلاینت asyncio خام،
+بدون وابستگی اضافه). سناریوها: create (POST رزرو)، detail، search (پاسپورت، پیشوند)، receipt (PDF).
+خروجی هر ردیف: درخواست در ثانیه، میانه / p95 / p99 تأخیر و تعداد پاسخ‌های غیر 2xx/304.
+uvicorn جزو requirements نیست؛ اگر نصب نباشد دستور خطا می‌دهد.
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.models import Booking
+
+
+MODES = {
+    'wsgi': (['--interface', 'wsgi', 'config.wsgi:application'], '/api/bookings/'),
+    'asgi': (['config.asgi:application'], '/api/bookings/'),
+    'asgi-async': (['config.asgi:application'], '/api/async/bookings/'),
+}
+SCENARIOS = ('create', 'detail', 'search', 'receipt')
+SAMPLE_SIZE = 200
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _create_body(index):
+    return json.dumps({
+        'originPort': 'BND',
+        'destinationPort': 'QSM',
+        'departureDate': '2026-11-01T10:00:00',
+        'hasPassenger': True,
+        'passengerName': f'Http Bench {index}',
+        'passportNumber': f'H{index:07d}',
+    }).encode()
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection') == 'close'
+
+
+class _Load:
+    """درخواست‌های یک سناریو روی یک سرور؛ نتیجه: تأخیرها (ms) و تعداد خطاها."""
+
+    def __init__(self, port, requests):
+        self.port = port
+        self.requests = requests  # تابع شمارهٔ درخواست → (method، path، body)
+        self.latencies = []
+        self.errors = 0
+        self.counter = 0
+
+    async def _connection(self, deadline):
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            self.counter += 1
+            method, path, body = self.requests(self.counter)
+            request = (
+                f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'
+            ).encode() + body
+            begin = time.perf_counter()
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, close = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError):
+                self.errors += 1
+                writer.close()
+                writer = None
+                continue
+            self.latencies.append((time.perf_counter() - begin) * 1000)
+            if not (200 <= status < 300 or status == 304):
+                self.errors += 1
+            if close:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    async def run(self, concurrency, duration):
+        started = time.perf_counter()
+        await asyncio.gather(*(self._connection(started + duration) for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Load-test booking endpoints under uvicorn: WSGI vs DRF on ASGI vs async views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES))
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario.')
+
+    def handle(self, *args, **options):
+        modes = [name.strip() for name in options['modes'].split(',') if name.strip()]
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = sorted(set(modes) - set(MODES)) + sorted(set(scenarios) - set(SCENARIOS))
+        if unknown:
+            raise CommandError(f'unknown mode/scenario: {", ".join(unknown)}')
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('uvicorn is not installed (pip install uvicorn).')
+
+        samples = list(
+            Booking.objects.exclude(passport_key='').order_by('-id')
+            .values_list('reference', 'passport_key')[:SAMPLE_SIZE]
+        )
+        if not samples and set(scenarios) - {'create'}:
+            raise CommandError('no bookings with a passport in the database; run the create scenario first.')
+
+        self.stdout.write(
+            f'{options["concurrency"]} connections, {options["duration"]:.0f} s per scenario, '
+            f'{len(samples)} sample bookings'
+        )
+        for mode in modes:
+            arguments, prefix = MODES[mode]
+            port = _free_port()
+            server = self._start(arguments, port)
+            try:
+                for scenario in scenarios:
+                    load = _Load(port, self._requests(scenario, prefix, samples))
+                    elapsed = asyncio.run(load.run(options['concurrency'], options['duration']))
+                    self._report(mode, scenario, load, elapsed)
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+    def _start(self, arguments, port):
+        command = [
+            sys.executable, '-m', 'uvicorn', *arguments,
+            '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log',
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=dict(os.environ), stderr=subprocess.PIPE)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(server.stderr.read().decode().strip().splitlines()[-1])
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                return server
+            except OSError:
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError(f'uvicorn did not start on port {port}')
+
+    def _requests(self, scenario, prefix, samples):
+        run = f'{os.getpid()}{int(time.time()) % 100000}'
+
+        def create(index):
+            return 'POST', prefix, _create_body(int(f'{run}{index:06d}') % 10 ** 7)
+
+        def detail(index):
+            return 'GET', f'{prefix}{samples[index % len(samples)][0]}/', b''
+
+        def search(index):
+            # پیشوند پاسپورت: مسیر prefix روی ایندکس (همان چیزی که باجه هنگام تایپ می‌زند)
+            return 'GET', f'{prefix}search/?passport={samples[index % len(samples)][1][:-1]}&match=prefix', b''
+
+        def receipt(index):
+            return 'GET', f'{prefix}{samples[index % len(samples)][0]}/receipt/pdf/', b''
+
+        return {'create': create, 'detail': detail, 'search': search, 'receipt': receipt}[scenario]
+
+    def _report(self, mode, scenario, load, elapsed):
+        latencies = sorted(load.latencies)
+        self.stdout.write(
+            f'{mode:<11} {scenario:<8} {len(latencies) / elapsed:7.0f} req/s  '
+            f'median={statistics.median(latencies) if latencies else 0:7.1f} ms  '
+            f'p95={_percentile(latencies, 0.95):7.1f} ms  p99={_percentile(latencies, 0.99):7.1f} ms  '
+            f'errors={load.errors}'
+        )
@@ -0,0 +1,93 @@
+"""
+دستور مدیریتی: توان تولید رسید PDF (receipts.py و receipt_cache.py) به صفحه در ثانیه.
+استفاده: python manage.py benchmark_receipts --bookings 1000 --rounds 3
+
+رزروها فقط در حافظه ساخته می‌شوند (بدون دیتابیس). برای هر مسیر میانهٔ زمان چند دور و صفحه در ثانیه چاپ می‌شود:
+- single:   یک سند جدا برای هر رزرو (render_receipt_fields) — همان کار N درخواست تکی /receipt/pdf/
+- pdf:      یک PDF چندصفحه‌ای با قالب مشترک (render_receipts_pdf)
+- zip:      ZIP از PDFهای جدا در همین پردازه
+- zip-pool: همان ZIP با استخر پردازه‌ها (RECEIPT_WORKERS)
+- cached:   هش فیلدها + خواندن از DiskReceiptCache (دانلود دوبارهٔ رسیدی که قبلاً ساخته شده)
+"""
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.bookings import receipts
+from apps.bookings.models import Booking
+from apps.bookings.receipt_cache import DiskReceiptCache, receipt_digest
+
+
+def _bookings(count):
+    created = timezone.now()
+    return [
+        Booking(
+            reference=f'SC-BENCH{index:06d}',
+            created_at=created,
+            passenger_name=f'Bench Passenger {index}',
+            origin_port='BND',
+            destination_port='QSM',
+            baggage_pieces=2,
+            baggage_weight_kg=31.5,
+        )
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Measure receipt PDF throughput (pages per second) for single, batch, ZIP and cached paths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1000)
+        parser.add_argument('--rounds', type=int, default=3)
+
+    def handle(self, *args, **options):
+        count, rounds = options['bookings'], options['rounds']
+        bookings = _bookings(count)
+        fields_list = [receipts.receipt_fields(booking) for booking in bookings]
+        if receipts.render_receipt_fields(fields_list[0]) is None:
+            raise CommandError('reportlab is not installed')
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskReceiptCache(directory, max_bytes=1 << 40)
+            for fields in fields_list:
+                cache.set(receipt_digest(fields), receipts.render_receipt_fields(fields))
+
+            def cached():
+                return [cache.get(receipt_digest(fields)) for fields in fields_list]
+
+            def zip_serial():
+                with override_settings(RECEIPT_PARALLEL_THRESHOLD=count):
+                    return receipts.render_receipts_zip(bookings)
+
+            def zip_pool():
+                with override_settings(RECEIPT_PARALLEL_THRESHOLD=0):
+                    return receipts.render_receipts_zip(bookings)
+
+            paths = {
+                'single': lambda: [receipts.render_receipt_fields(fields) for fields in fields_list],
+                'pdf': lambda: receipts.render_receipts_pdf(bookings),
+                'zip': zip_serial,
+                'zip-pool': zip_pool,
+                'cached': cached,
+            }
+            self.stdout.write(
+                f'{count} receipts, {rounds} rounds, {receipts._workers()} pool workers, '
+                f'logo={"yes" if settings.RECEIPT_LOGO_PATH else "no"}'
+            )
+            for label, render in paths.items():
+                seconds = []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    output = render()
+                    seconds.append(time.perf_counter() - started)
+                size = sum(map(len, output)) if isinstance(output, list) else len(output)
+                median = statistics.median(seconds)
+                self.stdout.write(
+                    f'{label:<9} {median * 1000:8.1f} ms  {count / median:8.0f} pages/s  bytes={size}'
+                )
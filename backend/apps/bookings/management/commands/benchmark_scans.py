@@ -0,0 +1,155 @@
+"""
+دستور مدیریتی: آزمون بار اسکن گیت (scan_index.py) — یک حرکت پر و صف سوار شدن.
+استفاده: python manage.py benchmark_scans --bookings 5000 --scans 3000
+
+روی یک فایل SQLite موقت تازه اجرا می‌شود (migrate و اندازه‌گیری در پردازهٔ جدا؛ db.sqlite3 پروژه دست نمی‌خورد).
+--bookings رزرو روی یک حرکت ساخته می‌شود، بعد:
+- load:   بارگذاری کامل VoyageIndex
+- find:   میانه و p99 پیدا کردن کد در حافظه (PNR، پاسپورت تایپ‌شده، شناسه، بارکد SB) به میکروثانیه
+- record: record_scan برای همهٔ رزروها (BOARDED) + نوشتن دسته‌ای → اسکن در ثانیه
+- http:   --scans درخواست POST /api/bookings/scan/ (EXITED) بدون شبکه → اسکن در ثانیه و تعداد کوئری‌ها
+"""
+import datetime
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.bookings import scan_index
+from apps.bookings.barcodes import booking_payloads, encode
+from apps.bookings.models import Booking, BookingScan
+from apps.bookings.references import next_reference
+from apps.bookings.views import BookingScanView
+from config.database import PROFILES
+
+
+CHUNK_SIZE = 5000
+ORIGIN, DESTINATION = 'BND', 'QSM'
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Load-test gate scans against the in-memory voyage index on a temporary SQLite database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', default='sqlite', choices=[p for p in PROFILES if p.startswith('sqlite')])
+        parser.add_argument('--bookings', type=int, default=5000)
+        parser.add_argument('--scans', type=int, default=3000, help='HTTP scans to send.')
+        parser.add_argument('--seed', type=int, default=1)
+        # نقش داخلی پردازهٔ فرزند
+        parser.add_argument('--role', choices=('run', 'worker'), default='run')
+
+    def handle(self, *args, **options):
+        if options['role'] == 'worker':
+            return self._worker(options['bookings'], options['scans'], random.Random(options['seed']))
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ, DB_PROFILE=options['profile'], SQLITE_PATH=os.path.join(directory, 'bench.sqlite3'),
+            )
+            manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+            subprocess.run([*manage, 'migrate', '--verbosity', '0'], env=env, check=True)
+            worker = subprocess.run(
+                [*manage, 'benchmark_scans', '--role', 'worker', '--bookings', str(options['bookings']),
+                 '--scans', str(options['scans']), '--seed', str(options['seed'])],
+                env=env,
+            )
+            if worker.returncode:
+                raise CommandError(f'benchmark worker exited with {worker.returncode}')
+
+    # ---------- پردازهٔ فرزند ----------
+
+    def _worker(self, count, scans, rng):
+        # نوشتن فقط با flush صریح یا پر شدن بافر، نه با تایمر در نخ دیگر
+        scan_index.recorder.flush_seconds = 0
+        departure = timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time(10)))
+        day = timezone.localdate(departure).isoformat()
+        bookings = self._populate(count, departure)
+
+        started = time.perf_counter()
+        index = scan_index.get_voyage_index(ORIGIN, DESTINATION, day)
+        self.stdout.write(f'load    {count} bookings in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+        codes = []
+        for booking in rng.sample(bookings, min(count, 500)):
+            booking.baggage_items = []
+            codes += [
+                (booking.pk, booking.reference.lower()),
+                (booking.pk, f'{booking.passport_number[:4]}-{booking.passport_number[4:].lower()}'),
+                (booking.pk, booking.passenger_id_number),
+                (booking.pk, encode(booking_payloads(booking)[0][1])),
+            ]
+        latencies = []
+        for booking_id, code in codes:
+            begin = time.perf_counter_ns()
+            record = index.find(code)
+            latencies.append((time.perf_counter_ns() - begin) / 1000)
+            if record is None or record.booking_id != booking_id:
+                raise CommandError(f'find({code!r}) did not return booking {booking_id}')
+        latencies.sort()
+        self.stdout.write(
+            f'find    median={statistics.median(latencies):6.1f} us  p99={_percentile(latencies, 0.99):6.1f} us  '
+            f'({len(latencies)} codes)'
+        )
+
+        started = time.perf_counter()
+        for booking in bookings:
+            scan_index.record_scan(index, booking.reference, BookingScan.BOARDED)
+        scan_index.recorder.flush()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'record  {count / elapsed:8.0f} scans/s ({count} scans incl. batched writes)')
+
+        view = BookingScanView.as_view()
+        factory = APIRequestFactory()
+        sample = [rng.choice(bookings) for _ in range(scans)]
+        statuses = {}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for booking in sample:
+                response = view(factory.post('/api/bookings/scan/', {
+                    'code': booking.passport_number, 'event': BookingScan.EXITED,
+                    'origin': ORIGIN, 'destination': DESTINATION, 'date': day, 'gate': 'G1',
+                }, format='json'))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            scan_index.recorder.flush()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'http    {scans / elapsed:8.0f} scans/s ({scans} requests, {len(queries)} queries, '
+            f'status {dict(sorted(statuses.items()))})'
+        )
+        written = BookingScan.objects.count()
+        self.stdout.write(f'written {written} scan rows')
+
+    def _populate(self, count, departure):
+        bookings = []
+        for offset in range(0, count, CHUNK_SIZE):
+            chunk = []
+            for index in range(offset, min(count, offset + CHUNK_SIZE)):
+                booking = Booking(
+                    reference=next_reference(),
+                    has_passenger=True,
+                    passenger_name=f'Bench Passenger {index}',
+                    passport_number=f'P{index:08d}',
+                    passenger_id_number=f'{9_000_000_000 + index}',
+                    origin_port=ORIGIN,
+                    destination_port=DESTINATION,
+                    departure_date=departure,
+                    document_type='PASSENGER_TICKET',
+                )
+                booking.refresh_search_keys()
+                chunk.append(booking)
+            bookings += Booking.objects.bulk_create(chunk)
+        return bookings
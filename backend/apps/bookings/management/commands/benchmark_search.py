@@ -0,0 +1,163 @@
+"""
+دستور مدیریتی: تأخیر جستجوی رزرو (search.py) روی یک جدول بزرگ — همان کاری که پشت باجهٔ check-in با اسکن پاسپورت انجام می‌شود.
+
+استفاده:
+    python manage.py benchmark_search --bookings 1000000 --lookups 500
+    DB_PROFILE=postgres POSTGRES_HOST=... python manage.py benchmark_search --profile postgres
+
+پروفایل‌های SQLite روی یک فایل موقت تازه اجرا می‌شوند (migrate، ساخت رزروها و اندازه‌گیری در پردازهٔ جدا؛
+db.sqlite3 پروژه دست نمی‌خورد). برای postgres رزروها داخل یک تراکنش ساخته و در پایان rollback می‌شوند.
+
+برای هر راهبرد (exact / prefix / contains و auto با ورودی تایپ‌شدهٔ نامرتب) --lookups جستجو روی رزروهای
+تصادفی زده می‌شود — همان مسیر BookingSearchView بدون HTTP: search_bookings + mapper لیست رزروها.
+خروجی: میانه / p95 / p99 زمان هر جستجو. اگر جستجوی دقیق رزرو مورد نظر را پیدا نکند دستور خطا می‌دهد.
+"""
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bookings.booking_json import mapper_for
+from apps.bookings.models import Booking
+from apps.bookings.references import next_reference
+from apps.bookings.search import search_bookings
+from config.database import PROFILES
+
+
+CHUNK_SIZE = 5000
+LETTERS = 'ABCDEFGHJKLMNPRSTUVWXYZ'
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def _passport(rng):
+    return f'{rng.choice(LETTERS)}{rng.choice(LETTERS)}{rng.randrange(10 ** 7):07d}'
+
+
+def _id_number(rng):
+    return f'{rng.randrange(10 ** 10):010d}'
+
+
+def _messy(value):
+    """همان مقدار به شکلی که کاربر تایپ می‌کند: حروف کوچک، با فاصله و خط تیره."""
+    middle = len(value) // 2
+    return f' {value[:middle].lower()}-{value[middle:]} '
+
+
+# راهبرد → (پارامتر، match، ساخت ورودی از مقدار کامل)
+CASES = {
+    'reference exact': ('reference', 'exact', lambda value: value),
+    'passport exact': ('passport', 'exact', lambda value: value),
+    'passport prefix': ('passport', 'prefix', lambda value: value[:5]),
+    'passport contains': ('passport', 'contains', lambda value: value[3:8]),
+    'id contains': ('id_number', 'contains', lambda value: value[2:8]),
+    'passport auto': ('passport', 'auto', _messy),
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure booking search latency (exact / prefix / contains) on a large bookings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', default='sqlite', choices=PROFILES)
+        parser.add_argument('--bookings', type=int, default=1_000_000)
+        parser.add_argument('--lookups', type=int, default=500, help='Searches per strategy.')
+        parser.add_argument('--seed', type=int, default=1)
+        # نقش داخلی پردازهٔ فرزند
+        parser.add_argument('--role', choices=('run', 'worker'), default='run')
+
+    def handle(self, *args, **options):
+        if options['role'] == 'worker' or options['profile'] == 'postgres':
+            return self._worker(options['bookings'], options['lookups'], options['seed'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ, DB_PROFILE=options['profile'], SQLITE_PATH=os.path.join(directory, 'bench.sqlite3'),
+            )
+            manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+            subprocess.run([*manage, 'migrate', '--verbosity', '0'], env=env, check=True)
+            worker = subprocess.run(
+                [*manage, 'benchmark_search', '--role', 'worker', '--bookings', str(options['bookings']),
+                 '--lookups', str(options['lookups']), '--seed', str(options['seed'])],
+                env=env,
+            )
+            if worker.returncode:
+                raise CommandError(f'benchmark worker exited with {worker.returncode}')
+
+    # ---------- پردازهٔ فرزند (یا خود postgres) ----------
+
+    def _worker(self, count, lookups, seed):
+        try:
+            with transaction.atomic():
+                samples = self._populate(count, lookups, random.Random(seed))
+                self._measure(samples, random.Random(seed + 1))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _populate(self, count, lookups, rng):
+        """count رزرو می‌سازد؛ (reference، پاسپورت، شماره شناسایی) چند رزرو تصادفی را برای جستجو برمی‌گرداند."""
+        wanted = set(rng.sample(range(count), min(count, lookups)))
+        samples = []
+        departure = timezone.now()
+        started = time.perf_counter()
+        for offset in range(0, count, CHUNK_SIZE):
+            chunk = []
+            for index in range(offset, min(count, offset + CHUNK_SIZE)):
+                booking = Booking(
+                    reference=next_reference(),
+                    has_passenger=True,
+                    passenger_name=f'Bench Passenger {index}',
+                    passport_number=_passport(rng),
+                    passenger_id_number=_id_number(rng),
+                    origin_port='BND',
+                    destination_port='QSM',
+                    departure_date=departure,
+                    document_type='PASSENGER_TICKET',
+                )
+                # bulk_create از save() رد نمی‌شود
+                booking.refresh_search_keys()
+                chunk.append(booking)
+                if index in wanted:
+                    samples.append((booking.reference, booking.passport_number, booking.passenger_id_number))
+            Booking.objects.bulk_create(chunk)
+        self.stdout.write(
+            f'{count} bookings on {settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1]} '
+            f'inserted in {time.perf_counter() - started:.1f} s, {len(samples)} lookups per strategy'
+        )
+        return samples
+
+    def _measure(self, samples, rng):
+        mapper = mapper_for(None)
+        for label, (param, match, make_input) in CASES.items():
+            latencies, hits = [], 0
+            for reference, passport, id_number in rng.sample(samples, len(samples)):
+                value = {'reference': reference, 'passport': passport, 'id_number': id_number}[param]
+                begin = time.perf_counter()
+                rows = mapper.dicts(search_bookings(
+                    {param: make_input(value)}, match=match, limit=50, queryset=mapper.rows(Booking.objects.all()),
+                ))
+                latencies.append((time.perf_counter() - begin) * 1000)
+                hits += bool(rows)
+                if match == 'exact' and [row['reference'] for row in rows] != [reference]:
+                    raise CommandError(f'{label}: {value!r} did not find exactly {reference}')
+            latencies.sort()
+            self.stdout.write(
+                f'{label:<18} median={statistics.median(latencies):6.2f} ms  '
+                f'p95={_percentile(latencies, 0.95):6.2f} ms  p99={_percentile(latencies, 0.99):6.2f} ms  '
+                f'with results={hits}/{len(latencies)}'
+            )
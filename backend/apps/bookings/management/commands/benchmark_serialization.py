@@ -0,0 +1,107 @@
+"""
+دستور مدیریتی: مقایسهٔ مسیر قدیمی و سریع تبدیل رزروها به JSON (لیست / جستجو / منیفست).
+استفاده: python manage.py benchmark_serialization --bookings 200 --rounds 20
+
+رزروهای موقت (هر کدام با دو قطعه بار و یک وسیله) داخل یک تراکنش ساخته و در پایان rollback می‌شوند.
+برای هر مسیر میانهٔ زمان «خواندن از دیتابیس + تبدیل به دیکشنری» و «رندر JSON» چاپ می‌شود:
+- model:  Booking.objects.with_items() + _model_to_dict + JSONRenderer (مسیر قبلی)
+- fast:   booking_json (values_list + getterهای از پیش حساب‌شده) + FastJSONRenderer
+- sparse: همان fast با ?fields=reference,passengerName,departureDate
+خروجی model و fast باید یکی باشد؛ اگر نباشد دستور خطا می‌دهد.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.bookings.booking_json import mapper_for, parse_fields
+from apps.bookings.models import Booking
+from apps.bookings.renderers import FastJSONRenderer, orjson
+from apps.bookings.serializers import BookingSerializer, _model_to_dict
+from apps.bookings.services import bulk_create_bookings
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _sample(index):
+    return {
+        'originPort': 'BND',
+        'destinationPort': 'QSM',
+        'departureDate': '2026-11-01T10:00:00',
+        'hasPassenger': True,
+        'hasBaggage': True,
+        'hasVehicle': True,
+        'passengerName': f'Bench Passenger {index}',
+        'passportNumber': f'B{index:07d}',
+        'phoneNumber': '+989120000000',
+        'baggagePieces': 2,
+        'baggageWeightKg': 31.5,
+        'baggageItems': [{'baggageType': 'checked', 'pieceDetails': [
+            {'weightKg': 20, 'barcodeId': f'BG{index:07d}A'},
+            {'weightKg': 11.5, 'barcodeId': f'BG{index:07d}B'},
+        ]}],
+        'vehicleItems': [{'plateNumber': f'{index:05d}-IR', 'type': 'car', 'lengthM': 4.5, 'barcodeId': f'VH{index:07d}'}],
+        'carrierName': 'Bench Lines',
+        'seatNumber': '12A',
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare model-based and values_list-based booking JSON serialization (changes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200)
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options['bookings'], options['rounds'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, count, rounds):
+        rows = []
+        for index in range(count):
+            serializer = BookingSerializer(data=_sample(index))
+            serializer.is_valid(raise_exception=True)
+            rows.append((index, serializer.validated_data))
+        bulk_create_bookings(rows)
+        ids = list(Booking.objects.order_by('-id').values_list('id', flat=True)[:count])
+
+        def queryset():
+            return Booking.objects.filter(id__in=ids)
+
+        full = mapper_for(None)
+        sparse = mapper_for(parse_fields('reference,passengerName,departureDate'))
+        paths = {
+            'model': (
+                lambda: [_model_to_dict(b) for b in queryset().with_items()],
+                JSONRenderer(),
+            ),
+            'fast': (lambda: full.dicts(full.rows(queryset())), FastJSONRenderer()),
+            'sparse': (lambda: sparse.dicts(sparse.rows(queryset())), FastJSONRenderer()),
+        }
+        if paths['model'][0]() != paths['fast'][0]():
+            raise CommandError('model and fast paths produced different output')
+
+        self.stdout.write(f'{count} bookings, {rounds} rounds, orjson={"yes" if orjson else "no"}')
+        for label, (build, renderer) in paths.items():
+            build_ms, render_ms = [], []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                data = build()
+                built = time.perf_counter()
+                body = renderer.render(data)
+                build_ms.append((built - started) * 1000)
+                render_ms.append((time.perf_counter() - built) * 1000)
+            build_median, render_median = statistics.median(build_ms), statistics.median(render_ms)
+            self.stdout.write(
+                f'{label:<7} fetch+map={build_median:7.2f} ms  render={render_median:6.2f} ms  '
+                f'total={build_median + render_median:7.2f} ms  bytes={len(body)}'
+            )
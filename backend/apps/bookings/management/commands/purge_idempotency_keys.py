@@ -0,0 +1,16 @@
+"""
+دستور مدیریتی: حذف کلیدهای Idempotency-Key منقضی (قدیمی‌تر از IDEMPOTENCY_KEY_TTL).
+استفاده: python manage.py purge_idempotency_keys
+روزی یک بار از cron اجرا کنید تا جدول کوچک بماند.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.bookings.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired idempotency keys deleted'))
@@ -0,0 +1,132 @@
+"""
+دستور مدیریتی: worker صف کار پس‌زمینه (apps/bookings/jobs.py).
+
+استفاده:
+    python manage.py run_jobs                     # یک worker، تا Ctrl+C / SIGTERM
+    python manage.py run_jobs --processes 4       # چهار پردازهٔ worker (پردازهٔ مرده دوباره بالا می‌آید)
+    python manage.py run_jobs --once              # تا خالی شدن صف، بعد خروج (cron / تست)
+    python manage.py run_jobs --kinds receipt.render
+    python manage.py run_jobs --stats             # تعداد کارها به تفکیک نوع و وضعیت
+    python manage.py run_jobs --requeue-dead      # کارهای DEAD دوباره به صف
+    python manage.py run_jobs --purge             # حذف کارهای DONE قدیمی‌تر از JOB_KEEP_DONE_SECONDS
+
+با SIGTERM هر worker دستهٔ فعلی را تمام می‌کند و بیرون می‌آید (کار نیمه‌کاره نمی‌ماند).
+"""
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Count
+
+from apps.bookings import jobs
+from apps.bookings.models import Job
+
+
+# هر چند ثانیه کارهای worker های مرده به صف برمی‌گردند
+RECOVER_EVERY = 30
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (durable DB-backed queue).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--kinds', default='', help='Comma-separated job kinds (default: all registered).')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between polls of an empty queue.')
+        parser.add_argument('--stats', action='store_true')
+        parser.add_argument('--requeue-dead', action='store_true')
+        parser.add_argument('--purge', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            return self._stats()
+        if options['requeue_dead']:
+            count = jobs.requeue(Job.objects.filter(status=Job.DEAD))
+            self.stdout.write(self.style.SUCCESS(f'{count} dead jobs requeued'))
+            return
+        if options['purge']:
+            self.stdout.write(self.style.SUCCESS(f'{jobs.purge_finished()} finished jobs deleted'))
+            return
+
+        kinds = [kind.strip() for kind in options['kinds'].split(',') if kind.strip()] or None
+        if options['processes'] > 1:
+            return self._supervise(options)
+        self._work(kinds, options['once'], options['poll'])
+
+    # ---------- worker ----------
+
+    def _work(self, kinds, once, poll):
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+        worker = jobs.worker_name()
+        self.stdout.write(f'worker {worker}: {", ".join(kinds or jobs.handlers())}')
+        last_recover = 0.0
+        while not stop.is_set():
+            close_old_connections()
+            if time.monotonic() - last_recover > RECOVER_EVERY:
+                jobs.recover_stale()
+                last_recover = time.monotonic()
+            handler, batch = jobs.claim(worker, kinds)
+            if not batch:
+                if once:
+                    break
+                stop.wait(poll)
+                continue
+            started = time.perf_counter()
+            done, failed = jobs.run_batch(handler, batch)
+            self.stdout.write(
+                f'{handler.kind}: {done} done, {failed} failed ({(time.perf_counter() - started) * 1000:.0f} ms)'
+            )
+
+    # ---------- چند پردازه ----------
+
+    def _child(self, options):
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'run_jobs',
+            '--processes', '1', '--poll', str(options['poll']),
+        ]
+        if options['kinds']:
+            command += ['--kinds', options['kinds']]
+        if options['once']:
+            command.append('--once')
+        return subprocess.Popen(command)
+
+    def _supervise(self, options):
+        stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stopping.set())
+        children = [self._child(options) for _ in range(options['processes'])]
+        try:
+            while children:
+                for child in list(children):
+                    if child.poll() is None:
+                        continue
+                    if options['once'] or stopping.is_set():
+                        children.remove(child)
+                    else:
+                        self.stderr.write(f'worker pid {child.pid} exited ({child.returncode}); restarting')
+                        children[children.index(child)] = self._child(options)
+                if stopping.wait(0.5):
+                    for child in children:
+                        if child.poll() is None:
+                            child.terminate()
+        finally:
+            for child in children:
+                child.wait()
+
+    # ---------- گزارش ----------
+
+    def _stats(self):
+        rows = Job.objects.values('kind', 'status').annotate(count=Count('id')).order_by('kind', 'status')
+        for row in rows:
+            self.stdout.write(f'{row["kind"]:<20} {row["status"]:<8} {row["count"]}')
+        if not rows:
+            self.stdout.write('queue is empty')
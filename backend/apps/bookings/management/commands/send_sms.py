@@ -0,0 +1,106 @@
+"""
+دستور مدیریتی: ارسال صف SMS (apps/bookings/sms.py) با provider تنظیم‌شده در SMS_PROVIDER.
+
+استفاده:
+    python manage.py send_sms                        # تا Ctrl+C / SIGTERM
+    python manage.py send_sms --once                 # پیام‌های آماده را بفرست و خارج شو (cron / تست)
+    python manage.py send_sms --stats                # تعداد پیام‌ها به تفکیک وضعیت
+    python manage.py send_sms --departed VOY-2025-001  # خبر حرکت به همهٔ رزروهای این حرکت (فقط صف)
+    python manage.py send_sms --benchmark 5000 --recipients 1500   # درگاه محلی + گزارش توان عملیاتی
+
+با SIGTERM دور فعلی تمام می‌شود و بعد خروج (پیام نیمه‌کاره SENDING نمی‌ماند).
+"""
+import signal
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.bookings.models import SmsMessage, Voyage
+from apps.bookings.sms import SmsDispatcher, SmsStats, TokenBucket, queue_departure_sms
+from apps.bookings.sms_providers import HttpSmsProvider, LocalSmsGateway, get_sms_provider
+
+
+BENCHMARK_TOPIC = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Send queued SMS messages (coalesced per recipient, bulk and rate limited).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when no message is due.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between polls of an empty queue.')
+        parser.add_argument('--stats', action='store_true')
+        parser.add_argument('--departed', metavar='VOYAGE_CODE', help='Queue departure SMS for a voyage.')
+        parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                            help='Send N messages through a local gateway and report throughput.')
+        parser.add_argument('--recipients', type=int, default=0, help='Distinct recipients for --benchmark.')
+        parser.add_argument('--rate', type=float, default=0, help='Override SMS_RATE_PER_SECOND for --benchmark.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Gateway latency for --benchmark (s).')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            return self._stats()
+        if options['departed']:
+            voyage = Voyage.objects.filter(code=options['departed']).first()
+            if voyage is None:
+                raise CommandError(f"voyage {options['departed']} not found")
+            self.stdout.write(self.style.SUCCESS(f'{queue_departure_sms(voyage)} departure messages queued'))
+            return
+        if options['benchmark']:
+            return self._benchmark(options)
+
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+        provider = get_sms_provider()
+        dispatcher = SmsDispatcher(provider)
+        try:
+            dispatcher.run(stop, once=options['once'], poll=options['poll'])
+        finally:
+            provider.close()
+        self.stdout.write(dispatcher.stats.summary())
+
+    def _stats(self):
+        rows = SmsMessage.objects.values('status').annotate(count=Count('id')).order_by('status')
+        for row in rows:
+            self.stdout.write(f'{row["status"]:<8} {row["count"]}')
+        if not rows:
+            self.stdout.write('outbox is empty')
+
+    def _benchmark(self, options):
+        total = options['benchmark']
+        recipients = options['recipients'] or total
+        run = uuid.uuid4().hex[:8]
+        now = timezone.now()
+        SmsMessage.objects.bulk_create([
+            SmsMessage(
+                recipient=f'+9689{i % recipients:07d}', topic=BENCHMARK_TOPIC,
+                text=f'benchmark {run} message {i}', dedupe_key=f'{BENCHMARK_TOPIC}-{run}-{i}',
+                send_after=now, created_at=now,
+            )
+            for i in range(total)
+        ], batch_size=1000)
+
+        gateway = LocalSmsGateway(latency=options['latency']).start()
+        provider = HttpSmsProvider(gateway.url, sender='ShinasPort')
+        bucket = None
+        if options['rate']:
+            bucket = TokenBucket(options['rate'], max(provider.max_batch, int(options['rate'])))
+        dispatcher = SmsDispatcher(provider, bucket=bucket, stats=SmsStats())
+        started = time.perf_counter()
+        try:
+            dispatcher.run(threading.Event(), once=True)
+        finally:
+            provider.close()
+            gateway.stop()
+            SmsMessage.objects.filter(topic=BENCHMARK_TOPIC, dedupe_key__startswith=f'{BENCHMARK_TOPIC}-{run}-').delete()
+        self.stdout.write(dispatcher.stats.summary())
+        self.stdout.write(
+            f'{total} messages, {recipients} recipients in {time.perf_counter() - started:.2f} s; '
+            f'gateway: {gateway.requests} requests, {len(gateway.received)} SMS; '
+            f'HTTP connections opened: {provider.pool.created}'
+        )
@@ -0,0 +1,30 @@
+"""
+دستور مدیریتی: درگاه SMS ساختگی برای تست — همان API گروهی HttpSmsProvider (apps/bookings/sms_providers.py).
+استفاده: python manage.py sms_gateway --port 9110 [--fail-every 5] [--latency 0.05]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.bookings.sms_providers import LocalSmsGateway
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMS gateway (bulk JSON API) that prints received messages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9110)
+        parser.add_argument('--fail-every', type=int, default=0, help='Answer every Nth bulk request with 503.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each answer.')
+
+    def handle(self, *args, **options):
+        gateway = LocalSmsGateway(
+            options['host'], options['port'], fail_every=options['fail_every'], latency=options['latency'],
+            on_message=lambda message: self.stdout.write(f"{message.get('to')}: {message.get('text')}"),
+        )
+        self.stdout.write(f'SMS gateway listening on {gateway.url} (Ctrl+C to stop)')
+        try:
+            gateway.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway.server.server_close()
@@ -0,0 +1,39 @@
+"""
+دستور مدیریتی: یک «چاپگر Zebra» ساختگی برای تست — روی پورت TCP گوش می‌دهد و ZPL دریافتی را ذخیره/چاپ می‌کند.
+استفاده: python manage.py zpl_sink --port 9100 --output labels.zpl
+(همان LocalZplSink در apps/bookings/printing.py که تست‌ها در نخ جدا اجرا می‌کنند.)
+"""
+from django.core.management.base import BaseCommand
+
+from apps.bookings.printing import LocalZplSink
+
+
+class Command(BaseCommand):
+    help = 'Listen on a TCP port like a Zebra printer and dump received ZPL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9100)
+        parser.add_argument('--output', help='Append received ZPL to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+
+        def received(address, data):
+            if output:
+                with open(output, 'ab') as fh:
+                    fh.write(data)
+            else:
+                self.stdout.write(data.decode('utf-8', errors='replace'))
+            self.stdout.write(self.style.SUCCESS(
+                f'{address[0]}: {len(data)} bytes, {data.count(b"^XZ")} labels'
+            ))
+
+        sink = LocalZplSink(options['host'], options['port'], on_receive=received)
+        self.stdout.write(f"ZPL sink listening on {options['host']}:{options['port']} (Ctrl+C to stop)")
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server.server_close()
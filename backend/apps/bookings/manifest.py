@@ -0,0 +1,134 @@
+"""
+منیفست سفر (لیست مسافر، بار و وسیله برای یک حرکت) به صورت CSV یا XLSX.
+
+هر رزرو چند ردیف می‌دهد:
+- یک ردیف PASSENGER (اطلاعات رزرو/مسافر)
+- یک ردیف BAGGAGE برای هر قطعه بار (جدول BaggageItem)
+- یک ردیف VEHICLE برای هر وسیله (جدول VehicleItem)
+
+رزروها با iterator(chunk_size=...) از دیتابیس خوانده و ردیف به ردیف نوشته می‌شوند؛
+پس حافظه برای ۵۰ ردیف و ۵۰٬۰۰۰ ردیف تقریباً یکسان است.
+فقط ستون‌های منیفست خوانده می‌شوند (booking_json، بدون ساختن شیء Booking).
+متن‌هایی که شبیه فرمول‌اند (= + - @) با ' شروع می‌شوند تا صفحه‌گسترده آن‌ها را اجرا نکند.
+"""
+import csv
+import tempfile
+from itertools import islice
+
+from .booking_json import mapper_for
+
+
+CHUNK_SIZE = 2000
+
+# ستون‌های رزرو (کلیدهای booking_json.FIELDS)
+BOOKING_COLUMNS = [
+    'reference', 'documentType', 'passengerName', 'passportNumber', 'passengerIdNumber',
+    'phoneNumber', 'originPort', 'destinationPort', 'departureDate', 'carrierName',
+    'departureGate', 'seatNumber', 'seatingArea', 'ticketNumber', 'sequenceNumber', 'boardingTime',
+    'baggagePieces', 'baggageWeightKg',
+]
+# ستون‌های هر قطعه بار / وسیله
+ITEM_COLUMNS = [
+    'itemType', 'baggageType', 'pieceWeightKg', 'barcodeId',
+    'plateNumber', 'vehicleType', 'lengthM', 'make', 'model', 'year',
+    'engineNumber', 'chassisNumber', 'ownerName', 'ownerContact', 'senderCompany', 'receiverCompany',
+]
+COLUMNS = BOOKING_COLUMNS + ITEM_COLUMNS
+
+# fieldset خوانده‌شده از دیتابیس
+MANIFEST_FIELDS = tuple(BOOKING_COLUMNS) + ('baggageItems', 'vehicleItems')
+
+_VEHICLE_KEYS = [
+    'plateNumber', 'lengthM', 'make', 'model', 'year', 'engineNumber', 'chassisNumber',
+    'ownerName', 'ownerContact', 'senderCompany', 'receiverCompany',
+]
+
+
+# متنی که با این نویسه‌ها شروع شود را اکسل / LibreOffice فرمول حساب می‌کنند (CSV injection)؛
+# نام یا شمارهٔ تلفنی که کاربر وارد کرده نباید در کامپیوتر کارکنان بندر اجرا شود
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def booking_rows(data):
+    """ردیف‌های منیفست یک رزرو (دیکشنری JSON رزرو) — لیست مقادیر به ترتیب COLUMNS."""
+    base = [_cell(data[key]) for key in BOOKING_COLUMNS]
+    empty = {key: '' for key in ITEM_COLUMNS}
+
+    yield base + [_cell(v) for v in dict(empty, itemType='PASSENGER').values()]
+
+    for group in data['baggageItems']:
+        if not isinstance(group, dict):
+            continue
+        for piece in group.get('pieceDetails') or []:
+            if not isinstance(piece, dict):
+                continue
+            item = dict(
+                empty,
+                itemType='BAGGAGE',
+                baggageType=group.get('baggageType'),
+                pieceWeightKg=piece.get('weightKg'),
+                barcodeId=piece.get('barcodeId'),
+            )
+            yield base + [_cell(v) for v in item.values()]
+
+    for vehicle in data['vehicleItems']:
+        if not isinstance(vehicle, dict):
+            continue
+        item = dict(empty, itemType='VEHICLE', barcodeId=vehicle.get('barcodeId'), vehicleType=vehicle.get('type'))
+        item.update({key: vehicle.get(key) for key in _VEHICLE_KEYS})
+        yield base + [_cell(v) for v in item.values()]
+
+
+def manifest_rows(queryset):
+    """
+    همهٔ ردیف‌های منیفست برای یک queryset، بدون بارگذاری کل نتایج در حافظه.
+    قطعه‌های بار و وسیله‌ها برای هر chunk با یک کوئری خوانده می‌شوند.
+    """
+    mapper = mapper_for(MANIFEST_FIELDS)
+    rows = mapper.rows(queryset).iterator(chunk_size=CHUNK_SIZE)
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        for data in mapper.dicts(chunk):
+            yield from booking_rows(data)
+
+
+class _Echo:
+    """شیء شبه‌فایل برای csv.writer که به‌جای نوشتن، همان خط را برمی‌گرداند."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset):
+    """تولیدکنندهٔ خطوط CSV (با BOM تا اکسل متن فارسی/عربی را درست باز کند)."""
+    writer = csv.writer(_Echo())
+    yield '﻿' + writer.writerow(COLUMNS)
+    for row in manifest_rows(queryset):
+        yield writer.writerow(row)
+
+
+def build_xlsx(queryset):
+    """
+    فایل XLSX منیفست در یک فایل موقت (openpyxl در حالت write_only، ردیف به ردیف).
+    اگر openpyxl نصب نباشد None برمی‌گرداند.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return None
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Manifest')
+    sheet.append(COLUMNS)
+    for row in manifest_rows(queryset):
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_add_port_carrier'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='booking',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'رزرو', 'verbose_name_plural': 'رزروها'},
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at', '-id'], name='booking_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['origin_port', 'destination_port', '-created_at', '-id'], name='booking_route_created_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.11 on 2026-10-18 06:59
+
+from django.db import migrations, models
+
+from apps.bookings.normalization import normalize_lookup
+
+
+BATCH_SIZE = 2000
+KEY_FIELDS = {
+    'reference': 'reference_key',
+    'passport_number': 'passport_key',
+    'passenger_id_number': 'id_number_key',
+}
+
+
+def backfill_search_keys(apps, schema_editor):
+    """پر کردن کلیدهای جستجو برای رزروهای موجود — دسته‌ای، بدون بارگذاری کل جدول در حافظه."""
+    Booking = apps.get_model('bookings', 'Booking')
+    db = schema_editor.connection.alias
+    rows = Booking.objects.using(db).only('id', *KEY_FIELDS).order_by('id').iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for booking in rows:
+        for source, key in KEY_FIELDS.items():
+            setattr(booking, key, normalize_lookup(getattr(booking, source)))
+        batch.append(booking)
+        if len(batch) >= BATCH_SIZE:
+            Booking.objects.using(db).bulk_update(batch, list(KEY_FIELDS.values()))
+            batch = []
+    if batch:
+        Booking.objects.using(db).bulk_update(batch, list(KEY_FIELDS.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='id_number_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='passport_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='reference_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.bookings.normalization import name_search_keys
+
+
+BATCH_SIZE = 2000
+
+
+def backfill_name_keys(apps, schema_editor):
+    """ساخت کلیدهای نام برای رزروهای موجود — دسته‌ای و جریانی."""
+    Booking = apps.get_model('bookings', 'Booking')
+    PassengerNameKey = apps.get_model('bookings', 'PassengerNameKey')
+    db = schema_editor.connection.alias
+    rows = (
+        Booking.objects.using(db)
+        .exclude(passenger_name='')
+        .order_by('id')
+        .values_list('id', 'passenger_name')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for booking_id, name in rows:
+        batch.extend(
+            PassengerNameKey(booking_id=booking_id, kind=kind, key=key)
+            for kind, key in name_search_keys(name)
+        )
+        if len(batch) >= BATCH_SIZE:
+            PassengerNameKey.objects.using(db).bulk_create(batch)
+            batch = []
+    if batch:
+        PassengerNameKey.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PassengerNameKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('name', 'Full name'), ('token', 'Name token'), ('phonetic', 'Phonetic key')], max_length=8)),
+                ('key', models.CharField(max_length=255)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_keys', to='bookings.booking')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'key', 'booking'], name='passenger_name_key_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_name_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_passenger_name_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('BOARDED', 'Boarded'), ('EXITED', 'Exited')], max_length=8)),
+                ('scanned_at', models.DateTimeField()),
+                ('gate', models.CharField(blank=True, max_length=32)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scans', to='bookings.booking')),
+            ],
+            options={
+                'verbose_name': 'اسکن',
+                'verbose_name_plural': 'اسکن\u200cها',
+                'ordering': ['-scanned_at', '-id'],
+                'indexes': [models.Index(fields=['booking', '-scanned_at'], name='booking_scan_latest_idx')],
+            },
+        ),
+    ]
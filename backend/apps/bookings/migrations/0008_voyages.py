@@ -0,0 +1,59 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_scans'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Voyage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='کد حرکت مثلاً DXB-KIH-0301-A', max_length=32, unique=True)),
+                ('departure_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('CLOSED', 'Closed')], default='OPEN', max_length=8)),
+                ('passenger_capacity', models.PositiveIntegerField(default=0)),
+                ('cargo_capacity_kg', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('vehicle_lane_capacity_m', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('passengers_booked', models.PositiveIntegerField(default=0, editable=False)),
+                ('cargo_booked_kg', models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12)),
+                ('vehicle_lane_booked_m', models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=8)),
+                ('seat_map', models.BinaryField(default=b'')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('carrier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='voyages', to='bookings.carrier')),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='arriving_voyages', to='bookings.port')),
+                ('origin', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='departing_voyages', to='bookings.port')),
+            ],
+            options={
+                'verbose_name': 'حرکت',
+                'verbose_name_plural': 'حرکت\u200cها',
+                'ordering': ['departure_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VoyageAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seat', models.PositiveIntegerField(blank=True, null=True)),
+                ('passengers', models.PositiveIntegerField(default=0)),
+                ('cargo_kg', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('vehicle_lane_m', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='allocation', to='bookings.booking')),
+                ('voyage', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='bookings.voyage')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='voyage',
+            index=models.Index(fields=['origin', 'destination', 'departure_at'], name='voyage_route_departure_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='voyageallocation',
+            constraint=models.UniqueConstraint(fields=('voyage', 'seat'), name='voyage_allocation_seat_unique'),
+        ),
+    ]
@@ -0,0 +1,155 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.bookings.items import InvalidItem, baggage_groups, baggage_rows, vehicle_dicts, vehicle_rows
+
+
+BATCH_SIZE = 2000
+
+
+def _rows(convert, value):
+    """
+    تبدیل JSON قدیمی به ردیف. دادهٔ قدیمی اعتبارسنجی نشده بود؛ اگر کل لیست خراب بود،
+    عضوها تک‌تک تبدیل می‌شوند و فقط عضو خراب کنار گذاشته می‌شود.
+    """
+    if not isinstance(value, list):
+        return []
+    try:
+        return convert(value)
+    except InvalidItem:
+        rows = []
+        for index, element in enumerate(value):
+            try:
+                converted = convert([element])
+            except InvalidItem:
+                continue
+            for row in converted:
+                row['group' if 'group' in row else 'position'] = index
+            rows.extend(converted)
+        return rows
+
+
+def _clip(model, row):
+    # ستون‌های متنی به طول ستون بریده می‌شوند (PostgreSQL مقدار بلندتر را رد می‌کند)
+    for name, value in row.items():
+        max_length = getattr(model._meta.get_field(name), 'max_length', None)
+        if max_length and isinstance(value, str):
+            row[name] = value[:max_length]
+    return model(**row)
+
+
+def copy_items_to_tables(apps, schema_editor):
+    """baggage_items / vehicle_items هر رزرو → ردیف‌های BaggageItem / VehicleItem (دسته‌ای و جریانی)."""
+    Booking = apps.get_model('bookings', 'Booking')
+    BaggageItem = apps.get_model('bookings', 'BaggageItem')
+    VehicleItem = apps.get_model('bookings', 'VehicleItem')
+    db = schema_editor.connection.alias
+    rows = (
+        Booking.objects.using(db)
+        .order_by('id')
+        .values_list('id', 'baggage_items', 'vehicle_items')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    baggage, vehicles = [], []
+    for booking_id, baggage_json, vehicle_json in rows:
+        baggage.extend(
+            _clip(BaggageItem, dict(row, booking_id=booking_id)) for row in _rows(baggage_rows, baggage_json)
+        )
+        vehicles.extend(
+            _clip(VehicleItem, dict(row, booking_id=booking_id)) for row in _rows(vehicle_rows, vehicle_json)
+        )
+        if len(baggage) >= BATCH_SIZE:
+            BaggageItem.objects.using(db).bulk_create(baggage)
+            baggage = []
+        if len(vehicles) >= BATCH_SIZE:
+            VehicleItem.objects.using(db).bulk_create(vehicles)
+            vehicles = []
+    BaggageItem.objects.using(db).bulk_create(baggage)
+    VehicleItem.objects.using(db).bulk_create(vehicles)
+
+
+def copy_items_to_json(apps, schema_editor):
+    """برگشت: ردیف‌ها → JSON روی رزرو."""
+    Booking = apps.get_model('bookings', 'Booking')
+    db = schema_editor.connection.alias
+    bookings = (
+        Booking.objects.using(db)
+        .only('id')
+        .order_by('id')
+        .prefetch_related('baggage', 'vehicles')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for booking in bookings:
+        booking.baggage_items = baggage_groups(booking.baggage.all())
+        booking.vehicle_items = vehicle_dicts(booking.vehicles.all())
+        batch.append(booking)
+        if len(batch) >= BATCH_SIZE:
+            Booking.objects.using(db).bulk_update(batch, ['baggage_items', 'vehicle_items'])
+            batch = []
+    if batch:
+        Booking.objects.using(db).bulk_update(batch, ['baggage_items', 'vehicle_items'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_voyages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BaggageItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.PositiveSmallIntegerField(default=0)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('baggage_type', models.CharField(blank=True, db_index=True, max_length=32)),
+                ('weight_kg', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('tag_number', models.CharField(blank=True, db_index=True, help_text='barcodeId برچسب', max_length=64)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='baggage', to='bookings.booking')),
+            ],
+            options={
+                'verbose_name': 'قطعهٔ بار',
+                'verbose_name_plural': 'قطعه\u200cهای بار',
+                'ordering': ['booking', 'group', 'position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VehicleItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('plate_number', models.CharField(blank=True, db_index=True, max_length=32)),
+                ('vehicle_type', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('length_m', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('tag_number', models.CharField(blank=True, db_index=True, help_text='barcodeId برچسب', max_length=64)),
+                ('make', models.CharField(blank=True, max_length=64)),
+                ('model', models.CharField(blank=True, max_length=64)),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('engine_number', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('chassis_number', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('owner_name', models.CharField(blank=True, max_length=255)),
+                ('owner_contact', models.CharField(blank=True, max_length=64)),
+                ('sender_company', models.CharField(blank=True, max_length=255)),
+                ('receiver_company', models.CharField(blank=True, max_length=255)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vehicles', to='bookings.booking')),
+            ],
+            options={
+                'verbose_name': 'وسیله',
+                'verbose_name_plural': 'وسیله\u200cها',
+                'ordering': ['booking', 'position'],
+            },
+        ),
+        migrations.RunPython(copy_items_to_tables, copy_items_to_json),
+        migrations.RemoveField(
+            model_name='booking',
+            name='baggage_items',
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='vehicle_items',
+        ),
+    ]
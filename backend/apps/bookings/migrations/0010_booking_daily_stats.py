@@ -0,0 +1,51 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+from apps.bookings.rollups import BATCH_SIZE, KEY_FIELDS, totals
+
+
+def build_daily_stats(apps, schema_editor):
+    """پرکردن اولیهٔ آمار روزانه از رزروهای موجود (همان محاسبهٔ rollups.rebuild با مدل‌های تاریخی)."""
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingDailyStat = apps.get_model('bookings', 'BookingDailyStat')
+    db = schema_editor.connection.alias
+    stats = totals(Booking.objects.using(db).all())
+    BookingDailyStat.objects.using(db).bulk_create(
+        [BookingDailyStat(**dict(zip(KEY_FIELDS, key)), **counts._asdict()) for key, counts in stats.items()],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_baggage_vehicle_items'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('origin_port', models.CharField(max_length=64)),
+                ('destination_port', models.CharField(max_length=64)),
+                ('carrier_name', models.CharField(blank=True, max_length=128)),
+                ('document_type', models.CharField(max_length=32)),
+                ('bookings', models.IntegerField(default=0)),
+                ('passengers', models.IntegerField(default=0)),
+                ('baggage_pieces', models.IntegerField(default=0)),
+                ('baggage_weight_kg', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vehicles', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'آمار روزانه',
+                'verbose_name_plural': 'آمار روزانه',
+                'ordering': ['day', 'origin_port', 'destination_port', 'carrier_name', 'document_type'],
+                'indexes': [models.Index(fields=['origin_port', 'day'], name='daily_stat_origin_day_idx'), models.Index(fields=['carrier_name', 'day'], name='daily_stat_carrier_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'origin_port', 'destination_port', 'carrier_name', 'document_type'), name='booking_daily_stat_unique')],
+            },
+        ),
+        migrations.RunPython(build_daily_stats, migrations.RunPython.noop),
+    ]
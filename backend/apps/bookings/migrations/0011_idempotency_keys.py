@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('completed', models.BooleanField(default=False)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response_body', models.BinaryField(default=b'')),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'کلید idempotency',
+                'verbose_name_plural': 'کلیدهای idempotency',
+            },
+        ),
+    ]
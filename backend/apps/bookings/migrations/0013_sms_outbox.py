@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-18 08:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_background_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.CharField(max_length=32)),
+                ('topic', models.CharField(max_length=32)),
+                ('text', models.CharField(max_length=320)),
+                ('dedupe_key', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=8)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('send_after', models.DateTimeField()),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('provider_id', models.CharField(blank=True, max_length=64)),
+                ('last_error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sms_messages', to='bookings.booking')),
+            ],
+            options={
+                'verbose_name': 'پیامک',
+                'verbose_name_plural': 'پیامک\u200cها',
+                'ordering': ['send_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'send_after'], name='booking_sms_due_idx'), models.Index(fields=['recipient', 'status'], name='booking_sms_recipient_idx')],
+            },
+        ),
+    ]
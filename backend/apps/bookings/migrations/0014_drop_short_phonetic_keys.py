@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models.functions import Length
+
+from apps.bookings.normalization import MIN_PHONETIC_LENGTH, NAME_KEY_PHONETIC
+
+
+def drop_short_phonetic_keys(apps, schema_editor):
+    """کلیدهای آوایی کوتاه‌تر از MIN_PHONETIC_LENGTH که name_search_keys دیگر نمی‌سازد (و جستجو نمی‌پرسد)."""
+    PassengerNameKey = apps.get_model('bookings', 'PassengerNameKey')
+    db = schema_editor.connection.alias
+    (
+        PassengerNameKey.objects.using(db)
+        .annotate(key_length=Length('key'))
+        .filter(kind=NAME_KEY_PHONETIC, key_length__lt=MIN_PHONETIC_LENGTH)
+        .delete()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_sms_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_short_phonetic_keys, migrations.RunPython.noop),
+    ]
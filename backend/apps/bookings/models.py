@@ -4,9 +4,24 @@
 هر کلاس زیر که از models.Model ارث می‌برد = یک جدول در دیتابیس.
 فیلدها = ستون‌های آن جدول.
 """
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 
+from .items import baggage_groups, baggage_rows, vehicle_dicts, vehicle_rows
+from .normalization import (
+    NAME_KEY_NAME,
+    NAME_KEY_PHONETIC,
+    NAME_KEY_TOKEN,
+    name_search_keys,
+    normalize_lookup,
+)
+
+
+class BookingQuerySet(models.QuerySet):
+    def with_items(self):
+        """قطعه‌های بار و وسیله‌ها با دو کوئری برای کل صفحه (نه دو کوئری برای هر رزرو)."""
+        return self.prefetch_related('baggage', 'vehicles')
+
 
 class Booking(models.Model):
     """
@@ -52,9 +67,8 @@ class Booking(models.Model):
         blank=True,
     )
 
-    # --- جزئیات بار و وسیله به صورت JSON (همان ساختاری که فرانت می‌فرستد)
-    baggage_items = models.JSONField(default=list, blank=True)
-    vehicle_items = models.JSONField(default=list, blank=True)
+    # --- جزئیات بار و وسیله: جدول‌های BaggageItem و VehicleItem (پایین)؛
+    #     baggage_items / vehicle_items همان ساختار JSON فرانت را می‌دهند و می‌گیرند (property‌های پایین)
 
     # --- فیلدهای قدیمی یک وسیله (برای سازگاری)
     vehicle_plate_number = models.CharField(max_length=32, blank=True)
@@ -92,14 +106,223 @@ class Booking(models.Model):
     sequence_number = models.CharField(max_length=32, blank=True)
     boarding_time = models.CharField(max_length=32, blank=True)
 
+    # --- کلیدهای نرمال‌شدهٔ جستجو (حروف بزرگ، بدون فاصله و خط تیره) — در save() پر می‌شوند
+    reference_key = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    passport_key = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    id_number_key = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+
+    # فیلد منبع → فیلد کلید
+    SEARCH_KEY_FIELDS = {
+        'reference': 'reference_key',
+        'passport_number': 'passport_key',
+        'passenger_id_number': 'id_number_key',
+    }
+
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # برای صفحه‌بندی keyset لیست رزروها (جدیدترین اول)
+            models.Index(fields=['-created_at', '-id'], name='booking_created_id_idx'),
+            # لیست فیلترشده بر اساس مسیر، با همان ترتیب صفحه‌بندی
+            models.Index(
+                fields=['origin_port', 'destination_port', '-created_at', '-id'],
+                name='booking_route_created_idx',
+            ),
+        ]
         verbose_name = 'رزرو'
         verbose_name_plural = 'رزروها'
 
     def __str__(self):
         return f'{self.reference} ({self.origin_port} → {self.destination_port})'
 
+    @property
+    def baggage_items(self):
+        """
+        baggageItems به شکل JSON فرانت — از ردیف‌های BaggageItem (یا مقدار تازه‌ست‌شده و هنوز ذخیره‌نشده).
+        بدون prefetch هر رزرو یک کوئری؛ برای چند رزرو with_items() یا booking_json (لیست و منیفست) را به کار ببر.
+        """
+        pending = getattr(self, '_pending_baggage', None)
+        if pending is not None:
+            return pending
+        if self.pk is None:
+            return []
+        return baggage_groups(self.baggage.all())
+
+    @baggage_items.setter
+    def baggage_items(self, value):
+        # در save() (یا build_items برای bulk_create) به ردیف تبدیل می‌شود
+        self._pending_baggage = list(value or [])
+
+    @property
+    def vehicle_items(self):
+        """vehicleItems به شکل JSON فرانت — از ردیف‌های VehicleItem."""
+        pending = getattr(self, '_pending_vehicles', None)
+        if pending is not None:
+            return pending
+        if self.pk is None:
+            return []
+        return vehicle_dicts(self.vehicles.all())
+
+    @vehicle_items.setter
+    def vehicle_items(self, value):
+        self._pending_vehicles = list(value or [])
+
+    def build_items(self):
+        """
+        ردیف‌های ذخیره‌نشدهٔ BaggageItem و VehicleItem از مقدارهای ست‌شده (برای bulk_create).
+        اگر چیزی ست نشده باشد (None, None).
+        """
+        baggage = vehicles = None
+        if getattr(self, '_pending_baggage', None) is not None:
+            baggage = [BaggageItem(booking=self, **row) for row in baggage_rows(self._pending_baggage)]
+        if getattr(self, '_pending_vehicles', None) is not None:
+            vehicles = [VehicleItem(booking=self, **row) for row in vehicle_rows(self._pending_vehicles)]
+        return baggage, vehicles
+
+    def _save_items(self, adding):
+        baggage, vehicles = self.build_items()
+        for manager, rows in ((BaggageItem.objects, baggage), (VehicleItem.objects, vehicles)):
+            if rows is None:
+                continue
+            if not adding:
+                manager.filter(booking=self).delete()
+            manager.bulk_create(rows)
+        self._pending_baggage = self._pending_vehicles = None
+
+    def refresh_search_keys(self):
+        """کلیدهای جستجو را از روی فیلدهای منبع دوباره حساب می‌کند (برای bulk_create هم صدا بزن)."""
+        for source, key in self.SEARCH_KEY_FIELDS.items():
+            setattr(self, key, normalize_lookup(getattr(self, source)))
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            update_fields.update(
+                key for source, key in self.SEARCH_KEY_FIELDS.items() if source in update_fields
+            )
+            kwargs['update_fields'] = update_fields
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Booking, instance=self)):
+            super().save(*args, **kwargs)
+            self._save_items(adding)
+
+
+class BaggageItem(models.Model):
+    """یک قطعه بار (هر قطعه یک برچسب با بارکد)."""
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='baggage')
+    # شمارهٔ گروه در baggageItems و جای قطعه در pieceDetails آن گروه
+    group = models.PositiveSmallIntegerField(default=0)
+    position = models.PositiveSmallIntegerField(default=0)
+    baggage_type = models.CharField(max_length=32, blank=True, db_index=True)
+    weight_kg = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    tag_number = models.CharField(max_length=64, blank=True, db_index=True, help_text='barcodeId برچسب')
+
+    class Meta:
+        ordering = ['booking', 'group', 'position']
+        verbose_name = 'قطعهٔ بار'
+        verbose_name_plural = 'قطعه‌های بار'
+
+    def __str__(self):
+        return f'{self.tag_number or self.pk} ({self.weight_kg} kg)'
+
+
+class VehicleItem(models.Model):
+    """یک وسیلهٔ همراه رزرو."""
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='vehicles')
+    position = models.PositiveSmallIntegerField(default=0)
+    plate_number = models.CharField(max_length=32, blank=True, db_index=True)
+    vehicle_type = models.CharField(max_length=64, blank=True, db_index=True)
+    length_m = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    tag_number = models.CharField(max_length=64, blank=True, db_index=True, help_text='barcodeId برچسب')
+    make = models.CharField(max_length=64, blank=True)
+    model = models.CharField(max_length=64, blank=True)
+    year = models.IntegerField(null=True, blank=True)
+    engine_number = models.CharField(max_length=64, blank=True, db_index=True)
+    chassis_number = models.CharField(max_length=64, blank=True, db_index=True)
+    owner_name = models.CharField(max_length=255, blank=True)
+    owner_contact = models.CharField(max_length=64, blank=True)
+    sender_company = models.CharField(max_length=255, blank=True)
+    receiver_company = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['booking', 'position']
+        verbose_name = 'وسیله'
+        verbose_name_plural = 'وسیله‌ها'
+
+    def __str__(self):
+        return f'{self.plate_number} {self.vehicle_type}'.strip()
+
+
+class PassengerNameKey(models.Model):
+    """
+    کلیدهای جستجوی نام مسافر (جدول کناری Booking).
+    هنگام ذخیرهٔ رزرو از روی passenger_name ساخته می‌شوند تا جستجوی نام با ایندکس انجام شود، نه icontains.
+    """
+    KINDS = [
+        (NAME_KEY_NAME, 'Full name'),
+        (NAME_KEY_TOKEN, 'Name token'),
+        (NAME_KEY_PHONETIC, 'Phonetic key'),
+    ]
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='name_keys')
+    kind = models.CharField(max_length=8, choices=KINDS)
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            # booking_id داخل ایندکس است تا گروه‌بندی امتیاز بدون خواندن جدول انجام شود
+            models.Index(fields=['kind', 'key', 'booking'], name='passenger_name_key_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}:{self.key}'
+
+    @classmethod
+    def build_for(cls, booking):
+        """ردیف‌های کلید (ذخیره‌نشده) برای یک رزرو."""
+        return [
+            cls(booking=booking, kind=kind, key=key)
+            for kind, key in name_search_keys(booking.passenger_name)
+        ]
+
+    @classmethod
+    def reindex(cls, booking):
+        """کلیدهای نام یک رزرو را با مقدار فعلی passenger_name جایگزین می‌کند."""
+        cls.objects.filter(booking=booking).delete()
+        cls.objects.bulk_create(cls.build_for(booking))
+
+
+class BookingScan(models.Model):
+    """
+    یک اسکن در گیت: سوار شدن (BOARDED) یا خروج (EXITED).
+    از طریق scan_index.py به صورت دسته‌ای (bulk_create) نوشته می‌شود، نه یکی‌یکی در هر درخواست.
+    """
+    BOARDED = 'BOARDED'
+    EXITED = 'EXITED'
+    EVENTS = [
+        (BOARDED, 'Boarded'),
+        (EXITED, 'Exited'),
+    ]
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='scans')
+    event = models.CharField(max_length=8, choices=EVENTS)
+    scanned_at = models.DateTimeField()
+    gate = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        ordering = ['-scanned_at', '-id']
+        indexes = [
+            # آخرین وضعیت هر رزرو هنگام بارگذاری ایندکس حرکت
+            models.Index(fields=['booking', '-scanned_at'], name='booking_scan_latest_idx'),
+        ]
+        verbose_name = 'اسکن'
+        verbose_name_plural = 'اسکن‌ها'
+
+    def __str__(self):
+        return f'{self.booking_id} {self.event} {self.scanned_at:%Y-%m-%d %H:%M}'
+
 
 class Port(models.Model):
     """بندر (مبدا/مقصد)"""
@@ -129,3 +352,241 @@ class Carrier(models.Model):
 
     def __str__(self):
         return f'{self.code} - {self.name}'
+
+
+class Voyage(models.Model):
+    """
+    یک حرکت مشخص (سفر دریایی) با ظرفیت: صندلی مسافر، وزن بار و متر طولی خط وسیله روی عرشه.
+
+    شمارنده‌های *_booked فقط با UPDATE شرطی در allocation.py عوض می‌شوند (نه COUNT روی رزروها)؛
+    seat_map یک bitmap است: بیت i یعنی صندلی i+1 گرفته شده.
+    """
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+    STATUSES = [
+        (OPEN, 'Open'),
+        (CLOSED, 'Closed'),
+    ]
+    code = models.CharField(max_length=32, unique=True, help_text='کد حرکت مثلاً DXB-KIH-0301-A')
+    origin = models.ForeignKey(Port, on_delete=models.PROTECT, related_name='departing_voyages')
+    destination = models.ForeignKey(Port, on_delete=models.PROTECT, related_name='arriving_voyages')
+    carrier = models.ForeignKey(
+        Carrier, on_delete=models.SET_NULL, null=True, blank=True, related_name='voyages',
+    )
+    departure_at = models.DateTimeField()
+    status = models.CharField(max_length=8, choices=STATUSES, default=OPEN)
+
+    # --- ظرفیت
+    passenger_capacity = models.PositiveIntegerField(default=0)
+    cargo_capacity_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    vehicle_lane_capacity_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+
+    # --- مصرف‌شده (فقط allocation.py)
+    passengers_booked = models.PositiveIntegerField(default=0, editable=False)
+    cargo_booked_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    vehicle_lane_booked_m = models.DecimalField(max_digits=8, decimal_places=2, default=0, editable=False)
+    seat_map = models.BinaryField(default=b'', editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['departure_at', 'id']
+        indexes = [
+            models.Index(fields=['origin', 'destination', 'departure_at'], name='voyage_route_departure_idx'),
+        ]
+        verbose_name = 'حرکت'
+        verbose_name_plural = 'حرکت‌ها'
+
+    # فقط allocation.py این‌ها را (با UPDATE شرطی) می‌نویسد
+    ALLOCATION_FIELDS = ('passengers_booked', 'cargo_booked_kg', 'vehicle_lane_booked_m', 'seat_map')
+
+    def __str__(self):
+        return f'{self.code} ({self.departure_at:%Y-%m-%d %H:%M})'
+
+    def save(self, *args, **kwargs):
+        # ذخیرهٔ معمولی (ادمین، PATCH) نباید شمارنده‌های قدیمیِ داخل شیء را روی مقدار واقعی بنویسد
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ALLOCATION_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class VoyageAllocation(models.Model):
+    """
+    سهم یک رزرو از ظرفیت یک حرکت. با حذف رزرو (یا همین ردیف) ظرفیت آزاد می‌شود (signals.py).
+    """
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='allocation')
+    voyage = models.ForeignKey(Voyage, on_delete=models.PROTECT, related_name='allocations')
+    seat = models.PositiveIntegerField(null=True, blank=True)
+    passengers = models.PositiveIntegerField(default=0)
+    cargo_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    vehicle_lane_m = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['voyage', 'seat'], name='voyage_allocation_seat_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.voyage_id}:{self.booking_id} seat={self.seat}'
+
+
+class BookingDailyStat(models.Model):
+    """
+    آمار تجمیعی روزانهٔ رزروها برای گزارش‌های ادمین: یک ردیف برای هر
+    (روز حرکت، مبدأ، مقصد، شرکت حمل، نوع سند).
+
+    با هر ساخت/ویرایش/حذف رزرو به صورت افزایشی به‌روز می‌شود (rollups.py و signals.py)؛
+    manage.py rebuild_daily_stats همه را از نو از جدول رزروها می‌سازد.
+    شمارنده‌ها علامت‌دار هستند تا اگر ردیفی قبل از ساخت اولیه کم شد خطا ندهد (rebuild درستش می‌کند).
+    """
+    day = models.DateField()
+    origin_port = models.CharField(max_length=64)
+    destination_port = models.CharField(max_length=64)
+    carrier_name = models.CharField(max_length=128, blank=True)
+    document_type = models.CharField(max_length=32)
+
+    bookings = models.IntegerField(default=0)
+    passengers = models.IntegerField(default=0)
+    baggage_pieces = models.IntegerField(default=0)
+    baggage_weight_kg = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    vehicles = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['day', 'origin_port', 'destination_port', 'carrier_name', 'document_type']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'origin_port', 'destination_port', 'carrier_name', 'document_type'],
+                name='booking_daily_stat_unique',
+            ),
+        ]
+        indexes = [
+            # گزارش بازه‌ای برای یک بندر یا شرکت حمل
+            models.Index(fields=['origin_port', 'day'], name='daily_stat_origin_day_idx'),
+            models.Index(fields=['carrier_name', 'day'], name='daily_stat_carrier_day_idx'),
+        ]
+        verbose_name = 'آمار روزانه'
+        verbose_name_plural = 'آمار روزانه'
+
+    def __str__(self):
+        return f'{self.day} {self.origin_port} → {self.destination_port} {self.carrier_name}'
+
+
+class IdempotencyKey(models.Model):
+    """
+    یک کلید Idempotency-Key که کلاینت با POST رزرو فرستاده و پاسخ ذخیره‌شدهٔ آن (idempotency.py).
+
+    ردیف قبل از اجرای درخواست ساخته می‌شود (completed=False) و قید یکتایی key همان «قفل» است:
+    درخواست همزمان دوم با همان کلید INSERT نمی‌کند و منتظر نتیجهٔ اولی می‌ماند.
+    ردیف‌های قدیمی‌تر از IDEMPOTENCY_KEY_TTL با manage.py purge_idempotency_keys پاک می‌شوند.
+    """
+    # هش SHA-256 از (endpoint، کاربر، مقدار هدر) — طول ثابت و کوتاه، هر چه کلاینت بفرستد
+    key = models.CharField(max_length=64, unique=True)
+    # هش SHA-256 از متد، مسیر، query string و بدنه؛ همان کلید با درخواست دیگر → 422
+    request_hash = models.CharField(max_length=64)
+    completed = models.BooleanField(default=False)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.BinaryField(default=b'')
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'کلید idempotency'
+        verbose_name_plural = 'کلیدهای idempotency'
+
+    def __str__(self):
+        return f'{self.key[:12]}… {self.status_code or "pending"}'
+
+
+class Job(models.Model):
+    """
+    یک کار پس‌زمینه در صف پایدار (jobs.py) — مثلاً رندر رسید یا چاپ لیبل بعد از ثبت رزرو.
+
+    در همان تراکنشی که رزرو ثبت می‌شود INSERT می‌شود (یا هر دو ثبت می‌شوند یا هیچ‌کدام) و
+    manage.py run_jobs آن را برمی‌دارد. خطا → تلاش دوباره با backoff؛ بعد از max_attempts → DEAD.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    DEAD = 'DEAD'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (DEAD, 'Dead'),
+    ]
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=8, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # زودترین زمان اجرا (برای تلاش دوباره عقب می‌رود)
+    run_at = models.DateTimeField()
+    # worker ای که کار را برداشته (host:pid) و زمان برداشتن؛ کار RUNNING خیلی قدیمی مال worker مرده است
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            # برداشتن کارهای آمادهٔ یک نوع: WHERE status = 'PENDING' AND kind = ... AND run_at <= now
+            models.Index(fields=['status', 'kind', 'run_at'], name='booking_job_due_idx'),
+        ]
+        verbose_name = 'کار پس‌زمینه'
+        verbose_name_plural = 'کارهای پس‌زمینه'
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} {self.status}'
+
+
+class SmsMessage(models.Model):
+    """
+    یک پیام در صف خروجی SMS (sms.py) — مثلاً تأیید ثبت بار بدون مسافر یا خبر حرکت کشتی.
+
+    در همان تراکنش رویداد INSERT می‌شود؛ python manage.py send_sms پیام‌های هر گیرنده را یکی می‌کند،
+    گروهی به اپراتور می‌فرستد و نتیجه را همین‌جا ثبت می‌کند.
+    """
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+    # شمارهٔ نرمال‌شده (فقط رقم و + ابتدایی)
+    recipient = models.CharField(max_length=32)
+    topic = models.CharField(max_length=32)
+    text = models.CharField(max_length=320)
+    booking = models.ForeignKey(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='sms_messages',
+    )
+    # هش (topic، گیرنده، رزرو یا متن): همان رویداد دو بار ثبت شود → یک پیام
+    dedupe_key = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=8, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # زودترین زمان ارسال: created_at + پنجرهٔ یکی‌کردن، یا زمان تلاش دوباره
+    send_after = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    provider_id = models.CharField(max_length=64, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['send_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='booking_sms_due_idx'),
+            models.Index(fields=['recipient', 'status'], name='booking_sms_recipient_idx'),
+        ]
+        verbose_name = 'پیامک'
+        verbose_name_plural = 'پیامک‌ها'
+
+    def __str__(self):
+        return f'{self.recipient} {self.topic} {self.status}'
@@ -0,0 +1,151 @@
+"""
+نرمال‌سازی مقادیر جستجو (PNR، پاسپورت، شماره شناسایی و نام مسافر).
+
+مقداری که کاربر تایپ می‌کند یا اسکنر می‌خواند ممکن است «ab 123-45» یا «AB12345» یا با ارقام فارسی باشد.
+همهٔ این‌ها باید به یک «کلید» یکسان برسند تا جستجو با ایندکس B-tree (برابری/پیشوند) انجام شود
+و دیگر لازم نباشد دیتابیس با LIKE '%x%' کل جدول را بخواند.
+"""
+import re
+import unicodedata
+
+# ارقام فارسی و عربی → ارقام لاتین (جدول str.translate؛ شمارهٔ تلفن در sms.py هم از همین استفاده می‌کند)
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+# فاصله‌ها و انواع خط تیره (- ‐ ‑ – — ـ) و زیرخط
+_SEPARATORS = re.compile(r'[\s\-‐-―ـ_]+')
+
+
+def normalize_lookup(value):
+    """
+    کلید جستجو: حروف بزرگ، ارقام لاتین، بدون فاصله و خط تیره.
+    مثال: ' sc-18f3a-x1 ' → 'SC18F3AX1'
+    """
+    if not value:
+        return ''
+    return _SEPARATORS.sub('', value.translate(DIGITS)).upper()
+
+
+# ---------------------------------------------------------------------------
+# نام مسافر (لاتین / عربی / فارسی)
+#
+# یک نام ممکن است «Mohammad»، «Muhammed» یا «محمد» ثبت شود. برای هر نام سه نوع کلید می‌سازیم:
+# - name:     کل نام تاشده (folded) — تطابق کامل
+# - token:    هر کلمهٔ تاشده — تطابق کلمه به کلمه در همان خط
+# - phonetic: اسکلت صامت‌های هر کلمه به حروف لاتین — تطابق بین خط‌ها (محمد ≈ Mohammad)
+# ---------------------------------------------------------------------------
+
+NAME_KEY_NAME = 'name'
+NAME_KEY_TOKEN = 'token'
+NAME_KEY_PHONETIC = 'phonetic'
+
+# اسکلت تک‌صامتی (Ali / Aly / Leila / علی → 'L') نام‌های بی‌ربط زیادی را به هم می‌رساند؛ کلید آوایی از ۲ صامت به بالا
+MIN_PHONETIC_LENGTH = 2
+
+# یکسان‌سازی حروف عربی و فارسی (ي/ی، ك/ک، ة/ه، ...)
+_ARABIC_FOLD = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ٱ': 'ا',
+    'ـ': None,  # کشیده (tatweel)
+    '‌': None,  # نیم‌فاصله
+})
+
+_NON_WORD = re.compile(r'[^\w]+|_')
+
+# حروف عربی/فارسی → کد آوایی لاتین؛ '' یعنی مصوت/حرف بی‌صدا که در اسکلت نمی‌آید
+_ARABIC_PHONETIC = {
+    'ا': '', 'آ': '', 'ع': '', 'ء': '', 'ی': '',
+    'ب': 'B', 'پ': 'P', 'ت': 'T', 'ط': 'T', 'ث': 'S', 'س': 'S', 'ص': 'S',
+    'ج': 'J', 'چ': 'C', 'ح': 'H', 'خ': 'K', 'د': 'D',
+    'ذ': 'Z', 'ز': 'Z', 'ض': 'Z', 'ظ': 'Z', 'ژ': 'Z', 'ر': 'R', 'ش': 'X',
+    'غ': 'G', 'گ': 'G', 'ف': 'F', 'ق': 'K', 'ک': 'K',
+    'ل': 'L', 'م': 'M', 'ن': 'N',
+}
+_LATIN_DIGRAPHS = {
+    'kh': 'K', 'gh': 'G', 'sh': 'X', 'ch': 'C', 'zh': 'Z',
+    'th': 'S', 'dh': 'Z', 'ph': 'F', 'ck': 'K', 'ou': '',
+}
+_LATIN_PHONETIC = {'c': 'K', 'q': 'K', 'x': 'KS', 'y': ''}
+_LATIN_VOWELS = 'aeiou'
+
+
+def fold_name(value):
+    """
+    نام تاشده: ارقام لاتین، بدون اعراب و علائم (é→e، أ→ا)، ی/ک یکسان، حروف کوچک، تک‌فاصله.
+    """
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', value.translate(DIGITS))
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    value = value.translate(_ARABIC_FOLD).casefold()
+    return ' '.join(_NON_WORD.sub(' ', value).split())
+
+
+def _collapse(codes):
+    out = []
+    for code in codes:
+        if code and (not out or out[-1] != code):
+            out.append(code)
+    return ''.join(out)
+
+
+def _arabic_phonetic(token):
+    codes = []
+    last = len(token) - 1
+    for i, ch in enumerate(token):
+        if ch == 'و':
+            # «و» در ابتدای کلمه صامت است (وحید)، در میانه معمولاً مصوت (یوسف)
+            codes.append('V' if i == 0 else '')
+        elif ch == 'ه':
+            # «ه» پایانی معمولاً خوانده نمی‌شود (فاطمه، عبدالله)
+            codes.append('' if i == last else 'H')
+        else:
+            codes.append(_ARABIC_PHONETIC.get(ch, ch.upper() if ch.isascii() else ''))
+    return _collapse(codes)
+
+
+def _latin_phonetic(token):
+    codes = []
+    i = 0
+    last = len(token) - 1
+    while i <= last:
+        pair = token[i:i + 2]
+        ch = token[i]
+        if pair in _LATIN_DIGRAPHS:
+            codes.append(_LATIN_DIGRAPHS[pair])
+            i += 2
+            continue
+        if ch in _LATIN_VOWELS:
+            codes.append('')
+        elif ch in 'vw':
+            codes.append('V' if i == 0 else '')
+        elif ch == 'h' and i == last and i > 0 and token[i - 1] in _LATIN_VOWELS:
+            codes.append('')
+        else:
+            codes.append(_LATIN_PHONETIC.get(ch, ch.upper()))
+        i += 1
+    return _collapse(codes)
+
+
+def phonetic_key(token):
+    """
+    اسکلت صامت‌های یک کلمهٔ تاشده به حروف لاتین؛ برای هر دو خط یکسان است:
+    'mohammad' → 'MHMD'، 'محمد' → 'MHMD'، 'hossein' / 'حسین' → 'HSN'
+    """
+    if not token:
+        return ''
+    if token.isascii():
+        return _latin_phonetic(token)
+    return _arabic_phonetic(token)
+
+
+def name_search_keys(name, max_length=255):
+    """لیست (نوع، کلید) برای جدول کلیدهای نام؛ تکراری‌ها حذف می‌شوند."""
+    folded = fold_name(name)
+    if not folded:
+        return []
+    keys = [(NAME_KEY_NAME, folded[:max_length])]
+    for token in folded.split():
+        keys.append((NAME_KEY_TOKEN, token[:max_length]))
+        phonetic = phonetic_key(token)
+        if len(phonetic) >= MIN_PHONETIC_LENGTH:
+            keys.append((NAME_KEY_PHONETIC, phonetic[:max_length]))
+    return list(dict.fromkeys(keys))
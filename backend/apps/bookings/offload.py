@@ -0,0 +1,57 @@
+"""
+اجرای کار بلاک‌کننده از viewهای async (async_views.py) بدون بستن event loop.
+
+- run_blocking: I/O بلاک‌کننده‌ای که نسخهٔ async ندارد (کش رسید روی دیسک، کتابخانه‌های sync) در یک
+  ThreadPoolExecutor محدود: ASYNC_BLOCKING_WORKERS نخ (پیش‌فرض ۸) و حداکثر ASYNC_BLOCKING_QUEUE کار
+  در صف (پیش‌فرض ۲۰۰). صف پر → Overloaded (view جواب 503 می‌دهد) به‌جای جمع شدن بی‌نهایت درخواست در حافظه.
+- کار CPU سنگین (رندر PDF با reportlab) به ProcessPoolExecutor همان receipts.py می‌رود (receipts.arender_*).
+
+کوئری‌های ORM اینجا نمی‌آیند: یا async ORM خود Django (aget، async for) یا sync_to_async برای تراکنش‌ها.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class Overloaded(RuntimeError):
+    """صف کارهای بلاک‌کننده پر است."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'ASYNC_BLOCKING_WORKERS', 8),
+                    thread_name_prefix='async-blocking',
+                )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """func(*args, **kwargs) در استخر نخ محدود؛ صف پر → Overloaded."""
+    global _pending
+    limit = getattr(settings, 'ASYNC_BLOCKING_QUEUE', 200)
+    with _pending_lock:
+        if _pending >= limit:
+            raise Overloaded(f'more than {limit} blocking tasks queued')
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # مثل asyncio.to_thread: ContextVarهای درخواست (alias replica، شمارش کوئری) به نخ استخر هم برسند
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(_get_executor(), functools.partial(context.run, func, *args, **kwargs))
+    finally:
+        with _pending_lock:
+            _pending -= 1
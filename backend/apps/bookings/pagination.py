@@ -0,0 +1,171 @@
+"""
+صفحه‌بندی کلیدی (keyset / cursor) و فیلترهای لیست رزروها.
+
+چرا OFFSET نه؟
+- با OFFSET دیتابیس باید همهٔ ردیف‌های صفحه‌های قبلی را بخواند و دور بریزد؛ صفحهٔ هزارم کند است.
+- با keyset فقط می‌گوییم «ردیف‌های بعد از آخرین ردیفی که دیدی» و ایندکس (created_at, id) مستقیم به همان نقطه می‌پرد.
+
+cursor یک توکن base64 از (created_at, id) آخرین ردیف صفحه است؛ فرانت آن را بدون تغییر برمی‌گرداند.
+"""
+import base64
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import BaggageItem, VehicleItem
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_BOOLEAN_FILTERS = ('has_passenger', 'has_baggage', 'has_vehicle')
+# پارامتر → ستون ایندکس‌دار VehicleItem
+_VEHICLE_FILTERS = {
+    'plate': 'plate_number',
+    'chassis': 'chassis_number',
+    'engine': 'engine_number',
+}
+_TRUE_VALUES = ('1', 'true', 'yes')
+_FALSE_VALUES = ('0', 'false', 'no')
+
+
+class InvalidQuery(ValueError):
+    """پارامتر نامعتبر در query string (cursor خراب، تاریخ بد و ...)."""
+
+
+def encode_cursor(booking):
+    """ساخت توکن cursor از آخرین رزرو یک صفحه (شیء Booking یا ردیف BookingMapper.rows)."""
+    raw = f'{booking.created_at.isoformat()}|{booking.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    برگرداندن (created_at, id) از توکن cursor؛ اگر خراب باشد InvalidQuery.
+    cursorی که encode_cursor ساخته همیشه منطقهٔ زمانی دارد؛ زمان بدون منطقه یعنی توکن دستکاری شده
+    (مقایسهٔ آن با ستون آگاه از منطقه در دیتابیس خطای 500 می‌داد).
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_str, pk_str = raw.rsplit('|', 1)
+        created_at = datetime.fromisoformat(created_str)
+        pk = int(pk_str)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidQuery('cursor نامعتبر است.')
+    if timezone.is_naive(created_at):
+        raise InvalidQuery('cursor نامعتبر است.')
+    return created_at, pk
+
+
+def parse_day(value):
+    """
+    تاریخ YYYY-MM-DD به date، یا None اگر فرمت بد باشد.
+    parse_date برای تاریخ خوش‌فرم ولی ناممکن (2026-02-30) ValueError می‌دهد؛ آن هم None است تا view پاسخ 400 بدهد نه 500.
+    """
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def _parse_bound(value, name, end=False):
+    """
+    تاریخ یا تاریخ/زمان را به datetime آگاه از منطقهٔ زمانی تبدیل می‌کند.
+    اگر فقط تاریخ باشد و end=True، تا ابتدای روز بعد (انحصاری) در نظر می‌گیریم.
+    """
+    try:
+        day = parse_date(value)
+        parsed = None if day else parse_datetime(value)
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+    elif parsed is None:
+        raise InvalidQuery(f'فرمت تاریخ {name} معتبر نیست.')
+    elif end:
+        parsed += timedelta(microseconds=1)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _parse_bool(value, name):
+    value = value.strip().lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise InvalidQuery(f'مقدار {name} باید true یا false باشد.')
+
+
+def filter_bookings(qs, params):
+    """
+    اعمال فیلترهای لیست روی queryset:
+    origin, destination, departure_from, departure_to, document_type, has_passenger, has_baggage, has_vehicle،
+    plate / chassis / engine (وسیله) و tag (برچسب قطعهٔ بار یا وسیله) — برابری روی ستون‌های ایندکس‌دار جدول‌های فرزند
+    """
+    origin = (params.get('origin') or '').strip()
+    destination = (params.get('destination') or '').strip()
+    document_type = (params.get('document_type') or '').strip()
+    departure_from = (params.get('departure_from') or '').strip()
+    departure_to = (params.get('departure_to') or '').strip()
+
+    if origin:
+        qs = qs.filter(origin_port=origin)
+    if destination:
+        qs = qs.filter(destination_port=destination)
+    if document_type:
+        qs = qs.filter(document_type=document_type)
+    if departure_from:
+        qs = qs.filter(departure_date__gte=_parse_bound(departure_from, 'departure_from'))
+    if departure_to:
+        qs = qs.filter(departure_date__lt=_parse_bound(departure_to, 'departure_to', end=True))
+    for name in _BOOLEAN_FILTERS:
+        value = params.get(name)
+        if value not in (None, ''):
+            qs = qs.filter(**{name: _parse_bool(value, name)})
+    # با زیرکوئری id__in (نه join) تا رزروی با چند وسیلهٔ مطابق تکراری برنگردد
+    for name, column in _VEHICLE_FILTERS.items():
+        value = (params.get(name) or '').strip()
+        if value:
+            qs = qs.filter(id__in=VehicleItem.objects.filter(**{column: value}).values('booking_id'))
+    tag = (params.get('tag') or '').strip()
+    if tag:
+        qs = qs.filter(
+            Q(id__in=BaggageItem.objects.filter(tag_number=tag).values('booking_id'))
+            | Q(id__in=VehicleItem.objects.filter(tag_number=tag).values('booking_id'))
+        )
+    return qs
+
+
+def parse_page_size(value):
+    """اندازهٔ صفحه از پارامتر limit؛ بین ۱ و MAX_PAGE_SIZE."""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidQuery('limit باید عدد باشد.')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate_bookings(qs, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    یک صفحه از رزروها (جدیدترین اول) و توکن صفحهٔ بعد را برمی‌گرداند.
+    یک ردیف اضافه می‌خوانیم تا بدون COUNT بفهمیم صفحهٔ بعدی وجود دارد یا نه.
+    """
+    qs = qs.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # شرط created_at__lte اضافه است ولی به دیتابیس اجازه می‌دهد از ایندکس range-seek کند.
+        qs = qs.filter(created_at__lte=created_at).filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    rows = list(qs[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
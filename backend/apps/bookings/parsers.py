@@ -0,0 +1,27 @@
+"""
+Parserهای اضافه برای API رزرو.
+
+NDJSONParser: بدنه‌ای که هر خطش یک شیء JSON است (application/x-ndjson).
+برای ورود گروهی/منیفست که ابزارهای تور اپراتور خط به خط تولید می‌کنند؛ خط به خط خوانده می‌شود
+و لازم نیست کل بدنه یک آرایهٔ JSON بزرگ باشد.
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        rows = []
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {line_number}: {exc}')
+        return rows
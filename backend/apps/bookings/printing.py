@@ -0,0 +1,138 @@
+"""
+ارسال ZPL به چاپگر Zebra از طریق شبکه (پورت خام 9100).
+
+چاپگرها با نام در settings.ZEBRA_PRINTERS تعریف می‌شوند؛ API فقط نام چاپگر را می‌گیرد،
+نه آدرس دلخواه (تا کسی نتواند سرور را به اتصال به هر host/port وادار کند).
+
+برای تست بدون چاپگر: LocalZplSink (یک شنوندهٔ TCP در نخ جدا؛ بایت‌های هر اتصال در sink.received)
+یا python manage.py zpl_sink که همان را روی 127.0.0.1:9100 اجرا می‌کند.
+
+asend_zpl نسخهٔ async (asyncio streams) برای viewهای async است. اتصال‌ها نگه داشته (pool) نمی‌شوند:
+پورت 9100 چاپگر Zebra در هر لحظه فقط یک اتصال می‌پذیرد و اتصال باز یک سرور چاپ سرورهای دیگر را می‌بندد.
+به‌جایش ارسال‌ها به هر چاپگر در هر پردازه پشت یک قفل async صف می‌شوند (به‌جای اینکه همزمان وصل شوند و
+timeout بخورند) و هیچ نخی منتظر شبکه نمی‌ماند.
+"""
+import asyncio
+import socket
+import socketserver
+import threading
+import weakref
+
+from django.conf import settings
+
+
+class PrinterError(Exception):
+    """اتصال یا ارسال به چاپگر ناموفق بود."""
+
+
+class UnknownPrinter(PrinterError):
+    """نام چاپگر در ZEBRA_PRINTERS تعریف نشده است."""
+
+
+def get_printer(name):
+    printers = getattr(settings, 'ZEBRA_PRINTERS', {})
+    if name not in printers:
+        raise UnknownPrinter(f'چاپگری با نام {name} تعریف نشده است.')
+    return printers[name]
+
+
+def send_zpl(zpl, printer='default'):
+    """ZPL را به چاپگر می‌فرستد و تعداد بایت ارسال‌شده را برمی‌گرداند."""
+    config = get_printer(printer)
+    payload = zpl.encode('utf-8')
+    try:
+        with socket.create_connection(
+            (config['host'], config.get('port', 9100)),
+            timeout=config.get('timeout', 5),
+        ) as conn:
+            conn.sendall(payload)
+    except OSError as exc:
+        raise PrinterError(f'ارسال به چاپگر {printer} ناموفق بود: {exc}')
+    return len(payload)
+
+
+# event loop → {نام چاپگر: asyncio.Lock} (قفل‌های asyncio به loop خودشان وابسته‌اند)
+_printer_locks = weakref.WeakKeyDictionary()
+
+
+def _printer_lock(printer):
+    locks = _printer_locks.setdefault(asyncio.get_running_loop(), {})
+    if printer not in locks:
+        locks[printer] = asyncio.Lock()
+    return locks[printer]
+
+
+async def asend_zpl(zpl, printer='default'):
+    """نسخهٔ async send_zpl؛ همان خروجی و همان استثناها."""
+    config = get_printer(printer)
+    payload = zpl.encode('utf-8')
+    timeout = config.get('timeout', 5)
+    async with _printer_lock(printer):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(config['host'], config.get('port', 9100)), timeout,
+            )
+            try:
+                writer.write(payload)
+                await asyncio.wait_for(writer.drain(), timeout)
+            finally:
+                writer.close()
+                await writer.wait_closed()
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise PrinterError(f'ارسال به چاپگر {printer} ناموفق بود: {str(exc) or "timeout"}')
+    return len(payload)
+
+
+class _SinkServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class LocalZplSink:
+    """
+    چاپگر Zebra ساختگی: هر اتصال تا بسته شدن خوانده و بایت‌هایش به sink.received اضافه می‌شود.
+    port=0 یعنی یک پورت آزاد؛ sink.printer تنظیمات همین sink برای ZEBRA_PRINTERS است.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, on_receive=None):
+        self.received = []
+        self.on_receive = on_receive
+        self._changed = threading.Condition()
+        self.server = _SinkServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def printer(self):
+        host, port = self.server.server_address[:2]
+        return {'host': host, 'port': port, 'timeout': 2}
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                data = self.rfile.read()
+                with sink._changed:
+                    sink.received.append(data)
+                    sink._changed.notify_all()
+                if sink.on_receive:
+                    sink.on_receive(self.client_address, data)
+
+        return Handler
+
+    def wait(self, count, timeout=5):
+        """تا رسیدن count اتصال صبر می‌کند (ارسال‌کننده قبل از پردازش اتصال در نخ sink برمی‌گردد)."""
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.received) >= count, timeout)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
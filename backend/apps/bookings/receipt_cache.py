@@ -0,0 +1,131 @@
+"""
+کش PDF رسیدها — «آدرس‌دهی با محتوا».
+
+کلید کش = هش SHA-256 از فیلدهایی که در رسید چاپ می‌شوند (receipt_fields، که reference را هم دارد)
+به‌علاوهٔ نسخهٔ قالب. پس:
+- تا وقتی این فیلدها عوض نشده‌اند، همان فایل PDF برگردانده می‌شود و reportlab صدا زده نمی‌شود.
+- اگر رزرو ویرایش شود، هش عوض می‌شود و خودبه‌خود PDF جدید ساخته می‌شود (نیازی به پاک کردن دستی نیست).
+- همین هش، ETag پاسخ است؛ درخواست تکراری با If-None-Match جواب 304 می‌گیرد.
+
+Backend قابل تعویض است (RECEIPT_CACHE در settings):
+- DiskReceiptCache: فایل روی دیسک محلی با حذف LRU بر اساس حجم کل
+- DjangoCacheReceiptCache: هر backend کش Django (مثلاً Redis یا Memcached مشترک بین سرورها)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+# اگر چیدمان رسید (receipts.py) عوض شد این عدد را زیاد کن تا کش قبلی استفاده نشود
+RECEIPT_TEMPLATE_VERSION = 1
+
+
+def receipt_digest(fields):
+    """هش محتوای رسید (hex)."""
+    payload = json.dumps([RECEIPT_TEMPLATE_VERSION, fields], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskReceiptCache:
+    """
+    هر رسید یک فایل <digest>.pdf. با هر hit زمان فایل به‌روز می‌شود؛ وقتی حجم کل از max_bytes
+    بیشتر شد، قدیمی‌ترین فایل‌ها (کم‌استفاده‌ترین) حذف می‌شوند تا به ۹۰٪ حد برسیم.
+    """
+
+    def __init__(self, location, max_bytes=256 * 1024 * 1024):
+        self.location = str(location)
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.location, f'{key}.pdf')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        os.makedirs(self.location, exist_ok=True)
+        # نوشتن در فایل موقت و rename تا پردازهٔ دیگر هیچ‌وقت فایل نیمه‌کاره نخواند
+        fd, tmp_path = tempfile.mkstemp(dir=self.location, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        with os.scandir(self.location) as it:
+            return [e for e in it if e.is_file() and e.name.endswith('.pdf')]
+
+    def _scan_size(self):
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+
+
+class DjangoCacheReceiptCache:
+    """رسیدها در یکی از کش‌های CACHES؛ حذف و انقضا را خود backend انجام می‌دهد."""
+
+    def __init__(self, alias='default', timeout=None):
+        self.alias = alias
+        self.timeout = timeout
+
+    def get(self, key):
+        return caches[self.alias].get(f'receipt:{key}')
+
+    def set(self, key, data):
+        caches[self.alias].set(f'receipt:{key}', data, timeout=self.timeout)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_receipt_cache():
+    """کش تنظیم‌شده در RECEIPT_CACHE (یک نمونه برای هر پردازه)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = getattr(settings, 'RECEIPT_CACHE', {})
+                backend = import_string(config.get('BACKEND', 'apps.bookings.receipt_cache.DiskReceiptCache'))
+                options = config.get('OPTIONS') or {
+                    'location': os.path.join(settings.BASE_DIR, 'var', 'receipt-cache'),
+                }
+                _cache = backend(**options)
+    return _cache
@@ -0,0 +1,156 @@
+"""
+کش دادهٔ مرجع (بندرها و شرکت‌های حمل) — سال‌ها چند بار عوض می‌شوند ولی در هر بار باز شدن فرم رزرو خوانده می‌شوند.
+
+دو لایه:
+- کش مشترک (CACHES[REFERENCE_DATA_CACHE]، مثلاً Redis): شمارهٔ نسخهٔ هر جدول و snapshot همان نسخه
+  (بدنهٔ JSON آماده، ETag، زمان ساخت، ردیف‌ها).
+- حافظهٔ پردازه: آخرین snapshot؛ نسخهٔ مشترک حداکثر هر VERSION_CHECK_SECONDS یک بار پرسیده می‌شود.
+
+با هر save/delete بندر یا شرکت حمل (از API، ادمین یا shell) بعد از commit تراکنش نسخه یک واحد زیاد می‌شود
+(signals.py)؛ snapshot نسخهٔ قبلی دیگر استفاده نمی‌شود و اولین درخواست بعدی آن را از دیتابیس می‌سازد.
+پردازه‌های دیگر حداکثر VERSION_CHECK_SECONDS بعد تغییر را می‌بینند.
+اگر CACHES[REFERENCE_DATA_CACHE] بین پردازه‌ها مشترک نباشد (LocMem؛ config/caches.py) نسخهٔ زیادشده در یک worker
+به بقیه نمی‌رسد؛ آن وقت snapshot هر VERSION_CHECK_SECONDS یک بار از دیتابیس دوباره ساخته می‌شود (همان سقف کهنگی).
+
+GET /api/ports/ و /api/carriers/ همان بایت‌های آماده را برمی‌گردانند (بدون کوئری و بدون serializer)
+و با ETag / Last-Modified به درخواست شرطی 304 می‌دهند.
+port_by_code برای اعتبارسنجی رزرو بدون کوئری است.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+from config.caches import is_shared
+
+from .models import Carrier, Port
+
+
+VERSION_CHECK_SECONDS = 1.0
+# snapshot در کش مشترک؛ با عوض شدن نسخه کلید هم عوض می‌شود، پس انقضا فقط برای جمع کردن نسخه‌های قدیمی است
+SNAPSHOT_TIMEOUT = 7 * 24 * 3600
+
+
+def _cache_alias():
+    return getattr(settings, 'REFERENCE_DATA_CACHE', 'default')
+
+
+def _shared_cache():
+    return caches[_cache_alias()]
+
+
+class Snapshot:
+    """یک نسخه از جدول: بدنهٔ JSON، ETag، Last-Modified و کد (حروف بزرگ) → شیء مدل."""
+
+    __slots__ = ('version', 'body', 'etag', 'last_modified', 'by_code')
+
+    def __init__(self, version, body, etag, last_modified, by_code):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.by_code = by_code
+
+
+class ReferenceTable:
+    """یک جدول مرجع کوچک (همهٔ ردیف‌ها در یک snapshot)."""
+
+    def __init__(self, name, model, serializer_path):
+        self.name = name
+        self.model = model
+        # serializers.py خودش به این ماژول وابسته است (اعتبارسنجی رزرو)، پس serializer دیرتر import می‌شود
+        self.serializer_path = serializer_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = float('-inf')
+
+    @property
+    def _version_key(self):
+        return f'refdata:{self.name}:version'
+
+    def _shared_version(self):
+        cache = _shared_cache()
+        version = cache.get(self._version_key)
+        if version is None:
+            # کش خالی شده (یا تازه راه افتاده): شروع از زمان فعلی تا هیچ‌وقت به شماره‌ای قدیمی برنگردیم
+            cache.add(self._version_key, time.time_ns(), timeout=None)
+            version = cache.get(self._version_key)
+        return version
+
+    def bump(self):
+        """نسخه را زیاد می‌کند؛ snapshot فعلی در همهٔ پردازه‌ها کهنه می‌شود."""
+        cache = _shared_cache()
+        try:
+            cache.incr(self._version_key)
+        except ValueError:
+            cache.set(self._version_key, time.time_ns(), timeout=None)
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = float('-inf')
+
+    def _build(self, version):
+        serializer_class = import_string(self.serializer_path)
+        objects = list(self.model.objects.all())
+        body = JSONRenderer().render(serializer_class(objects, many=True).data)
+        return Snapshot(
+            version=version,
+            body=body,
+            etag=f'"{self.name}-{hashlib.sha256(body).hexdigest()[:32]}"',
+            last_modified=timezone.now(),
+            by_code={obj.code.upper(): obj for obj in objects},
+        )
+
+    def snapshot(self):
+        """snapshot معتبر: از حافظه، بعد از کش مشترک، در آخر از دیتابیس."""
+        now = time.monotonic()
+        current = self._snapshot
+        if current is not None and now - self._checked_at < VERSION_CHECK_SECONDS:
+            return current
+        if is_shared(_cache_alias()):
+            current = self._from_shared_cache(current)
+        else:
+            current = self._rebuild_local(current)
+        with self._lock:
+            self._snapshot = current
+            self._checked_at = now
+        return current
+
+    def _from_shared_cache(self, current):
+        version = self._shared_version()
+        if current is not None and current.version == version:
+            return current
+        cache = _shared_cache()
+        snapshot_key = f'refdata:{self.name}:{version}'
+        snapshot = cache.get(snapshot_key)
+        if snapshot is None:
+            snapshot = self._build(version)
+            cache.set(snapshot_key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+        return snapshot
+
+    def _rebuild_local(self, current):
+        # بدون کش مشترک: از دیتابیس؛ محتوای بدون تغییر همان snapshot قبلی (Last-Modified ثابت می‌ماند)
+        built = self._build(None)
+        return current if current is not None and current.etag == built.etag else built
+
+    def lookup(self, code):
+        """کد (بدون حساسیت به حروف بزرگ/کوچک و فاصله) → شیء مدل یا None."""
+        return self.snapshot().by_code.get((code or '').strip().upper())
+
+
+ports = ReferenceTable('ports', Port, 'apps.bookings.serializers.PortSerializer')
+carriers = ReferenceTable('carriers', Carrier, 'apps.bookings.serializers.CarrierSerializer')
+
+
+def port_by_code(code):
+    """Port با این کد یا None — بدون کوئری دیتابیس (از snapshot)."""
+    return ports.lookup(code)
+
+
+def has_ports():
+    """آیا هیچ بندری تعریف شده است؟"""
+    return bool(ports.snapshot().by_code)
@@ -0,0 +1,130 @@
+"""
+تولید شمارهٔ رزرو (PNR) — یکتا «از روی ساختار»، بدون پرس‌وجو از دیتابیس.
+
+روش قبلی: SC-<زمان هگز>-<دو حرف تصادفی> و بعد حلقهٔ exists() روی دیتابیس.
+مشکل: یک کوئری اضافه برای هر رزرو، و باز هم دو worker همزمان می‌توانستند یک شماره بسازند.
+
+روش فعلی (NodeCounterGenerator):
+    SC-<node>-<counter><check>
+- node:    شناسهٔ پردازه = [BOOKING_REFERENCE_NODE] + زمان شروع پردازه (ثانیه) + pid + ۲۵ بیت تصادفی
+           روی یک میزبان دو پردازهٔ زنده pid یکسان ندارند؛ ولی دو container (هر دو pid 1) که در یک ثانیه
+           بالا بیایند، یا pid که در همان ثانیه دوباره داده شود، فقط با بیت‌های تصادفی (os.urandom) از هم جدا
+           می‌شوند: احتمال برخورد برای هر چنین جفتی ۱ در ۳۳ میلیون. BOOKING_REFERENCE_NODE جدا برای هر
+           سرور این احتمال را هم صفر می‌کند.
+- counter: شمارندهٔ یکنوای داخل پردازه (thread-safe؛ بعد از fork از صفر با node جدید)
+- check:   رقم کنترل Luhn mod 32 روی کل شماره — غلط تایپی/اسکن را قبل از جستجو تشخیص می‌دهد.
+همه با الفبای Crockford base32 (بدون I، L، O، U تا با 1 و 0 اشتباه نشوند).
+
+مولد قابل تعویض است: BOOKING_REFERENCE_GENERATOR در settings مسیر کلاس را می‌گیرد.
+"""
+import itertools
+import os
+import secrets
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_BASE = len(ALPHABET)
+_VALUES = {ch: i for i, ch in enumerate(ALPHABET)}
+
+PREFIX = 'SC'
+# بیت‌های تصادفی هر پردازه در node (۵ نویسهٔ base32)
+NODE_RANDOM_BITS = 25
+# مبدأ زمانی برای کوتاه شدن بخش node (۲۰۲۶-۰۱-۰۱ UTC)
+EPOCH = 1767225600
+
+
+def encode(number, width=1):
+    """عدد نامنفی → رشتهٔ base32 با حداقل طول width."""
+    chars = []
+    while number:
+        number, rem = divmod(number, _BASE)
+        chars.append(ALPHABET[rem])
+    return ''.join(reversed(chars)).rjust(width, '0')
+
+
+def check_char(payload):
+    """رقم کنترل Luhn mod N روی نویسه‌های الفبا (نویسه‌های دیگر مثل '-' نادیده گرفته می‌شوند)."""
+    factor = 2
+    total = 0
+    for ch in reversed(payload):
+        if ch not in _VALUES:
+            continue
+        addend = factor * _VALUES[ch]
+        total += addend // _BASE + addend % _BASE
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(_BASE - total % _BASE) % _BASE]
+
+
+def is_valid_reference(reference):
+    """آیا رقم کنترل شماره درست است؟ (برای شماره‌های قدیمی بدون رقم کنترل False برمی‌گرداند.)"""
+    reference = (reference or '').strip().upper()
+    if not reference.startswith(f'{PREFIX}-') or len(reference) < 5:
+        return False
+    return check_char(reference[:-1]) == reference[-1]
+
+
+# مولدهای زنده؛ یک hook در سطح ماژول بعد از fork همه را reset می‌کند.
+# hookهای register_at_fork پاک‌شدنی نیستند، پس ثبت یکی برای هر نمونه آن نمونه را تا آخر پردازه زنده نگه می‌داشت.
+_live_generators = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for generator in list(_live_generators):
+        generator._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class NodeCounterGenerator:
+    """مولد پیش‌فرض: node پردازه + شمارندهٔ یکنوا + رقم کنترل."""
+
+    def __init__(self, node_prefix=''):
+        self.node_prefix = ''.join(ch for ch in node_prefix.upper() if ch in _VALUES)
+        self._lock = threading.Lock()
+        self._reset()
+        _live_generators.add(self)
+
+    def _reset(self):
+        # بعد از fork، فرزند pid و بیت‌های تصادفی جدید دارد → node جدید؛ قفل هم دوباره ساخته می‌شود
+        self._lock = threading.Lock()
+        started = max(int(time.time()) - EPOCH, 0)
+        salt = encode(secrets.randbits(NODE_RANDOM_BITS), NODE_RANDOM_BITS // 5)
+        self.node = f'{self.node_prefix}{encode(started, 6)}{encode(os.getpid(), 5)}{salt}'
+        self._counter = itertools.count()
+
+    def __call__(self):
+        with self._lock:
+            value = next(self._counter)
+        payload = f'{PREFIX}-{self.node}-{encode(value, 2)}'
+        return payload + check_char(payload)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_reference_generator():
+    """مولد تنظیم‌شده در settings (یک نمونه برای هر پردازه)."""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                cls = import_string(getattr(
+                    settings, 'BOOKING_REFERENCE_GENERATOR',
+                    'apps.bookings.references.NodeCounterGenerator',
+                ))
+                _generator = cls(node_prefix=getattr(settings, 'BOOKING_REFERENCE_NODE', ''))
+    return _generator
+
+
+def next_reference():
+    """یک شمارهٔ رزرو جدید؛ بدون هیچ کوئری دیتابیس."""
+    return get_reference_generator()()
@@ -0,0 +1,215 @@
+"""
+آمار روزانهٔ رزروها (BookingDailyStat) برای صفحهٔ admin-reports.
+
+هر رزرو «سهمی» در یک ردیف آمار دارد:
+    کلید = (روز حرکت به وقت محلی، مبدأ، مقصد، شرکت حمل، نوع سند)
+    مقدار = ۱ رزرو، ۱ مسافر اگر has_passenger، تعداد و وزن بار، تعداد وسیله‌ها
+و گزارش فقط جمع همین ردیف‌هاست — هیچ وقت کل جدول Booking اسکن نمی‌شود.
+
+به‌روزرسانی افزایشی:
+- save(): در pre_save سهم قبلی از دیتابیس خوانده می‌شود و در post_save تفاضل (جدید − قبلی) اعمال می‌شود.
+- delete(): سهم رزرو کم می‌شود.
+- bulk_create (services._insert_chunk): سهم‌های یک chunk اول در حافظه جمع و بعد برای هر کلید یک UPDATE زده می‌شود.
+همهٔ این‌ها داخل تراکنش همان ذخیره/حذف هستند؛ UPDATE با F() است، پس درخواست‌های همزمان هم را خراب نمی‌کنند.
+rebuild() همه را از نو می‌سازد (manage.py rebuild_daily_stats).
+"""
+import datetime
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Booking, BookingDailyStat
+
+
+Counts = namedtuple('Counts', ['bookings', 'passengers', 'baggage_pieces', 'baggage_weight_kg', 'vehicles'])
+ZERO = Counts(0, 0, 0, Decimal(0), 0)
+
+KEY_FIELDS = ('day', 'origin_port', 'destination_port', 'carrier_name', 'document_type')
+# فیلدهای Booking که در سهم آماری اثر دارند (ذخیره با update_fields بدون این‌ها آمار را عوض نمی‌کند)
+BOOKING_FIELDS = (
+    'departure_date', 'origin_port', 'destination_port', 'carrier_name', 'document_type',
+    'has_passenger', 'has_vehicle', 'baggage_pieces', 'baggage_weight_kg',
+)
+
+# نام گروه‌بندی در API → فیلد BookingDailyStat
+GROUP_FIELDS = {
+    'day': 'day',
+    'origin': 'origin_port',
+    'destination': 'destination_port',
+    'carrier': 'carrier_name',
+    'documentType': 'document_type',
+}
+MAX_REPORT_DAYS = 366
+BATCH_SIZE = 2000
+
+
+def _day(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localdate(value)
+
+
+def _vehicle_count(has_vehicle, items):
+    # رزروهای قدیمی فقط فیلدهای تک‌وسیله‌ای دارند
+    return items or (1 if has_vehicle else 0)
+
+
+def contribution(booking, vehicles):
+    """(کلید، Counts) یک رزرو (یا SimpleNamespace از _stored)؛ vehicles = تعداد VehicleItemها."""
+    key = (
+        _day(booking.departure_date),
+        booking.origin_port,
+        booking.destination_port,
+        booking.carrier_name or '',
+        booking.document_type,
+    )
+    return key, Counts(
+        bookings=1,
+        passengers=1 if booking.has_passenger else 0,
+        baggage_pieces=booking.baggage_pieces or 0,
+        baggage_weight_kg=Decimal(str(booking.baggage_weight_kg or 0)).quantize(Decimal('0.01')),
+        vehicles=_vehicle_count(booking.has_vehicle, vehicles),
+    )
+
+
+def _stored(queryset):
+    """رزروهای queryset همان‌طور که در دیتابیس هستند (فقط فیلدهای BOOKING_FIELDS و vehicle_count) — یک کوئری."""
+    names = ('pk', *BOOKING_FIELDS, 'vehicle_count')
+    rows = queryset.order_by().values_list('pk', *BOOKING_FIELDS).annotate(vehicle_count=Count('vehicles'))
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        yield SimpleNamespace(**dict(zip(names, row)))
+
+
+def stored_state(booking_id):
+    """وضعیت فعلی یک رزرو در دیتابیس برای محاسبهٔ سهم قبلی، یا None."""
+    return next(_stored(Booking.objects.filter(pk=booking_id)), None)
+
+
+def booking_saved(booking, before):
+    """بعد از save: سهم قبلی (before از stored_state) کم و سهم جدید اضافه می‌شود."""
+    pending = getattr(booking, '_pending_vehicles', None)
+    if pending is not None:
+        vehicles = len(pending)
+    else:
+        vehicles = before.vehicle_count if before is not None else 0
+    old = contribution(before, before.vehicle_count) if before is not None else None
+    apply_change(old, contribution(booking, vehicles))
+
+
+def booking_deleted(before):
+    if before is not None:
+        apply_change(contribution(before, before.vehicle_count), None)
+
+
+def _add(a, b, sign=1):
+    return Counts(*(x + sign * y for x, y in zip(a, b)))
+
+
+def apply(deltas):
+    """deltas: دیکشنری کلید → Counts؛ برای هر کلید یک UPDATE (و در صورت نبود ردیف، INSERT)."""
+    for key, delta in deltas.items():
+        if key[0] is None or delta == ZERO:
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        updates = {field: F(field) + value for field, value in delta._asdict().items() if value}
+        if BookingDailyStat.objects.filter(**lookup).update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                BookingDailyStat.objects.create(**lookup, **delta._asdict())
+        except IntegrityError:
+            # درخواست همزمان همین الان ردیف را ساخت
+            BookingDailyStat.objects.filter(**lookup).update(**updates)
+
+
+def apply_change(before, after):
+    """تغییر یک رزرو: before/after هر کدام (کلید، Counts) یا None."""
+    deltas = defaultdict(lambda: ZERO)
+    if before is not None:
+        deltas[before[0]] = _add(deltas[before[0]], before[1], -1)
+    if after is not None:
+        deltas[after[0]] = _add(deltas[after[0]], after[1])
+    apply(deltas)
+
+
+def add_bookings(bookings):
+    """رزروهای تازه bulk_create‌شده (که سیگنال ندارند)."""
+    deltas = defaultdict(lambda: ZERO)
+    for booking in bookings:
+        key, counts = contribution(booking, len(getattr(booking, '_pending_vehicles', None) or []))
+        deltas[key] = _add(deltas[key], counts)
+    apply(deltas)
+
+
+def totals(bookings):
+    """جمع سهم همهٔ رزروهای queryset به تفکیک کلید (برای rebuild و migration پرکردن اولیه)."""
+    result = defaultdict(lambda: ZERO)
+    for state in _stored(bookings):
+        key, counts = contribution(state, state.vehicle_count)
+        if key[0] is not None:
+            result[key] = _add(result[key], counts)
+    return result
+
+
+def rebuild():
+    """همهٔ ردیف‌های آمار را از روی جدول رزروها از نو می‌سازد؛ خروجی: تعداد ردیف‌ها."""
+    with transaction.atomic():
+        stats = totals(Booking.objects.all())
+        BookingDailyStat.objects.all().delete()
+        BookingDailyStat.objects.bulk_create(
+            [BookingDailyStat(**dict(zip(KEY_FIELDS, key)), **counts._asdict()) for key, counts in stats.items()],
+            batch_size=BATCH_SIZE,
+        )
+    return len(stats)
+
+
+def report(date_from, date_to, group_by=('day',), filters=None):
+    """
+    جمع آمار در بازهٔ [date_from, date_to] گروه‌بندی‌شده بر اساس group_by (کلیدهای GROUP_FIELDS).
+    filters: کلید GROUP_FIELDS (به جز day) → مقدار.
+    خروجی: (ردیف‌ها، جمع کل) — هر ردیف دیکشنری camelCase.
+    """
+    stats = BookingDailyStat.objects.filter(day__gte=date_from, day__lte=date_to)
+    for name, value in (filters or {}).items():
+        stats = stats.filter(**{GROUP_FIELDS[name]: value})
+    sums = {
+        'bookings': Sum('bookings'),
+        'passengers': Sum('passengers'),
+        'baggagePieces': Sum('baggage_pieces'),
+        'baggageWeightKg': Sum('baggage_weight_kg'),
+        'vehicles': Sum('vehicles'),
+    }
+    columns = [GROUP_FIELDS[name] for name in group_by]
+    rows = []
+    for row in stats.values(*columns).annotate(**sums).order_by(*columns):
+        item = {name: row[GROUP_FIELDS[name]] for name in group_by}
+        if 'day' in item:
+            item['day'] = item['day'].isoformat()
+        item.update(_numbers(row))
+        rows.append(item)
+    return rows, _numbers(stats.aggregate(**sums))
+
+
+def _numbers(row):
+    return {
+        'bookings': row['bookings'] or 0,
+        'passengers': row['passengers'] or 0,
+        'baggagePieces': row['baggagePieces'] or 0,
+        'baggageWeightKg': float(row['baggageWeightKg'] or 0),
+        'vehicles': row['vehicles'] or 0,
+    }
+
+
+def default_range(today=None):
+    """بازهٔ پیش‌فرض گزارش: ۳۰ روز گذشته تا امروز."""
+    today = today or timezone.localdate()
+    return today - datetime.timedelta(days=29), today
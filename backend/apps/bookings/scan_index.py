@@ -0,0 +1,272 @@
+"""
+ایندکس درون‌حافظه‌ای حرکت‌ها برای اسکن گیت (سوار شدن / خروج).
+
+قبلاً هر اسکن یک Booking.objects.get(reference=...) یا حتی جستجوی icontains بود.
+حالا برای هر حرکت فعال (مبدأ، مقصد، روز حرکت) یک VoyageIndex در حافظهٔ پردازه نگه می‌داریم:
+
+- رکوردها ScanRecord با __slots__ هستند (نه شیء ORM)؛ فقط چیزی که گیت لازم دارد.
+- سه دیکشنری reference_key / passport_key / id_number_key → رکورد (همان کلیدهای نرمال‌شدهٔ models.py)،
+  و دیکشنری pk → رکورد برای بارکدهای SB... (barcodes.py).
+- به‌روزرسانی افزایشی: فقط رزروهای با id بزرگ‌تر از آخرین id دیده‌شده خوانده می‌شوند —
+  وقتی کدی پیدا نشد (مسافر تازه رزرو کرده) یا هر REFRESH_SECONDS. هر FULL_RELOAD_SECONDS
+  کل حرکت دوباره خوانده می‌شود تا ویرایش/حذف و اسکن‌های پردازه‌های دیگر هم دیده شوند.
+
+اسکن‌ها با ScanRecorder دسته‌ای نوشته می‌شوند (bulk_create هر FLUSH_SIZE اسکن یا حداکثر FLUSH_SECONDS بعد).
+وضعیت BOARDED/EXITED در حافظه فوراً عوض می‌شود، پس اسکن تکراری همان لحظه تشخیص داده می‌شود.
+محدودیت: با چند پردازه، هر پردازه ایندکس خودش را دارد و اسکن تکراری در پردازهٔ دیگر تا بارگذاری کامل بعدی دیده نمی‌شود.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.db import IntegrityError, connections
+from django.utils import timezone
+
+from .barcodes import PREFIX as BARCODE_PREFIX, InvalidBarcode, decode as decode_barcode
+from .models import Booking, BookingScan
+from .normalization import normalize_lookup
+from .pagination import filter_bookings
+
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = 5
+# حداقل فاصلهٔ دو بارگذاری افزایشی به خاطر «پیدا نشد» (تا اسکن مکرر یک کد بی‌ربط دیتابیس را نکوبد)
+MISS_REFRESH_SECONDS = 0.25
+FULL_RELOAD_SECONDS = 300
+# حرکتی که این مدت اسکن نشده از حافظه بیرون می‌رود
+IDLE_SECONDS = 3600
+
+FLUSH_SIZE = 200
+FLUSH_SECONDS = 1.0
+
+SCAN_EVENTS = (BookingScan.BOARDED, BookingScan.EXITED)
+
+_FIELDS = (
+    'id', 'reference', 'reference_key', 'passport_key', 'id_number_key',
+    'passenger_name', 'document_type',
+)
+
+
+class ScanRecord:
+    """آنچه گیت از یک رزرو لازم دارد."""
+
+    __slots__ = ('booking_id', 'reference', 'passenger', 'document_type', 'status')
+
+    def __init__(self, booking_id, reference, passenger, document_type, status=''):
+        self.booking_id = booking_id
+        self.reference = reference
+        self.passenger = passenger
+        self.document_type = document_type
+        self.status = status
+
+
+class VoyageIndex:
+    """همهٔ رزروهای یک حرکت، قابل جستجو با PNR، پاسپورت، شناسه یا بارکد."""
+
+    def __init__(self, origin, destination, day):
+        self.origin = origin
+        self.destination = destination
+        self.day = day
+        self._lock = threading.Lock()
+        self.by_id = {}
+        self._by_key = ({}, {}, {})
+        self.high_water = 0
+        self.loaded_at = self.refreshed_at = float('-inf')
+        self.used_at = 0.0
+
+    def _queryset(self):
+        return filter_bookings(Booking.objects.all(), {
+            'origin': self.origin,
+            'destination': self.destination,
+            'departure_from': self.day,
+            'departure_to': self.day,
+        })
+
+    def _add_rows(self, rows, by_id, by_key):
+        high_water = 0
+        for booking_id, reference, *keys, passenger, document_type in rows:
+            record = ScanRecord(booking_id, reference, passenger, document_type)
+            by_id[booking_id] = record
+            for index, key in zip(by_key, keys):
+                if key:
+                    index[key] = record
+            high_water = max(high_water, booking_id)
+        return high_water
+
+    def load(self):
+        """بارگذاری کامل: رزروها + آخرین وضعیت اسکن هر رزرو."""
+        qs = self._queryset()
+        by_id, by_key = {}, ({}, {}, {})
+        high_water = self._add_rows(qs.values_list(*_FIELDS).iterator(chunk_size=2000), by_id, by_key)
+        latest = (
+            BookingScan.objects.filter(booking__in=qs.values('id'))
+            .order_by('booking_id', 'scanned_at', 'id')
+            .values_list('booking_id', 'event')
+        )
+        for booking_id, event in latest.iterator(chunk_size=2000):
+            if booking_id in by_id:
+                by_id[booking_id].status = event
+        # وضعیت‌هایی که هنوز در بافر نوشتن هستند نباید با بارگذاری دوباره گم شوند
+        for booking_id, event in recorder.pending_status():
+            if booking_id in by_id:
+                by_id[booking_id].status = event
+        with self._lock:
+            self.by_id, self._by_key = by_id, by_key
+            self.high_water = high_water
+            self.loaded_at = self.refreshed_at = time.monotonic()
+
+    def refresh(self):
+        """بارگذاری افزایشی: فقط رزروهای جدیدتر از high_water."""
+        rows = list(self._queryset().filter(id__gt=self.high_water).values_list(*_FIELDS))
+        with self._lock:
+            if rows:
+                self.high_water = max(self.high_water, self._add_rows(rows, self.by_id, self._by_key))
+            self.refreshed_at = time.monotonic()
+        return len(rows)
+
+    def find(self, code):
+        """کد اسکن‌شده → ScanRecord یا None (بدون دیتابیس)."""
+        if code.upper().startswith(BARCODE_PREFIX):
+            try:
+                return self.by_id.get(decode_barcode(code).booking_id)
+            except InvalidBarcode:
+                pass
+        key = normalize_lookup(code)
+        for index in self._by_key:
+            record = index.get(key)
+            if record is not None:
+                return record
+        return None
+
+    def lookup(self, code):
+        """مثل find، ولی اگر پیدا نشد (یا ایندکس کهنه است) اول به‌روزرسانی می‌کند."""
+        now = time.monotonic()
+        self.used_at = now
+        if now - self.loaded_at > FULL_RELOAD_SECONDS:
+            self.load()
+        elif now - self.refreshed_at > REFRESH_SECONDS:
+            self.refresh()
+        record = self.find(code)
+        if record is None and time.monotonic() - self.refreshed_at > MISS_REFRESH_SECONDS:
+            if self.refresh():
+                record = self.find(code)
+        return record
+
+    def counts(self):
+        """تعداد رزروها به تفکیک وضعیت اسکن."""
+        totals = {'total': len(self.by_id), BookingScan.BOARDED: 0, BookingScan.EXITED: 0}
+        for record in list(self.by_id.values()):
+            if record.status:
+                totals[record.status] += 1
+        return totals
+
+
+class ScanRecorder:
+    """بافر اسکن‌ها و نوشتن دسته‌ای با bulk_create."""
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def add(self, booking_id, event, scanned_at, gate=''):
+        with self._lock:
+            self._pending.append(BookingScan(
+                booking_id=booking_id, event=event, scanned_at=scanned_at, gate=gate,
+            ))
+            full = len(self._pending) >= self.flush_size
+            if not full and self._timer is None and self.flush_seconds:
+                # اسکن‌های آخر یک صف هم حداکثر flush_seconds بعد نوشته می‌شوند
+                self._timer = threading.Timer(self.flush_seconds, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def pending_status(self):
+        with self._lock:
+            return [(scan.booking_id, scan.event) for scan in self._pending]
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        finally:
+            # این thread اتصال دیتابیس خودش را باز کرده است
+            connections.close_all()
+
+    def flush(self):
+        """نوشتن همهٔ اسکن‌های بافر؛ تعداد ردیف‌های نوشته‌شده را برمی‌گرداند."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+        try:
+            BookingScan.objects.bulk_create(batch)
+            return len(batch)
+        except IntegrityError:
+            # معمولاً رزروی بین اسکن و نوشتن حذف شده؛ بقیه را یکی‌یکی نجات بده
+            written = 0
+            for scan in batch:
+                try:
+                    scan.save(force_insert=True)
+                    written += 1
+                except IntegrityError:
+                    logger.warning('dropping scan for missing booking %s', scan.booking_id)
+            return written
+
+
+recorder = ScanRecorder()
+atexit.register(recorder.flush)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_voyage_index(origin, destination, day):
+    """ایندکس یک حرکت (در اولین استفاده بارگذاری می‌شود)؛ حرکت‌های بی‌استفاده بیرون می‌روند."""
+    key = (origin, destination, day)
+    now = time.monotonic()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            for stale_key, stale in list(_indexes.items()):
+                if now - stale.used_at > IDLE_SECONDS:
+                    del _indexes[stale_key]
+            index = _indexes[key] = VoyageIndex(origin, destination, day)
+            index.used_at = now
+            new = True
+        else:
+            new = False
+    if new:
+        index.load()
+    return index
+
+
+def record_scan(index, code, event, gate=''):
+    """
+    اسکن یک کد در یک حرکت.
+    خروجی: (ScanRecord یا None اگر در این حرکت نیست، تکراری بود؟، زمان اسکن)
+    """
+    record = index.lookup(code)
+    scanned_at = timezone.now()
+    if record is None:
+        return None, False, scanned_at
+    with index._lock:
+        duplicate = record.status == event
+        record.status = event
+    if not duplicate:
+        recorder.add(record.booking_id, event, scanned_at, gate)
+    return record, duplicate, scanned_at
+
+
+def clear_indexes():
+    """خالی کردن همهٔ ایندکس‌ها (مثلاً بعد از import دسته‌ای یا در تست)."""
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,239 @@
+"""
+موتور جستجوی رزرو بر اساس PNR، پاسپورت و شماره شناسایی.
+
+قبلاً BookingSearchView برای هر پارامتر icontains می‌زد که یعنی LIKE '%x%' و خواندن کل جدول؛
+آن هم درست وقتی پاسپورت مسافر پشت باجه اسکن می‌شود. حالا:
+
+۱) مقدار ورودی با normalize_lookup به «کلید» تبدیل می‌شود (همان کلیدی که هنگام save ذخیره شده).
+۲) برای هر درخواست ارزان‌ترین راهبرد انتخاب می‌شود:
+   - exact:    برابری روی ایندکس B-tree (مثلاً اسکن کامل پاسپورت)
+   - prefix:   بازهٔ [key, key+1) روی همان ایندکس (کاربر اول شماره را تایپ کرده)
+   - contains: زیررشته — در SQLite با جدول FTS5 (tokenizer سه‌حرفی)، در PostgreSQL با ایندکس pg_trgm
+   در حالت auto به همین ترتیب جلو می‌رویم و اولین مرحله‌ای که نتیجه داشت برگردانده می‌شود.
+
+جستجوی نام مسافر (search_passenger_names) جداگانه است: روی جدول PassengerNameKey با ایندکس (kind, key)
+و رتبه‌بندی بر اساس کیفیت تطابق (نام کامل > کلمه > آوایی بین خط‌ها).
+
+جدول FTS5 و تریگرهایش با ensure_search_index ساخته می‌شوند (بعد از هر migrate از apps.py صدا زده می‌شود)،
+چون SQLite هنگام بازسازی جدول در migrationها تریگرها را پاک می‌کند.
+"""
+from asgiref.sync import sync_to_async
+from django.db import connections, router
+from django.db.models import Case, Q, Sum, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Booking, PassengerNameKey
+from .normalization import (
+    NAME_KEY_NAME,
+    NAME_KEY_PHONETIC,
+    NAME_KEY_TOKEN,
+    name_search_keys,
+    normalize_lookup,
+)
+
+
+FTS_TABLE = 'bookings_booking_search'
+FTS_COLUMNS = ('reference_key', 'passport_key', 'id_number_key')
+# کوتاه‌تر از این، tokenizer سه‌حرفی (trigram) چیزی پیدا نمی‌کند
+MIN_GRAM = 3
+
+MATCH_MODES = ('auto', 'exact', 'prefix', 'contains')
+_AUTO_MODES = ('exact', 'prefix', 'contains')
+
+# پارامتر query string → ستون کلید
+SEARCH_PARAMS = {
+    'reference': 'reference_key',
+    'passport': 'passport_key',
+    'id_number': 'id_number_key',
+}
+
+_fts_available = {}
+
+
+def _sqlite_ddl():
+    table = Booking._meta.db_table
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f'INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {table} '
+        f'BEGIN {delete_old} {insert_new} END',
+    ]
+
+
+def _postgresql_ddl():
+    table = Booking._meta.db_table
+    statements = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    for column in FTS_COLUMNS:
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+            f'ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+    return statements
+
+
+def ensure_search_index(using='default'):
+    """
+    ساخت ایندکس زیررشته (اگر نیست). idempotent است؛ بعد از هر migrate صدا زده می‌شود.
+    اگر ستون‌های کلید هنوز ساخته نشده‌اند (migrate به نسخهٔ قدیمی‌تر) کاری نمی‌کند.
+    """
+    connection = connections[using]
+    table = Booking._meta.db_table
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if table not in tables:
+            return
+        columns = {c.name for c in connection.introspection.get_table_description(cursor, table)}
+        if not set(FTS_COLUMNS) <= columns:
+            return
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{FTS_TABLE}%'],
+            )
+            complete = FTS_TABLE in tables and cursor.fetchone()[0] == 3
+            for statement in _sqlite_ddl():
+                cursor.execute(statement)
+            if not complete:
+                # تازه ساخته شد یا تریگرها گم شده بودند → محتوای FTS را از جدول اصلی بازسازی کن
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            for statement in _postgresql_ddl():
+                cursor.execute(statement)
+    _fts_available.pop(using, None)
+
+
+def _has_fts(connection):
+    if connection.alias not in _fts_available:
+        _fts_available[connection.alias] = (
+            connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available[connection.alias]
+
+
+def _fts_phrase(column, key):
+    escaped = key.replace('"', '""')
+    return f'{column} : "{escaped}"'
+
+
+def _condition(column, key, mode, connection):
+    if mode == 'exact':
+        return Q(**{column: key})
+    if mode == 'prefix':
+        # بازهٔ [key, key+1) — برخلاف LIKE 'x%' همیشه از ایندکس B-tree استفاده می‌کند
+        upper = key[:-1] + chr(ord(key[-1]) + 1)
+        return Q(**{f'{column}__gte': key, f'{column}__lt': upper})
+    if len(key) >= MIN_GRAM and _has_fts(connection):
+        return Q(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [_fts_phrase(column, key)],
+        ))
+    # PostgreSQL: LIKE '%x%' روی ستون کلید از ایندکس gin_trgm_ops استفاده می‌کند
+    return Q(**{f'{column}__contains': key})
+
+
+def search_bookings(terms, match='auto', limit=50, queryset=None):
+    """
+    terms: دیکشنری {نام پارامتر: مقدار خام} با کلیدهای SEARCH_PARAMS.
+    match: یکی از MATCH_MODES. همهٔ پارامترها با AND ترکیب می‌شوند.
+    لیست Booking برمی‌گرداند (حداکثر limit تا، جدیدترین اول).
+    queryset: پیش‌فرض Booking.objects.with_items()؛ مثلاً BookingMapper.rows(...) برای خواندن فقط ستون‌های لازم.
+    """
+    keys = _search_keys(terms)
+    if not keys:
+        return []
+
+    qs = Booking.objects.with_items() if queryset is None else queryset
+    connection = connections[router.db_for_read(Booking)]
+    for condition in _conditions(keys, match, connection):
+        rows = list(qs.filter(condition)[:limit])
+        if rows:
+            return rows
+    return []
+
+
+async def asearch_bookings(terms, match='auto', limit=50, queryset=None):
+    """نسخهٔ async search_bookings (async ORM) برای async_views.py؛ همان ورودی و خروجی."""
+    keys = _search_keys(terms)
+    if not keys:
+        return []
+
+    qs = Booking.objects.with_items() if queryset is None else queryset
+    alias = router.db_for_read(Booking)
+    if alias not in _fts_available:
+        # فقط بار اول هر alias: introspection جدول FTS کوئری sync است
+        await sync_to_async(lambda: _has_fts(connections[alias]))()
+    connection = connections[alias]
+    for condition in _conditions(keys, match, connection):
+        rows = [row async for row in qs.filter(condition)[:limit]]
+        if rows:
+            return rows
+    return []
+
+
+def _search_keys(terms):
+    keys = {}
+    for name, column in SEARCH_PARAMS.items():
+        key = normalize_lookup(terms.get(name))
+        if key:
+            keys[column] = key
+    return keys
+
+
+def _conditions(keys, match, connection):
+    modes = _AUTO_MODES if match == 'auto' else (match,)
+    for mode in modes:
+        condition = Q()
+        for column, key in keys.items():
+            condition &= _condition(column, key, mode, connection)
+        yield condition
+
+
+# امتیاز هر نوع تطابق نام؛ جمع امتیازها ترتیب نتایج را تعیین می‌کند
+NAME_SCORES = {
+    NAME_KEY_NAME: 100,
+    NAME_KEY_TOKEN: 10,
+    NAME_KEY_PHONETIC: 3,
+}
+
+
+def search_passenger_names(query, limit=50, queryset=None):
+    """
+    جستجوی نام مسافر به هر خطی (لاتین / عربی / فارسی).
+    لیست (Booking, امتیاز) برمی‌گرداند، بهترین تطابق اول.
+    queryset: مثل search_bookings (هر چیزی که ردیف‌هایش .id دارند).
+    """
+    keys = name_search_keys(query)
+    if not keys:
+        return []
+
+    condition = Q()
+    for kind in NAME_SCORES:
+        values = [key for key_kind, key in keys if key_kind == kind]
+        if values:
+            condition |= Q(kind=kind, key__in=values)
+    score = Sum(Case(
+        *[When(kind=kind, then=Value(points)) for kind, points in NAME_SCORES.items()],
+        default=Value(0),
+    ))
+    ranked = list(
+        PassengerNameKey.objects.filter(condition)
+        .values('booking_id')
+        .annotate(score=score)
+        .order_by('-score', '-booking_id')[:limit]
+    )
+    qs = Booking.objects.with_items() if queryset is None else queryset
+    bookings = {booking.id: booking for booking in qs.filter(id__in=[row['booking_id'] for row in ranked])}
+    return [
+        (bookings[row['booking_id']], row['score'])
+        for row in ranked
+        if row['booking_id'] in bookings
+    ]
@@ -8,8 +8,13 @@
 
 چرا camelCase؟ چون فرانت Angular با originPort و departureDate کار می‌کند؛ پس API هم همین نام‌ها را برمی‌گرداند.
 """
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
 from rest_framework import serializers
-from .models import Booking, Port, Carrier
+from .items import InvalidItem, baggage_rows, vehicle_rows
+from .models import BaggageItem, Booking, Port, Carrier, VehicleItem, Voyage
+from .reference_data import has_ports, port_by_code
 
 
 def _model_to_dict(booking):
@@ -92,6 +97,9 @@ class BookingSerializer(serializers.Serializer):
         default='CARGO_BOARDING_CARD',
     )
 
+    # حرکت (اختیاری): اگر باشد، مسیر/زمان/شرکت حمل از حرکت می‌آید و صندلی و ظرفیت تخصیص داده می‌شود
+    voyageId = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+
     # اختیاری برای چاپ
     departureGate = serializers.CharField(required=False, allow_blank=True, default='')
     seatNumber = serializers.CharField(required=False, allow_blank=True, default='')
@@ -115,6 +123,57 @@ class BookingSerializer(serializers.Serializer):
             return parsed
         return value
 
+    def _validate_port(self, value):
+        """
+        کد بندر تعریف‌شده به شکل استاندارد خودش (dubai → DUBAI) — از کش reference_data، بدون کوئری.
+        با BOOKING_REQUIRE_KNOWN_PORTS=True بندر ناشناخته رد می‌شود (اگر اصلاً بندری تعریف شده باشد).
+        """
+        port = port_by_code(value)
+        if port is not None:
+            return port.code
+        if getattr(settings, 'BOOKING_REQUIRE_KNOWN_PORTS', False) and has_ports():
+            raise serializers.ValidationError(f'بندر {value} تعریف نشده است.')
+        return value
+
+    def validate_originPort(self, value):
+        return self._validate_port(value)
+
+    def validate_destinationPort(self, value):
+        return self._validate_port(value)
+
+    def _validate_items(self, value, convert, model):
+        """شکل، نوع عددها و طول متن‌ها را مثل ستون‌های جدول بررسی می‌کند؛ خود لیست JSON را برمی‌گرداند."""
+        try:
+            rows = convert(value)
+        except InvalidItem as exc:
+            raise serializers.ValidationError(str(exc))
+        for row in rows:
+            for name, item_value in row.items():
+                field = model._meta.get_field(name)
+                if isinstance(item_value, str):
+                    if field.max_length and len(item_value) > field.max_length:
+                        raise serializers.ValidationError(f'{name} حداکثر {field.max_length} نویسه است.')
+                    continue
+                if item_value is None:
+                    continue
+                # عدد: max_digits / decimal_places ستون Decimal و بازهٔ ستون عدد صحیح (وگرنه خطای دیتابیس → 500)
+                try:
+                    field.run_validators(item_value)
+                except DjangoValidationError:
+                    if isinstance(field, models.DecimalField):
+                        raise serializers.ValidationError(
+                            f'{name} حداکثر {field.max_digits - field.decimal_places} رقم صحیح '
+                            f'و {field.decimal_places} رقم اعشار دارد.'
+                        )
+                    raise serializers.ValidationError(f'{name} خارج از بازهٔ مجاز است.')
+        return value
+
+    def validate_baggageItems(self, value):
+        return self._validate_items(value, baggage_rows, BaggageItem)
+
+    def validate_vehicleItems(self, value):
+        return self._validate_items(value, vehicle_rows, VehicleItem)
+
     def create(self, validated_data):
         """
         بعد از اعتبارسنجی، ساخت رزرو را به لایهٔ سرویس می‌سپاریم.
@@ -128,6 +187,29 @@ class BookingSerializer(serializers.Serializer):
         return booking_service.create_booking(validated_data, user=user)
 
 
+class BookingRowValidator:
+    """
+    اعتبارسنجی سریع ردیف‌ها برای ورود گروهی.
+
+    BookingSerializer(data=row) برای هر ردیف همهٔ ۳۰ فیلد را deepcopy می‌کند که گران‌ترین بخش است؛
+    اینجا یک نمونه سریالایزر ساخته می‌شود و run_validation برای همهٔ ردیف‌ها روی همان فیلدها اجرا می‌شود.
+    قوانین دقیقاً همان BookingSerializer است.
+    """
+
+    def __init__(self, context=None):
+        self._serializer = BookingSerializer(context=context or {})
+        self._serializer.fields  # یک بار ساخته و کش می‌شود
+
+    def validate(self, row):
+        """(validated_data, None) یا (None, errors) برمی‌گرداند."""
+        if not isinstance(row, dict):
+            return None, {'non_field_errors': ['هر ردیف باید یک شیء JSON باشد.']}
+        try:
+            return self._serializer.run_validation(row), None
+        except serializers.ValidationError as exc:
+            return None, serializers.as_serializer_error(exc)
+
+
 class PortSerializer(serializers.ModelSerializer):
     class Meta:
         model = Port
@@ -140,3 +222,29 @@ class CarrierSerializer(serializers.ModelSerializer):
         model = Carrier
         fields = ['id', 'code', 'name', 'created_at']
         read_only_fields = ['created_at']
+
+
+class VoyageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Voyage
+        fields = [
+            'id', 'code', 'origin', 'destination', 'carrier', 'departure_at', 'status',
+            'passenger_capacity', 'cargo_capacity_kg', 'vehicle_lane_capacity_m',
+            'passengers_booked', 'cargo_booked_kg', 'vehicle_lane_booked_m', 'created_at',
+        ]
+        read_only_fields = ['passengers_booked', 'cargo_booked_kg', 'vehicle_lane_booked_m', 'created_at']
+
+    def validate(self, attrs):
+        """ظرفیت را نمی‌شود کمتر از آنچه همین حالا فروخته شده کرد."""
+        if self.instance is not None:
+            errors = {}
+            for capacity, booked in (
+                ('passenger_capacity', 'passengers_booked'),
+                ('cargo_capacity_kg', 'cargo_booked_kg'),
+                ('vehicle_lane_capacity_m', 'vehicle_lane_booked_m'),
+            ):
+                if capacity in attrs and attrs[capacity] < getattr(self.instance, booked):
+                    errors[capacity] = f'کمتر از مقدار رزروشده ({getattr(self.instance, booked)}) است.'
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
@@ -7,29 +7,21 @@
 - بعداً اگر بخواهی از همین منطق در یک دستور مدیریتی (manage.py) یا یک تسک پس‌زمینه استفاده کنی، همان تابع را صدا می‌زنی.
 
 تابع اصلی: create_booking(data) — دادهٔ معتبر (از سریالایزر) را می‌گیرد، reference تولید می‌کند، یک Booking می‌سازد و برمی‌گرداند.
+reference در references.py بدون کوئری دیتابیس و یکتا از روی ساختار تولید می‌شود؛ پس ساخت رزرو فقط یک INSERT است.
 """
-import random
-import string
-from django.utils import timezone
-from .models import Booking
+from collections import defaultdict
 
+from django.db import DatabaseError, transaction
 
-def _generate_reference():
-    """
-    تولید یک شمارهٔ یکتا برای رزرو (مشابه فرانت: SC-xxx-xx).
-    """
-    ts = timezone.now().timestamp()
-    part1 = format(int(ts * 1000), 'X')[:10]
-    part2 = ''.join(random.choices(string.ascii_uppercase + string.digits, k=2))
-    return f'SC-{part1}-{part2}'
+from . import rollups
+from .allocation import CapacityError, allocate, booking_demand
+from .models import BaggageItem, Booking, PassengerNameKey, VehicleItem, Voyage, VoyageAllocation
+from .references import next_reference
+from .tasks import post_booking_jobs
 
 
-def _ensure_unique_reference():
-    """تا وقتی reference تکراری است، یکی جدید بساز."""
-    ref = _generate_reference()
-    while Booking.objects.filter(reference=ref).exists():
-        ref = _generate_reference()
-    return ref
+# ورود گروهی: چند ردیف در هر INSERT/تراکنش
+BULK_CHUNK_SIZE = 500
 
 
 def _camel_to_model_data(data):
@@ -37,7 +29,7 @@ def _camel_to_model_data(data):
     تبدیل دیکشنری با کلیدهای camelCase (همان خروجی validated_data سریالایزر) به فیلدهای مدل (snake_case).
     """
     return {
-        'reference': data.get('reference') or _ensure_unique_reference(),
+        'reference': data.get('reference') or next_reference(),
         'has_passenger': data.get('hasPassenger', False),
         'has_baggage': data.get('hasBaggage', False),
         'has_vehicle': data.get('hasVehicle', False),
@@ -67,23 +59,172 @@ def _camel_to_model_data(data):
     }
 
 
+def _load_voyages(ids):
+    """حرکت‌ها با بندر و شرکت حمل (برای پر کردن فیلدهای رزرو) — id → Voyage."""
+    ids = {voyage_id for voyage_id in ids if voyage_id}
+    if not ids:
+        return {}
+    return Voyage.objects.select_related('origin', 'destination', 'carrier').in_bulk(ids)
+
+
+def _apply_voyage(kwargs, voyage):
+    """مسیر، زمان حرکت و شرکت حمل رزرو از خود حرکت می‌آید، نه از متن آزاد ورودی."""
+    kwargs['origin_port'] = voyage.origin.code
+    kwargs['destination_port'] = voyage.destination.code
+    kwargs['departure_date'] = voyage.departure_at
+    if voyage.carrier is not None:
+        kwargs['carrier_name'] = voyage.carrier.name
+
+
+def _allocate_for(bookings_by_voyage):
+    """
+    ظرفیت حرکت برای رزروهای ذخیره‌نشده (داخل تراکنش فراخواننده).
+    صندلی روی seat_number نوشته می‌شود؛ ردیف‌های VoyageAllocation (ذخیره‌نشده) برگردانده می‌شوند.
+    """
+    allocations = []
+    # ترتیب ثابت قفل کردن حرکت‌ها → بدون deadlock بین دو ورود گروهی همزمان
+    for voyage_id in sorted(bookings_by_voyage):
+        bookings = bookings_by_voyage[voyage_id]
+        demands = [booking_demand(booking) for booking in bookings]
+        seats = allocate(voyage_id, demands)
+        for booking, demand, seat in zip(bookings, demands, seats):
+            if seat is not None:
+                booking.seat_number = str(seat)
+            allocations.append(VoyageAllocation(
+                booking=booking, voyage_id=voyage_id, seat=seat, **demand._asdict(),
+            ))
+    return allocations
+
+
 def create_booking(data, user=None):
     """
     یک رزرو جدید می‌سازد و برمی‌گرداند.
 
     - data: دیکشنری معتبر (خروجی serializer.validated_data با کلید camelCase).
     - user: کاربر لاگین‌شده (اختیاری؛ اگر بعداً JWT داشته باشی، از request.user می‌گیری).
+    - اگر voyageId داشته باشد، ظرفیت حرکت در همان تراکنش گرفته می‌شود (allocation.py)؛
+      ظرفیت نباشد → CapacityError و رزروی ساخته نمی‌شود.
+    - کارهای بعد از ثبت (رسید، چاپ، ...) فقط در صف ثبت می‌شوند (tasks.py)، در همان تراکنش؛ اجرا با run_jobs.
     """
     kwargs = _camel_to_model_data(data)
     if user is not None:
         kwargs['user'] = user
-    booking = Booking.objects.create(**kwargs)
+    voyage_id = data.get('voyageId')
+    if not voyage_id:
+        with transaction.atomic():
+            booking = Booking.objects.create(**kwargs)
+            post_booking_jobs([booking])
+        return booking
+
+    voyage = _load_voyages([voyage_id]).get(voyage_id)
+    if voyage is None:
+        raise CapacityError('حرکت یافت نشد.')
+    _apply_voyage(kwargs, voyage)
+    booking = Booking(**kwargs)
+    with transaction.atomic():
+        allocations = _allocate_for({voyage_id: [booking]})
+        booking.save()
+        allocations[0].save()
+        post_booking_jobs([booking])
     return booking
 
 
+def _build_booking(data, user=None, voyages=None):
+    kwargs = _camel_to_model_data(data)
+    if user is not None:
+        kwargs['user'] = user
+    voyage_id = data.get('voyageId')
+    if voyage_id:
+        if voyage_id not in (voyages or {}):
+            raise CapacityError('حرکت یافت نشد.')
+        _apply_voyage(kwargs, voyages[voyage_id])
+    booking = Booking(**kwargs)
+    # bulk_create متد save را صدا نمی‌زند؛ کلیدهای جستجو را خودمان پر می‌کنیم
+    booking.refresh_search_keys()
+    return booking
+
+
+def _insert_chunk(items):
+    """items: لیست (Booking ذخیره‌نشده، voyage_id یا None) — داخل تراکنش فراخواننده."""
+    by_voyage = defaultdict(list)
+    for booking, voyage_id in items:
+        if voyage_id:
+            by_voyage[voyage_id].append(booking)
+    # یک UPDATE شرطی برای همهٔ رزروهای هر حرکت در این chunk
+    allocations = _allocate_for(by_voyage)
+    bookings = [booking for booking, _ in items]
+    Booking.objects.bulk_create(bookings)
+    # سیگنال post_save هم در bulk_create فرستاده نمی‌شود → کلیدهای نام را دستی می‌سازیم
+    PassengerNameKey.objects.bulk_create(
+        [key for booking in bookings for key in PassengerNameKey.build_for(booking)]
+    )
+    VoyageAllocation.objects.bulk_create(allocations)
+    # قطعه‌های بار و وسیله‌ها هم (save() صدا زده نشده)
+    baggage, vehicles = [], []
+    for booking in bookings:
+        booking_baggage, booking_vehicles = booking.build_items()
+        baggage.extend(booking_baggage or [])
+        vehicles.extend(booking_vehicles or [])
+    BaggageItem.objects.bulk_create(baggage)
+    VehicleItem.objects.bulk_create(vehicles)
+    # آمار روزانه: یک UPDATE برای هر (روز، مسیر، شرکت، نوع سند) این chunk
+    rollups.add_bookings(bookings)
+    post_booking_jobs(bookings)
+
+
+def bulk_create_bookings(rows, user=None, atomic=False, chunk_size=BULK_CHUNK_SIZE):
+    """
+    ساخت گروهی رزروها با bulk_create در تراکنش‌های چندتایی.
+
+    - rows: لیست (index, validated_data) — فقط ردیف‌های معتبر.
+    - atomic=True: همه در یک تراکنش؛ هر خطای دیتابیس یعنی هیچ ردیفی ثبت نمی‌شود (استثنا بالا می‌رود).
+    - atomic=False: هر chunk تراکنش خودش را دارد؛ اگر chunk شکست خورد، ردیف‌هایش تک‌تک ثبت می‌شوند
+      تا فقط ردیف مشکل‌دار رد شود.
+
+    خروجی: دیکشنری index → Booking (ثبت‌شده) یا رشتهٔ خطا.
+    ردیف‌های دارای voyageId ظرفیت حرکت را در همان تراکنش chunk می‌گیرند؛ در حالت atomic کمبود ظرفیت
+    CapacityError است، در غیر این صورت فقط همان ردیف‌ها رد می‌شوند.
+    referenceها قبل از INSERT و بدون کوئری ساخته می‌شوند (references.py).
+    """
+    voyages = _load_voyages(data.get('voyageId') for _, data in rows)
+    results = {}
+    pending = []
+    for index, data in rows:
+        try:
+            pending.append((index, (_build_booking(data, user=user, voyages=voyages), data.get('voyageId'))))
+        except CapacityError as exc:
+            if atomic:
+                raise
+            results[index] = str(exc)
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+    if atomic:
+        with transaction.atomic():
+            for chunk in chunks:
+                _insert_chunk([item for _, item in chunk])
+        return {index: booking for index, (booking, _) in pending}
+
+    for chunk in chunks:
+        try:
+            with transaction.atomic():
+                _insert_chunk([item for _, item in chunk])
+            results.update((index, booking) for index, (booking, _) in chunk)
+        except (DatabaseError, CapacityError):
+            for index, (booking, voyage_id) in chunk:
+                booking.pk = None
+                try:
+                    with transaction.atomic():
+                        _insert_chunk([(booking, voyage_id)])
+                    results[index] = booking
+                except (DatabaseError, CapacityError) as exc:
+                    results[index] = str(exc)
+    return results
+
+
 # یک «نقطهٔ دسترسی» برای راحتی (مثلاً از serializer صدا بزنیم)
 class BookingService:
     create_booking = staticmethod(create_booking)
+    bulk_create_bookings = staticmethod(bulk_create_bookings)
 
 
 booking_service = BookingService()
@@ -0,0 +1,67 @@
+"""
+سیگنال‌های اپ bookings — کارهایی که باید «بعد از ذخیره/حذف رزرو» خودکار انجام شوند
+(از هر مسیری: API، پنل ادمین یا manage.py shell).
+
+در apps.py (متد ready) import می‌شود تا receiverها ثبت شوند.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import rollups
+from .allocation import release
+from .models import Booking, Carrier, PassengerNameKey, Port, VoyageAllocation
+from .reference_data import carriers, ports
+
+
+@receiver(post_save, sender=Booking)
+def index_passenger_name(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """کلیدهای جستجوی نام را با passenger_name فعلی هماهنگ می‌کند."""
+    if raw:
+        return
+    if update_fields is not None and 'passenger_name' not in update_fields:
+        return
+    if created:
+        PassengerNameKey.objects.bulk_create(PassengerNameKey.build_for(instance))
+    else:
+        PassengerNameKey.reindex(instance)
+
+
+@receiver(pre_delete, sender=VoyageAllocation)
+def release_voyage_capacity(sender, instance, **kwargs):
+    """حذف رزرو (و در نتیجه سهمش از حرکت) ظرفیت و صندلی را آزاد می‌کند."""
+    release(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_daily_stat(sender, instance, raw=False, update_fields=None, **kwargs):
+    """سهم قبلی رزرو در آمار روزانه (پیش از بازنویسی ردیف) برای post_save نگه داشته می‌شود."""
+    instance._daily_stat_before = None
+    instance._daily_stat_skip = raw or (
+        update_fields is not None
+        and not set(update_fields) & set(rollups.BOOKING_FIELDS)
+        and getattr(instance, '_pending_vehicles', None) is None
+    )
+    if not instance._daily_stat_skip and not instance._state.adding:
+        instance._daily_stat_before = rollups.stored_state(instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def update_daily_stat(sender, instance, **kwargs):
+    """آمار روزانه با تفاضل سهم جدید و قبلی به‌روز می‌شود (rollups.py)."""
+    if not getattr(instance, '_daily_stat_skip', True):
+        rollups.booking_saved(instance, instance._daily_stat_before)
+
+
+@receiver(pre_delete, sender=Booking)
+def remove_daily_stat(sender, instance, **kwargs):
+    """سهم رزرو حذف‌شده از آمار روزانه کم می‌شود (قبل از حذف وسیله‌هایش)."""
+    rollups.booking_deleted(rollups.stored_state(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Port)
+@receiver([post_save, post_delete], sender=Carrier)
+def bump_reference_data(sender, **kwargs):
+    """نسخهٔ کش بندرها / شرکت‌های حمل بعد از commit زیاد می‌شود (تا snapshot از دادهٔ commit‌نشده ساخته نشود)."""
+    table = ports if sender is Port else carriers
+    transaction.on_commit(table.bump)
@@ -0,0 +1,321 @@
+"""
+صف خروجی SMS (جدول SmsMessage) — پیام وضعیت به Booking.phone_number.
+
+وقتی کشتی حرکت می‌کند صدها پیام با هم ساخته می‌شوند؛ فرستادن تک‌تک و همزمان یعنی صدها درخواست HTTP،
+خطای 429 اپراتور و چند پیام جدا برای صاحب چند محموله. حالا:
+
+۱) ثبت: queue_sms / queue_booking_sms / queue_departure_sms فقط ردیف INSERT می‌کنند (در تراکنش رویداد).
+   dedupe_key یکتاست: همان رویداد برای همان گیرنده دو بار ثبت شود (دکمهٔ دوباره، تلاش دوباره) → یک پیام.
+   (پیام بدون رزرو: همان متن فقط داخل پنجرهٔ SMS_DEDUPE_WINDOW_SECONDS تکراری است.)
+۲) یکی کردن: پیام‌ها تا SMS_COALESCE_SECONDS صبر می‌کنند؛ dispatcher همهٔ پیام‌های آمادهٔ یک گیرنده را در
+   یک SMS می‌گذارد (SMS_PREFIX یک بار، متن‌ها با «; »، متن تکراری یک بار؛ بیشتر از SMS_MAX_LENGTH → چند SMS).
+۳) ارسال گروهی: SMSها در درخواست‌های گروهی provider (تا max_batch) با اتصال‌های نگه‌داشته‌شده (sms_providers.py).
+۴) محدودیت نرخ: token bucket با SMS_RATE_PER_SECOND و SMS_RATE_BURST (سقف اپراتور؛ برای هر پردازهٔ send_sms).
+۵) خطای موقت → تلاش دوباره با همان backoff صف کار (jobs.retry_delay)؛ رد دائمی یا SMS_MAX_ATTEMPTS → FAILED.
+۶) آمار: SmsStats (پیام، SMS، درخواست گروهی، یکی‌شده، خطا، زمان انتظار rate limit، تأخیر درخواست‌ها).
+
+اجرا: python manage.py send_sms (برای تست محلی: python manage.py sms_gateway).
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .jobs import retry_delay
+from .models import SmsMessage, VoyageAllocation
+from .normalization import DIGITS
+from .sms_providers import OutgoingSms, SendResult
+
+
+BOOKING_CREATED = 'booking.created'
+VOYAGE_DEPARTED = 'voyage.departed'
+# SENDING قدیمی‌تر از این یعنی dispatcher وسط کار مرده
+SENDING_TIMEOUT = timedelta(minutes=5)
+# نتیجهٔ پیامی که provider برایش نتیجه‌ای برنگرداند (لیست کوتاه‌تر از پیام‌ها) — خطای موقت
+MISSING_RESULT = SendResult(False, '', 'provider returned fewer results than messages', True)
+_PHONE_JUNK = re.compile(r'[\s\-().]')
+_MAX_TEXT = SmsMessage._meta.get_field('text').max_length
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize_phone(value):
+    """'۰۹۱۲ ۱۲۳-۴۵۶۷' → '09121234567'؛ فقط رقم با + اختیاری در ابتدا، وگرنه ''."""
+    value = _PHONE_JUNK.sub('', (value or '').translate(DIGITS))
+    if value.startswith('00'):
+        value = '+' + value[2:]
+    digits = value[1:] if value.startswith('+') else value
+    if not digits.isdigit() or not 7 <= len(digits) <= 15:
+        return ''
+    return value
+
+
+def _dedupe_key(topic, recipient, booking_id, text, now):
+    """
+    پیام رزرو: یک بار برای هر (رویداد، گیرنده، رزرو).
+    پیام بدون رزرو: همان متن فقط در یک پنجرهٔ SMS_DEDUPE_WINDOW_SECONDS تکراری حساب می‌شود؛
+    وگرنه همان یادداشت (مثلاً «بندر فردا بسته است») روزهای بعد هرگز دوباره فرستاده نمی‌شد.
+    """
+    if booking_id:
+        event = booking_id
+    else:
+        window = max(1, int(_setting('SMS_DEDUPE_WINDOW_SECONDS', 3600)))
+        event = f'{text}\x00{int(now.timestamp()) // window}'
+    return hashlib.sha256(f'{topic}\x00{recipient}\x00{event}'.encode()).hexdigest()
+
+
+def queue_sms(items):
+    """
+    items: (شمارهٔ تلفن خام، topic، متن، Booking یا None). شمارهٔ نامعتبر نادیده گرفته می‌شود؛
+    تکراری‌ها (همان dedupe_key) در دیتابیس رد می‌شوند. خروجی: تعداد ردیف‌های ارسال‌شده به INSERT.
+    """
+    now = timezone.now()
+    send_after = now + timedelta(seconds=_setting('SMS_COALESCE_SECONDS', 2))
+    rows = {}
+    for phone, topic, text, booking in items:
+        recipient = normalize_phone(phone)
+        if not recipient:
+            continue
+        booking_id = booking.pk if booking is not None else None
+        key = _dedupe_key(topic, recipient, booking_id, text, now)
+        rows[key] = SmsMessage(
+            recipient=recipient, topic=topic, text=text[:_MAX_TEXT], booking_id=booking_id,
+            dedupe_key=key, send_after=send_after, created_at=now,
+        )
+    SmsMessage.objects.bulk_create(rows.values(), ignore_conflicts=True)
+    return len(rows)
+
+
+def _when(value):
+    return value.strftime('%Y-%m-%d %H:%M') if hasattr(value, 'strftime') else str(value or '')
+
+
+def queue_booking_sms(bookings):
+    """تأیید ثبت برای رزروهای بار بدون مسافر که شماره دارند (سند بزینس)."""
+    if not _setting('SMS_BOOKING_NOTIFICATIONS', True):
+        return 0
+    return queue_sms(
+        (
+            booking.phone_number, BOOKING_CREATED,
+            f'cargo booking {booking.reference} registered, {booking.origin_port} > '
+            f'{booking.destination_port}, departure {_when(booking.departure_date)}',
+            booking,
+        )
+        for booking in bookings
+        if not booking.has_passenger and booking.phone_number
+    )
+
+
+def queue_departure_sms(voyage):
+    """خبر حرکت برای همهٔ رزروهای این حرکت که شماره دارند؛ خروجی: تعداد."""
+    allocations = (
+        VoyageAllocation.objects.filter(voyage=voyage).exclude(booking__phone_number='')
+        .select_related('booking').only('booking__id', 'booking__reference', 'booking__phone_number')
+    )
+    departed = _when(timezone.localtime())
+    return queue_sms(
+        (
+            allocation.booking.phone_number, VOYAGE_DEPARTED,
+            f'booking {allocation.booking.reference}: {voyage.code} departed {departed}',
+            allocation.booking,
+        )
+        for allocation in allocations.iterator(chunk_size=2000)
+    )
+
+
+def requeue(queryset):
+    """پیام‌های FAILED (یا هر queryset) → PENDING برای ارسال همین الان با شمارش تلاش از صفر."""
+    return queryset.exclude(status__in=(SmsMessage.SENDING, SmsMessage.SENT)).update(
+        status=SmsMessage.PENDING, attempts=0, send_after=timezone.now(), last_error='',
+    )
+
+
+def compose(texts, prefix=None, max_length=None):
+    """متن‌های یک گیرنده → لیست متن SMSها (پیشوند یک بار، تکراری حذف، شکستن در max_length)."""
+    prefix = _setting('SMS_PREFIX', 'Shinas Port: ') if prefix is None else prefix
+    max_length = max_length or _setting('SMS_MAX_LENGTH', 459)
+    parts, current = [], ''
+    for text in dict.fromkeys(texts):
+        candidate = f'{current}; {text}' if current else text
+        if current and len(prefix) + len(candidate) > max_length:
+            parts.append(prefix + current)
+            candidate = text
+        current = candidate
+    if current:
+        parts.append(prefix + current)
+    return [part[:max_length] for part in parts]
+
+
+class TokenBucket:
+    """rate توکن در ثانیه، حداکثر burst؛ acquire(n) تا وقتی n توکن باشد صبر می‌کند (خروجی: ثانیهٔ انتظار)."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, count=1, sleep=time.sleep):
+        count = min(count, self.burst)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= count:
+                    self.tokens -= count
+                    return waited
+                delay = (count - self.tokens) / self.rate
+            sleep(delay)
+            waited += delay
+
+
+class SmsStats:
+    """شمارنده‌های dispatcher برای گزارش و بنچمارک."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.messages = 0        # پیام‌های صف که پردازش شدند
+        self.sent_messages = 0
+        self.sms = 0             # SMSهای فرستاده‌شده به provider (بعد از یکی کردن)
+        self.bulk_calls = 0
+        self.failed = 0          # FAILED نهایی
+        self.retried = 0
+        self.throttled = 0.0     # ثانیه‌های انتظار rate limit
+        self.call_ms = []
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        calls = sorted(self.call_ms)
+        p50 = calls[len(calls) // 2] if calls else 0.0
+        p95 = calls[min(len(calls) - 1, int(len(calls) * 0.95))] if calls else 0.0
+        return (
+            f'{self.messages} messages -> {self.sms} SMS ({max(0, self.messages - self.sms)} coalesced) '
+            f'in {self.bulk_calls} bulk calls; sent={self.sent_messages} retry={self.retried} '
+            f'failed={self.failed}; {self.sent_messages / elapsed:.0f} msg/s, {self.sms / elapsed:.0f} SMS/s; '
+            f'throttled {self.throttled:.1f} s; bulk call p50={p50:.1f} ms p95={p95:.1f} ms'
+        )
+
+
+class SmsDispatcher:
+    """پیام‌های آماده را برمی‌دارد، یکی می‌کند، گروهی و با محدودیت نرخ می‌فرستد و نتیجه را ثبت می‌کند."""
+
+    def __init__(self, provider, bucket=None, stats=None, recipients_per_claim=500):
+        self.provider = provider
+        self.bucket = bucket or TokenBucket(
+            _setting('SMS_RATE_PER_SECOND', 20), _setting('SMS_RATE_BURST', 100),
+        )
+        self.stats = stats or SmsStats()
+        self.recipients_per_claim = recipients_per_claim
+
+    def recover_stale(self):
+        return SmsMessage.objects.filter(
+            status=SmsMessage.SENDING, locked_at__lt=timezone.now() - SENDING_TIMEOUT,
+        ).update(status=SmsMessage.PENDING, locked_at=None)
+
+    def claim(self):
+        """همهٔ پیام‌های آمادهٔ حداکثر recipients_per_claim گیرندهٔ قدیمی‌تر → SENDING."""
+        now = timezone.now()
+        due = SmsMessage.objects.filter(status=SmsMessage.PENDING, send_after__lte=now)
+        recipients = list(dict.fromkeys(
+            due.order_by('send_after', 'id').values_list('recipient', flat=True)[:self.recipients_per_claim * 4]
+        ))[:self.recipients_per_claim]
+        if not recipients:
+            return []
+        with transaction.atomic():
+            candidates = due.filter(recipient__in=recipients)
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            ids = list(candidates.values_list('id', flat=True))
+            SmsMessage.objects.filter(id__in=ids, status=SmsMessage.PENDING).update(
+                status=SmsMessage.SENDING, locked_at=now, attempts=F('attempts') + 1,
+            )
+        return list(SmsMessage.objects.filter(id__in=ids, status=SmsMessage.SENDING, locked_at=now).order_by('id'))
+
+    def dispatch_once(self):
+        """یک دور: خروجی تعداد پیام‌های پردازش‌شده (0 یعنی صف آماده خالی است)."""
+        messages = self.claim()
+        if not messages:
+            return 0
+        by_recipient = OrderedDict()
+        for message in messages:
+            by_recipient.setdefault(message.recipient, []).append(message)
+        outgoing = [
+            (OutgoingSms(recipient, text), recipient)
+            for recipient, group in by_recipient.items()
+            for text in compose(message.text for message in group)
+        ]
+
+        batch_size = max(1, min(self.provider.max_batch, self.bucket.burst))
+        results = {}
+        for start in range(0, len(outgoing), batch_size):
+            chunk = outgoing[start:start + batch_size]
+            self.stats.throttled += self.bucket.acquire(len(chunk))
+            began = time.perf_counter()
+            chunk_results = list(self.provider.send_bulk([sms for sms, _ in chunk]))
+            # zip کوتاه‌ترین را می‌گیرد؛ بدون این، گیرندهٔ بی‌نتیجه در _record خطا می‌داد و کل دسته در SENDING می‌ماند
+            chunk_results += [MISSING_RESULT] * (len(chunk) - len(chunk_results))
+            self.stats.call_ms.append((time.perf_counter() - began) * 1000)
+            self.stats.bulk_calls += 1
+            self.stats.sms += len(chunk)
+            for (_, recipient), result in zip(chunk, chunk_results):
+                # گیرنده‌ای که SMSش چند تکه شد: اولین تکهٔ ناموفق نتیجهٔ همه است
+                previous = results.get(recipient)
+                if previous is None or previous.ok:
+                    results[recipient] = result
+        self._record(by_recipient, results)
+        self.stats.messages += len(messages)
+        return len(messages)
+
+    def _record(self, by_recipient, results):
+        """
+        نتیجهٔ همه با یک UPDATE آماده و executemany — bulk_update برای هزاران ردیف یک CASE WHEN بزرگ
+        می‌سازد و خودِ ساختنش از ارسال کندتر است.
+        """
+        now = timezone.now()
+        max_attempts = _setting('SMS_MAX_ATTEMPTS', 5)
+        prep = SmsMessage._meta.get_field('sent_at').get_db_prep_value
+        sent_at = prep(now, connection)
+        rows = []
+        for recipient, group in by_recipient.items():
+            result = results[recipient]
+            for message in group:
+                send_after = prep(message.send_after, connection)
+                if result.ok:
+                    rows.append((SmsMessage.SENT, result.provider_id[:64], sent_at, send_after, '', message.id))
+                    self.stats.sent_messages += 1
+                elif result.retry and message.attempts < max_attempts:
+                    retry_at = prep(now + retry_delay(message.attempts), connection)
+                    rows.append((SmsMessage.PENDING, '', None, retry_at, result.error[:255], message.id))
+                    self.stats.retried += 1
+                else:
+                    rows.append((SmsMessage.FAILED, '', None, send_after, result.error[:255], message.id))
+                    self.stats.failed += 1
+        quote = connection.ops.quote_name
+        sql = (
+            f'UPDATE {quote(SmsMessage._meta.db_table)} SET status = %s, provider_id = %s, sent_at = %s, '
+            f'send_after = %s, last_error = %s, locked_at = NULL WHERE id = %s'
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def run(self, stop, once=False, poll=1.0):
+        """حلقهٔ اصلی send_sms؛ stop: threading.Event."""
+        self.recover_stale()
+        while not stop.is_set():
+            if self.dispatch_once():
+                continue
+            if once:
+                return
+            stop.wait(poll)
@@ -0,0 +1,245 @@
+"""
+ارسال SMS از طریق اپراتور — رابط provider قابل تعویض (SMS_PROVIDER) و یک درگاه محلی برای تست.
+
+اپراتور هنوز انتخاب نشده (docs/EXTERNAL-SERVICES-TODO.md)؛ پس اینجا یک API «ارسال گروهی» عمومی روی HTTP/JSON
+تعریف شده که بیشتر اپراتورها شبیهش را دارند و برای اپراتور واقعی فقط یک زیرکلاس SmsProvider لازم است:
+
+    POST <url>   Authorization: Bearer <api_key>
+    {"sender": "ShinasPort", "messages": [{"to": "+9689...", "text": "..."}, ...]}
+    → 200 {"results": [{"id": "...", "status": "accepted"} | {"status": "rejected", "error": "..."}, ...]}
+    (به همان ترتیب پیام‌ها؛ 429 / 5xx یعنی «بعداً دوباره بفرست»)
+
+- HttpSmsProvider: همین API با اتصال‌های HTTP/1.1 keep-alive نگه‌داشته‌شده (استخر کوچک http.client برای هر
+  host) — بدون handshake TCP/TLS برای هر درخواست گروهی.
+- LocMemSmsProvider: پیام‌ها فقط در LocMemSmsProvider.outbox جمع می‌شوند (مثل locmem ایمیل Django).
+- LocalSmsGateway: همان API روی یک سرور HTTP محلی (نخ جدا)؛ برای تست و python manage.py sms_gateway.
+  پیام‌های دریافتی در gateway.received؛ با fail_every / latency می‌شود خطا و کندی اپراتور را شبیه‌سازی کرد.
+"""
+import http.client
+import json
+import queue
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+OutgoingSms = namedtuple('OutgoingSms', 'to text')
+# ok: پذیرفته شد؛ retry: خطای موقت (دوباره بفرست) — در غیر این صورت رد دائمی (شماره نامعتبر و ...)
+SendResult = namedtuple('SendResult', 'ok provider_id error retry')
+
+
+class SmsProvider:
+    """رابط: send_bulk(لیست OutgoingSms) → لیست SendResult به همان ترتیب."""
+    # حداکثر پیام در یک درخواست گروهی اپراتور
+    max_batch = 100
+
+    def send_bulk(self, messages):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LocMemSmsProvider(SmsProvider):
+    outbox = []
+
+    def __init__(self, max_batch=100):
+        self.max_batch = max_batch
+
+    def send_bulk(self, messages):
+        start = len(LocMemSmsProvider.outbox)
+        LocMemSmsProvider.outbox.extend(messages)
+        return [SendResult(True, f'locmem-{start + i}', '', False) for i in range(len(messages))]
+
+
+class _ConnectionPool:
+    """اتصال‌های keep-alive به یک host؛ اتصالی که خطا داد دور انداخته می‌شود."""
+
+    def __init__(self, url, size, timeout):
+        parts = urlsplit(url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=size)
+        self.created = 0
+
+    def request(self, method, path, body, headers):
+        """(status, bytes) — یک بار با اتصال تازه دوباره تلاش می‌کند اگر اتصال نگه‌داشته‌شده بسته شده بود."""
+        for attempt in (1, 2):
+            connection = None
+            if attempt == 1:
+                try:
+                    connection = self.idle.get_nowait()
+                except queue.Empty:
+                    pass
+            reused = connection is not None
+            if connection is None:
+                connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+                self.created += 1
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if reused and attempt == 1:
+                    continue  # سرور اتصال بیکار را بسته بود
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                try:
+                    self.idle.put_nowait(connection)
+                except queue.Full:
+                    connection.close()
+            return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class HttpSmsProvider(SmsProvider):
+
+    def __init__(self, url, api_key='', sender='', timeout=10, max_batch=100, pool_size=4):
+        self.url = url
+        self.path = urlsplit(url).path or '/'
+        self.api_key = api_key
+        self.sender = sender
+        self.max_batch = max_batch
+        self.pool = _ConnectionPool(url, pool_size, timeout)
+
+    def send_bulk(self, messages):
+        body = json.dumps({
+            'sender': self.sender,
+            'messages': [{'to': m.to, 'text': m.text} for m in messages],
+        }).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        try:
+            status, data = self.pool.request('POST', self.path, body, headers)
+        except (OSError, http.client.HTTPException) as exc:
+            return self._all(messages, f'{type(exc).__name__}: {exc}', retry=True)
+        if status == 429 or status >= 500:
+            return self._all(messages, f'HTTP {status}', retry=True)
+        if status >= 400:
+            return self._all(messages, f'HTTP {status}: {data[:200].decode(errors="replace")}', retry=False)
+        try:
+            results = json.loads(data)['results']
+        except (ValueError, KeyError, TypeError):
+            return self._all(messages, 'invalid gateway response', retry=True)
+        if len(results) != len(messages):
+            return self._all(messages, 'gateway returned a different number of results', retry=True)
+        return [
+            SendResult(True, str(r.get('id', '')), '', False) if r.get('status') == 'accepted'
+            else SendResult(False, '', str(r.get('error') or 'rejected'), False)
+            for r in results
+        ]
+
+    def _all(self, messages, error, retry):
+        return [SendResult(False, '', error, retry) for _ in messages]
+
+    def close(self):
+        self.pool.close()
+
+
+def get_sms_provider():
+    """provider تنظیم‌شده در SMS_PROVIDER (هر بار یک نمونهٔ تازه؛ فراخواننده close می‌کند)."""
+    config = getattr(settings, 'SMS_PROVIDER', {})
+    backend = import_string(config.get('BACKEND', 'apps.bookings.sms_providers.LocMemSmsProvider'))
+    return backend(**(config.get('OPTIONS') or {}))
+
+
+class LocalSmsGateway:
+    """
+    درگاه SMS محلی با همان API گروهی HttpSmsProvider.
+    fail_every=n: هر n-امین درخواست گروهی 503 می‌گیرد؛ latency: تأخیر هر درخواست (ثانیه).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fail_every=0, latency=0.0, on_message=None):
+        self.received = []
+        self.requests = 0
+        self.fail_every = fail_every
+        self.latency = latency
+        self.on_message = on_message
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/v1/messages/bulk'
+
+    def _handler(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+            # سرآیند و بدنه جدا نوشته می‌شوند؛ بدون این Nagle + delayed ACK هر پاسخ را ~40ms نگه می‌دارد
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if gateway.latency:
+                    time.sleep(gateway.latency)
+                with gateway._lock:
+                    gateway.requests += 1
+                    fail = gateway.fail_every and gateway.requests % gateway.fail_every == 0
+                if fail:
+                    return self._reply(503, {'error': 'simulated outage'})
+                try:
+                    messages = json.loads(data)['messages']
+                except (ValueError, KeyError, TypeError):
+                    return self._reply(400, {'error': 'invalid body'})
+                results = []
+                with gateway._lock:
+                    for message in messages:
+                        to = str(message.get('to') or '')
+                        if not to.lstrip('+').isdigit():
+                            results.append({'status': 'rejected', 'error': 'invalid number'})
+                            continue
+                        gateway.received.append(OutgoingSms(to, str(message.get('text') or '')))
+                        results.append({'id': f'local-{len(gateway.received)}', 'status': 'accepted'})
+                if gateway.on_message:
+                    for message in messages:
+                        gateway.on_message(message)
+                self._reply(200, {'results': results})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,92 @@
+"""
+کارهای پس‌زمینهٔ بعد از ثبت رزرو (handlerهای صف jobs.py؛ اجرا با manage.py run_jobs).
+
+سند بزینس برای «بار بدون مسافر» بعد از ثبت رسید PDF، خروجی چاپگر و SMS به مشتری می‌خواهد. create_booking و
+ورود گروهی فقط post_booking_jobs را در همان تراکنش صدا می‌زنند و برمی‌گردند؛ کار واقعی اینجاست:
+
+- receipt.render: PDF رسید از قبل در کش رسیدها ساخته می‌شود (دانلود بعدی فوری است). BOOKING_PRERENDER_RECEIPTS.
+- labels.print:   لیبل‌های رزرو به چاپگر BOOKING_AUTO_PRINTER (نام در ZEBRA_PRINTERS؛ خالی = چاپ خودکار نه).
+                  همهٔ لیبل‌های یک دسته با یک اتصال به چاپگر فرستاده می‌شوند.
+- SMS تأیید ثبت:  فقط ردیف صف SMS (sms.py؛ ارسال با manage.py send_sms که پیام‌های هر گیرنده را یکی می‌کند).
+
+payload هر کار فقط {"booking_id": ...} است؛ رزرو موقع اجرا خوانده می‌شود (رزرو حذف‌شده → کار بی‌اثر).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+
+from .jobs import enqueue_many, job_handler
+from .labels import booking_labels
+from .models import Booking
+from .printing import PrinterError, send_zpl
+from .receipt_cache import get_receipt_cache, receipt_digest
+from .receipts import receipt_fields, render_receipt_fields
+from .sms import queue_booking_sms
+
+
+RECEIPT_RENDER = 'receipt.render'
+LABELS_PRINT = 'labels.print'
+
+
+def post_booking_jobs(bookings):
+    """کارهای پس از ثبت رزروها (داخل تراکنش ثبت صدا بزنید). فعلاً فقط برای بار بدون مسافر."""
+    bookings = list(bookings)
+    queue_booking_sms(bookings)
+    printer = getattr(settings, 'BOOKING_AUTO_PRINTER', '')
+    prerender = getattr(settings, 'BOOKING_PRERENDER_RECEIPTS', True)
+    items = []
+    for booking in bookings:
+        if booking.has_passenger:
+            continue
+        if prerender:
+            items.append((RECEIPT_RENDER, {'booking_id': booking.pk}))
+        if printer:
+            items.append((LABELS_PRINT, {'booking_id': booking.pk, 'printer': printer}))
+    return enqueue_many(items) if items else []
+
+
+def _bookings(jobs, queryset):
+    return queryset.in_bulk({job.payload['booking_id'] for job in jobs})
+
+
+@job_handler(RECEIPT_RENDER, batch_size=50)
+def render_receipts(jobs):
+    bookings = _bookings(jobs, Booking.objects.only(
+        'reference', 'created_at', 'passenger_name', 'origin_port', 'destination_port',
+        'baggage_pieces', 'baggage_weight_kg',
+    ))
+    cache = get_receipt_cache()
+    failures = {}
+    for job in jobs:
+        booking = bookings.get(job.payload['booking_id'])
+        if booking is None:
+            continue
+        fields = receipt_fields(booking)
+        digest = receipt_digest(fields)
+        if cache.get(digest) is not None:
+            continue
+        pdf_bytes = render_receipt_fields(fields)
+        if pdf_bytes is None:
+            failures[job.id] = 'reportlab is not installed'
+            continue
+        cache.set(digest, pdf_bytes)
+    return failures
+
+
+@job_handler(LABELS_PRINT, batch_size=100)
+def print_labels(jobs):
+    bookings = _bookings(jobs, Booking.objects.with_items())
+    by_printer = defaultdict(list)
+    for job in jobs:
+        booking = bookings.get(job.payload['booking_id'])
+        if booking is not None:
+            by_printer[job.payload.get('printer') or 'default'].append((job, booking))
+    failures = {}
+    for printer, items in by_printer.items():
+        zpl = ''.join(label for _, booking in items for _, label in booking_labels(booking))
+        try:
+            send_zpl(zpl, printer=printer)
+        except PrinterError as exc:
+            # چاپگر خاموش / تعریف‌نشده: همهٔ کارهای همین چاپگر با هم دوباره تلاش می‌کنند
+            failures.update((job.id, str(exc)) for job, _ in items)
+    return failures
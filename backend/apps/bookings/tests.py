@@ -1,3 +1,1437 @@
-from django.test import TestCase
+"""
+تست‌های اپ bookings:
+- پروفایل دیتابیس (config/database.py)
+- یکتایی شمارهٔ رزرو بین نخ‌ها و پردازه‌ها (references.py)
+- تخصیص ظرفیت حرکت زیر رزرو همزمان (allocation.py)
+- نسخهٔ دادهٔ مرجع بین پردازه‌ها (reference_data.py)
+- مسیریابی خواندن به replica (config/db_router.py) — بدون دیتابیس واقعی replica
+- صف کار پس‌زمینه (jobs.py) و صف SMS (sms.py) با درگاه محلی
+- جستجوی رزرو (search.py): کلید نرمال‌شده، پیشوند و زیررشته با FTS5 trigram
+- جستجوی نام مسافر (normalization.py و search.py): ترتیب امتیاز، یکسان‌سازی حروف و تطابق لاتین ↔ فارسی
+- بارکد رزرو (barcodes.py): رفت و برگشت، نویسه‌های هم‌ارز Crockford، checksum و نسخه، endpointها
+- کش رسید PDF (receipt_cache.py): miss / hit / 304 و حذف LRU
+- ایندکس اسکن گیت (scan_index.py): جستجوی کدها در حافظه و ثبت اسکن
+- Idempotency-Key روی POST رزرو (idempotency.py): تکرار، بدنهٔ دیگر و درخواست همزمان
+- صفحه‌بندی cursor لیست رزروها (pagination.py)
+- قطعه‌های بار / وسیله‌ها (items.py): سقف ستون‌های عددی و تعداد کوئری لیست و خروجی‌ها
+- تبدیل سریع رزرو به JSON (booking_json.py) در برابر _model_to_dict و رندر orjson (renderers.py) در برابر JSONRenderer
+- منیفست CSV (manifest.py): خنثی کردن متن‌های شبیه فرمول
+- ورود گروهی (services.bulk_create_bookings و /api/bookings/bulk/): 207، atomic، NDJSON و تلاش تک‌ردیفی
+- لیبل‌های ZPL (labels.py) و ارسال به چاپگر (printing.py) با LocalZplSink
+- viewهای async (async_views.py و offload.py) با AsyncClient: ثبت، Idempotency-Key، 404، 304، JWT و 503
+- آمار روزانه (rollups.py): به‌روزرسانی افزایشی در برابر rebuild و /api/reports/
+"""
+import asyncio
+import base64
+import csv
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zlib
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connection, router
+from django.http import HttpResponse
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.database import database_config, replica_configs
+from config.db_router import ReplicaMiddleware
+
+from . import (
+    barcodes, jobs, labels, manifest, receipt_cache, receipts, reference_data, references, renderers, rollups, scan_index, search,
+    services, views,
+)
+from .allocation import CapacityError
+from .barcodes import InvalidBarcode, booking_payloads, decode, encode
+from .booking_json import booking_dicts, parse_fields
+from .labels import booking_labels
+from .normalization import name_search_keys, phonetic_key
+from .offload import Overloaded, run_blocking
+from .printing import LocalZplSink, PrinterError, UnknownPrinter, asend_zpl, send_zpl
+from .search import FTS_TABLE, ensure_search_index, search_bookings, search_passenger_names
+from .serializers import _model_to_dict
+from .models import (
+    Booking, BookingDailyStat, BookingScan, Carrier, Job, PassengerNameKey, Port, SmsMessage, Voyage, VoyageAllocation,
+)
+from .services import bulk_create_bookings, create_booking
+from .sms import SmsDispatcher, TokenBucket, queue_sms
+from .sms_providers import HttpSmsProvider, LocalSmsGateway, SendResult, SmsProvider
+from .tasks import RECEIPT_RENDER
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_default_sqlite_profile_leaves_journal_mode_alone(self):
+        config = database_config(Path('/srv'), env={})
+        self.assertEqual(config['NAME'], Path('/srv') / 'db.sqlite3')
+        self.assertNotIn('OPTIONS', config)
+
+    def test_wal_profile_sets_pragmas_and_immediate_transactions(self):
+        config = database_config(Path('/srv'), env={
+            'DB_PROFILE': 'SQLite-WAL', 'SQLITE_PATH': '/data/port.sqlite3', 'SQLITE_BUSY_TIMEOUT_MS': '250',
+        })
+        self.assertEqual(config['NAME'], '/data/port.sqlite3')
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=WAL', config['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA busy_timeout=250', config['OPTIONS']['init_command'])
+
+    def test_postgres_pool_and_replicas(self):
+        env = {'DB_PROFILE': 'postgres', 'DB_POOL': 'yes', 'DB_POOL_MAX_SIZE': '20',
+               'POSTGRES_REPLICA_HOSTS': 'r1, r2:5433'}
+        config = database_config(Path('/srv'), env=env)
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10})
+        replicas = replica_configs(config, env=env)
+        self.assertEqual(
+            {alias: (c['HOST'], c['PORT']) for alias, c in replicas.items()},
+            {'replica1': ('r1', '5432'), 'replica2': ('r2', '5433')},
+        )
+        self.assertEqual(database_config(Path('/srv'), env={'DB_PROFILE': 'postgres'})['CONN_MAX_AGE'], 60)
+
+    def test_invalid_values_are_rejected(self):
+        for env in ({'DB_PROFILE': 'mysql'}, {'DB_PROFILE': 'sqlite-wal', 'SQLITE_MMAP_SIZE': 'big'}):
+            with self.assertRaises(ImproperlyConfigured):
+                database_config(Path('/srv'), env=env)
+
+
+def _references_from_threads(count, threads=4):
+    """count شماره از هر کدام از threads نخ با مولد مشترک همین پردازه."""
+    made = [[] for _ in range(threads)]
+    workers = [
+        threading.Thread(target=lambda out: out.extend(references.next_reference() for _ in range(count)), args=(out,))
+        for out in made
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [reference for out in made for reference in out]
+
+
+class ReferenceGeneratorTests(SimpleTestCase):
+    @skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+    def test_unique_across_threads_and_forked_processes(self):
+        references.get_reference_generator()  # مولد قبل از fork ساخته شود تا فرزندها آن را ارث ببرند
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            children = pool.map(_references_from_threads, [2000] * 4)
+        made = _references_from_threads(2000) + [reference for batch in children for reference in batch]
+        self.assertEqual(len(made), 5 * 4 * 2000)
+        self.assertEqual(len(set(made)), len(made))
+        self.assertTrue(all(references.is_valid_reference(reference) for reference in made))
+
+    def test_same_pid_in_same_second_gets_distinct_nodes(self):
+        # دو container با pid 1 که در یک ثانیه بالا می‌آیند
+        with mock.patch.object(references.os, 'getpid', return_value=1), \
+                mock.patch.object(references.time, 'time', return_value=references.EPOCH + 1000):
+            nodes = {references.NodeCounterGenerator().node for _ in range(200)}
+        self.assertEqual(len(nodes), 200)
+
+    def test_generators_register_no_fork_hook_and_are_not_kept_alive(self):
+        with mock.patch.object(references.os, 'register_at_fork') as register:
+            generator = references.NodeCounterGenerator()
+        register.assert_not_called()
+        self.assertIn(generator, references._live_generators)
+        node = generator.node
+        references._reset_after_fork()
+        self.assertNotEqual(generator.node, node)
+
+        live = len(references._live_generators)
+        del generator
+        self.assertEqual(len(references._live_generators), live - 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'], DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.seen = []
+
+        def view(request):
+            self.seen.append(router.db_for_read(Booking))
+            return HttpResponse()
+
+        self.middleware = ReplicaMiddleware(view)
+
+    def _call(self, method, token='client-a'):
+        request = getattr(self.factory, method)('/api/bookings/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.middleware(request)
+        return self.seen[-1]
+
+    def test_reads_rotate_over_replicas(self):
+        self.assertEqual({self._call('get'), self._call('get')}, {'replica1', 'replica2'})
+
+    def test_writes_and_outside_requests_use_default(self):
+        self.assertEqual(self._call('post'), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_read(Booking), DEFAULT_DB_ALIAS)
+
+    def test_client_sticks_to_default_after_write(self):
+        self._call('post', token='client-a')
+        self.assertEqual(self._call('get', token='client-a'), DEFAULT_DB_ALIAS)
+        self.assertIn(self._call('get', token='client-b'), ('replica1', 'replica2'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_default(self):
+        self.assertEqual(self._call('get'), DEFAULT_DB_ALIAS)
+
+    async def test_async_requests_rotate_and_stick(self):
+        async def view(request):
+            self.seen.append(router.db_for_read(Booking))
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        for method in ('get', 'get', 'post', 'get'):
+            await middleware(getattr(self.factory, method)('/api/async/bookings/', HTTP_AUTHORIZATION='Bearer c'))
+        self.assertEqual(set(self.seen[:2]), {'replica1', 'replica2'})
+        self.assertEqual(self.seen[2:], [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS])
+
+    @skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+    def test_write_on_another_worker_makes_client_sticky(self):
+        worker = multiprocessing.get_context('fork').Process(target=self._call, args=('post', 'client-a'))
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(self._call('get', token='client-a'), DEFAULT_DB_ALIAS)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_replicas_refuse_a_per_process_sticky_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaMiddleware(lambda request: HttpResponse())
+
+
+async def _count_bookings_in_pool_thread():
+    def count():
+        try:
+            return Booking.objects.count()
+        finally:
+            connection.close()
+
+    return await run_blocking(count)
+
+
+@override_settings(DATABASE_REPLICAS=[], DATABASE_QUERY_COUNT_HEADER=True)
+class QueryCountHeaderTests(TestCase):
+    async def test_async_orm_queries_in_other_threads_are_counted(self):
+        async def view(request):
+            await Booking.objects.acount()            # async ORM: نخ sync جدا
+            await _count_bookings_in_pool_thread()   # run_blocking: نخ استخر، اتصال خودش
+            return HttpResponse()
+
+        response = await ReplicaMiddleware(view)(RequestFactory().get('/api/async/bookings/'))
+        self.assertEqual(response['X-DB-Queries'], 'default=2')
+
+    def test_sync_view_counts(self):
+        def view(request):
+            list(Booking.objects.all()[:1])
+            return HttpResponse()
+
+        self.assertEqual(ReplicaMiddleware(view)(RequestFactory().get('/'))['X-DB-Queries'], 'default=1')
+
+
+_calls = []
+
+
+@jobs.job_handler('test.collect', batch_size=2)
+def _collect(batch):
+    _calls.append(sorted(job.payload['n'] for job in batch))
+
+
+@jobs.job_handler('test.flaky')
+def _flaky(batch):
+    return {job.id: 'boom' for job in batch if job.payload.get('fail')}
+
+
+CARGO_ONLY = {
+    'originPort': 'BND', 'destinationPort': 'QSM', 'departureDate': timezone.now(),
+    'hasPassenger': False, 'hasBaggage': True, 'baggagePieces': 1, 'baggageWeightKg': 10,
+}
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        _calls.clear()
+
+    def test_cargo_booking_enqueues_in_same_transaction(self):
+        booking = create_booking(CARGO_ONLY)
+        self.assertEqual(
+            list(Job.objects.values_list('kind', 'payload')), [(RECEIPT_RENDER, {'booking_id': booking.pk})],
+        )
+        create_booking({**CARGO_ONLY, 'hasPassenger': True, 'passengerName': 'A B'})
+        self.assertEqual(Job.objects.count(), 1)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            create_booking(CARGO_ONLY)
+            raise RuntimeError
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claims_batches_of_one_kind(self):
+        for n in range(3):
+            jobs.enqueue('test.collect', {'n': n})
+        jobs.enqueue('test.flaky', {})
+        for _ in range(3):
+            handler, batch = jobs.claim('w1', kinds=['test.collect', 'test.flaky'])
+            jobs.run_batch(handler, batch)
+        self.assertEqual(_calls, [[0, 1], [2]])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 4)
+        self.assertEqual(jobs.claim('w1', kinds=['test.collect', 'test.flaky']), (None, []))
+
+    def test_failures_back_off_then_dead_letter(self):
+        job = jobs.enqueue('test.flaky', {'fail': True}, max_attempts=2)
+        jobs.run_batch(*jobs.claim('w1', kinds=['test.flaky']))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.PENDING, 1, 'boom'))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(jobs.claim('w1', kinds=['test.flaky']), (None, []))
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        jobs.run_batch(*jobs.claim('w1', kinds=['test.flaky']))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DEAD, 2))
+
+        jobs.requeue(Job.objects.filter(id=job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 0))
+
+
+@override_settings(SMS_COALESCE_SECONDS=0, SMS_RATE_PER_SECOND=1000, SMS_RATE_BURST=1000, SMS_PREFIX='P: ')
+class SmsOutboxTests(TestCase):
+    def setUp(self):
+        self.gateway = LocalSmsGateway().start()
+        self.provider = HttpSmsProvider(self.gateway.url, max_batch=2)
+        self.addCleanup(self.gateway.stop)
+        self.addCleanup(self.provider.close)
+
+    def _dispatch(self):
+        dispatcher = SmsDispatcher(self.provider)
+        while dispatcher.dispatch_once():
+            pass
+        return dispatcher.stats
+
+    def test_bookings_coalesce_per_recipient(self):
+        first = create_booking({**CARGO_ONLY, 'phoneNumber': '۰۹۱۲ ۱۲۳ ۴۵۶۷'})
+        second = create_booking({**CARGO_ONLY, 'phoneNumber': '09121234567'})
+        queue_sms([('09121234567', 'booking.created', 'again', first)])  # همان رویداد دوباره → نادیده
+        queue_sms([('+96890000001', 'note', 'hello', None), ('not a phone', 'note', 'x', None)])
+        self.assertEqual(SmsMessage.objects.count(), 3)
+
+        stats = self._dispatch()
+        self.assertEqual((stats.messages, stats.sms, stats.bulk_calls), (3, 2, 1))
+        by_number = dict(self.gateway.received)
+        self.assertEqual(set(by_number), {'09121234567', '+96890000001'})
+        self.assertEqual(by_number['09121234567'].count('P: '), 1)
+        self.assertIn(first.reference, by_number['09121234567'])
+        self.assertIn(second.reference, by_number['09121234567'])
+        self.assertEqual(SmsMessage.objects.filter(status=SmsMessage.SENT).count(), 3)
+        self.assertEqual(self.provider.pool.created, 1)
+
+    @override_settings(SMS_DEDUPE_WINDOW_SECONDS=3600)
+    def test_same_note_without_booking_is_sent_again_in_a_later_window(self):
+        note = [('+96890000001', 'note', 'port closed tomorrow', None)]
+        queue_sms(note)
+        queue_sms(note)  # تلاش دوباره همان لحظه → نادیده
+        self.assertEqual(SmsMessage.objects.count(), 1)
+        later = timezone.now() + datetime.timedelta(days=1)
+        with mock.patch('apps.bookings.sms.timezone.now', return_value=later):
+            queue_sms(note)
+            queue_sms(note)
+        self.assertEqual(SmsMessage.objects.count(), 2)
+
+    def test_gateway_outage_is_retried(self):
+        self.gateway.fail_every = 1
+        queue_sms([('+9689000000%d' % n, 'note', 'hello', None) for n in range(3)])
+        stats = self._dispatch()
+        self.assertEqual((stats.bulk_calls, stats.retried, stats.sent_messages), (2, 3, 0))
+        message = SmsMessage.objects.first()
+        self.assertEqual((message.status, message.attempts, message.last_error), (SmsMessage.PENDING, 1, 'HTTP 503'))
+        self.assertGreater(message.send_after, timezone.now())
+
+        self.gateway.fail_every = 0
+        SmsMessage.objects.update(send_after=timezone.now())
+        self.assertEqual(self._dispatch().sent_messages, 3)
+        self.assertEqual(len(self.gateway.received), 3)
+
+    def test_missing_provider_results_are_retried(self):
+        class ShortProvider(SmsProvider):
+            # آخرین نتیجهٔ هر درخواست گروهی گم می‌شود
+            def send_bulk(self, messages):
+                return [SendResult(True, f'short-{i}', '', False) for i in range(len(messages) - 1)]
+
+        self.provider = ShortProvider()
+        queue_sms([('+9689000000%d' % n, 'note', 'hello', None) for n in range(3)])
+        stats = self._dispatch()
+        self.assertEqual((stats.messages, stats.sent_messages, stats.retried), (3, 2, 1))
+        self.assertFalse(SmsMessage.objects.filter(status=SmsMessage.SENDING).exists())
+        message = SmsMessage.objects.get(status=SmsMessage.PENDING)
+        self.assertEqual(message.last_error, 'provider returned fewer results than messages')
+        self.assertGreater(message.send_after, timezone.now())
+
+    def test_token_bucket_waits_for_refill(self):
+        slept = []
+        bucket = TokenBucket(rate=10, burst=5)
+        self.assertEqual(bucket.acquire(5, sleep=slept.append), 0.0)
+        bucket.acquire(2, sleep=lambda seconds: (slept.append(seconds), setattr(bucket, 'tokens', bucket.burst)))
+        self.assertEqual(len(slept), 1)
+        self.assertAlmostEqual(slept[0], 0.2, delta=0.01)
+
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    """چند نخ (هر کدام اتصال دیتابیس خودش) همزمان روی یک حرکت با ظرفیت کم رزرو می‌کنند."""
+
+    def test_no_overbooking_under_concurrent_bookings(self):
+        voyage = Voyage.objects.create(
+            code='BND-QSM-TEST', origin=Port.objects.create(code='BND', name='Bandar Abbas'),
+            destination=Port.objects.create(code='QSM', name='Qeshm'),
+            carrier=Carrier.objects.create(code='VAL', name='Valfajr'),
+            departure_at=timezone.now(), passenger_capacity=40, cargo_capacity_kg=500,
+        )
+        passenger = {'voyageId': voyage.pk, 'hasPassenger': True, 'passengerName': 'A B'}
+        cargo = {**CARGO_ONLY, 'voyageId': voyage.pk, 'baggageWeightKg': 30}
+        requests = [passenger if i % 2 else cargo for i in range(240)]
+        created, rejected, errors = [], [], []
+        start = threading.Barrier(12)
+        lock = threading.Lock()
+
+        def worker(batch):
+            start.wait()
+            try:
+                for data in batch:
+                    try:
+                        booking = create_booking(data)
+                    except CapacityError as exc:
+                        with lock:
+                            rejected.append((data is passenger, exc.dimension))
+                    else:
+                        with lock:
+                            created.append(booking)
+            except Exception as exc:  # هر خطای دیگر (قفل دیتابیس و ...) شکست تست است
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(requests[i::12],)) for i in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        voyage.refresh_from_db()
+        # ۴۰ صندلی و ۵۰۰ کیلو (۱۶ بار ۳۰ کیلویی) از ۱۲۰ + ۱۲۰ درخواست
+        self.assertEqual(voyage.passengers_booked, 40)
+        self.assertEqual(voyage.cargo_booked_kg, 480)
+        self.assertEqual(len(created), 56)
+        self.assertEqual(len(rejected), 240 - 56)
+        self.assertEqual(
+            sorted(set(rejected)), [(False, 'cargo'), (True, 'passengers')],
+        )
+        allocations = VoyageAllocation.objects.filter(voyage=voyage)
+        self.assertEqual(allocations.count(), 56)
+        seats = sorted(allocations.exclude(seat=None).values_list('seat', flat=True))
+        self.assertEqual(seats, list(range(1, 41)))
+
+
+class VoyageListTests(TestCase):
+    def test_date_filter(self):
+        departure = timezone.make_aware(datetime.datetime(2026, 11, 1, 10, 0))
+        voyage = Voyage.objects.create(
+            code='BND-QSM-1101', origin=Port.objects.create(code='BND', name='Bandar Abbas'),
+            destination=Port.objects.create(code='QSM', name='Qeshm'), departure_at=departure,
+        )
+        client = APIClient()
+        day = timezone.localdate(departure)
+        self.assertEqual([v['id'] for v in client.get('/api/voyages/', {'date': day.isoformat()}).json()], [voyage.pk])
+        self.assertEqual(client.get('/api/voyages/', {'date': (day + datetime.timedelta(days=1)).isoformat()}).json(), [])
+        for value in ('2026-02-30', 'tomorrow'):
+            response = client.get('/api/voyages/', {'date': value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('detail', response.json())
+
+
+@skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+class ReferenceDataVersionTests(TestCase):
+    def setUp(self):
+        reference_data.ports.bump()
+        Port.objects.create(code='BND', name='Bandar Abbas')
+        self.assertIsNotNone(reference_data.port_by_code('bnd'))
+        # ردیف بدون سیگنال: فقط bump (در هر پردازه‌ای) snapshot را کهنه می‌کند
+        Port.objects.bulk_create([Port(code='KIH', name='Kish')])
+
+    def _bump_in_other_worker(self):
+        worker = multiprocessing.get_context('fork').Process(target=reference_data.ports.bump)
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+
+    @mock.patch.object(reference_data, 'VERSION_CHECK_SECONDS', 0)
+    def test_bump_in_another_worker_is_seen(self):
+        self.assertIsNone(reference_data.port_by_code('KIH'))
+        self._bump_in_other_worker()
+        self.assertEqual(reference_data.port_by_code('kih').name, 'Kish')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_rebuilds_after_check_interval(self):
+        # bump پردازهٔ دیگر به LocMem این پردازه نمی‌رسد؛ سقف کهنگی همان VERSION_CHECK_SECONDS است
+        self._bump_in_other_worker()
+        self.assertIsNone(reference_data.port_by_code('KIH'))
+        with mock.patch.object(reference_data, 'VERSION_CHECK_SECONDS', 0):
+            self.assertEqual(reference_data.port_by_code('kih').name, 'Kish')
+            # محتوای بدون تغییر: همان snapshot (ETag و Last-Modified ثابت)
+            self.assertIs(reference_data.ports.snapshot(), reference_data.ports.snapshot())
+
+
+class BookingSearchTests(TestCase):
+    def setUp(self):
+        self.booking = create_booking({
+            **CARGO_ONLY, 'hasPassenger': True, 'passengerName': 'Sara Ahmadi',
+            'passportNumber': 'ab 1234567', 'passengerIdNumber': '0012345678',
+        })
+        self.other = create_booking({**CARGO_ONLY, 'hasPassenger': True, 'passportNumber': 'AB7654321'})
+
+    def _search(self, match='auto', **terms):
+        return [booking.pk for booking in search_bookings(terms, match=match)]
+
+    def test_exact_and_prefix_use_normalized_keys(self):
+        self.assertEqual(self._search(passport='AB-1234567', match='exact'), [self.booking.pk])
+        self.assertEqual(self._search(passport='ab12', match='prefix'), [self.booking.pk])
+        # پیشوند مشترک: هر دو، جدیدترین اول
+        self.assertEqual(self._search(passport='ab', match='prefix'), [self.other.pk, self.booking.pk])
+        self.assertEqual(self._search(passport='۰۰۱۲', id_number='۰۰۱۲', match='prefix'), [])
+        self.assertEqual(self._search(id_number='۰۰۱۲', match='prefix'), [self.booking.pk])
+
+    def test_contains_goes_through_the_trigram_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._search(passport='34-56', match='contains'), [self.booking.pk])
+        if connection.vendor == 'sqlite':
+            self.assertIn(f'{FTS_TABLE} MATCH', queries[0]['sql'])
+        # کوتاه‌تر از یک trigram: LIKE روی ستون کلید
+        self.assertEqual(self._search(passport='65', match='contains'), [self.other.pk])
+
+    def test_auto_falls_through_to_the_first_strategy_with_results(self):
+        self.assertEqual(self._search(passport='AB1234567'), [self.booking.pk])
+        self.assertEqual(self._search(passport='AB12'), [self.booking.pk])
+        self.assertEqual(self._search(passport='4321'), [self.other.pk])
+        self.assertEqual(self._search(passport='ZZ99'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 table is SQLite only')
+    def test_fts_follows_updates_and_deletes(self):
+        self.booking.passport_number = 'CD9990001'
+        self.booking.save()
+        self.assertEqual(self._search(passport='99900', match='contains'), [self.booking.pk])
+        self.assertEqual(self._search(passport='234567', match='contains'), [])
+        self.other.delete()
+        self.assertEqual(self._search(passport='654', match='contains'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 table is SQLite only')
+    def test_ensure_search_index_restores_dropped_triggers(self):
+        # مثل migrationی که جدول bookings را بازسازی می‌کند
+        with connection.cursor() as cursor:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER {FTS_TABLE}_{suffix}')
+        late = Booking.objects.create(
+            origin_port='BND', destination_port='QSM', departure_date=timezone.now(),
+            reference='SC-LATE-1', passport_number='EF5550001',
+        )
+        self.assertEqual(self._search(passport='55500', match='contains'), [])
+        ensure_search_index()
+        self.assertEqual(self._search(passport='55500', match='contains'), [late.pk])
+
+    def test_endpoint_validates_parameters(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/bookings/search/').status_code, 400)
+        self.assertEqual(client.get('/api/bookings/search/', {'passport': 'AB12', 'match': 'fuzzy'}).status_code, 400)
+        response = client.get('/api/bookings/search/', {'passport': 'ab-12', 'fields': 'reference'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'reference': self.booking.reference}])
+
+
+class PassengerNameSearchTests(TestCase):
+    def setUp(self):
+        self.names = {}
+        for name in ('Mohammad Rezaei', 'Mohammad Karimi', 'محمد رضایی', 'Ali Ahmadi', 'Leila Ahmadi',
+                     'زهرا کریمی', 'فاطمه', 'Jose Garcia', 'حسین'):
+            self.names[name] = create_booking({**CARGO_ONLY, 'hasPassenger': True, 'passengerName': name}).pk
+
+    def _search(self, query):
+        by_pk = {pk: name for name, pk in self.names.items()}
+        return [(by_pk[booking.pk], score) for booking, score in search_passenger_names(query)]
+
+    def test_exact_name_beats_token_beats_phonetic(self):
+        results = self._search('mohammad  REZAEI')
+        self.assertEqual([name for name, _ in results], ['Mohammad Rezaei', 'Mohammad Karimi', 'محمد رضایی'])
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertGreaterEqual(scores[0], search.NAME_SCORES['name'])
+        self.assertGreater(scores[1], scores[2])
+
+    def test_single_consonant_phonetic_keys_are_not_matched(self):
+        self.assertEqual(phonetic_key('aly'), 'L')
+        self.assertNotIn(('phonetic', 'L'), name_search_keys('Ali'))
+        self.assertEqual(self._search('Aly'), [])
+        self.assertEqual([name for name, _ in self._search('Ali')], ['Ali Ahmadi'])
+
+    def test_folding_diacritics_and_scripts(self):
+        exact = search.NAME_SCORES['name']
+        # ي/ى و ك عربی
+        self.assertEqual(self._search('زهرا كريمى')[0], ('زهرا کریمی', exact + 2 * (10 + 3)))
+        # اعراب و حروف لاتین با accent
+        self.assertEqual(self._search('فاطِمه')[0][0], 'فاطمه')
+        self.assertEqual(self._search('José García')[0][0], 'Jose Garcia')
+        # لاتین ↔ فارسی فقط با کلید آوایی
+        self.assertEqual(self._search('Hossein'), [('حسین', search.NAME_SCORES['phonetic'])])
+        self.assertEqual(self._search('Fatemeh'), [('فاطمه', search.NAME_SCORES['phonetic'])])
+        self.assertEqual([name for name, _ in self._search('رضایی')][:1], ['محمد رضایی'])
+
+    def test_endpoint_returns_match_score(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/bookings/search/name/').status_code, 400)
+        response = client.get('/api/bookings/search/name/', {'q': 'محمد', 'fields': 'passengerName'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {'passengerName': 'محمد رضایی', 'matchScore': 10 + 3},
+            {'passengerName': 'Mohammad Karimi', 'matchScore': 3},
+            {'passengerName': 'Mohammad Rezaei', 'matchScore': 3},
+        ])
+
+
+class ReceiptCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='receipt-cache-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        patcher = mock.patch.object(receipt_cache, '_cache', receipt_cache.DiskReceiptCache(self.directory))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.booking = create_booking({**CARGO_ONLY, 'hasPassenger': True, 'passengerName': 'Sara Ahmadi'})
+        self.url = f'/api/bookings/{self.booking.reference}/receipt/pdf/'
+
+    def test_miss_renders_once_then_hits_and_revalidates(self):
+        client = APIClient()
+        with mock.patch.object(views, 'render_receipt_fields', wraps=receipts.render_receipt_fields) as render:
+            first = client.get(self.url)
+            self.assertEqual(first.status_code, 200)
+            self.assertTrue(first.content.startswith(b'%PDF'))
+            digest = first['ETag'].strip('"')
+            self.assertTrue(os.path.exists(os.path.join(self.directory, f'{digest}.pdf')))
+
+            second = client.get(self.url)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+            self.assertEqual(render.call_count, 1)
+
+            # فیلد چاپی عوض شد → هش تازه، رندر دوباره
+            self.booking.passenger_name = 'Sara Ahmadi Rad'
+            self.booking.save()
+            third = client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(third.status_code, 200)
+            self.assertNotEqual(third['ETag'], first['ETag'])
+            self.assertEqual(render.call_count, 2)
+
+    def test_disk_cache_evicts_least_recently_used(self):
+        cache = receipt_cache.DiskReceiptCache(self.directory, max_bytes=300)
+        cache.set('a', b'a' * 100)
+        cache.set('b', b'b' * 100)
+        os.utime(cache._path('a'), (1, 1))
+        os.utime(cache._path('b'), (2, 2))
+        self.assertEqual(cache.get('a'), b'a' * 100)  # hit → تازه‌ترین
+        cache.set('c', b'c' * 150)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'a' * 100)
+        self.assertEqual(cache.get('c'), b'c' * 150)
+
+
+BARCODE = barcodes.BarcodePayload(
+    version=barcodes.VERSION, booking_id=2 ** 40 + 7, departure_date=datetime.date(2026, 11, 1), piece=2,
+    piece_count=3, weight_kg=23.4, passenger='سارا احمدی', passport='AB1234567', id_number='0012345678',
+    origin='BND', destination='QSM', baggage_type='checked',
+)
+
+
+def _with_crc(body):
+    return barcodes.PREFIX + barcodes._b32encode(body + zlib.crc32(body).to_bytes(4, 'big'))
+
+
+class BarcodeTests(TestCase):
+    def test_round_trip(self):
+        code = encode(BARCODE)
+        self.assertTrue(code.startswith('SB'))
+        self.assertTrue(set(code) <= set(references.ALPHABET))
+        self.assertEqual(decode(code), BARCODE)
+        empty = BARCODE._replace(booking_id=1, departure_date=None, piece=0, piece_count=0, weight_kg=0.0,
+                                 passenger='', passport='', id_number='', baggage_type='')
+        self.assertEqual(decode(encode(empty)), empty)
+
+    def test_typed_codes_use_crockford_aliases(self):
+        code = encode(BARCODE)
+        self.assertTrue('0' in code[2:] and '1' in code[2:], code)
+        typed = code.replace('0', 'o').replace('1', 'l').lower()
+        typed = ' ' + '-'.join(typed[i:i + 4] for i in range(0, len(typed), 4)) + ' '
+        self.assertEqual(decode(typed), BARCODE)
+        self.assertEqual(decode(code.replace('1', 'I')), BARCODE)
+
+    def test_damaged_codes_are_rejected(self):
+        code = encode(BARCODE)
+        middle = len(code) // 2
+        flipped = code[:middle] + ('A' if code[middle] != 'A' else 'B') + code[middle + 1:]
+        with self.assertRaisesRegex(InvalidBarcode, 'checksum'):
+            decode(flipped)
+        body = barcodes.pack(BARCODE)[:-4]
+        with self.assertRaisesRegex(InvalidBarcode, 'نسخه'):
+            decode(_with_crc(bytes([barcodes.VERSION + 1]) + body[1:]))
+        # CRC درست ولی بدنهٔ بریده: varint یا متن ناقص
+        for cut in (2, 12, len(body) - 1):
+            with self.assertRaises(InvalidBarcode, msg=cut):
+                decode(_with_crc(body[:cut]))
+        for text in (code[:-3], code[:6], 'SB', '', 'XX' + code[2:], code + 'U', None):
+            with self.assertRaises(InvalidBarcode, msg=text):
+                decode(text)
+
+
+class BarcodeEndpointTests(TestCase):
+    def setUp(self):
+        scan_index.clear_indexes()
+        self.addCleanup(scan_index.clear_indexes)
+        patcher = mock.patch.object(scan_index.recorder, 'flush_seconds', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.booking = create_booking({**FULL_BOOKING, 'baggageItems': [
+            {'baggageType': 'checked', 'pieceDetails': [{'weightKg': 20}, {'weightKg': 12.5}]},
+        ]})
+
+    def test_batch_returns_a_code_per_piece(self):
+        client = APIClient()
+        response = client.post('/api/bookings/barcodes/', {'references': [self.booking.reference]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        [result] = response.json()['results']
+        self.assertEqual(result['reference'], self.booking.reference)
+        self.assertEqual(
+            [(b['piece'], b['pieceCount'], b['weightKg']) for b in result['barcodes']],
+            [(0, 2, 20.5), (1, 2, 20.0), (2, 2, 12.5)],
+        )
+        decoded = [decode(b['payload']) for b in result['barcodes']]
+        self.assertEqual({payload.booking_id for payload in decoded}, {self.booking.pk})
+        self.assertEqual(decoded[2].passenger, self.booking.passenger_name)
+
+        svg = client.post('/api/bookings/barcodes/', {'references': [self.booking.reference], 'format': 'svg'},
+                          format='json')
+        if svg.status_code != 501:  # بدون reportlab
+            self.assertTrue(svg.json()['results'][0]['barcodes'][0]['image'].startswith('data:image/svg+xml;base64,'))
+        self.assertEqual(
+            client.post('/api/bookings/barcodes/', {'references': [self.booking.reference], 'format': 'gif'},
+                        format='json').status_code, 400,
+        )
+
+    def test_scanned_code_resolves_to_the_booking(self):
+        client = APIClient()
+        code = encode(booking_payloads(Booking.objects.with_items().get(pk=self.booking.pk))[1][1])
+        with self.assertNumQueries(3):  # رزرو + قطعه‌های بار و وسیله‌ها برای مقایسهٔ stale
+            response = client.get(f'/api/bookings/barcodes/{code.lower()}/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['booking']['reference'], body['barcode']['piece'], body['stale']),
+                         (self.booking.reference, 1, False))
+
+        self.booking.passenger_name = 'Reza Karimi'
+        self.booking.save()
+        self.assertTrue(client.get(f'/api/bookings/barcodes/{code}/').json()['stale'])
+        self.assertEqual(client.get('/api/bookings/barcodes/SB1234/').status_code, 400)
+        self.assertEqual(client.get(f'/api/bookings/barcodes/{encode(BARCODE)}/').status_code, 404)
+
+        scan = client.post('/api/bookings/scan/', {
+            'code': code, 'event': 'BOARDED', 'origin': 'BND', 'destination': 'QSM',
+            'date': timezone.localdate(self.booking.departure_date).isoformat(),
+        }, format='json')
+        self.assertEqual((scan.status_code, scan.json()['reference']), (200, self.booking.reference))
+        self.assertEqual(scan_index.recorder.flush(), 1)
+
+
+class ScanIndexTests(TestCase):
+    DEPARTURE = timezone.make_aware(datetime.datetime(2026, 11, 1, 10, 0))
+
+    def setUp(self):
+        scan_index.clear_indexes()
+        self.addCleanup(scan_index.clear_indexes)
+        # بدون تایمر نوشتن در نخ دیگر؛ flush صریح
+        patcher = mock.patch.object(scan_index.recorder, 'flush_seconds', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        passenger = {**CARGO_ONLY, 'hasPassenger': True, 'departureDate': self.DEPARTURE}
+        self.booking = create_booking({
+            **passenger, 'passengerName': 'Sara Ahmadi', 'passportNumber': 'AB1234567',
+            'passengerIdNumber': '0012345678',
+        })
+        self.next_day = create_booking({
+            **passenger, 'passportNumber': 'CD7654321', 'departureDate': self.DEPARTURE + datetime.timedelta(days=1),
+        })
+        self.day = timezone.localdate(self.DEPARTURE).isoformat()
+
+    def test_finds_every_code_kind_without_queries(self):
+        index = scan_index.get_voyage_index('BND', 'QSM', self.day)
+        barcode = encode(booking_payloads(self.booking)[0][1])
+        with self.assertNumQueries(0):
+            for code in (self.booking.reference.lower(), 'ab-123 4567', '۰۰۱۲۳۴۵۶۷۸', barcode):
+                record = index.find(code)
+                self.assertEqual((record.booking_id, record.passenger), (self.booking.pk, 'Sara Ahmadi'), code)
+            self.assertIsNone(index.find(self.next_day.reference))
+            self.assertIsNone(index.find('SB' + barcode[2:-1]))
+
+    @mock.patch.object(scan_index, 'MISS_REFRESH_SECONDS', 0)
+    def test_miss_picks_up_new_bookings_incrementally(self):
+        index = scan_index.get_voyage_index('BND', 'QSM', self.day)
+        late = create_booking({**CARGO_ONLY, 'hasPassenger': True, 'departureDate': self.DEPARTURE,
+                               'passportNumber': 'EF5550001'})
+        self.assertIsNone(index.find('EF5550001'))
+        self.assertEqual(index.lookup('EF5550001').booking_id, late.pk)
+        self.assertEqual(index.high_water, late.pk)
+        self.assertEqual(len(index.by_id), 2)
+
+    def test_scan_endpoint_records_once_and_flags_duplicates(self):
+        client = APIClient()
+        body = {'code': 'ab1234567', 'event': 'BOARDED', 'origin': 'BND', 'destination': 'QSM', 'date': self.day}
+        first = client.post('/api/bookings/scan/', body, format='json')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['reference'], self.booking.reference)
+        self.assertEqual(client.post('/api/bookings/scan/', body, format='json').status_code, 409)
+        self.assertEqual(
+            client.post('/api/bookings/scan/', {**body, 'code': 'CD7654321'}, format='json').status_code, 404,
+        )
+        self.assertEqual(scan_index.recorder.flush(), 1)
+        self.assertEqual(
+            list(BookingScan.objects.values_list('booking_id', 'event')), [(self.booking.pk, 'BOARDED')],
+        )
+        counts = client.get('/api/bookings/scan/', {'origin': 'BND', 'destination': 'QSM', 'date': self.day})
+        self.assertEqual(counts.json(), {'total': 1, 'BOARDED': 1, 'EXITED': 0})
+
+    def test_impossible_voyage_date_is_rejected(self):
+        client = APIClient()
+        voyage = {'origin': 'BND', 'destination': 'QSM', 'date': '2026-02-30'}
+        self.assertEqual(client.get('/api/bookings/scan/', voyage).status_code, 400)
+        response = client.post('/api/bookings/scan/', {**voyage, 'code': 'AB1234567', 'event': 'BOARDED'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('detail', response.json())
+
+
+IDEMPOTENT_BODY = {
+    'originPort': 'BND', 'destinationPort': 'QSM', 'departureDate': '2026-11-01T10:00:00',
+    'hasPassenger': True, 'passengerName': 'Sara Ahmadi', 'passportNumber': 'AB1234567',
+}
+
+
+def _post_booking(body, key):
+    return APIClient().post('/api/bookings/', body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+
+class IdempotencyTests(TestCase):
+    def test_retry_replays_the_stored_response(self):
+        first = _post_booking(IDEMPOTENT_BODY, 'kiosk-1-0001')
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first)
+        with self.assertNumQueries(1):
+            retry = _post_booking(IDEMPOTENT_BODY, 'kiosk-1-0001')
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self.assertEqual(_post_booking(IDEMPOTENT_BODY, 'kiosk-1-0002').status_code, 201)
+        other = _post_booking({**IDEMPOTENT_BODY, 'passengerName': 'Reza Karimi'}, 'kiosk-1-0002')
+        self.assertEqual(other.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+        # کلید دیگر همان بدنه را دوباره ثبت می‌کند
+        self.assertEqual(_post_booking(IDEMPOTENT_BODY, 'kiosk-1-0003').status_code, 201)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_invalid_request_is_stored_and_server_errors_are_not(self):
+        bad = _post_booking({**IDEMPOTENT_BODY, 'originPort': ''}, 'kiosk-1-0004')
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(_post_booking({**IDEMPOTENT_BODY, 'originPort': ''}, 'kiosk-1-0004')['Idempotent-Replayed'],
+                         'true')
+        with mock.patch.object(views.BookingSerializer, 'save', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                _post_booking(IDEMPOTENT_BODY, 'kiosk-1-0005')
+        self.assertEqual(_post_booking(IDEMPOTENT_BODY, 'kiosk-1-0005').status_code, 201)
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    def test_concurrent_retries_create_one_booking(self):
+        threads = 6
+        barrier = threading.Barrier(threads)
+        responses, errors = [], []
+
+        def kiosk():
+            try:
+                barrier.wait()
+                responses.append(_post_booking(IDEMPOTENT_BODY, 'kiosk-2-0001'))
+            except Exception as exc:  # در نخ اصلی گزارش می‌شود
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=kiosk) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Booking.objects.count(), 1)
+        reference = Booking.objects.get().reference
+        self.assertEqual([r.status_code for r in responses], [201] * threads)
+        self.assertEqual({r.json()['reference'] for r in responses}, {reference})
+        self.assertEqual(sum(r.has_header('Idempotent-Replayed') for r in responses), threads - 1)
+
+
+def _cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+class BookingPaginationTests(TestCase):
+    def setUp(self):
+        self.bookings = [create_booking(CARGO_ONLY) for _ in range(7)]
+        # پنج رزرو با created_at کاملاً یکسان (مثل ورود گروهی در یک لحظه) و دو رزرو جدیدتر
+        tie = timezone.now() - datetime.timedelta(hours=1)
+        Booking.objects.filter(pk__in=[b.pk for b in self.bookings[:5]]).update(created_at=tie)
+        self.expected = [b.reference for b in reversed(self.bookings)]
+
+    def _pages(self, limit):
+        client, pages, cursor = APIClient(), [], None
+        while True:
+            params = {'limit': limit, 'fields': 'reference'}
+            if cursor:
+                params['cursor'] = cursor
+            response = client.get('/api/bookings/', params)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['reference'] for row in response.json()])
+            cursor = response.get('X-Next-Cursor')
+            if cursor is None:
+                self.assertNotIn('Link', response)
+                return pages
+            self.assertIn(f'cursor={cursor}', response['Link'])
+            self.assertIn('fields=reference', response['Link'])
+
+    def test_ties_on_created_at_are_neither_skipped_nor_repeated(self):
+        pages = self._pages(limit=2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual([ref for page in pages for ref in page], self.expected)
+
+    def test_last_page_has_no_next_cursor(self):
+        self.assertEqual(self._pages(limit=7), [self.expected])
+        self.assertEqual(self._pages(limit=200), [self.expected])
+
+    def test_invalid_and_tampered_cursors_are_rejected(self):
+        client = APIClient()
+        last = self.bookings[0]
+        for cursor in (
+            'not a cursor!',
+            _cursor('garbage'),
+            _cursor(f'{last.created_at.isoformat()}|x'),
+            # زمان بدون منطقهٔ زمانی
+            _cursor(f'{last.created_at.replace(tzinfo=None).isoformat()}|{last.pk}'),
+        ):
+            response = client.get('/api/bookings/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json(), {'detail': 'cursor نامعتبر است.'})
+
+
+ITEMS_BODY = {
+    **IDEMPOTENT_BODY, 'hasBaggage': True, 'hasVehicle': True,
+    'baggageItems': [{'baggageType': 'checked', 'pieceDetails': [{'weightKg': 20, 'barcodeId': 'BG1'}]}],
+    'vehicleItems': [{'plateNumber': '12-IR', 'type': 'car', 'lengthM': 4.5, 'barcodeId': 'VH1'}],
+}
+
+
+class BookingItemTests(TestCase):
+    def _post(self, body):
+        return APIClient().post('/api/bookings/', body, format='json')
+
+    def _with_piece(self, weight):
+        return {**ITEMS_BODY, 'baggageItems': [{'pieceDetails': [{'weightKg': weight, 'barcodeId': 'BG1'}]}]}
+
+    def test_numbers_must_fit_the_item_columns(self):
+        self.assertEqual(self._post(self._with_piece(999999.99)).status_code, 201)
+        for body in (
+            self._with_piece(1000000),  # max_digits=8, decimal_places=2
+            self._with_piece('1e40'),
+            {**ITEMS_BODY, 'vehicleItems': [{'plateNumber': '12-IR', 'type': 'car', 'lengthM': 10000}]},
+            {**ITEMS_BODY, 'vehicleItems': [{'plateNumber': '12-IR', 'type': 'car', 'year': 10 ** 20}]},
+        ):
+            response = self._post(body)
+            self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def _query_counts(self):
+        client, day = APIClient(), timezone.localdate().isoformat()
+        counts = []
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get('/api/bookings/').status_code, 200)
+        counts.append(len(queries))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/bookings/manifest/', {'origin': 'BND', 'destination': 'QSM', 'date': day})
+            b''.join(response.streaming_content)
+        counts.append(len(queries))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                '/api/bookings/barcodes/', {'origin': 'BND', 'destination': 'QSM', 'date': day}, format='json',
+            )
+            self.assertEqual(response.status_code, 200)
+        counts.append(len(queries))
+        return counts
+
+    def test_list_and_exports_read_items_in_batches(self):
+        body = {**ITEMS_BODY, 'departureDate': timezone.now().isoformat()}
+        self.assertEqual(self._post(body).status_code, 201)
+        few = self._query_counts()
+        # رزرو + قطعه‌های بار + وسیله‌ها: برای هر صفحه / chunk، نه برای هر رزرو
+        self.assertEqual(few[0], 3)
+        for _ in range(5):
+            self._post(body)
+        self.assertEqual(self._query_counts(), few)
+
+
+FULL_BOOKING = {
+    **ITEMS_BODY, 'departureDate': timezone.now(),
+    'passengerIdNumber': '0012345678', 'phoneNumber': '+989120000000', 'baggagePieces': 1,
+    'baggageWeightKg': 20.5, 'vehiclePlateNumber': '12-IR', 'vehicleType': 'car', 'vehicleLengthM': 4.5,
+    'documentType': 'PASSENGER_TICKET', 'departureGate': 'G2', 'seatNumber': '12A', 'seatingArea': 'VIP',
+    'arrivalDate': '2026-11-01 14:00', 'carrierName': 'Valfajr', 'ticketNumber': 'T-1', 'sequenceNumber': '007',
+    'boardingTime': '09:30',
+    'vehicleItems': [{
+        'plateNumber': '12-IR', 'type': 'car', 'lengthM': 4.5, 'barcodeId': 'VH1', 'make': 'Saipa',
+        'model': 'Tiba', 'year': 2020, 'engineNumber': 'E1', 'chassisNumber': 'C1', 'ownerName': 'Sara',
+        'ownerContact': '0912', 'senderCompany': 'A', 'receiverCompany': 'B',
+    }],
+}
+
+
+class BookingJsonTests(TestCase):
+    def test_fast_mapper_matches_model_to_dict(self):
+        full = create_booking(FULL_BOOKING)
+        empty = create_booking(CARGO_ONLY)
+        queryset = Booking.objects.filter(pk__in=[full.pk, empty.pk]).order_by('id')
+        expected = [_model_to_dict(booking) for booking in queryset.with_items()]
+        self.assertTrue(all(value not in (None, '', []) for value in expected[0].values()), expected[0])
+        self.assertEqual(booking_dicts(queryset), expected)
+
+        fields = parse_fields('vehicleItems,reference,baggageWeightKg')
+        self.assertEqual(
+            booking_dicts(queryset, fields),
+            [{key: data[key] for key in ('reference', 'baggageWeightKg', 'vehicleItems')} for data in expected],
+        )
+
+
+class FastJSONRendererTests(TestCase):
+    def test_orjson_output_is_byte_identical_to_drf(self):
+        self.assertIsNotNone(renderers.orjson)  # در requirements.txt است؛ بدون آن این تست چیزی را نمی‌سنجد
+        booking = _model_to_dict(create_booking(FULL_BOOKING))
+        payload = {
+            'results': [booking, {**booking, 'passengerName': 'خط\u2028جدید\u2029پاراگراف'}],
+            'createdAt': timezone.now().replace(microsecond=123456),
+            'localTime': datetime.datetime(2026, 11, 1, 10, 0, 0, 500),
+            'day': datetime.date(2026, 11, 1),
+            'boarding': datetime.time(9, 30, 15, 250000),
+            'weight': Decimal('20.50'),
+            'id': uuid.UUID(int=1),
+            'label': gettext_lazy('Booking'),
+            'nextCursor': None,
+        }
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            fast = renderers.FastJSONRenderer().render(payload)
+        self.assertEqual(dumps.call_count, 1)
+        self.assertEqual(fast, JSONRenderer().render(payload))
+        self.assertIn(b'\\u2028', fast)
+
+
+class ManifestExportTests(TestCase):
+    def test_csv_cells_that_look_like_formulas_are_escaped(self):
+        create_booking({
+            **FULL_BOOKING,
+            'passengerName': '=HYPERLINK("http://evil.example","x")', 'phoneNumber': '+989120000000',
+            'passportNumber': '-2+3', 'seatNumber': '12A',
+            'vehicleItems': [{'plateNumber': '12-IR', 'type': 'car', 'barcodeId': 'VH1', 'ownerName': '@SUM(A1)'}],
+        })
+        response = APIClient().get('/api/bookings/manifest/', {
+            'origin': 'BND', 'destination': 'QSM', 'date': timezone.localdate().isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        text = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = [dict(zip(manifest.COLUMNS, row)) for row in csv.reader(io.StringIO(text))][1:]
+        self.assertEqual([row['itemType'] for row in rows], ['PASSENGER', 'BAGGAGE', 'VEHICLE'])
+        passenger, baggage, vehicle = rows
+        self.assertEqual(passenger['passengerName'], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(passenger['phoneNumber'], "'+989120000000")
+        self.assertEqual(passenger['passportNumber'], "'-2+3")
+        self.assertEqual(passenger['seatNumber'], '12A')
+        self.assertEqual(baggage['pieceWeightKg'], '20')
+        self.assertEqual(vehicle['ownerName'], "'@SUM(A1)")
+
+
+def _daily_stats():
+    """ردیف‌های غیرصفر BookingDailyStat → (کلید، شمارنده‌ها)؛ ردیف صفرشده بعد از جابه‌جایی با rebuild برابر است."""
+    rows = {}
+    for stat in BookingDailyStat.objects.all():
+        counts = (stat.bookings, stat.passengers, stat.baggage_pieces, stat.baggage_weight_kg, stat.vehicles)
+        if any(counts):
+            rows[tuple(getattr(stat, field) for field in rollups.KEY_FIELDS)] = counts
+    return rows
+
+
+class DailyStatTests(TestCase):
+    DEPARTURE = timezone.make_aware(datetime.datetime(2026, 11, 1, 10, 0))
+
+    def _key(self, days=0, origin='BND', document_type='CARGO_BOARDING_CARD'):
+        day = timezone.localdate(self.DEPARTURE) + datetime.timedelta(days=days)
+        return (day, origin, 'QSM', '', document_type)
+
+    def test_save_delete_and_bulk_create_keep_stats_equal_to_rebuild(self):
+        cargo = create_booking({**CARGO_ONLY, 'departureDate': self.DEPARTURE, 'baggageWeightKg': 10.5})
+        passenger = create_booking({
+            **FULL_BOOKING, 'departureDate': self.DEPARTURE, 'carrierName': '', 'documentType': 'CARGO_BOARDING_CARD',
+        })
+        self.assertEqual(_daily_stats(), {self._key(): (2, 1, 2, Decimal('31.00'), 1)})
+
+        # جابه‌جایی به روز و بندر دیگر: از ردیف قبلی کم و به ردیف تازه اضافه
+        cargo.departure_date = self.DEPARTURE + datetime.timedelta(days=1)
+        cargo.origin_port = 'KIH'
+        cargo.save()
+        passenger.baggage_pieces = 3
+        passenger.save(update_fields=['baggage_pieces'])
+        self.assertEqual(_daily_stats(), {
+            self._key(): (1, 1, 3, Decimal('20.50'), 1),
+            self._key(days=1, origin='KIH'): (1, 0, 1, Decimal('10.50'), 0),
+        })
+        passenger.delete()
+        self.assertEqual(_daily_stats(), {self._key(days=1, origin='KIH'): (1, 0, 1, Decimal('10.50'), 0)})
+
+        results = bulk_create_bookings([
+            (0, {**CARGO_ONLY, 'departureDate': self.DEPARTURE}),
+            (1, {**CARGO_ONLY, 'departureDate': self.DEPARTURE, 'hasVehicle': True,
+                 'vehicleItems': ITEMS_BODY['vehicleItems'] * 2}),
+            (2, {**CARGO_ONLY, 'departureDate': self.DEPARTURE + datetime.timedelta(days=1), 'originPort': 'KIH'}),
+        ])
+        self.assertTrue(all(isinstance(booking, Booking) for booking in results.values()))
+        incremental = _daily_stats()
+        self.assertEqual(incremental, {
+            self._key(): (2, 0, 2, Decimal('20.00'), 2),
+            self._key(days=1, origin='KIH'): (2, 0, 2, Decimal('20.50'), 0),
+        })
+        self.assertEqual(rollups.rebuild(), 2)
+        self.assertEqual(_daily_stats(), incremental)
+
+    def test_report_endpoint_groups_and_validates(self):
+        create_booking({**CARGO_ONLY, 'departureDate': self.DEPARTURE})
+        create_booking({**CARGO_ONLY, 'departureDate': self.DEPARTURE, 'originPort': 'KIH', 'hasPassenger': True,
+                        'passengerName': 'A B'})
+        day = timezone.localdate(self.DEPARTURE).isoformat()
+        client = APIClient()
+        response = client.get('/api/reports/', {'from': day, 'to': day, 'groupBy': 'day,origin'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['totals']['bookings'], body['totals']['passengers']), (2, 1))
+        self.assertEqual(
+            [(row['day'], row['origin'], row['bookings']) for row in body['rows']], [(day, 'BND', 1), (day, 'KIH', 1)],
+        )
+        filtered = client.get('/api/reports/', {'from': day, 'to': day, 'origin': 'KIH'}).json()
+        self.assertEqual(filtered['totals']['bookings'], 1)
+        for params in ({'from': '2026-02-30'}, {'to': '2026-13-01'}, {'from': 'yesterday'},
+                       {'from': day, 'to': '2026-10-01'}, {'groupBy': 'week'}):
+            response = client.get('/api/reports/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('detail', response.json())
+
+
+BULK_URL = '/api/bookings/bulk/'
+
+
+class BulkCreateTests(TestCase):
+    def setUp(self):
+        self.voyage = Voyage.objects.create(
+            code='BND-QSM-BULK', origin=Port.objects.create(code='BND', name='Bandar Abbas'),
+            destination=Port.objects.create(code='QSM', name='Qeshm'),
+            carrier=Carrier.objects.create(code='VAL', name='Valfajr'),
+            departure_at=timezone.make_aware(datetime.datetime(2026, 11, 1, 10, 0)), passenger_capacity=10,
+            cargo_capacity_kg=1000, vehicle_lane_capacity_m=100,
+        )
+        self.passenger = {**ITEMS_BODY, 'voyageId': self.voyage.pk}
+        self.cargo = {**IDEMPOTENT_BODY, 'hasPassenger': False, 'passengerName': '', 'hasBaggage': True,
+                      'baggagePieces': 1, 'baggageWeightKg': 10}
+
+    def _post(self, body, **params):
+        url = f'{BULK_URL}?atomic=true' if params.get('atomic') else BULK_URL
+        return APIClient().post(url, body, format='json')
+
+    def test_partial_success_writes_every_side_table(self):
+        response = self._post([self.passenger, {**self.cargo, 'originPort': ''}, 'not an object', self.cargo])
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual((body['created'], body['failed']), (2, 2))
+        self.assertEqual([row['status'] for row in body['results']], ['created', 'error', 'error', 'created'])
+        self.assertIn('originPort', body['results'][1]['errors'])
+        self.assertIn('non_field_errors', body['results'][2]['errors'])
+
+        passenger = Booking.objects.get(reference=body['results'][0]['reference'])
+        cargo = Booking.objects.get(reference=body['results'][3]['reference'])
+        # مسیر و شرکت حمل از خود حرکت
+        self.assertEqual((passenger.carrier_name, passenger.seat_number), ('Valfajr', '1'))
+        self.assertEqual(
+            set(passenger.name_keys.values_list('kind', flat=True)), {'name', 'token', 'phonetic'},
+        )
+        self.assertEqual(list(passenger.baggage.values_list('tag_number', flat=True)), ['BG1'])
+        self.assertEqual(list(passenger.vehicles.values_list('plate_number', flat=True)), ['12-IR'])
+        self.assertEqual(list(VoyageAllocation.objects.values_list('booking_id', 'seat')), [(passenger.pk, 1)])
+        self.voyage.refresh_from_db()
+        self.assertEqual(self.voyage.passengers_booked, 1)
+        self.assertEqual(sum(BookingDailyStat.objects.values_list('bookings', flat=True)), 2)
+        # کار پس‌زمینه فقط برای بار بدون مسافر
+        self.assertEqual(list(Job.objects.values_list('kind', 'payload')), [(RECEIPT_RENDER, {'booking_id': cargo.pk})])
+
+    def test_atomic_mode_writes_nothing_when_a_row_is_invalid(self):
+        response = self._post([self.cargo, {**self.cargo, 'originPort': ''}], atomic=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.json()['created'], response.json()['failed']), (0, 1))
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(self._post([self.cargo, self.cargo], atomic=True).status_code, 201)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_ndjson_body(self):
+        lines = f'{json.dumps(self.cargo)}\n\n{json.dumps(self.passenger)}\n'
+        response = APIClient().post(BULK_URL, lines, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+
+        broken = APIClient().post(BULK_URL, f'{json.dumps(self.cargo)}\n{{"originPort": \n',
+                                  content_type='application/x-ndjson')
+        self.assertEqual(broken.status_code, 400)
+        self.assertIn('line 2', broken.json()['detail'])
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_empty_and_non_list_bodies_are_rejected(self):
+        empty = self._post([])
+        self.assertEqual(empty.status_code, 400)
+        self.assertEqual(empty.json(), {'created': 0, 'failed': 0, 'results': []})
+        self.assertEqual(self._post(self.cargo).status_code, 400)
+        self.assertEqual(self._post(['a', 1, None]).json()['failed'], 3)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_failed_chunk_is_retried_row_by_row(self):
+        existing = create_booking(CARGO_ONLY)
+        # مستقیم به سرویس (بدون سریالایزر): تاریخ باید datetime باشد
+        cargo = {**self.cargo, 'departureDate': self.voyage.departure_at}
+        rows = [(0, self.passenger), (1, {**cargo, 'reference': existing.reference}), (2, cargo)]
+        with mock.patch.object(services, '_insert_chunk', wraps=services._insert_chunk) as insert:
+            results = bulk_create_bookings(rows, chunk_size=10)
+        # یک بار کل chunk (IntegrityError روی reference تکراری) و بعد هر ردیف جدا
+        self.assertEqual(insert.call_count, 4)
+        self.assertIsInstance(results[0], Booking)
+        self.assertIsInstance(results[1], str)
+        self.assertIsInstance(results[2], Booking)
+        self.assertEqual(Booking.objects.count(), 3)
+        # از تلاش اول chunk چیزی باقی نمانده: یک صندلی، یک سهم آمار برای هر رزرو
+        self.assertEqual(list(VoyageAllocation.objects.values_list('booking_id', 'seat')), [(results[0].pk, 1)])
+        self.assertEqual(sum(BookingDailyStat.objects.values_list('bookings', flat=True)), 3)
+        self.assertEqual(results[0].name_keys.count(), len(PassengerNameKey.build_for(results[0])))
+
+
+def _refused_printer():
+    """تنظیمات چاپگری که اتصال را رد می‌کند (پورتی که همین الان آزاد شد)."""
+    sink = LocalZplSink()
+    printer = sink.printer
+    sink.server.server_close()
+    return printer
+
+
+class LabelTests(TestCase):
+    def setUp(self):
+        self.sink = LocalZplSink().start()
+        self.addCleanup(self.sink.stop)
+        printers = override_settings(ZEBRA_PRINTERS={'gate': self.sink.printer, 'offline': _refused_printer()})
+        printers.enable()
+        self.addCleanup(printers.disable)
+        self.passenger = create_booking({
+            **FULL_BOOKING, 'passengerName': 'Sara^FS~JA_X', 'seatNumber': '12^A',
+            'baggageItems': [
+                {'baggageType': 'checked', 'pieceDetails': [{'weightKg': 20, 'barcodeId': 'BG1'}]},
+                {'baggageType': 'cabin', 'pieceDetails': [{'weightKg': 7}]},
+            ],
+        })
+        self.cargo = create_booking({**FULL_BOOKING, 'hasPassenger': False, 'documentType': 'CARGO_BOARDING_CARD'})
+
+    def _labels(self, booking):
+        return booking_labels(Booking.objects.with_items().get(pk=booking.pk))
+
+    def test_every_kind_renders_with_escaped_fields(self):
+        passenger, cargo = self._labels(self.passenger), self._labels(self.cargo)
+        self.assertEqual([kind for kind, _ in passenger], ['PASSENGER_TICKET', 'BAG_TAG', 'CABIN_TAG', 'VEHICLE_LABEL'])
+        self.assertEqual([kind for kind, _ in cargo], ['CARGO_BOARDING_CARD', 'BAG_TAG', 'VEHICLE_CARGO_LABEL'])
+        self.assertEqual({kind for kind, _ in passenger + cargo}, set(labels.LABEL_KINDS))
+        for kind, zpl in passenger + cargo:
+            self.assertTrue(zpl.startswith('^XA^CI28') and zpl.endswith('^XZ'), kind)
+            self.assertEqual(zpl.count('^XA'), 1, kind)
+        ticket = passenger[0][1]
+        self.assertIn('^FH_^FDPassenger: Sara_5EFS_7EJA_5FX^FS', ticket)
+        self.assertIn('Seat: 12_5EA ', ticket)
+        self.assertNotIn('Sara^FS', ticket)
+        # قطعهٔ بدون barcodeId: PNR-شماره
+        self.assertIn(f'^FD{self.passenger.reference}-2^FS', passenger[2][1])
+        self.assertEqual(labels.zpl_escape('a_b^c~d\ne'), 'a_5Fb_5Ec_7Ed e')
+
+    def _post(self, **body):
+        return APIClient().post('/api/bookings/labels/', body, format='json')
+
+    def test_batch_endpoint_returns_zpl_for_the_selected_kinds(self):
+        references = [self.passenger.reference, self.cargo.reference]
+        response = self._post(references=references)
+        self.assertEqual(response.status_code, 200)
+        expected = ''.join(zpl for booking in (self.passenger, self.cargo) for _, zpl in self._labels(booking))
+        self.assertEqual(response.content.decode(), expected)
+        tags = self._post(references=references, kinds=['bag_tag']).content.decode()
+        self.assertEqual(tags.count('^XA'), 2)
+        self.assertEqual(self._post(references=references, kinds=['POSTER']).status_code, 400)
+        self.assertEqual(self._post(references=['SC-NOPE']).status_code, 404)
+
+    def test_batch_endpoint_sends_exact_bytes_to_the_printer(self):
+        zpl = APIClient().get(f'/api/bookings/{self.passenger.reference}/labels/zpl/').content
+        response = self._post(references=[self.passenger.reference], printer='gate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'printer': 'gate', 'labels': 4, 'bytes': len(zpl)})
+        self.assertTrue(self.sink.wait(1))
+        self.assertEqual(self.sink.received, [zpl])
+
+    def test_unknown_and_unreachable_printers(self):
+        unknown = self._post(references=[self.cargo.reference], printer='lobby')
+        self.assertEqual(unknown.status_code, 400)
+        self.assertIn('lobby', unknown.json()['detail'])
+        offline = self._post(references=[self.cargo.reference], printer='offline')
+        self.assertEqual(offline.status_code, 502)
+        self.assertIn('detail', offline.json())
+        self.assertEqual(self.sink.received, [])
+
+    async def test_async_send_delivers_exact_bytes(self):
+        zpl = '^XA^FDشناس_^FS^XZ'
+        sent = await asyncio.gather(*(asend_zpl(zpl, printer='gate') for _ in range(3)))
+        self.assertEqual(sent, [len(zpl.encode())] * 3)
+        self.assertEqual(send_zpl(zpl, printer='gate'), len(zpl.encode()))
+        self.assertTrue(self.sink.wait(4))
+        self.assertEqual(self.sink.received, [zpl.encode()] * 4)
+        with self.assertRaises(UnknownPrinter):
+            await asend_zpl(zpl, printer='lobby')
+        with self.assertRaises(PrinterError):
+            await asend_zpl(zpl, printer='offline')
+
+
+ASYNC_URL = '/api/async/bookings/'
+
+
+class AsyncBookingViewTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='receipt-cache-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        patcher = mock.patch.object(receipt_cache, '_cache', receipt_cache.DiskReceiptCache(self.directory))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.booking = create_booking({
+            **CARGO_ONLY, 'hasPassenger': True, 'passengerName': 'Sara Ahmadi', 'passportNumber': 'AB1234567',
+        })
+
+    async def _create(self, body, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return await self.async_client.post(ASYNC_URL, body, content_type='application/json', headers=headers)
+
+    async def test_create_matches_sync_endpoint_and_replays(self):
+        first = await self._create(IDEMPOTENT_BODY, key='kiosk-9-0001')
+        self.assertEqual(first.status_code, 201)
+        created = await Booking.objects.aget(reference=first.json()['reference'])
+        self.assertEqual(first.json(), await sync_to_async(_model_to_dict)(created))
+
+        retry = await self._create(IDEMPOTENT_BODY, key='kiosk-9-0001')
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual((await self._create({**IDEMPOTENT_BODY, 'passengerName': 'X'}, key='kiosk-9-0001'))
+                         .status_code, 422)
+        self.assertEqual(await Booking.objects.acount(), 2)
+
+        invalid = await self._create({**IDEMPOTENT_BODY, 'originPort': ''})
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn('originPort', invalid.json())
+        broken = await self.async_client.post(ASYNC_URL, '{"originPort":', content_type='application/json')
+        self.assertEqual(broken.status_code, 400)
+
+    async def test_detail_and_search(self):
+        detail = await self.async_client.get(f'{ASYNC_URL}{self.booking.reference}/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()['passportNumber'], 'AB1234567')
+        self.assertEqual((await self.async_client.get(f'{ASYNC_URL}SC-NOPE/')).status_code, 404)
+
+        search_url = f'{ASYNC_URL}search/'
+        found = await self.async_client.get(search_url, {'passport': 'ab-1234567', 'fields': 'reference'})
+        self.assertEqual(found.json(), [{'reference': self.booking.reference}])
+        for params in ({}, {'passport': ' - '}, {'passport': 'AB1', 'match': 'fuzzy'},
+                       {'passport': 'AB1', 'fields': 'nope'}):
+            response = await self.async_client.get(search_url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('detail', response.json())
+
+    async def test_receipt_etag_and_not_modified(self):
+        url = f'{ASYNC_URL}{self.booking.reference}/receipt/pdf/'
+        first = await self.async_client.get(url)
+        if first.status_code == 501:  # بدون reportlab
+            return
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.content.startswith(b'%PDF'))
+        sync = await sync_to_async(APIClient().get)(f'/api/bookings/{self.booking.reference}/receipt/pdf/')
+        self.assertEqual(first['ETag'], sync['ETag'])
+        cached = await self.async_client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual((await self.async_client.get(f'{ASYNC_URL}SC-NOPE/receipt/pdf/')).status_code, 404)
+
+    @override_settings(ASYNC_BLOCKING_QUEUE=0)
+    async def test_full_blocking_queue_answers_503(self):
+        response = await self.async_client.get(f'{ASYNC_URL}{self.booking.reference}/receipt/pdf/')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('detail', response.json())
+
+    async def test_invalid_jwt_is_rejected(self):
+        for header in ('Bearer not-a-token', 'Bearer'):
+            response = await self.async_client.get(
+                f'{ASYNC_URL}{self.booking.reference}/', headers={'Authorization': header},
+            )
+            self.assertEqual(response.status_code, 401, header)
+            self.assertIn('Bearer', response['WWW-Authenticate'])
+            self.assertIn('detail', response.json())
+        user = await sync_to_async(get_user_model().objects.create_user)('kiosk', 'kiosk@example.com', 'x')
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(user).access_token))()
+        response = await self.async_client.get(
+            f'{ASYNC_URL}{self.booking.reference}/', headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class RunBlockingTests(SimpleTestCase):
+    @override_settings(ASYNC_BLOCKING_QUEUE=1)
+    async def test_full_queue_raises_overloaded(self):
+        release = threading.Event()
+        first = asyncio.ensure_future(run_blocking(release.wait, 5))
+        await asyncio.sleep(0)  # شمارندهٔ صف در run_blocking بالا رفته است
+        with self.assertRaises(Overloaded):
+            await run_blocking(sum, [1, 2])
+        release.set()
+        self.assertTrue(await first)
+        self.assertEqual(await run_blocking(sum, [1, 2]), 3)
@@ -10,7 +10,16 @@ from . import views
 
 urlpatterns = [
     path('', views.BookingListCreateView.as_view()),
+    path('barcodes/', views.BookingBarcodeBatchView.as_view()),
+    path('barcodes/<str:code>/', views.BookingBarcodeLookupView.as_view()),
+    path('bulk/', views.BookingBulkCreateView.as_view()),
+    path('labels/', views.BookingLabelBatchView.as_view()),
+    path('manifest/', views.BookingManifestView.as_view()),
+    path('receipts/', views.BookingReceiptBatchView.as_view()),
+    path('scan/', views.BookingScanView.as_view()),
     path('search/', views.BookingSearchView.as_view()),
+    path('search/name/', views.BookingNameSearchView.as_view()),
     path('<str:reference>/receipt/pdf/', views.BookingReceiptPdfView.as_view()),
+    path('<str:reference>/labels/zpl/', views.BookingLabelsView.as_view()),
     path('<str:reference>/', views.BookingDetailView.as_view()),
 ]
@@ -9,33 +9,86 @@ Viewها — لایهٔ «دریافت درخواست HTTP و برگرداندن
 
 چرا AllowAny؟ فعلاً فرانت Angular ممکن است بدون توکن درخواست بزند؛ بعداً وقتی JWT وصل شد می‌توانی فقط برای لیست/جزئیات احراز هویت بگذاری و برای ساخت رزرو هم اگر خواستی فقط کاربر لاگین‌شده بتواند رزرو بزند، IsAuthenticated می‌گذاری.
 """
-from io import BytesIO
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.http import HttpResponse
-
-from .models import Booking, Port, Carrier
-from .serializers import BookingSerializer, _model_to_dict, PortSerializer, CarrierSerializer
+from rest_framework.parsers import JSONParser
+from django.db.models import ProtectedError
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+from .allocation import CapacityError
+from .barcodes import BARCODE_FORMATS, InvalidBarcode, booking_payloads, decode, encode, image_data_uri
+from .booking_json import mapper_for, parse_fields
+from .conditional import conditional_response, validator_headers
+from .idempotency import idempotent
+from .labels import LABEL_KINDS, booking_labels
+from .manifest import build_xlsx, stream_csv
+from .models import Booking, Port, Carrier, Voyage
+from .normalization import normalize_lookup
+from .pagination import InvalidQuery, filter_bookings, paginate_bookings, parse_day, parse_page_size
+from .parsers import NDJSONParser
+from .printing import PrinterError, UnknownPrinter, send_zpl
+from .scan_index import SCAN_EVENTS, get_voyage_index, record_scan
+from .receipt_cache import get_receipt_cache, receipt_digest
+from .reference_data import carriers as reference_carriers, ports as reference_ports
+from .receipts import receipt_fields, render_receipt_fields, render_receipts_pdf, render_receipts_zip
+from .rollups import GROUP_FIELDS, MAX_REPORT_DAYS, default_range, report
+from .search import MATCH_MODES, SEARCH_PARAMS, search_bookings, search_passenger_names
+from .serializers import (
+    BookingRowValidator,
+    BookingSerializer,
+    _model_to_dict,
+    PortSerializer,
+    CarrierSerializer,
+    VoyageSerializer,
+)
+from .services import booking_service
+
+
+def _capacity_response(exc):
+    """409 برای رزروی که در ظرفیت حرکت جا نمی‌شود (dimension: passengers / cargo / vehicle_lane / voyage)."""
+    return Response({'detail': str(exc), 'dimension': exc.dimension}, status=status.HTTP_409_CONFLICT)
 
 
 class BookingListCreateView(APIView):
     """
-    GET  /api/bookings/  → لیست همهٔ رزروها (برای ادمین یا بعداً فیلتر بر اساس کاربر).
+    GET  /api/bookings/  → لیست صفحه‌بندی‌شدهٔ رزروها (جدیدترین اول).
     POST /api/bookings/  → ساخت رزرو جدید (همان چیزی که فرانت با Submit می‌زند).
     """
     permission_classes = [AllowAny]
 
     def get(self, request):
-        """لیست رزروها — الان همه را برمی‌گردانیم؛ بعداً می‌توانی فیلتر کنی (مثلاً فقط رزروهای همین کاربر)."""
-        bookings = Booking.objects.all()[:100]  # محدود به ۱۰۰ تا برای جلوگیری از پاسخ سنگین
-        data = [_model_to_dict(b) for b in bookings]
-        return Response(data)
-
+        """
+        لیست رزروها با صفحه‌بندی cursor:
+        ?limit=50&cursor=<X-Next-Cursor صفحهٔ قبل>
+        فیلترها: origin, destination, departure_from, departure_to, document_type,
+        has_passenger, has_baggage, has_vehicle
+        ?fields=reference,passengerName,... → فقط همین کلیدها (ستون‌های دیگر اصلاً خوانده نمی‌شوند)
+        بدنهٔ پاسخ مثل قبل آرایهٔ رزروهاست؛ صفحهٔ بعد در هدرهای X-Next-Cursor و Link (rel="next")
+        می‌آید (مثل GET /api/auth/users/) و در صفحهٔ آخر این هدرها نیستند.
+        """
+        params = request.query_params
+        try:
+            limit = parse_page_size(params.get('limit'))
+            mapper = mapper_for(parse_fields(params.get('fields')))
+            qs = filter_bookings(Booking.objects.all(), params)
+            rows, next_cursor = paginate_bookings(mapper.rows(qs), cursor=params.get('cursor'), limit=limit)
+        except InvalidQuery as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        headers = {}
+        if next_cursor:
+            # همان فیلترها و fields صفحهٔ فعلی، فقط cursor عوض می‌شود
+            query = params.copy()
+            query['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+            headers = {'Link': f'<{next_url}>; rel="next"', 'X-Next-Cursor': next_cursor}
+        return Response(mapper.dicts(rows), headers=headers)
+
+    @idempotent('bookings:create')
     def post(self, request):
         """
-        ساخت رزرو:
+        ساخت رزرو (با هدر Idempotency-Key تلاش دوباره همان پاسخ را می‌گیرد؛ idempotency.py):
         ۱) دادهٔ بدنه را با BookingSerializer اعتبارسنجی می‌کنیم.
         ۲) serializer.save() صدا زده می‌شود که داخلش create() است و آن هم سرویس را صدا می‌زند.
         ۳) پاسخ را با _model_to_dict به camelCase برمی‌گردانیم تا فرانت همان ساختار را ببیند.
@@ -44,10 +97,144 @@ class BookingListCreateView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        booking = serializer.save()
+        try:
+            booking = serializer.save()
+        except CapacityError as exc:
+            return _capacity_response(exc)
         return Response(_model_to_dict(booking), status=status.HTTP_201_CREATED)
 
 
+# حداکثر ردیف در یک درخواست ورود گروهی
+BULK_MAX_ROWS = 1000
+
+
+class BookingBulkCreateView(APIView):
+    """
+    POST /api/bookings/bulk/ — ورود گروهی (گروه تور، منیفست).
+
+    بدنه: آرایهٔ JSON از رزروها (همان شکل POST /api/bookings/) یا NDJSON (Content-Type: application/x-ndjson).
+    ?atomic=true → همه یا هیچ: اگر حتی یک ردیف نامعتبر باشد هیچ رزروی ثبت نمی‌شود.
+    پیش‌فرض: ردیف‌های معتبر ثبت می‌شوند و خطای بقیه در results برمی‌گردد.
+
+    پاسخ: {"created": n, "failed": m, "results": [{"index": 0, "status": "created", "reference": "..."}, ...]}
+    کد وضعیت: 201 همه ثبت شدند، 207 بعضی ثبت شدند، 400 هیچ‌کدام ثبت نشد.
+    هدر Idempotency-Key مثل POST /api/bookings/ پشتیبانی می‌شود.
+    """
+    permission_classes = [AllowAny]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    @idempotent('bookings:bulk')
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                {'detail': 'بدنه باید آرایه‌ای از رزروها یا NDJSON باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(rows) > BULK_MAX_ROWS:
+            return Response(
+                {'detail': f'حداکثر {BULK_MAX_ROWS} رزرو در هر درخواست.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        atomic = (request.query_params.get('atomic') or '').lower() in ('1', 'true', 'yes')
+
+        validator = BookingRowValidator(context={'request': request})
+        valid_rows = []
+        results = [None] * len(rows)
+        for index, row in enumerate(rows):
+            data, errors = validator.validate(row)
+            if errors is not None:
+                results[index] = {'index': index, 'status': 'error', 'errors': errors}
+            else:
+                valid_rows.append((index, data))
+
+        failed = len(rows) - len(valid_rows)
+        if not rows or (atomic and failed):
+            return Response(
+                {'created': 0, 'failed': failed, 'results': [r for r in results if r is not None]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = request.user if request.user and request.user.is_authenticated else None
+        try:
+            created = booking_service.bulk_create_bookings(valid_rows, user=user, atomic=atomic)
+        except CapacityError as exc:
+            return _capacity_response(exc)
+        for index, outcome in created.items():
+            if isinstance(outcome, Booking):
+                results[index] = {'index': index, 'status': 'created', 'reference': outcome.reference}
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': [outcome]}}
+
+        created_count = sum(1 for r in results if r['status'] == 'created')
+        if created_count == len(rows):
+            code = status.HTTP_201_CREATED
+        elif created_count:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created_count, 'failed': len(rows) - created_count, 'results': results},
+            status=code,
+        )
+
+
+class BookingManifestView(APIView):
+    """
+    GET /api/bookings/manifest/?origin=DUBAI&destination=KISH&date=2026-03-01&export=csv
+    منیفست کامل یک حرکت (مسافر + هر قطعه بار + هر وسیله) برای کارکنان بندر مبدا و مقصد.
+    export: csv (پیش‌فرض، جریانی) یا xlsx (نیاز به openpyxl).
+    (نام پارامتر format نیست چون DRF آن را برای انتخاب renderer رزرو کرده.)
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = request.query_params
+        origin = (params.get('origin') or '').strip()
+        destination = (params.get('destination') or '').strip()
+        date = (params.get('date') or '').strip()
+        export_format = (params.get('export') or 'csv').strip().lower()
+        if not origin or not destination or not date:
+            return Response(
+                {'detail': 'پارامترهای origin، destination و date الزامی هستند.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if export_format not in ('csv', 'xlsx'):
+            return Response(
+                {'detail': 'export باید csv یا xlsx باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            qs = filter_bookings(Booking.objects.all(), {
+                'origin': origin,
+                'destination': destination,
+                'departure_from': date,
+                'departure_to': date,
+            })
+        except InvalidQuery as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        qs = qs.order_by('departure_date', 'id')
+        filename = f'manifest-{origin}-{destination}-{date}.{export_format}'
+
+        if export_format == 'xlsx':
+            xlsx_file = build_xlsx(qs)
+            if xlsx_file is None:
+                return Response(
+                    {'detail': 'خروجی XLSX در سرور پیکربندی نشده (openpyxl).'},
+                    status=status.HTTP_501_NOT_IMPLEMENTED,
+                )
+            return FileResponse(
+                xlsx_file,
+                as_attachment=True,
+                filename=filename,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+
+        response = StreamingHttpResponse(stream_csv(qs), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class BookingDetailView(APIView):
     """
     GET /api/bookings/<reference>/ — جزئیات یک رزرو با شمارهٔ reference.
@@ -65,38 +252,12 @@ class BookingDetailView(APIView):
         return Response(_model_to_dict(booking))
 
 
-def _generate_receipt_pdf(booking):
-    """تولید PDF رسید برای یک رزرو (شماره پیگیری + خلاصه)."""
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-    except ImportError:
-        return None
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-    y = height - 80
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(72, y, "Shinas Port International Terminal - Registration Receipt")
-    y -= 30
-    c.setFont("Helvetica", 12)
-    c.drawString(72, y, f"Tracking Number (PNR): {booking.reference}")
-    y -= 22
-    c.drawString(72, y, f"Date: {booking.created_at.strftime('%Y-%m-%d %H:%M') if booking.created_at else '—'}")
-    y -= 22
-    c.drawString(72, y, f"Passenger: {booking.passenger_name or '—'}")
-    y -= 22
-    c.drawString(72, y, f"Route: {booking.origin_port} → {booking.destination_port}")
-    y -= 22
-    c.drawString(72, y, f"Cargo: {booking.baggage_pieces or 0} pcs / {booking.baggage_weight_kg or 0} kg")
-    c.save()
-    buf.seek(0)
-    return buf.getvalue()
-
-
 class BookingReceiptPdfView(APIView):
     """
     GET /api/bookings/<reference>/receipt/pdf/ — دانلود PDF رسید با شماره پیگیری.
+
+    PDF در کش رسیدها (receipt_cache.py) با هش فیلدهای رسید نگه داشته می‌شود و همان هش ETag پاسخ است؛
+    دانلود دوباره با If-None-Match جواب 304 می‌گیرد بدون اینکه reportlab صدا زده شود.
     """
     permission_classes = [AllowAny]
 
@@ -108,57 +269,426 @@ class BookingReceiptPdfView(APIView):
                 {'detail': 'رزروی با این شماره یافت نشد.'},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        pdf_bytes = _generate_receipt_pdf(booking)
+        fields = receipt_fields(booking)
+        digest = receipt_digest(fields)
+        headers = validator_headers(etag=f'"{digest}"')
+        not_modified = conditional_response(request, etag=headers['ETag'], headers=headers)
+        if not_modified is not None:
+            return not_modified
+
+        cache = get_receipt_cache()
+        pdf_bytes = cache.get(digest)
         if pdf_bytes is None:
+            pdf_bytes = render_receipt_fields(fields)
+            if pdf_bytes is None:
+                return Response(
+                    {'detail': 'تولید PDF در سرور پیکربندی نشده (reportlab).'},
+                    status=status.HTTP_501_NOT_IMPLEMENTED,
+                )
+            cache.set(digest, pdf_bytes)
+        response = HttpResponse(pdf_bytes, content_type='application/pdf', headers=headers)
+        response['Content-Disposition'] = f'attachment; filename="receipt-{booking.reference}.pdf"'
+        return response
+
+
+def _select_batch(data, limit):
+    """
+    انتخاب رزروها برای کارهای دسته‌ای (رسید، لیبل):
+      {"references": [...]}  یا  {"origin": ..., "destination": ..., "date": ...}
+    خروجی: (لیست رزروها، None) یا (None، پاسخ خطا).
+    """
+    references = data.get('references')
+    if references is not None:
+        if not isinstance(references, list) or not all(isinstance(r, str) for r in references):
+            return None, Response(
+                {'detail': 'references باید لیستی از شماره رزروها باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        by_reference = Booking.objects.with_items().in_bulk(references[:limit + 1], field_name='reference')
+        bookings = [by_reference[r] for r in dict.fromkeys(references) if r in by_reference]
+    elif data.get('origin') and data.get('destination') and data.get('date'):
+        try:
+            qs = filter_bookings(Booking.objects.with_items(), {
+                'origin': str(data['origin']),
+                'destination': str(data['destination']),
+                'departure_from': str(data['date']),
+                'departure_to': str(data['date']),
+            })
+        except InvalidQuery as exc:
+            return None, Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        bookings = list(qs.order_by('departure_date', 'id')[:limit + 1])
+    else:
+        return None, Response(
+            {'detail': 'references یا origin/destination/date را ارسال کنید.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not bookings:
+        return None, Response(
+            {'detail': 'رزروی برای چاپ یافت نشد.'},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    if len(bookings) > limit:
+        return None, Response(
+            {'detail': f'حداکثر {limit} رزرو در هر درخواست.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return bookings, None
+
+
+# حداکثر رسید در یک درخواست دسته‌ای
+RECEIPT_BATCH_MAX = 2000
+
+
+class BookingReceiptBatchView(APIView):
+    """
+    POST /api/bookings/receipts/ — رسید PDF برای چند رزرو با یک درخواست (مثلاً کل یک حرکت).
+
+    بدنه (یکی از دو حالت):
+      {"references": ["SC-...", ...]}
+      {"origin": "DUBAI", "destination": "KISH", "date": "2026-03-01"}
+    "bundle": "pdf" (پیش‌فرض: یک PDF چندصفحه‌ای) یا "zip" (یک PDF جدا برای هر رزرو).
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        bundle = (data.get('bundle') or 'pdf').strip().lower()
+        if bundle not in ('pdf', 'zip'):
+            return Response(
+                {'detail': 'bundle باید pdf یا zip باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        bookings, error = _select_batch(data, RECEIPT_BATCH_MAX)
+        if error is not None:
+            return error
+
+        if bundle == 'zip':
+            payload = render_receipts_zip(bookings)
+            content_type, filename = 'application/zip', 'receipts.zip'
+        else:
+            payload = render_receipts_pdf(bookings)
+            content_type, filename = 'application/pdf', 'receipts.pdf'
+        if payload is None:
             return Response(
                 {'detail': 'تولید PDF در سرور پیکربندی نشده (reportlab).'},
                 status=status.HTTP_501_NOT_IMPLEMENTED,
             )
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="receipt-{booking.reference}.pdf"'
+        response = HttpResponse(payload, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
 
+def _parse_label_kinds(value):
+    """kinds از بدنه (لیست) یا query string (با کاما جدا)؛ None یعنی همه."""
+    if not value:
+        return None, None
+    kinds = value.split(',') if isinstance(value, str) else value
+    kinds = [str(k).strip().upper() for k in kinds if str(k).strip()]
+    unknown = [k for k in kinds if k not in LABEL_KINDS]
+    if unknown:
+        return None, Response(
+            {'detail': f'نوع لیبل نامعتبر: {", ".join(unknown)}. مجاز: {", ".join(LABEL_KINDS)}'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return kinds, None
+
+
+def _zpl_response(zpl, filename):
+    response = HttpResponse(zpl, content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class BookingLabelsView(APIView):
+    """
+    GET /api/bookings/<reference>/labels/zpl/?kinds=BAG_TAG,CABIN_TAG
+    همهٔ لیبل‌های ZPL یک رزرو (بوردینگ‌پاس/کارت بار، تگ‌های بار، لیبل وسیله‌ها).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, reference):
+        kinds, error = _parse_label_kinds(request.query_params.get('kinds'))
+        if error is not None:
+            return error
+        try:
+            booking = Booking.objects.get(reference=reference)
+        except Booking.DoesNotExist:
+            return Response(
+                {'detail': 'رزروی با این شماره یافت نشد.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        zpl = ''.join(label for _, label in booking_labels(booking, kinds))
+        return _zpl_response(zpl, f'labels-{booking.reference}.zpl')
+
+
+# حداکثر رزرو در یک درخواست لیبل دسته‌ای
+LABEL_BATCH_MAX = 2000
+
+
+class BookingLabelBatchView(APIView):
+    """
+    POST /api/bookings/labels/ — لیبل‌های ZPL برای چند رزرو یا کل یک حرکت.
+
+    بدنه: {"references": [...]} یا {"origin", "destination", "date"}
+    "kinds": ["BAG_TAG", ...] (اختیاری؛ پیش‌فرض همه)
+    "printer": "default" (اختیاری) → به‌جای برگرداندن فایل، مستقیم به چاپگر Zebra فرستاده می‌شود.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        kinds, error = _parse_label_kinds(data.get('kinds'))
+        if error is not None:
+            return error
+        bookings, error = _select_batch(data, LABEL_BATCH_MAX)
+        if error is not None:
+            return error
+
+        labels = [label for booking in bookings for _, label in booking_labels(booking, kinds)]
+        zpl = ''.join(labels)
+        printer = data.get('printer')
+        if not printer:
+            return _zpl_response(zpl, 'labels.zpl')
+        try:
+            sent = send_zpl(zpl, printer=str(printer))
+        except UnknownPrinter as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except PrinterError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response({'printer': printer, 'labels': len(labels), 'bytes': sent})
+
+
+# حداکثر رزرو در یک درخواست بارکد دسته‌ای
+BARCODE_BATCH_MAX = 2000
+
+
+def _barcode_piece(number, payload):
+    return {
+        'piece': number,
+        'pieceCount': payload.piece_count,
+        'baggageType': payload.baggage_type,
+        'weightKg': payload.weight_kg,
+    }
+
+
+class BookingBarcodeBatchView(APIView):
+    """
+    POST /api/bookings/barcodes/ — محتوای بارکد (و در صورت نیاز تصویر QR) برای چند رزرو.
+
+    بدنه: {"references": [...]} یا {"origin", "destination", "date"}
+    "format": "payload" (پیش‌فرض، فقط متن) یا "svg" / "png" (تصویر QR به صورت data URI در فیلد image)
+    برای هر رزرو یک بارکد اصلی (piece=0) و یک بارکد برای هر قطعهٔ بار برمی‌گردد.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        image_format = (data.get('format') or 'payload').strip().lower()
+        if image_format not in BARCODE_FORMATS:
+            return Response(
+                {'detail': f'format باید یکی از {", ".join(BARCODE_FORMATS)} باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        bookings, error = _select_batch(data, BARCODE_BATCH_MAX)
+        if error is not None:
+            return error
+
+        results = []
+        for booking in bookings:
+            barcodes = []
+            for number, payload in booking_payloads(booking):
+                item = dict(_barcode_piece(number, payload), payload=encode(payload))
+                if image_format != 'payload':
+                    item['image'] = image_data_uri(item['payload'], image_format)
+                    if item['image'] is None:
+                        return Response(
+                            {'detail': 'تولید تصویر بارکد در سرور پیکربندی نشده (reportlab / Pillow).'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED,
+                        )
+                barcodes.append(item)
+            results.append({'reference': booking.reference, 'barcodes': barcodes})
+        return Response({'results': results})
+
+
+class BookingBarcodeLookupView(APIView):
+    """
+    GET /api/bookings/barcodes/<code>/ — رزرو مربوط به یک بارکد اسکن‌شده.
+    بارکد شامل pk رزرو است، پس فقط یک کوئری با کلید اصلی؛ هیچ جستجوی متنی لازم نیست.
+    stale=true یعنی رزرو بعد از چاپ بارکد ویرایش شده و محتوای بارکد با دادهٔ فعلی یکی نیست.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, code):
+        try:
+            payload = decode(code)
+        except InvalidBarcode as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # قطعه‌های بار هم برای مقایسهٔ stale و هم برای پاسخ لازم‌اند؛ یک بار با prefetch
+        booking = Booking.objects.with_items().filter(pk=payload.booking_id).first()
+        if booking is None:
+            return Response(
+                {'detail': 'رزروی برای این بارکد یافت نشد.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        current = dict(booking_payloads(booking)).get(payload.piece)
+        return Response({
+            'booking': _model_to_dict(booking),
+            'barcode': _barcode_piece(payload.piece, payload),
+            'stale': current != payload,
+        })
+
+
+def _voyage_params(params):
+    """(origin, destination, date) از بدنه یا query string؛ یا (None، پاسخ خطا)."""
+    origin = str(params.get('origin') or '').strip()
+    destination = str(params.get('destination') or '').strip()
+    day = parse_day(str(params.get('date') or '').strip())
+    if not origin or not destination or day is None:
+        return None, Response(
+            {'detail': 'origin، destination و date (YYYY-MM-DD) حرکت را ارسال کنید.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return (origin, destination, day.isoformat()), None
+
+
+class BookingScanView(APIView):
+    """
+    اسکن گیت با ایندکس درون‌حافظه‌ای حرکت (scan_index.py).
+
+    POST /api/bookings/scan/
+      {"code": "<PNR | پاسپورت | شناسه | بارکد SB...>", "event": "BOARDED" | "EXITED",
+       "origin": "DUBAI", "destination": "KISH", "date": "2026-03-01", "gate": "G2"}
+      200 = ثبت شد، 409 = قبلاً همین وضعیت را داشته، 404 = در این حرکت نیست.
+
+    GET /api/bookings/scan/?origin=...&destination=...&date=... → شمارش سوارشده/خارج‌شده.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        voyage, error = _voyage_params(request.query_params)
+        if error is not None:
+            return error
+        return Response(get_voyage_index(*voyage).counts())
+
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        voyage, error = _voyage_params(data)
+        if error is not None:
+            return error
+        code = str(data.get('code') or '').strip()
+        if not code:
+            return Response({'detail': 'code را ارسال کنید.'}, status=status.HTTP_400_BAD_REQUEST)
+        event = str(data.get('event') or SCAN_EVENTS[0]).strip().upper()
+        if event not in SCAN_EVENTS:
+            return Response(
+                {'detail': f'event باید یکی از {", ".join(SCAN_EVENTS)} باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        record, duplicate, scanned_at = record_scan(
+            get_voyage_index(*voyage), code, event, gate=str(data.get('gate') or '')[:32],
+        )
+        if record is None:
+            return Response(
+                {'detail': 'این کد در لیست این حرکت نیست.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(
+            {
+                'reference': record.reference,
+                'passengerName': record.passenger,
+                'documentType': record.document_type,
+                'event': event,
+                'duplicate': duplicate,
+                'scannedAt': scanned_at,
+            },
+            status=status.HTTP_409_CONFLICT if duplicate else status.HTTP_200_OK,
+        )
+
+
 class BookingSearchView(APIView):
     """
-    GET /api/bookings/search/?reference=...&passport=...&id_number=...
+    GET /api/bookings/search/?reference=...&passport=...&id_number=...&match=auto
     جستجو بر اساس کد PNR (reference)، شماره پاسپورت یا شماره شناسایی (ID).
-    هر پارامتر اختیاری است؛ در صورت ارسال، رزروهایی که با آن مطابقت دارند برگردانده می‌شوند.
+    هر پارامتر اختیاری است؛ فاصله، خط تیره و بزرگی/کوچکی حروف مهم نیست.
+    match: auto (پیش‌فرض: اول دقیق، بعد پیشوند، بعد زیررشته) یا exact / prefix / contains.
+    ?fields=... مثل لیست رزروها.
     """
     permission_classes = [AllowAny]
 
     def get(self, request):
-        reference = (request.query_params.get('reference') or '').strip()
-        passport = (request.query_params.get('passport') or '').strip()
-        id_number = (request.query_params.get('id_number') or '').strip()
+        terms = {name: request.query_params.get(name) for name in SEARCH_PARAMS}
+        match = (request.query_params.get('match') or 'auto').strip().lower()
 
-        if not reference and not passport and not id_number:
+        if not any(normalize_lookup(value) for value in terms.values()):
             return Response(
                 {'detail': 'حداقل یکی از پارامترهای reference، passport یا id_number را ارسال کنید.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if match not in MATCH_MODES:
+            return Response(
+                {'detail': f'match باید یکی از {", ".join(MATCH_MODES)} باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            mapper = mapper_for(parse_fields(request.query_params.get('fields')))
+        except InvalidQuery as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = search_bookings(terms, match=match, limit=50, queryset=mapper.rows(Booking.objects.all()))
+        return Response(mapper.dicts(rows))
+
 
-        qs = Booking.objects.all()
-        if reference:
-            qs = qs.filter(reference__icontains=reference)
-        if passport:
-            qs = qs.filter(passport_number__icontains=passport)
-        if id_number:
-            qs = qs.filter(passenger_id_number__icontains=id_number)
+class BookingNameSearchView(APIView):
+    """
+    GET /api/bookings/search/name/?q=...
+    جستجوی نام مسافر به لاتین، عربی یا فارسی (Mohammad ≈ محمد ≈ مُحَمَّد).
+    نتایج بر اساس کیفیت تطابق مرتب می‌شوند و امتیاز در matchScore برمی‌گردد.
+    ?fields=... مثل لیست رزروها (matchScore همیشه هست).
+    """
+    permission_classes = [AllowAny]
 
-        qs = qs[:50]
-        data = [_model_to_dict(b) for b in qs]
+    def get(self, request):
+        query = (request.query_params.get('q') or '').strip()
+        if not query:
+            return Response(
+                {'detail': 'پارامتر q (نام مسافر) را ارسال کنید.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            mapper = mapper_for(parse_fields(request.query_params.get('fields')))
+        except InvalidQuery as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        results = search_passenger_names(query, limit=50, queryset=mapper.rows(Booking.objects.all()))
+        data = mapper.dicts(row for row, _ in results)
+        for item, (_, score) in zip(data, results):
+            item['matchScore'] = score
         return Response(data)
 
 
+def _reference_response(request, table):
+    """
+    لیست کامل یک جدول مرجع از کش reference_data: بایت‌های JSON آماده، یا 304 اگر ETag / Last-Modified کلاینت هنوز معتبر است.
+    """
+    snapshot = table.snapshot()
+    headers = validator_headers(snapshot.etag, snapshot.last_modified, cache_control='public, no-cache')
+    not_modified = conditional_response(request, snapshot.etag, snapshot.last_modified, headers)
+    if not_modified is not None:
+        return not_modified
+    return HttpResponse(snapshot.body, content_type='application/json', headers=headers)
+
+
 class PortListCreateView(APIView):
-    """GET/POST /api/ports/"""
+    """
+    GET/POST /api/ports/
+    GET از کش reference_data (بدون کوئری) با ETag؛ هر تغییر بندر نسخهٔ کش را عوض می‌کند.
+    """
     permission_classes = [AllowAny]
 
     def get(self, request):
-        ports = Port.objects.all()
-        serializer = PortSerializer(ports, many=True)
-        return Response(serializer.data)
+        return _reference_response(request, reference_ports)
 
     def post(self, request):
         serializer = PortSerializer(data=request.data)
@@ -199,18 +729,22 @@ class PortDetailView(APIView):
 
     def delete(self, request, pk):
         port = self.get_object(pk)
-        port.delete()
+        try:
+            port.delete()
+        except ProtectedError:
+            return Response(
+                {'detail': 'حرکت‌هایی به این رکورد وابسته‌اند؛ اول آن‌ها را حذف کنید.'},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class CarrierListCreateView(APIView):
-    """GET/POST /api/carriers/"""
+    """GET/POST /api/carriers/ — GET مثل بندرها از کش reference_data."""
     permission_classes = [AllowAny]
 
     def get(self, request):
-        carriers = Carrier.objects.all()
-        serializer = CarrierSerializer(carriers, many=True)
-        return Response(serializer.data)
+        return _reference_response(request, reference_carriers)
 
     def post(self, request):
         serializer = CarrierSerializer(data=request.data)
@@ -251,5 +785,133 @@ class CarrierDetailView(APIView):
 
     def delete(self, request, pk):
         carrier = self.get_object(pk)
-        carrier.delete()
+        try:
+            carrier.delete()
+        except ProtectedError:
+            return Response(
+                {'detail': 'حرکت‌هایی به این رکورد وابسته‌اند؛ اول آن‌ها را حذف کنید.'},
+                status=status.HTTP_409_CONFLICT,
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class VoyageListCreateView(APIView):
+    """
+    GET/POST /api/voyages/
+    فیلتر: ?origin=<کد بندر>&destination=<کد بندر>&date=YYYY-MM-DD
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = request.query_params
+        voyages = Voyage.objects.all()
+        if params.get('origin'):
+            voyages = voyages.filter(origin__code=params['origin'])
+        if params.get('destination'):
+            voyages = voyages.filter(destination__code=params['destination'])
+        if params.get('date'):
+            day = parse_day(params['date'])
+            if day is None:
+                return Response({'detail': 'فرمت date معتبر نیست.'}, status=status.HTTP_400_BAD_REQUEST)
+            voyages = voyages.filter(departure_at__date=day)
+        serializer = VoyageSerializer(voyages, many=True)
+        return Response(serializer.data)
+
+    def post(self, request):
+        serializer = VoyageSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class VoyageDetailView(APIView):
+    """GET/PUT/PATCH/DELETE /api/voyages/<id>/"""
+    permission_classes = [AllowAny]
+
+    def get_object(self, pk):
+        from rest_framework.generics import get_object_or_404
+        return get_object_or_404(Voyage, pk=pk)
+
+    def get(self, request, pk):
+        voyage = self.get_object(pk)
+        serializer = VoyageSerializer(voyage)
+        return Response(serializer.data)
+
+    def put(self, request, pk):
+        voyage = self.get_object(pk)
+        serializer = VoyageSerializer(voyage, data=request.data, partial=False)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data)
+
+    def patch(self, request, pk):
+        voyage = self.get_object(pk)
+        serializer = VoyageSerializer(voyage, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data)
+
+    def delete(self, request, pk):
+        voyage = self.get_object(pk)
+        try:
+            voyage.delete()
+        except ProtectedError:
+            return Response(
+                {'detail': 'این حرکت رزرو دارد و قابل حذف نیست؛ می‌توانید status را CLOSED کنید.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class DailyReportView(APIView):
+    """
+    GET /api/reports/?from=YYYY-MM-DD&to=YYYY-MM-DD&groupBy=day,origin
+    آمار رزروها (تعداد رزرو، مسافر، قطعه و وزن بار، وسیله) از جدول آمار روزانه — نه از خود رزروها.
+    groupBy: ترکیبی از day, origin, destination, carrier, documentType (پیش‌فرض day).
+    فیلتر اختیاری: origin, destination, carrier, documentType.
+    بازهٔ پیش‌فرض ۳۰ روز گذشته؛ حداکثر MAX_REPORT_DAYS روز. روز = روز حرکت به وقت محلی.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = request.query_params
+        date_from, date_to = default_range()
+        for name in ('from', 'to'):
+            if params.get(name):
+                day = parse_day(params[name])
+                if day is None:
+                    return Response({'detail': f'فرمت {name} معتبر نیست (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+                if name == 'from':
+                    date_from = day
+                else:
+                    date_to = day
+        if date_from > date_to:
+            return Response({'detail': 'from نباید بعد از to باشد.'}, status=status.HTTP_400_BAD_REQUEST)
+        if (date_to - date_from).days >= MAX_REPORT_DAYS:
+            return Response(
+                {'detail': f'بازهٔ گزارش حداکثر {MAX_REPORT_DAYS} روز است.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        group_by = list(dict.fromkeys(
+            name.strip() for name in (params.get('groupBy') or 'day').split(',') if name.strip()
+        ))
+        unknown = [name for name in group_by if name not in GROUP_FIELDS]
+        if not group_by or unknown:
+            return Response(
+                {'detail': f'groupBy باید ترکیبی از {", ".join(GROUP_FIELDS)} باشد.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        filters = {name: params[name] for name in GROUP_FIELDS if name != 'day' and params.get(name)}
+
+        rows, totals = report(date_from, date_to, group_by=group_by, filters=filters)
+        return Response({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'groupBy': group_by,
+            'totals': totals,
+            'rows': rows,
+        })
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.VoyageListCreateView.as_view()),
+    path('<int:pk>/', views.VoyageDetailView.as_view()),
+]
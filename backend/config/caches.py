@@ -0,0 +1,60 @@
+"""
+پیکربندی کش (CACHES در settings.py) از روی متغیرهای محیطی.
+
+کش‌های «مشترک» این پروژه باید بین همهٔ پردازه‌های worker (gunicorn -w N، uvicorn --workers N، run_jobs)
+یکی باشند: شمارهٔ نسخهٔ کاربرها برای ابطال کش احراز هویت (apps/accounts/token_cache.py)، نسخهٔ دادهٔ مرجع
+(apps/bookings/reference_data.py) و علامت read-your-writes replicaها (config/db_router.py).
+LocMemCache پیش‌فرض Django برای هر پردازه جداست؛ تغییری که یک worker ثبت کند بقیه هرگز نمی‌بینند.
+
+CACHE_BACKEND یکی از:
+- file (پیش‌فرض): FileBasedCache در CACHE_LOCATION (پیش‌فرض backend/var/cache) — بین همهٔ پردازه‌های یک سرور
+  مشترک، بدون وابستگی.
+- redis: RedisCache روی REDIS_URL (پیش‌فرض redis://127.0.0.1:6379/0) — برای چند سرور؛ نیاز به pip install redis
+- locmem: حافظهٔ هر پردازه — فقط برای یک پردازه؛ کش‌های بالا با آن خاموش می‌شوند (is_shared).
+
+در تست‌ها کش file به یک پوشهٔ موقت تازه برای هر اجرا می‌رود (config/test_runner.py).
+"""
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+BACKENDS = ('file', 'redis', 'locmem')
+
+# backendهایی که هر پردازه نسخهٔ خودش را دارد
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_config(base_dir, env=os.environ):
+    """CACHES['default'] برای CACHE_BACKEND فعلی."""
+    backend = env.get('CACHE_BACKEND', 'file').strip().lower() or 'file'
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f'CACHE_BACKEND must be one of {", ".join(BACKENDS)}, got {backend!r}')
+
+    if backend == 'redis':
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            raise ImproperlyConfigured('CACHE_BACKEND=redis needs the redis package: pip install redis')
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+        }
+    if backend == 'locmem':
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    return {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env.get('CACHE_LOCATION') or str(base_dir / 'var' / 'cache'),
+        # پیش‌فرض Django (۳۰۰) با کلیدهای نسخه و علامت‌های هر کلاینت زود پر می‌شود و کلید نسخه را بیرون می‌اندازد
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+
+
+def is_shared(alias):
+    """آیا CACHES[alias] بین پردازه‌ها مشترک است؟ (نه LocMem / Dummy)"""
+    backend = getattr(settings, 'CACHES', {}).get(alias, {}).get('BACKEND', PER_PROCESS_BACKENDS[0])
+    return backend not in PER_PROCESS_BACKENDS
@@ -0,0 +1,131 @@
+"""
+پیکربندی دیتابیس از روی متغیرهای محیطی (DATABASES['default'] در settings.py).
+
+DB_PROFILE یکی از:
+
+- sqlite (پیش‌فرض): فایل SQLite با تنظیمات پیش‌فرض Django (journal حذفی، بدون PRAGMA) — برای توسعه و
+  همان backend/db.sqlite3 که در git است (حالت WAL در سرآیند فایل ذخیره می‌شود و فایل کنارش -wal/-shm می‌سازد).
+- sqlite-wal: برای استقرار بندرهای کوچک تک‌سروری، تنظیم‌شده برای چند باجهٔ همزمان؛ فقط با DB_PROFILE صریح.
+  این PRAGMAها روی هر اتصال تازه (init_command) اجرا می‌شوند:
+    journal_mode=WAL      خواننده‌ها منتظر نویسنده نمی‌مانند و نویسنده منتظر خواننده‌ها نمی‌ماند
+    synchronous=NORMAL    در WAL امن است (با قطع برق فقط آخرین تراکنش‌ها ممکن است برگردند، فایل خراب نمی‌شود)
+                          و fsync هر commit حذف می‌شود
+    busy_timeout          نویسندهٔ دوم به‌جای خطای فوری «database is locked» تا این‌قدر صبر می‌کند
+    mmap_size             خواندن صفحه‌ها از حافظهٔ نگاشت‌شده، بدون کپی در هر read
+  و تراکنش‌ها IMMEDIATE شروع می‌شوند: قفل نوشتن همان اول تراکنش گرفته می‌شود، پس دو تراکنش که هر دو
+  اول خوانده‌اند و بعد می‌خواهند بنویسند به بن‌بست (خطای فوری بدون صبر) نمی‌خورند و فقط پشت هم منتظر می‌مانند.
+  SQLITE_PATH را به فایلی خارج از مخزن بدهید.
+  دیتابیس تست هر دو پروفایل sqlite یک فایل موقت است، نه حافظه: SQLite در حافظهٔ مشترک بین نخ‌ها به‌جای
+  صبر کردن فوراً «database table is locked» می‌دهد و تست‌های همزمانی (چند نخ، هر کدام اتصال خودش) ممکن نیستند.
+  متغیرها (هر دو پروفایل sqlite): SQLITE_PATH، SQLITE_TEST_PATH (پیش‌فرض: فایل موقت برای هر اجرای تست)؛ فقط sqlite-wal: SQLITE_BUSY_TIMEOUT_MS (5000)،
+  SQLITE_MMAP_SIZE (268435456 = ۲۵۶ مگابایت)
+- postgres: PostgreSQL (نیاز به pip install "psycopg[binary,pool]")
+  POSTGRES_DB، POSTGRES_USER، POSTGRES_PASSWORD، POSTGRES_HOST (localhost)، POSTGRES_PORT (5432)،
+  POSTGRES_SSLMODE (اختیاری)
+  DB_POOL=1 → pool داخلی Django 5.1+ (psycopg_pool) با DB_POOL_MIN_SIZE (2)، DB_POOL_MAX_SIZE (10)،
+  DB_POOL_TIMEOUT (10 ثانیه برای گرفتن اتصال از pool)
+  بدون pool: اتصال دائمی به مدت DB_CONN_MAX_AGE ثانیه (60). در هر دو حالت اتصال قبل از استفادهٔ دوباره
+  بررسی می‌شود (CONN_HEALTH_CHECKS) تا اتصال قطع‌شده (ری‌استارت دیتابیس، failover) خطای درخواست نشود.
+
+Replicaهای فقط‌خواندنی (config/db_router.py): هر کدام یک alias با نام replica1، replica2، ...
+  postgres: POSTGRES_REPLICA_HOSTS=host1,host2:5433 (بقیهٔ تنظیمات مثل default)
+  sqlite:   SQLITE_REPLICA_PATHS=/data/replica1.sqlite3,... (مثلاً کپی litestream / rsync)
+در تست‌ها replicaها آینهٔ default هستند (TEST MIRROR).
+
+مقایسه زیر بار نوشتن همزمان: python manage.py benchmark_db_writes
+"""
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+PROFILES = ('sqlite', 'sqlite-wal', 'postgres')
+
+
+def _int(env, name, default):
+    value = env.get(name, '')
+    try:
+        return int(value) if value != '' else default
+    except ValueError:
+        raise ImproperlyConfigured(f'{name} must be an integer, got {value!r}')
+
+
+def _flag(env, name):
+    return env.get(name, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def sqlite_pragmas(env=os.environ):
+    """PRAGMAهای پروفایل sqlite-wal (به ترتیب اجرا)."""
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={_int(env, "SQLITE_BUSY_TIMEOUT_MS", 5000)}',
+        f'PRAGMA mmap_size={_int(env, "SQLITE_MMAP_SIZE", 256 * 1024 * 1024)}',
+    ]
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def database_config(base_dir, env=os.environ):
+    """DATABASES['default'] برای DB_PROFILE فعلی."""
+    profile = env.get('DB_PROFILE', 'sqlite').strip().lower() or 'sqlite'
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(f'DB_PROFILE must be one of {", ".join(PROFILES)}, got {profile!r}')
+
+    if profile == 'postgres':
+        config = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env.get('POSTGRES_DB', 'shipping'),
+            'USER': env.get('POSTGRES_USER', 'shipping'),
+            'PASSWORD': env.get('POSTGRES_PASSWORD', ''),
+            'HOST': env.get('POSTGRES_HOST', 'localhost'),
+            'PORT': env.get('POSTGRES_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+        if env.get('POSTGRES_SSLMODE'):
+            config['OPTIONS']['sslmode'] = env['POSTGRES_SSLMODE']
+        if _flag(env, 'DB_POOL'):
+            # pool خودش اتصال‌ها را نگه می‌دارد؛ Django با pool فقط CONN_MAX_AGE=0 را می‌پذیرد
+            config['CONN_MAX_AGE'] = 0
+            config['OPTIONS']['pool'] = {
+                'min_size': _int(env, 'DB_POOL_MIN_SIZE', 2),
+                'max_size': _int(env, 'DB_POOL_MAX_SIZE', 10),
+                'timeout': _int(env, 'DB_POOL_TIMEOUT', 10),
+            }
+        else:
+            config['CONN_MAX_AGE'] = _int(env, 'DB_CONN_MAX_AGE', 60)
+        return config
+
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('SQLITE_PATH') or base_dir / 'db.sqlite3',
+        'TEST': {
+            'NAME': env.get('SQLITE_TEST_PATH')
+            or os.path.join(tempfile.gettempdir(), f'shinas-test-{os.getpid()}.sqlite3'),
+        },
+    }
+    if profile == 'sqlite-wal':
+        config['OPTIONS'] = {
+            'init_command': '; '.join(sqlite_pragmas(env)),
+            'transaction_mode': 'IMMEDIATE',
+        }
+    return config
+
+
+def replica_configs(default, env=os.environ):
+    """{alias: config} replicaها برای DATABASES (از روی default)؛ بدون متغیر، خالی."""
+    if default['ENGINE'].endswith('postgresql'):
+        targets = []
+        for host in _split(env.get('POSTGRES_REPLICA_HOSTS')):
+            host, _, port = host.partition(':')
+            targets.append({'HOST': host, 'PORT': port or default['PORT']})
+    else:
+        targets = [{'NAME': path} for path in _split(env.get('SQLITE_REPLICA_PATHS'))]
+    return {
+        f'replica{number}': {**default, **target, 'TEST': {'MIRROR': 'default'}}
+        for number, target in enumerate(targets, start=1)
+    }
@@ -0,0 +1,239 @@
+"""
+مسیریابی خواندن به replicaها (DATABASE_REPLICAS) برای اپ‌های bookings و accounts.
+
+جستجو، لیست، منیفست و گزارش‌ها سنگین‌ترین خواندن‌ها هستند و روی همان دیتابیسی که رزروها INSERT
+می‌شوند با آن‌ها رقابت می‌کنند. حالا:
+
+- ReplicaMiddleware برای هر درخواست GET / HEAD / OPTIONS یک replica (چرخشی) انتخاب می‌کند و
+  ReplicaRouter خواندن‌های مدل‌های REPLICA_APPS در همان درخواست را به آن می‌فرستد.
+  یک درخواست همیشه از یک replica می‌خواند (نه هر کوئری از یکی).
+- نوشتن‌ها، درخواست‌های POST/PUT/PATCH/DELETE، کارهای خارج از درخواست (manage.py، سیگنال‌ها در
+  تراکنش) و هر خواندنی داخل transaction.atomic همیشه روی default هستند.
+- read-your-writes: بعد از هر درخواست غیر-GET یک کلاینت، درخواست‌های همان کلاینت تا
+  DATABASE_REPLICA_STICKY_SECONDS ثانیه از default خوانده می‌شوند تا رزروی که همین الان ثبت کرده
+  در لیست/جستجو دیده شود، حتی اگر replica هنوز عقب باشد. کلاینت = هدر Authorization (توکن) یا
+  در نبود آن IP؛ علامت در کش مشترک CACHES[DATABASE_REPLICA_CACHE] نگه داشته می‌شود تا درخواست بعدی
+  روی هر worker دیگری هم آن را ببیند. با replica و کش جدا برای هر پردازه (LocMem) middleware اصلاً بالا
+  نمی‌آید (ImproperlyConfigured؛ config/caches.py).
+- شمارش کوئری به تفکیک alias: query_counts() (جمع از شروع پردازه) و هدر X-DB-Queries روی هر پاسخ
+  (اگر DATABASE_QUERY_COUNT_HEADER، پیش‌فرض DEBUG)، مثلاً X-DB-Queries: default=1, replica1=3.
+  هدر فقط کوئری‌های قبل از شروع پاسخ را دارد؛ کوئری‌های پاسخ stream فقط در query_counts() هستند.
+  شمارنده در یک ContextVar است و یک execute_wrapper دائمی روی هر اتصال هر نخ (سیگنال connection_created)
+  آن را زیاد می‌کند؛ پس کوئری‌های async ORM و sync_to_async هم که در نخ دیگری با اتصال دیگری اجرا می‌شوند
+  شمرده می‌شوند.
+
+ReplicaMiddleware هم sync است و هم async: زیر ASGI درخواست‌های viewهای async (/api/async/) بدون عبور از
+نخ sync رد می‌شوند؛ alias در ContextVar است و به نخ‌های sync_to_async (async ORM) هم می‌رسد.
+
+بدون replica (پیش‌فرض) همه چیز مثل قبل روی default است.
+"""
+import hashlib
+import itertools
+import threading
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from .caches import is_shared
+
+
+REPLICA_APPS = ('bookings', 'accounts')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# alias خواندن درخواست فعلی (None = default)
+_read_alias = ContextVar('db_read_alias', default=None)
+# شمارندهٔ کوئری‌های درخواست فعلی (None = خارج از درخواست)
+_request_counts = ContextVar('db_request_counts', default=None)
+_cycle_lock = threading.Lock()
+_cycle = None
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def _next_replica():
+    global _cycle
+    aliases = replicas()
+    if not aliases:
+        return None
+    with _cycle_lock:
+        if _cycle is None or _cycle[0] != aliases:
+            _cycle = (aliases, itertools.cycle(aliases))
+        return next(_cycle[1])
+
+
+def query_counts():
+    """تعداد کوئری هر alias در درخواست‌های این پردازه (از شروع)."""
+    with _counts_lock:
+        return dict(_counts)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label not in REPLICA_APPS:
+            return None
+        # خواندن داخل تراکنش باید همان چیزی را ببیند که تراکنش نوشته
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicaها کپی default هستند؛ شیء خوانده‌شده از replica به شیء default ربط دارد
+        allowed = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in allowed and obj2._state.db in allowed:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+def _client_key(request):
+    identity = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR') or ''
+    return 'db:sticky:' + hashlib.sha256(identity.encode()).hexdigest()
+
+
+def _sticky_cache_alias():
+    return getattr(settings, 'DATABASE_REPLICA_CACHE', 'default')
+
+
+def _sticky_cache():
+    return caches[_sticky_cache_alias()]
+
+
+def _count_query(execute, sql, params, many, context):
+    request_counts = _request_counts.get()
+    if request_counts is not None:
+        request_counts[context['connection'].alias] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_counter(connection, **kwargs):
+    # اول لیست: execute_wrapper() های موقت دیگر با pop() عضو آخر را برمی‌دارند، نه این را
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+connection_created.connect(_install_counter, dispatch_uid='config.db_router.count_queries')
+
+
+def _install_counters():
+    """اتصال‌های این نخ که قبل از import این ماژول باز شده بودند."""
+    for name in connections:
+        _install_counter(connections[name])
+
+
+def _add_counts(request_counts):
+    with _counts_lock:
+        _counts.update(request_counts)
+
+
+def _stream(content, alias):
+    # پاسخ stream (منیفست CSV) بعد از middleware خوانده می‌شود؛ همان replica و همان شمارش برای بقیهٔ کوئری‌ها
+    request_counts = Counter()
+    tokens = (_read_alias.set(alias), _request_counts.set(request_counts))
+    try:
+        yield from content
+    finally:
+        _add_counts(request_counts)
+        for var, token in zip((_read_alias, _request_counts), tokens):
+            try:
+                var.reset(token)
+            except ValueError:
+                # در context دیگری بسته شد (مثلاً سرور ASGI)
+                var.set(None)
+
+
+class ReplicaMiddleware:
+    """middleware sync و async (زیر ASGI viewهای async بدون پرش به نخ sync از آن رد می‌شوند)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replicas() and _sticky_seconds() and not is_shared(_sticky_cache_alias()):
+            raise ImproperlyConfigured(
+                'DATABASE_REPLICAS needs a cache shared by all workers for read-your-writes '
+                f'(CACHES[{_sticky_cache_alias()!r}] is per-process; see config/caches.py).'
+            )
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _install_counters()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        alias = None
+        if _wants_replica(request) and not (_sticky_seconds() and _sticky_cache().get(_client_key(request))):
+            alias = _next_replica()
+
+        request_counts = Counter()
+        tokens = (_read_alias.set(alias), _request_counts.set(request_counts))
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_counts.reset(tokens[1])
+            _read_alias.reset(tokens[0])
+
+        if _marks_sticky(request):
+            _sticky_cache().set(_client_key(request), 1, timeout=_sticky_seconds())
+        return _finish(response, alias, request_counts)
+
+    async def __acall__(self, request):
+        alias = None
+        if _wants_replica(request) and not (
+            _sticky_seconds() and await _sticky_cache().aget(_client_key(request))
+        ):
+            alias = _next_replica()
+
+        request_counts = Counter()
+        tokens = (_read_alias.set(alias), _request_counts.set(request_counts))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_counts.reset(tokens[1])
+            _read_alias.reset(tokens[0])
+
+        if _marks_sticky(request):
+            await _sticky_cache().aset(_client_key(request), 1, timeout=_sticky_seconds())
+        return _finish(response, alias, request_counts)
+
+
+def _sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+
+
+def _wants_replica(request):
+    return request.method in SAFE_METHODS and bool(replicas())
+
+
+def _marks_sticky(request):
+    return request.method not in SAFE_METHODS and bool(_sticky_seconds()) and bool(replicas())
+
+
+def _finish(response, alias, request_counts):
+    if response.streaming and not response.is_async:
+        response.streaming_content = _stream(response.streaming_content, alias)
+    _add_counts(request_counts)
+    if getattr(settings, 'DATABASE_QUERY_COUNT_HEADER', settings.DEBUG):
+        response['X-DB-Queries'] = ', '.join(
+            f'{name}={count}' for name, count in sorted(request_counts.items())
+        ) or 'none'
+    return response
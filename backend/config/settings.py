@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .caches import cache_config
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,6 +53,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # باید اول باشد تا CORS روی همه درخواست‌ها اعمال شود
     'django.middleware.security.SecurityMiddleware',
+    'config.db_router.ReplicaMiddleware',  # خواندن GETها از replica (اگر تعریف شده باشد)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,13 +84,29 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# پروفایل با DB_PROFILE: sqlite (پیش‌فرض، تنظیمات Django)، sqlite-wal (استقرار) یا postgres — متغیرها در config/database.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
+}
+# replicaهای فقط‌خواندنی (POSTGRES_REPLICA_HOSTS / SQLITE_REPLICA_PATHS) — config/db_router.py
+DATABASES.update(replica_configs(DATABASES['default']))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+# بعد از POST/PUT/PATCH/DELETE یک کلاینت، خواندن‌های همان کلاینت این‌قدر از default (read-your-writes)
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5'))
+# علامت read-your-writes در این کش؛ باید بین workerها مشترک باشد (با locmem و replica خطای شروع)
+DATABASE_REPLICA_CACHE = 'default'
+# هدر X-DB-Queries (تعداد کوئری هر alias) روی پاسخ‌ها
+DATABASE_QUERY_COUNT_HEADER = DEBUG
+
+# ---------- کش ----------
+# کش مشترک بین همهٔ workerها: CACHE_BACKEND=file (پیش‌فرض، یک سرور)، redis (چند سرور) یا locmem — config/caches.py
+CACHES = {
+    'default': cache_config(BASE_DIR),
 }
+# تست‌ها: کش file در یک پوشهٔ موقت تازه برای هر اجرا
+TEST_RUNNER = 'config.test_runner.TestRunner'
 
 
 # Password validation
@@ -106,10 +127,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-# لاگین با ایمیل یا username (برای پنل ادمین و بعداً API)
+# لاگین با ایمیل یا username (برای پنل ادمین و بعداً API)؛ EmailOrUsernameBackend زیرکلاس ModelBackend است
+# و مجوزها را هم می‌دهد، پس ModelBackend جداگانه لازم نیست (رمز اشتباه دو بار هش نمی‌شود)
 AUTHENTICATION_BACKENDS = [
     'apps.accounts.backends.EmailOrUsernameBackend',
-    'django.contrib.auth.backends.ModelBackend',
+]
+
+# هش رمز: PBKDF2 با تعداد تکرار قابل تنظیم (apps/accounts/hashers.py). ۰ = پیش‌فرض Django.
+# با عوض کردن عدد، رمز هر کاربر در لاگین بعدی خودکار با هزینهٔ جدید دوباره هش می‌شود.
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', '0'))
+PASSWORD_HASHERS = [
+    'apps.accounts.hashers.TunablePBKDF2PasswordHasher',
+    # برای خواندن هش‌های قدیمی‌تر (با لاگین بعدی به هشر اول ارتقا پیدا می‌کنند)
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
 ]
 
 
@@ -139,15 +172,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:4200',
 ]
+# هدرهای صفحه‌بندی لیست کاربران (GET /api/auth/users/) که فرانت باید بخواند
+CORS_EXPOSE_HEADERS = ['Link', 'X-Next-Cursor']
 
 # ---------- REST Framework و JWT ----------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # همان خروجی JSONRenderer؛ با orjson سریع‌تر — apps/bookings/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.bookings.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 from datetime import timedelta
@@ -155,3 +195,104 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
+
+# ---------- شمارهٔ رزرو (PNR) ----------
+# کلاس مولد reference؛ پیش‌فرض: node پردازه + شمارنده + رقم کنترل (apps/bookings/references.py)
+BOOKING_REFERENCE_GENERATOR = 'apps.bookings.references.NodeCounterGenerator'
+# اختیاری: حرف/عدد متفاوت برای هر سرور (مثلاً A، B)؛ بدون آن node هر پردازه بیت تصادفی دارد (references.py)
+BOOKING_REFERENCE_NODE = os.environ.get('BOOKING_REFERENCE_NODE', '')
+
+# ---------- رسید PDF ----------
+# لوگو و فونت فقط یک بار در هر پردازه بارگذاری می‌شوند (apps/bookings/receipts.py)
+RECEIPT_LOGO_PATH = BASE_DIR.parent / 'public' / 'logo-shinas.png'
+# فونت TTF با حروف فارسی/عربی (اختیاری)؛ خالی = Helvetica
+RECEIPT_FONT_PATH = os.environ.get('RECEIPT_FONT_PATH', '')
+# رسید دسته‌ای ZIP: بیشتر از این تعداد در چند پردازه رندر می‌شود
+RECEIPT_PARALLEL_THRESHOLD = 200
+RECEIPT_WORKERS = int(os.environ.get('RECEIPT_WORKERS', '0'))  # 0 = تعداد هسته‌های CPU
+# کش PDF رسیدها (کلید = هش محتوای رسید). برای چند سرور می‌توانی از
+# 'apps.bookings.receipt_cache.DjangoCacheReceiptCache' با OPTIONS {'alias': 'default'} استفاده کنی.
+RECEIPT_CACHE = {
+    'BACKEND': 'apps.bookings.receipt_cache.DiskReceiptCache',
+    'OPTIONS': {
+        'location': BASE_DIR / 'var' / 'receipt-cache',
+        'max_bytes': 256 * 1024 * 1024,
+    },
+}
+
+# ---------- چاپگرهای Zebra (ZPL روی پورت 9100) ----------
+# برای تست محلی: python manage.py zpl_sink
+ZEBRA_PRINTERS = {
+    'default': {
+        'host': os.environ.get('ZEBRA_PRINTER_HOST', '127.0.0.1'),
+        'port': int(os.environ.get('ZEBRA_PRINTER_PORT', '9100')),
+        'timeout': 5,
+    },
+}
+
+# ---------- دادهٔ مرجع (بندرها، شرکت‌های حمل) ----------
+# کش مشترک نسخه و snapshot (apps/bookings/reference_data.py)؛ با چند سرور CACHE_BACKEND=redis لازم است
+REFERENCE_DATA_CACHE = 'default'
+# True: رزرو با مبدأ/مقصدی که در جدول بندرها نیست رد می‌شود (اگر حداقل یک بندر تعریف شده باشد)
+BOOKING_REQUIRE_KNOWN_PORTS = False
+
+# ---------- Idempotency-Key برای POST رزرو (apps/bookings/idempotency.py) ----------
+# عمر کلید و پاسخ ذخیره‌شده (ثانیه)؛ پاک کردن منقضی‌ها: python manage.py purge_idempotency_keys
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+# درخواست همزمان با همان کلید حداکثر این‌قدر منتظر نتیجهٔ اولی می‌ماند، بعد 409
+IDEMPOTENCY_WAIT_SECONDS = 10
+# کلید ناتمام قدیمی‌تر از این (پردازه وسط کار مرده) دوباره آزاد می‌شود
+IDEMPOTENCY_LOCK_TIMEOUT = 120
+
+# ---------- صف کار پس‌زمینه (apps/bookings/jobs.py و tasks.py؛ اجرا: python manage.py run_jobs) ----------
+# کارهای بعد از ثبت بار بدون مسافر: ساخت PDF رسید در کش و چاپ خودکار لیبل روی این چاپگر (نام در ZEBRA_PRINTERS)
+BOOKING_PRERENDER_RECEIPTS = True
+BOOKING_AUTO_PRINTER = os.environ.get('BOOKING_AUTO_PRINTER', '')  # خالی = بدون چاپ خودکار
+JOB_MAX_ATTEMPTS = 5
+# تلاش دوباره: BASE × 2^(تلاش-1) ثانیه، حداکثر MAX
+JOB_RETRY_BASE_SECONDS = 5
+JOB_RETRY_MAX_SECONDS = 3600
+# کار RUNNING قدیمی‌تر از این (worker مرده) دوباره به صف برمی‌گردد
+JOB_LOCK_TIMEOUT = 600
+# کارهای انجام‌شده این‌قدر نگه داشته می‌شوند؛ پاک کردن: python manage.py run_jobs --purge
+JOB_KEEP_DONE_SECONDS = 7 * 24 * 3600
+
+# ---------- SMS (apps/bookings/sms.py و sms_providers.py؛ ارسال: python manage.py send_sms) ----------
+# اپراتور هنوز انتخاب نشده؛ پیش‌فرض درگاه محلی python manage.py sms_gateway روی پورت 9110
+SMS_PROVIDER = {
+    'BACKEND': 'apps.bookings.sms_providers.HttpSmsProvider',
+    'OPTIONS': {
+        'url': os.environ.get('SMS_GATEWAY_URL', 'http://127.0.0.1:9110/v1/messages/bulk'),
+        'api_key': os.environ.get('SMS_API_KEY', ''),
+        'sender': 'ShinasPort',
+        'timeout': 10,
+        'max_batch': 100,  # پیام در هر درخواست گروهی
+        'pool_size': 4,    # اتصال keep-alive نگه‌داشته‌شده
+    },
+}
+# تأیید ثبت بار بدون مسافر به Booking.phone_number
+SMS_BOOKING_NOTIFICATIONS = True
+SMS_PREFIX = 'Shinas Port: '
+SMS_MAX_LENGTH = 459  # سه تکهٔ GSM
+# پیام‌های یک گیرنده این‌قدر صبر می‌کنند تا در یک SMS یکی شوند
+SMS_COALESCE_SECONDS = 2
+# پیام بدون رزرو با همان متن برای همان گیرنده فقط داخل این پنجره تکراری حساب می‌شود
+SMS_DEDUPE_WINDOW_SECONDS = 3600
+# سقف نرخ اپراتور (SMS در ثانیه و حداکثر انفجاری)؛ برای هر پردازهٔ send_sms
+SMS_RATE_PER_SECOND = 20
+SMS_RATE_BURST = 100
+SMS_MAX_ATTEMPTS = 5
+
+# ---------- viewهای async (/api/async/bookings/، apps/bookings/async_views.py) ----------
+# استخر نخ کارهای بلاک‌کننده (کش رسید روی دیسک و ...)؛ بیشتر از QUEUE کار در صف → 503 (apps/bookings/offload.py)
+ASYNC_BLOCKING_WORKERS = int(os.environ.get('ASYNC_BLOCKING_WORKERS', '8'))
+ASYNC_BLOCKING_QUEUE = int(os.environ.get('ASYNC_BLOCKING_QUEUE', '200'))
+
+# ---------- کش احراز هویت JWT (apps/accounts/token_cache.py) ----------
+# توکن بررسی‌شده + snapshot کاربر/پروفایل در حافظهٔ پردازه؛ ALIAS = کش مشترک شمارهٔ نسخهٔ کاربرها (ابطال بین پردازه‌ها)
+# اگر CACHES[ALIAS] بین پردازه‌ها مشترک نباشد (locmem) کش توکن خاموش است
+JWT_AUTH_CACHE = {
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,  # ثانیه؛ هیچ‌وقت بیشتر از exp خود توکن
+}
@@ -0,0 +1,32 @@
+"""
+اجرای تست‌ها (TEST_RUNNER): کش file هر اجرا در یک پوشهٔ موقت تازه.
+
+کش file (config/caches.py) روی دیسک می‌ماند؛ بدون این، نسخه‌ها و snapshotهای اجرای قبلی (یا سرور توسعه
+روی همان پوشه) به دیتابیس تست تازه نشت می‌کنند. پوشهٔ موقت همچنان بین پردازه‌ها مشترک است، پس تست‌های
+چند-پردازه‌ای (fork) رفتار واقعی چند worker را می‌بینند.
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp(prefix='shinas-test-cache-')
+        caches = {}
+        for alias, config in settings.CACHES.items():
+            if config['BACKEND'].endswith('FileBasedCache'):
+                config = {**config, 'LOCATION': f'{self._cache_dir}/{alias}'}
+            caches[alias] = config
+        self._cache_override = override_settings(CACHES=caches)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
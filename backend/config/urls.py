@@ -20,7 +20,10 @@ from django.urls import path, include
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/bookings/", include("apps.bookings.urls")),
+    path("api/async/bookings/", include("apps.bookings.async_urls")),
     path("api/ports/", include("apps.bookings.ports_urls")),
     path("api/carriers/", include("apps.bookings.carriers_urls")),
+    path("api/voyages/", include("apps.bookings.voyages_urls")),
+    path("api/reports/", include("apps.bookings.reports_urls")),
     path("api/auth/", include("apps.accounts.urls")),
 ]
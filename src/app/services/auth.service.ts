@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
-import { BehaviorSubject, Observable, of } from 'rxjs';
-import { catchError, map, tap } from 'rxjs/operators';
+import { BehaviorSubject, EMPTY, Observable, of } from 'rxjs';
+import { catchError, expand, map, reduce, tap } from 'rxjs/operators';
 import {
   User,
   CreateUserRequest,
@@ -150,8 +150,20 @@ export class AuthService {
     this.setStoredUser(null);
   }
 
+  /** همهٔ کاربران؛ سرور صفحه‌به‌صفحه می‌دهد و تا وقتی هدر X-Next-Cursor هست صفحهٔ بعد خوانده می‌شود. */
   listUsers(): Observable<User[]> {
-    return this.http.get<User[]>(`${this.apiUrl}/users/`);
+    const page = (after?: string) =>
+      this.http.get<User[]>(`${this.apiUrl}/users/`, {
+        observe: 'response',
+        params: after ? { after } : {},
+      });
+    return page().pipe(
+      expand((res) => {
+        const next = res.headers.get('X-Next-Cursor');
+        return next ? page(next) : EMPTY;
+      }),
+      reduce((users, res) => users.concat(res.body ?? []), [] as User[])
+    );
   }
 
   updateUser(id: string | number, req: UpdateUserRequest): Observable<{ success: boolean; user?: User; error?: string }> {